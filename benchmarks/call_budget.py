@@ -0,0 +1,149 @@
+"""
+DynamoDB call budget per WebSocket route
+
+Plays a scripted room (two players connect, create, join, start, bid
+through the auction, play the first trick, resync, disconnect) through the unchanged handlers against the devserver's
+in-memory DynamoDB and reports, per route, what the request cost: round
+trips, scans, items examined and the RCU/WCU DynamoDB would bill
+(devserver/capacity.py).
+
+Each route is checked against BUDGETS; the script exits non-zero when one
+is exceeded, and tests/test_call_budgets.py runs the same check. The
+budgets describe the handlers as they are, so a regression shows up as an
+overrun and an improvement is locked in by lowering its budget.
+
+Usage:
+    python benchmarks/call_budget.py [--players 2] [--json results.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from devserver.server import ENVIRONMENT, DevServer
+from lambdas.session_tokens import issue_token
+
+# Most a single request to the route may cost, in the default room-sort-key
+# layout. Fan-out reads the room's connections once (connections.in_room),
+# a filtered scan in this layout and a ROOM_INDEX query in the connection-id
+# one. createRoom and joinRoom move the caller's connection by key and write
+# it with the room (one batch / one transaction, lambdas/unit_of_work.py).
+# $disconnect reads the connection's records, the room and the connections
+# left in it, then deletes the records and updates the room in one commit:
+# four round trips in either layout. Its scan is the room-sort-key layout's
+# in_room lookup, which has no index on currentRoomId; the connection-id
+# layout queries ROOM_INDEX instead (tests/test_call_budgets.py).
+BUDGETS = {
+    '$connect': {'roundTrips': 1, 'scans': 0},
+    'createRoom': {'roundTrips': 2, 'scans': 0},
+    'joinRoom': {'roundTrips': 4, 'scans': 1},
+    'startRoom': {'roundTrips': 3, 'scans': 1},
+    'makeBid': {'roundTrips': 3, 'scans': 1},
+    'playCard': {'roundTrips': 3, 'scans': 1},
+    'resync': {'roundTrips': 1, 'scans': 0},
+    '$disconnect': {'roundTrips': 4, 'scans': 1}
+}
+
+def over_budget(results):
+    """
+    (route, measure, used, allowed) for every budget a route exceeded
+    """
+    return [(route, measure, results[route][measure], allowed)
+            for route, budget in BUDGETS.items() if route in results
+            for measure, allowed in budget.items() if results[route][measure] > allowed]
+
+def measure(players=2):
+    """
+    Ledger summary of the costliest request to each route in one scripted room
+
+    Returns:
+        {route: summary} with the keys of capacity.Ledger.summary()
+    """
+    for name, value in ENVIRONMENT.items():
+        os.environ[name] = value
+    os.environ.setdefault('SESSION_SECRET', 'call-budget')
+    server = DevServer()
+    server.install()
+    ledger = server.dynamodb.ledger
+    results = {}
+
+    def request(route, connection_id, **fields):
+        ledger.reset()
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = server.dispatch(route, connection_id, **fields)
+        if not 200 <= response.get('statusCode', 500) < 300:
+            raise RuntimeError(f'{route} failed: {response.get("body")}')
+        summary = ledger.summary()
+        if route not in results or summary['roundTrips'] > results[route]['roundTrips']:
+            results[route] = summary
+        return json.loads(response.get('body') or '{}')
+
+    def send(route, connection_id, token, **body):
+        return request(route, connection_id, body=json.dumps(dict(body, action=route, token=token)))
+
+    users = [f'player-{i}' for i in range(players)]
+    tokens = {user: issue_token(user, user)['token'] for user in users}
+    for user in users:
+        request('$connect', f'conn-{user}', queryStringParameters={'token': tokens[user]})
+
+    owner = users[0]
+    room = send('createRoom', f'conn-{owner}', tokens[owner],
+                data={'ownerId': owner, 'playerName': owner, 'roomName': 'Budget'})['room']
+    for user in users[1:]:
+        send('joinRoom', f'conn-{user}', tokens[user], roomId=room['roomId'], userId=user)
+    started = send('startRoom', f'conn-{owner}', tokens[owner], roomId=room['roomId'], userId=owner)
+
+    def act(route, user, **body):
+        # Robots (the seats nobody joined) act through the owner's client
+        connection_id = f'conn-{user}' if user in tokens else f'conn-{owner}'
+        token = tokens[user] if user in tokens else issue_token(user, user)['token']
+        reply = send(route, connection_id, token, roomId=room['roomId'], userId=user, **body)
+        return reply['nextTurn'], reply['seq']
+
+    # The dealer is the owner's seat: the owner opens 1C and declares it
+    turn, seq = owner, started['seq']
+    for call in ('1C', 'pass', 'pass', 'pass'):
+        turn, seq = act('makeBid', turn, bid=call, lastSeq=seq)
+    # The first trick: the opening lead tables dummy, the fourth card closes it
+    rooms = server.dynamodb.Table('GameRooms')
+    for _ in range(4):
+        game_data = rooms.items[(room['roomId'],)]['gameData']
+        hand = game_data['hands'][game_data['turnSeat']]
+        led = game_data['currentTrick'][0]['card'][1] if game_data['currentTrick'] else None
+        card = next((held for held in hand if held[1] == led), hand[0])
+        turn, seq = act('playCard', turn, card=card, lastSeq=seq)
+    send('resync', f'conn-{users[-1]}', tokens[users[-1]], roomId=room['roomId'], userId=users[-1],
+         lastSeq=seq - 1)
+    for user in users:
+        request('$disconnect', f'conn-{user}')
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=2, choices=range(1, 5), help='human players in the room')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = measure(args.players)
+    print(f"{'route':<14}{'trips':>6}{'scans':>6}{'scanned':>9}{'rcu':>7}{'wcu':>7}  operations")
+    for route, summary in results.items():
+        operations = ', '.join(f'{name} x{count}' for name, count in summary['byOperation'].items())
+        print(f"{route:<14}{summary['roundTrips']:>6}{summary['scans']:>6}{summary['itemsScanned']:>9}"
+              f"{summary['rcu']:>7.1f}{summary['wcu']:>7.1f}  {operations}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    overruns = over_budget(results) if args.players == 2 else []
+    for route, name, used, allowed in overruns:
+        print(f'{route}: {name} {used} exceeds budget {allowed}')
+    sys.exit(1 if overruns else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Cold-start benchmark: per-route WebSocket functions vs the single router
+
+Every sample runs in a fresh interpreter so module caches start empty, the
+way a new Lambda container does.
+
+- per-route: import of one route's handler module, as its own function's
+  cold start pays it
+- router cold: import of the router plus the first dispatch to the route
+- router warm: loading the route in a router container that has already
+  served every other route (the shared modules are already imported)
+
+Usage:
+    python benchmarks/cold_start.py [--runs 5] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from lambdas.websocket_router import ROUTES
+
+ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-west-2',
+    'ROOM_TABLE': 'GameRooms',
+    'USER_TABLE': 'UsersTable',
+    'WEBSOCKET_CONNECTIONS_TABLE': 'WebSocketConnections'
+}
+
+PER_ROUTE_SCRIPT = """
+import importlib, time
+started = time.perf_counter()
+importlib.import_module({module!r}).lambda_handler
+print((time.perf_counter() - started) * 1000)
+"""
+
+ROUTER_COLD_SCRIPT = """
+import time
+started = time.perf_counter()
+from lambdas.websocket_router import resolve_route
+resolve_route({route!r})
+print((time.perf_counter() - started) * 1000)
+"""
+
+ROUTER_WARM_SCRIPT = """
+import time
+from lambdas.websocket_router import resolve_route, ROUTES
+for other in ROUTES:
+    if other != {route!r}:
+        resolve_route(other)
+started = time.perf_counter()
+resolve_route({route!r})
+print((time.perf_counter() - started) * 1000)
+"""
+
+def _sample(script):
+    env = dict(os.environ, **ENVIRONMENT)
+    output = subprocess.run(
+        [sys.executable, '-c', script], cwd=REPO_ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+def _median(script, runs):
+    return round(statistics.median(_sample(script) for _ in range(runs)), 2)
+
+def run(runs):
+    """
+    Measure every route
+
+    Returns:
+        {route: {'perRouteMs', 'routerColdMs', 'routerWarmMs'}}
+    """
+    results = {}
+    for route, module in ROUTES.items():
+        results[route] = {
+            'perRouteMs': _median(PER_ROUTE_SCRIPT.format(module=module), runs),
+            'routerColdMs': _median(ROUTER_COLD_SCRIPT.format(route=route), runs),
+            'routerWarmMs': _median(ROUTER_WARM_SCRIPT.format(route=route), runs)
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per measurement')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    print(f"{'route':<14}{'per-route ms':>14}{'router cold ms':>16}{'router warm ms':>16}")
+    for route, timing in results.items():
+        print(f"{route:<14}{timing['perRouteMs']:>14.2f}{timing['routerColdMs']:>16.2f}{timing['routerWarmMs']:>16.2f}")
+    per_route_total = sum(timing['perRouteMs'] for timing in results.values())
+    router_total = max(timing['routerColdMs'] for timing in results.values()) + \
+        sum(timing['routerWarmMs'] for timing in results.values())
+    print(f"\nOne cold container per route: {per_route_total:.2f} ms of imports")
+    print(f"One shared router container (upper bound): {router_total:.2f} ms of imports")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Import-time and first-invocation benchmark for every Lambda handler
+
+Each handler is measured in fresh interpreters, the way a new Lambda
+container starts:
+
+- import ms: cumulative import time of the handler module (python -X importtime)
+- first call ms: first invocation with an empty event, which is rejected
+  before any AWS call, so it shows work deferred out of the import
+- client init ms: creating the shared DynamoDB resource and a Table on the
+  first request that does reach AWS
+- heaviest imports: the top-level dependencies with the largest cumulative time
+
+Usage:
+    python benchmarks/import_time.py [--runs 3] [--top 3] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HANDLERS = [
+    'account_create', 'account_login', 'room_create', 'room_join', 'room_start',
+    'room_state', 'room_move', 'ai_bid', 'ai_play', 'ai_double_dummy', 'connection_count',
+    'websocket_connect', 'websocket_disconnect', 'websocket_create_room', 'websocket_join_room',
+    'websocket_start_room', 'websocket_make_bid', 'websocket_play_card', 'websocket_resync',
+    'websocket_router'
+]
+
+ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-west-2',
+    'ROOM_TABLE': 'GameRooms',
+    'USER_TABLE': 'UsersTable',
+    'WEBSOCKET_CONNECTIONS_TABLE': 'WebSocketConnections'
+}
+
+INVOKE_SCRIPT = """
+import contextlib, io, json, time
+import lambdas.{name} as module
+entry = getattr(module, 'lambda_handler', None) or module.handler
+started = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    entry({{}}, None)
+first_call = (time.perf_counter() - started) * 1000
+from lambdas import aws_clients
+started = time.perf_counter()
+aws_clients.table('GameRooms')
+client_init = (time.perf_counter() - started) * 1000
+print(json.dumps({{'firstCallMs': first_call, 'clientInitMs': client_init}}))
+"""
+
+def _run(args):
+    env = dict(os.environ, **ENVIRONMENT)
+    return subprocess.run([sys.executable] + args, cwd=REPO_ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+def _parse_importtime(stderr, module):
+    """
+    Total cumulative import time of module and its heaviest top-level imports
+
+    Lines look like 'import time:   self [us] | cumulative | imported package',
+    with nested imports indented under the name.
+    """
+    total = 0.0
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        cumulative_ms = int(cumulative) / 1000
+        if name.strip() == module:
+            total = cumulative_ms
+        # One level below the handler module (nested names are indented further)
+        elif len(name) - len(name.lstrip()) == 3:
+            top_level.append((name.strip(), cumulative_ms))
+    return total, top_level
+
+def measure(name, runs, top):
+    module = f'lambdas.{name}'
+    imports, first_calls, client_inits = [], [], []
+    heaviest = {}
+    for _ in range(runs):
+        total, top_level = _parse_importtime(_run(['-X', 'importtime', '-c', f'import {module}']).stderr, module)
+        imports.append(total)
+        for dependency, cumulative_ms in top_level:
+            heaviest[dependency] = max(heaviest.get(dependency, 0.0), cumulative_ms)
+        timing = json.loads(_run(['-c', INVOKE_SCRIPT.format(name=name)]).stdout.strip().splitlines()[-1])
+        first_calls.append(timing['firstCallMs'])
+        client_inits.append(timing['clientInitMs'])
+    return {
+        'importMs': round(statistics.median(imports), 2),
+        'firstCallMs': round(statistics.median(first_calls), 2),
+        'clientInitMs': round(statistics.median(client_inits), 2),
+        'heaviestImports': [
+            {'module': dependency, 'cumulativeMs': round(cumulative_ms, 2)}
+            for dependency, cumulative_ms in sorted(heaviest.items(), key=lambda item: -item[1])[:top]
+        ]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters per handler')
+    parser.add_argument('--top', type=int, default=3, help='heaviest imports to list per handler')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'handler':<24}{'import ms':>11}{'first call ms':>15}{'client init ms':>16}  heaviest imports")
+    for name in HANDLERS:
+        result = measure(name, args.runs, args.top)
+        results[name] = result
+        heaviest = ', '.join(f"{entry['module']} {entry['cumulativeMs']:.1f}" for entry in result['heaviestImports'])
+        print(f"{name:<24}{result['importMs']:>11.2f}{result['firstCallMs']:>15.2f}{result['clientInitMs']:>16.2f}  {heaviest}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Password hashing cost benchmark
+
+For each bcrypt cost factor (and argon2 with --argon2, which needs
+argon2-cffi) this measures, through lambdas.password_policy exactly as
+account_create and account_login use it:
+
+- hashes/sec: sequential hashes on one core, i.e. signups one warm
+  container can absorb per second
+- login p50/p99 ms: password verification plus the simulated user lookup
+  (--db-ms), the latency a login request spends before its response
+
+With --slo-ms the highest bcrypt cost whose login p99 fits is reported.
+Run it on the Lambda memory size you deploy with; bcrypt is CPU bound and
+Lambda CPU scales with memory.
+
+Usage:
+    python benchmarks/password_hashing.py [--rounds 10 11 12 13] [--samples 20]
+        [--db-ms 8] [--slo-ms 300] [--argon2] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from lambdas import password_policy
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def measure(settings, samples, db_ms):
+    """
+    Hash throughput and login latency under one policy
+
+    Returns:
+        {'hashesPerSec', 'loginP50Ms', 'loginP99Ms'}
+    """
+    os.environ.update(settings)
+    password_policy.reset()
+    # Build the context and load the backend outside the timed loop
+    password_policy.hash_password('warm-up')
+
+    started = time.perf_counter()
+    hashes = [password_policy.hash_password(f'password-{i}') for i in range(samples)]
+    hashes_per_sec = samples / (time.perf_counter() - started)
+
+    logins = []
+    for i, password_hash in enumerate(hashes):
+        started = time.perf_counter()
+        time.sleep(db_ms / 1000.0)
+        matches, _ = password_policy.verify_password(f'password-{i}', password_hash)
+        logins.append((time.perf_counter() - started) * 1000)
+        assert matches
+    return {
+        'hashesPerSec': round(hashes_per_sec, 2),
+        'loginP50Ms': round(statistics.median(logins), 2),
+        'loginP99Ms': round(_percentile(logins, 0.99), 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 11, 12, 13], help='bcrypt cost factors')
+    parser.add_argument('--samples', type=int, default=20, help='hashes and logins per policy')
+    parser.add_argument('--db-ms', type=float, default=0.0, help='simulated user lookup latency per login')
+    parser.add_argument('--slo-ms', type=float, help='login p99 target used to recommend a cost')
+    parser.add_argument('--argon2', action='store_true', help='also measure argon2 at the default memory cost')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    policies = [(f'bcrypt-{rounds}', {'PASSWORD_SCHEME': 'bcrypt', 'BCRYPT_ROUNDS': str(rounds)})
+                for rounds in args.rounds]
+    if args.argon2:
+        policies.append(('argon2', {'PASSWORD_SCHEME': 'argon2'}))
+
+    results = {}
+    print(f"{'policy':<12}{'hashes/sec':>12}{'login p50 ms':>14}{'login p99 ms':>14}")
+    for name, settings in policies:
+        result = measure(settings, args.samples, args.db_ms)
+        results[name] = result
+        print(f"{name:<12}{result['hashesPerSec']:>12.2f}{result['loginP50Ms']:>14.2f}{result['loginP99Ms']:>14.2f}")
+
+    if args.slo_ms is not None:
+        fitting = [rounds for rounds in args.rounds if results[f'bcrypt-{rounds}']['loginP99Ms'] <= args.slo_ms]
+        if fitting:
+            print(f"\nHighest bcrypt cost within a {args.slo_ms:g} ms login p99: BCRYPT_ROUNDS={max(fitting)}")
+        else:
+            print(f"\nNo measured bcrypt cost meets a {args.slo_ms:g} ms login p99")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,501 @@
+"""
+Handler and engine benchmark suite with regression baselines
+
+Times every handler entry point on representative rooms (an empty room, a
+room mid-auction, a room late in the play) and the bridge engine's hot
+paths (trick resolution, bid validation, dealing), then compares each
+median against a stored baseline.
+
+Handlers run unchanged against the devserver's in-memory DynamoDB with a
+post_to_connection stub, so a case measures the handler's own work and
+not the network. Password hashing runs at a fixed low bcrypt cost
+(BCRYPT_ROUNDS), so the account cases track the handlers rather than the
+deliberately slow hash, and do not move with the configured cost. The tables are reseeded before every round, outside the
+timed call, so every round sees the same room. Handler logging is
+discarded.
+
+Each case runs a few warm-up calls, then --rounds timed rounds; engine
+cases repeat their call many times per round and report per call. A case
+regresses when its median exceeds the baseline median by more than
+--threshold (a fraction). Baselines are machine specific: save them with
+--save on the machine that runs the comparison.
+
+Usage:
+    python benchmarks/suite.py [--filter makeBid] [--rounds 30]
+        [--baseline benchmarks/baselines.json] [--threshold 0.5] [--save]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from devserver.memory_table import MemoryDynamoDB
+from devserver.server import ENVIRONMENT, TABLE_KEYS
+from lambdas import aws_clients, bridge_engine, password_policy
+from lambdas.session_tokens import issue_token
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+DEFAULT_THRESHOLD = 0.5
+WARMUP_CALLS = 3
+SEATS = ['N', 'E', 'S', 'W']
+PLAYERS = {seat: f'bench-{seat}' for seat in SEATS}
+ROOM_ID = 'bench-room'
+BCRYPT_ROUNDS = '4'
+ACCOUNT = {'username': 'bench-account', 'password': 'benchmark-password'}
+# Double dummy table for the par case
+DD_TABLE = {
+    'N': {'C': 8, 'D': 8, 'H': 4, 'S': 10, 'NT': 7},
+    'S': {'C': 8, 'D': 8, 'H': 4, 'S': 10, 'NT': 7},
+    'E': {'C': 5, 'D': 5, 'H': 9, 'S': 3, 'NT': 5},
+    'W': {'C': 5, 'D': 5, 'H': 9, 'S': 3, 'NT': 5}
+}
+
+class BenchmarkError(Exception):
+    pass
+
+class _Discard:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+class _ManagementApi:
+    def post_to_connection(self, ConnectionId: str, Data: Any) -> Dict[str, Any]:
+        return {}
+
+# name -> (setup returning the callable to time, calls per round)
+CASES: Dict[str, Tuple[Callable[[], Callable[[], Any]], int]] = {}
+
+def case(name: str, calls: int = 1):
+    def register(setup):
+        CASES[name] = (setup, calls)
+        return setup
+    return register
+
+# Rooms
+
+def empty_room() -> Dict[str, Any]:
+    """
+    A waiting room with all four players seated
+    """
+    return {
+        'roomId': ROOM_ID,
+        'ownerId': PLAYERS['N'],
+        'playerName': PLAYERS['N'],
+        'roomName': 'Benchmark',
+        'isPrivate': False,
+        'seats': dict(PLAYERS),
+        'state': 'waiting',
+        'gameData': {'currentPhase': 'waiting', 'turn': PLAYERS['N'], 'bids': [],
+                     'hands': {seat: [] for seat in SEATS}, 'tricks': []},
+        'seq': 0
+    }
+
+def _started_room() -> Dict[str, Any]:
+    from lambdas.room_events import record_events
+    room = empty_room()
+    events, _ = bridge_engine.start_game(room, random.Random(42))
+    record_events(room, events)
+    return room
+
+def _bid(room: Dict[str, Any], call: str) -> None:
+    from lambdas.room_events import record_events
+    _, events = bridge_engine.apply_bid(room, room['gameData']['turn'], call, 0)
+    record_events(room, events)
+
+def legal_card(room: Dict[str, Any]) -> str:
+    """
+    First card the seat on turn may play
+    """
+    game_data = room['gameData']
+    hand = game_data['hands'][game_data['turnSeat']]
+    trick = game_data.get('currentTrick') or []
+    if trick:
+        following = [card for card in hand if card[1] == trick[0]['card'][1]]
+        if following:
+            return following[0]
+    return hand[0]
+
+def mid_auction_room() -> Dict[str, Any]:
+    """
+    A competitive auction six calls in
+    """
+    room = _started_room()
+    for call in ['1C', '1H', '1S', '2H', '2S', 'pass']:
+        _bid(room, call)
+    return room
+
+def late_play_room() -> Dict[str, Any]:
+    """
+    A 1NT contract with eleven tricks played and the twelfth led
+    """
+    from lambdas.room_events import record_events
+    room = _started_room()
+    for call in ['1NT', 'pass', 'pass', 'pass']:
+        _bid(room, call)
+    for _ in range(11 * 4 + 1):
+        _, events = bridge_engine.apply_play(room, room['gameData']['turn'], legal_card(room), 0)
+        record_events(room, events)
+    return room
+
+# Handler plumbing
+
+def seed(room: Optional[Dict[str, Any]], users: Optional[List[Dict[str, Any]]] = None) -> None:
+    """
+    Fresh in-memory tables holding the room, a live connection per player
+    and any user accounts
+    """
+    # Key the tables by whatever names the environment gives them
+    dynamodb = MemoryDynamoDB({os.environ[variable]: keys for variable, keys in TABLE_KEYS.items()})
+    snapshot = {os.environ['WEBSOCKET_CONNECTIONS_TABLE']: [
+        {'connectionId': f'conn-{user}', 'currentRoomId': ROOM_ID if room else 'not-joined', 'status': 'connected',
+         'userId': user, 'userName': user, 'connectedAt': 0, 'lastActivity': 0}
+        for user in PLAYERS.values()]}
+    if room:
+        snapshot[os.environ['ROOM_TABLE']] = [room]
+    if users:
+        snapshot[os.environ['USER_TABLE']] = users
+    dynamodb.restore(snapshot)
+    aws_clients.reset()
+    aws_clients.register_resource('dynamodb', dynamodb)
+    aws_clients.register_client('apigatewaymanagementapi', _ManagementApi(), os.environ['WEBSOCKET_ENDPOINT'])
+
+def checked(entry: Callable[[Dict[str, Any], Any], Dict[str, Any]], event: Dict[str, Any]) -> Callable[[], Any]:
+    """
+    The handler call to time; a non-2xx response fails the case
+    """
+    def call():
+        response = entry(event, None)
+        if not 200 <= response.get('statusCode', 500) < 300:
+            raise BenchmarkError(f"status {response.get('statusCode')}: {response.get('body')}")
+        return response
+    return call
+
+def token(user: str) -> str:
+    return issue_token(user, user)['token']
+
+def ws_event(route: str, user: Optional[str], body: Optional[Dict[str, Any]] = None,
+             **fields: Any) -> Dict[str, Any]:
+    event = dict(fields, requestContext={'connectionId': f'conn-{user}', 'routeKey': route,
+                                         'requestTimeEpoch': int(time.time() * 1000)})
+    if body is not None:
+        event['body'] = json.dumps(dict(body, action=route))
+    return event
+
+def rest_event(method: str, user: Optional[str], body: Optional[Dict[str, Any]] = None,
+               **fields: Any) -> Dict[str, Any]:
+    event = dict(fields, httpMethod=method, headers={'Authorization': f'Bearer {token(user)}'} if user else {})
+    if body is not None:
+        event['body'] = json.dumps(body)
+    return event
+
+def _action(room: Dict[str, Any], route: str) -> Tuple[str, Dict[str, Any]]:
+    user = room['gameData']['turn']
+    move = {'bid': 'pass'} if route == 'makeBid' else {'card': legal_card(room)}
+    return user, dict(move, roomId=ROOM_ID, userId=user, token=token(user), lastSeq=int(room['seq']))
+
+# WebSocket routes
+
+@case('ws.connect')
+def ws_connect():
+    from lambdas import websocket_connect
+    seed(None)
+    return checked(websocket_connect.lambda_handler,
+                   ws_event('$connect', 'bench-X', queryStringParameters={'token': token('bench-X')}))
+
+@case('ws.disconnect')
+def ws_disconnect():
+    from lambdas import websocket_disconnect
+    seed(empty_room())
+    return checked(websocket_disconnect.lambda_handler, ws_event('$disconnect', PLAYERS['E']))
+
+@case('ws.createRoom')
+def ws_create_room():
+    from lambdas import websocket_create_room
+    seed(None)
+    owner = PLAYERS['N']
+    return checked(websocket_create_room.lambda_handler, ws_event('createRoom', owner, {
+        'token': token(owner), 'data': {'ownerId': owner, 'playerName': owner, 'roomName': 'Benchmark'}}))
+
+@case('ws.joinRoom.emptyRoom')
+def ws_join_room():
+    from lambdas import websocket_join_room
+    room = empty_room()
+    room['seats']['W'] = ''
+    seed(room)
+    user = PLAYERS['W']
+    return checked(websocket_join_room.lambda_handler,
+                   ws_event('joinRoom', user, {'token': token(user), 'roomId': ROOM_ID, 'userId': user}))
+
+@case('ws.startRoom.emptyRoom')
+def ws_start_room():
+    from lambdas import websocket_start_room
+    seed(empty_room())
+    owner = PLAYERS['N']
+    return checked(websocket_start_room.lambda_handler,
+                   ws_event('startRoom', owner, {'token': token(owner), 'roomId': ROOM_ID, 'userId': owner}))
+
+@case('ws.makeBid.midAuction')
+def ws_make_bid():
+    from lambdas import websocket_make_bid
+    room = mid_auction_room()
+    seed(room)
+    user, body = _action(room, 'makeBid')
+    return checked(websocket_make_bid.lambda_handler, ws_event('makeBid', user, body))
+
+@case('ws.playCard.latePlay')
+def ws_play_card():
+    from lambdas import websocket_play_card
+    room = late_play_room()
+    seed(room)
+    user, body = _action(room, 'playCard')
+    return checked(websocket_play_card.lambda_handler, ws_event('playCard', user, body))
+
+@case('ws.resync.latePlay')
+def ws_resync():
+    from lambdas import websocket_resync
+    room = late_play_room()
+    seed(room)
+    user = PLAYERS['E']
+    return checked(websocket_resync.lambda_handler, ws_event('resync', user, {
+        'token': token(user), 'roomId': ROOM_ID, 'userId': user, 'lastSeq': int(room['seq']) - 8}))
+
+@case('ws.router.makeBid.midAuction')
+def ws_router():
+    from lambdas import websocket_router
+    room = mid_auction_room()
+    seed(room)
+    user, body = _action(room, 'makeBid')
+    return checked(websocket_router.lambda_handler, ws_event('makeBid', user, body))
+
+# REST routes
+
+@case('rest.roomCreate')
+def rest_room_create():
+    from lambdas import room_create
+    seed(None)
+    owner = PLAYERS['N']
+    return checked(room_create.handler, rest_event('POST', owner, {
+        'ownerId': owner, 'playerName': owner, 'roomName': 'Benchmark'}))
+
+@case('rest.roomJoin.emptyRoom')
+def rest_room_join():
+    from lambdas import room_join
+    room = empty_room()
+    room['seats']['W'] = ''
+    seed(room)
+    user = PLAYERS['W']
+    return checked(room_join.handler, rest_event('POST', user, {'roomId': ROOM_ID, 'userId': user}))
+
+@case('rest.roomStart.emptyRoom')
+def rest_room_start():
+    from lambdas import room_start
+    seed(empty_room())
+    owner = PLAYERS['N']
+    return checked(room_start.handler, rest_event('POST', owner, {'roomId': ROOM_ID, 'userId': owner}))
+
+@case('rest.roomMove.midAuction')
+def rest_room_move_bid():
+    from lambdas import room_move
+    room = mid_auction_room()
+    seed(room)
+    user = room['gameData']['turn']
+    return checked(room_move.handler, rest_event('POST', user, {'userId': user, 'move': 'pass'},
+                                                 pathParameters={'roomId': ROOM_ID}))
+
+@case('rest.roomMove.latePlay')
+def rest_room_move_play():
+    from lambdas import room_move
+    room = late_play_room()
+    seed(room)
+    user = room['gameData']['turn']
+    return checked(room_move.handler, rest_event('POST', user, {'userId': user, 'move': legal_card(room)},
+                                                 pathParameters={'roomId': ROOM_ID}))
+
+@case('rest.roomState.latePlay')
+def rest_room_state():
+    from lambdas import room_state
+    seed(late_play_room())
+    # A cold cache: the read and the view are part of the measurement
+    room_state.room_state_handler.rooms.clear()
+    room_state.room_state_handler.bodies.clear()
+    user = PLAYERS['S']
+    return checked(room_state.handler, rest_event('GET', user, pathParameters={'roomId': ROOM_ID},
+                                                  queryStringParameters={'userId': user}))
+
+@case('rest.connectionCount')
+def rest_connection_count():
+    from lambdas import connection_count
+    seed(late_play_room())
+    return checked(connection_count.handler, rest_event('GET', None))
+
+@case('rest.aiDoubleDummy')
+def rest_ai_double_dummy():
+    from lambdas import ai_double_dummy
+    ai_double_dummy._deal_cache.clear()
+    return checked(ai_double_dummy.handler, {'body': json.dumps({'ddTable': DD_TABLE, 'vulnerability': 'NS'})})
+
+# Accounts
+
+@case('rest.accountCreate')
+def rest_account_create():
+    from lambdas import account_create
+    seed(None)
+    return checked(account_create.handler, {'body': json.dumps(ACCOUNT)})
+
+@case('rest.accountLogin')
+def rest_account_login():
+    from lambdas import account_login
+    from lambdas.password_policy import hash_password
+    # Hashed at the benchmark's cost, so the login never rehashes
+    seed(None, users=[{'userId': 'bench-account-id', 'username': ACCOUNT['username'],
+                       'passwordHash': hash_password(ACCOUNT['password']), 'createdAt': '2024-01-01T00:00:00+00:00'}])
+    return checked(account_login.handler, {'body': json.dumps(ACCOUNT)})
+
+# Engine
+
+@case('engine.trickWinner', calls=2000)
+def engine_trick_winner():
+    plays = [{'seat': 'N', 'card': 'TH'}, {'seat': 'E', 'card': 'AH'},
+             {'seat': 'S', 'card': '2S'}, {'seat': 'W', 'card': 'KS'}]
+    return lambda: (bridge_engine.trick_winner(plays, 'S'), bridge_engine.trick_winner(plays, None))
+
+@case('engine.validateBid.longAuction', calls=2000)
+def engine_validate_bid():
+    bids = mid_auction_room()['gameData']['bids'] * 3
+    return lambda: bridge_engine.validate_bid(bids, 'W', '7NT')
+
+@case('engine.auctionComplete', calls=2000)
+def engine_auction_complete():
+    bids = mid_auction_room()['gameData']['bids']
+    return lambda: bridge_engine.auction_complete(bids)
+
+@case('engine.dealHands', calls=200)
+def engine_deal_hands():
+    rng = random.Random(7)
+    return lambda: bridge_engine.deal_hands(rng)
+
+# Harness
+
+def _environment() -> None:
+    for name, value in ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    os.environ.setdefault('SESSION_SECRET', 'benchmark-suite')
+
+def measure(name: str, rounds: int) -> Dict[str, Any]:
+    """
+    Median and best time of one case in microseconds per call
+    """
+    setup, calls = CASES[name]
+    samples = []
+    with contextlib.redirect_stdout(_Discard()):
+        for round_number in range(WARMUP_CALLS + rounds):
+            call = setup()
+            started = time.perf_counter()
+            for _ in range(calls):
+                call()
+            elapsed = (time.perf_counter() - started) / calls
+            if round_number >= WARMUP_CALLS:
+                samples.append(elapsed * 1e6)
+    return {'medianUs': round(statistics.median(samples), 2), 'minUs': round(min(samples), 2), 'rounds': rounds}
+
+def run(names: Optional[List[str]] = None, rounds: int = 30) -> Dict[str, Dict[str, Any]]:
+    """
+    Measure the named cases (all by default)
+
+    Raises:
+        BenchmarkError if a handler answers with an error
+    """
+    _environment()
+    configured_rounds = os.environ.get('BCRYPT_ROUNDS')
+    os.environ['BCRYPT_ROUNDS'] = BCRYPT_ROUNDS
+    password_policy.reset()
+    try:
+        return {name: measure(name, rounds) for name in (names or list(CASES))}
+    finally:
+        aws_clients.reset()
+        if configured_rounds is None:
+            del os.environ['BCRYPT_ROUNDS']
+        else:
+            os.environ['BCRYPT_ROUNDS'] = configured_rounds
+        password_policy.reset()
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Cases whose median exceeds the baseline median by more than threshold
+
+    Returns:
+        [{'name', 'medianUs', 'baselineUs', 'change'}], change as a fraction
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        change = result['medianUs'] / reference['medianUs'] - 1
+        if change > threshold:
+            regressions.append({'name': name, 'medianUs': result['medianUs'],
+                                'baselineUs': reference['medianUs'], 'change': round(change, 3)})
+    return regressions
+
+def load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get('cases', {})
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]]) -> None:
+    cases = load_baseline(path)
+    cases.update(results)
+    document = {'python': platform.python_version(), 'machine': platform.machine(), 'cases': cases}
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filter', help='only cases whose name contains this text')
+    parser.add_argument('--rounds', type=int, default=30, help='timed rounds per case')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown of a median as a fraction (0.5 = 50%%)')
+    parser.add_argument('--save', action='store_true', help='write these results as the new baseline')
+    args = parser.parse_args()
+
+    names = [name for name in CASES if not args.filter or args.filter in name]
+    if not names:
+        parser.error(f'no case matches {args.filter!r}')
+    results = run(names, args.rounds)
+    baseline = load_baseline(args.baseline)
+
+    print(f"{'case':<34}{'median us':>11}{'min us':>11}{'baseline':>11}{'change':>9}")
+    for name, result in results.items():
+        reference = baseline.get(name, {}).get('medianUs')
+        change = f"{result['medianUs'] / reference - 1:+.0%}" if reference else 'new'
+        print(f"{name:<34}{result['medianUs']:>11.1f}{result['minUs']:>11.1f}"
+              f"{reference or 0:>11.1f}{change:>9}")
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f'\nBaseline saved to {args.baseline}')
+        return
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"{regression['name']}: {regression['medianUs']:.1f} us vs {regression['baselineUs']:.1f} us "
+              f"baseline ({regression['change']:+.0%}), over the {args.threshold:.0%} threshold")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
@@ -53,12 +53,20 @@ cat > execution-policy.json << EOF
         "dynamodb:UpdateItem",
         "dynamodb:DeleteItem",
         "dynamodb:Query",
-        "dynamodb:Scan"
+        "dynamodb:Scan",
+        "dynamodb:BatchGetItem",
+        "dynamodb:BatchWriteItem",
+        "dynamodb:TransactGetItems",
+        "dynamodb:TransactWriteItems",
+        "dynamodb:DescribeTable"
       ],
       "Resource": [
         "arn:aws:dynamodb:*:*:table/UsersTable",
         "arn:aws:dynamodb:*:*:table/GameRooms",
-        "arn:aws:dynamodb:*:*:table/WebSocketConnections"
+        "arn:aws:dynamodb:*:*:table/WebSocketConnections",
+        "arn:aws:dynamodb:*:*:table/WebSocketConnections/index/*",
+        "arn:aws:dynamodb:*:*:table/WebSocketConnectionsV2",
+        "arn:aws:dynamodb:*:*:table/WebSocketConnectionsV2/index/*"
       ]
     }
   ]
@@ -19,6 +19,7 @@ if [ -z "$FUNCTION_NAME" ] || [ -z "$ACTION" ]; then
     echo "  account-login → LoginAPILambda"
     echo "  ai-double-dummy → GetDoubleDummyLambda"
     echo "  connection-count → ConnectionCountAPILambda"
+    echo "  idle-reaper → IdleReaperLambda (scheduled)"
     echo ""
     echo "WebSocket functions:"
     echo "  websocket-connect → WebSocketConnectLambda"
@@ -28,6 +29,9 @@ if [ -z "$FUNCTION_NAME" ] || [ -z "$ACTION" ]; then
     echo "  websocket-start-room → WebSocketStartRoomLambda"
     echo "  websocket-make-bid → WebSocketMakeBidLambda"
     echo "  websocket-play-card → WebSocketPlayCardLambda"
+    echo "  websocket-resync → WebSocketResyncLambda"
+    echo "  websocket-heartbeat → WebSocketHeartbeatLambda"
+    echo "  websocket-router → WebSocketRouterLambda (all WebSocket routes)"
     exit 1
 fi
 
@@ -38,6 +42,10 @@ RUNTIME="python3.12"
 ROLE_ARN="arn:aws:iam::851725597758:role/lambda-execution-role"
 TIMEOUT=30
 MEMORY_SIZE=256
+# lastActivity write interval and the idle time after which the reaper expires a connection
+ACTIVITY_INTERVAL_SECONDS=${ACTIVITY_INTERVAL_SECONDS:-60}
+IDLE_TIMEOUT_SECONDS=${IDLE_TIMEOUT_SECONDS:-900}
+REAPER_SCHEDULE="rate(5 minutes)"
 
 # Map function names to actual Lambda function names
 case $FUNCTION_NAME in
@@ -62,6 +70,9 @@ case $FUNCTION_NAME in
     "connection-count")
         LAMBDA_FUNCTION_NAME="ConnectionCountAPILambda"
         ;;
+    "idle-reaper")
+        LAMBDA_FUNCTION_NAME="IdleReaperLambda"
+        ;;
     "websocket-connect")
         LAMBDA_FUNCTION_NAME="WebSocketConnectLambda"
         ;;
@@ -83,6 +94,15 @@ case $FUNCTION_NAME in
     "websocket-play-card")
         LAMBDA_FUNCTION_NAME="WebSocketPlayCardLambda"
         ;;
+    "websocket-resync")
+        LAMBDA_FUNCTION_NAME="WebSocketResyncLambda"
+        ;;
+    "websocket-heartbeat")
+        LAMBDA_FUNCTION_NAME="WebSocketHeartbeatLambda"
+        ;;
+    "websocket-router")
+        LAMBDA_FUNCTION_NAME="WebSocketRouterLambda"
+        ;;
     *)
         echo "Unknown function: $FUNCTION_NAME"
         exit 1
@@ -101,15 +121,48 @@ if [ "$ACTION" = "create" ]; then
         ENV_VARS="Variables={USER_TABLE=UsersTable}"
     elif [[ $FUNCTION_NAME == room-* ]] || [[ $FUNCTION_NAME == websocket-* ]]; then
         # WebSocket functions need different tables based on their purpose
-        if [[ $FUNCTION_NAME == websocket-connect ]] || [[ $FUNCTION_NAME == websocket-disconnect ]]; then
+        if [[ $FUNCTION_NAME == websocket-router ]]; then
+            ENV_VARS="Variables={USER_TABLE=UsersTable,ROOM_TABLE=GameRooms,WEBSOCKET_CONNECTIONS_TABLE=WebSocketConnections}"
+        elif [[ $FUNCTION_NAME == websocket-connect ]]; then
+            # $connect only writes the connection record; it reads no rooms
             ENV_VARS="Variables={WEBSOCKET_CONNECTIONS_TABLE=WebSocketConnections}"
-        elif [[ $FUNCTION_NAME == websocket-start-room ]]; then
-            ENV_VARS="Variables={USER_TABLE=UsersTable,ROOM_TABLE=GameRooms}"
+        elif [[ $FUNCTION_NAME == websocket-disconnect ]]; then
+            # $disconnect frees or marks the seat of the room the connection was in
+            ENV_VARS="Variables={ROOM_TABLE=GameRooms,WEBSOCKET_CONNECTIONS_TABLE=WebSocketConnections}"
+        elif [[ $FUNCTION_NAME == websocket-* ]] || [[ $FUNCTION_NAME == room-start ]]; then
+            # Room and game routes look up the room's connections to broadcast to
+            ENV_VARS="Variables={ROOM_TABLE=GameRooms,WEBSOCKET_CONNECTIONS_TABLE=WebSocketConnections}"
         else
             ENV_VARS="Variables={ROOM_TABLE=GameRooms}"
         fi
     elif [[ $FUNCTION_NAME == connection-count ]]; then
         ENV_VARS="Variables={WEBSOCKET_CONNECTIONS_TABLE=WebSocketConnections}"
+    elif [[ $FUNCTION_NAME == idle-reaper ]]; then
+        # Expires idle connections and leaves or deletes the rooms they were in
+        ENV_VARS="Variables={ROOM_TABLE=GameRooms,WEBSOCKET_CONNECTIONS_TABLE=WebSocketConnections,IDLE_TIMEOUT_SECONDS=${IDLE_TIMEOUT_SECONDS}}"
+    fi
+    
+    # Functions that record connection activity share its write interval
+    if [[ $FUNCTION_NAME == websocket-heartbeat ]] || [[ $FUNCTION_NAME == websocket-router ]] || [[ $FUNCTION_NAME == idle-reaper ]]; then
+        ENV_VARS="${ENV_VARS%\}},ACTIVITY_INTERVAL_SECONDS=${ACTIVITY_INTERVAL_SECONDS}}"
+    fi
+    
+    # A REST start has no WebSocket request context to take the management endpoint from
+    if [[ $FUNCTION_NAME == room-start ]]; then
+        if [ -z "$WEBSOCKET_ENDPOINT" ]; then
+            echo "WEBSOCKET_ENDPOINT must be set to create $FUNCTION_NAME"
+            exit 1
+        fi
+        ENV_VARS="${ENV_VARS%\}},WEBSOCKET_ENDPOINT=${WEBSOCKET_ENDPOINT}}"
+    fi
+    
+    # Functions that issue or check session tokens share the signing secret
+    if [[ $FUNCTION_NAME == account-login ]] || [[ $FUNCTION_NAME == room-* ]] || [[ $FUNCTION_NAME == websocket-* ]]; then
+        if [ -z "$SESSION_SECRET" ]; then
+            echo "SESSION_SECRET must be set to create $FUNCTION_NAME"
+            exit 1
+        fi
+        ENV_VARS="${ENV_VARS%\}},SESSION_SECRET=${SESSION_SECRET}}"
     fi
     
     aws lambda create-function \
@@ -125,6 +178,31 @@ if [ "$ACTION" = "create" ]; then
         
     echo "Function $LAMBDA_FUNCTION_NAME created successfully!"
     
+    if [[ $FUNCTION_NAME == idle-reaper ]]; then
+        # Run the reaper on a schedule and let EventBridge invoke it
+        RULE_ARN=$(aws events put-rule \
+            --name IdleReaperSchedule \
+            --schedule-expression "$REAPER_SCHEDULE" \
+            --region $REGION \
+            --query RuleArn --output text)
+        aws lambda add-permission \
+            --function-name $LAMBDA_FUNCTION_NAME \
+            --statement-id IdleReaperSchedule \
+            --action lambda:InvokeFunction \
+            --principal events.amazonaws.com \
+            --source-arn $RULE_ARN \
+            --region $REGION
+        FUNCTION_ARN=$(aws lambda get-function \
+            --function-name $LAMBDA_FUNCTION_NAME \
+            --region $REGION \
+            --query Configuration.FunctionArn --output text)
+        aws events put-targets \
+            --rule IdleReaperSchedule \
+            --targets "Id"="IdleReaperLambda","Arn"="$FUNCTION_ARN" \
+            --region $REGION
+        echo "Scheduled $LAMBDA_FUNCTION_NAME: $REAPER_SCHEDULE"
+    fi
+    
 elif [ "$ACTION" = "update" ]; then
     echo "Updating Lambda function: $LAMBDA_FUNCTION_NAME"
     
@@ -142,9 +220,16 @@ fi
 
 echo ""
 echo "Next steps:"
-if [[ $FUNCTION_NAME == websocket-* ]]; then
+if [[ $FUNCTION_NAME == idle-reaper ]]; then
+    echo "1. Check the IdleReaperSchedule rule in EventBridge ($REAPER_SCHEDULE)"
+    echo "2. Keep IDLE_TIMEOUT_SECONDS above the clients' heartbeat interval"
+elif [[ $FUNCTION_NAME == websocket-* ]]; then
     echo "1. Configure API Gateway WebSocket API to route to this Lambda"
-    echo "2. Set up route key mapping (e.g., 'createRoom' → WebSocketCreateRoomLambda)"
+    if [[ $FUNCTION_NAME == websocket-router ]]; then
+        echo "2. Point every route key (\$connect, \$disconnect, createRoom, ...) at WebSocketRouterLambda"
+    else
+        echo "2. Set up route key mapping (e.g., 'createRoom' → WebSocketCreateRoomLambda)"
+    fi
     echo "3. Test the WebSocket function"
     echo "4. Set up proper IAM roles and permissions"
 else
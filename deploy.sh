@@ -3,6 +3,7 @@
 # BridgeLambdas Deployment Script
 # Usage: ./deploy.sh <function-name>
 # Example: ./deploy.sh room-create
+# Set BUNDLE=1 to ship only the modules the handler imports (see tools/bundle.py)
 
 set -e
 
@@ -22,6 +23,7 @@ if [ -z "$FUNCTION_NAME" ]; then
     echo "  ai-play"
     echo "  ai-double-dummy"
     echo "  connection-count"
+    echo "  idle-reaper          (scheduled)"
     echo ""
     echo "WebSocket functions:"
     echo "  websocket-connect"
@@ -31,11 +33,22 @@ if [ -z "$FUNCTION_NAME" ]; then
     echo "  websocket-start-room"
     echo "  websocket-make-bid"
     echo "  websocket-play-card"
+    echo "  websocket-resync"
+    echo "  websocket-heartbeat"
+    echo "  websocket-router     (all WebSocket routes in one function)"
     exit 1
 fi
 
 echo "Building deployment package for $FUNCTION_NAME..."
 
+if [ "$BUNDLE" = "1" ]; then
+    # Dependency-pruned, precompiled package with only the requirements it needs
+    python tools/bundle.py --install --out dist $FUNCTION_NAME
+    cp dist/${FUNCTION_NAME}.zip ${FUNCTION_NAME}-deployment.zip
+    echo "Deployment package created: ${FUNCTION_NAME}-deployment.zip"
+    exit 0
+fi
+
 # Create temporary build directory
 BUILD_DIR="build_$FUNCTION_NAME"
 rm -rf $BUILD_DIR
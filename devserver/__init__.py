@@ -0,0 +1,4 @@
+"""
+Local, single-process backend: every WebSocket route in one asyncio server
+over in-memory tables (python -m devserver)
+"""
@@ -0,0 +1,30 @@
+"""
+Run the devserver
+
+Usage:
+    python -m devserver [--host 127.0.0.1] [--port 8080] [--store rooms.json]
+        [--checkpoint-seconds 5] [--verbose]
+"""
+import argparse
+import asyncio
+
+from devserver.server import DevServer
+from devserver.stores import open_store
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--store', default='memory', help="'memory' or a JSON file the tables are kept in")
+    parser.add_argument('--checkpoint-seconds', type=float, default=5.0, help='how often changes are saved to the store')
+    parser.add_argument('--verbose', action='store_true', help="show the handlers' logging")
+    args = parser.parse_args()
+
+    server = DevServer(args.host, args.port, open_store(args.store), args.checkpoint_seconds, args.verbose)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Request accounting for the in-memory DynamoDB
+
+Every call made against a MemoryDynamoDB is recorded with the capacity
+DynamoDB would bill for it, so tests and benchmarks can hold handlers to a
+call budget offline:
+
+- item size follows the DynamoDB rules: attribute name bytes plus value
+  bytes (strings UTF-8, numbers ~1 byte per two digits + 1, 1 byte for
+  booleans and nulls, 3 bytes of overhead per list or map)
+- reads cost one RCU per 4 KB (half when eventually consistent); query and
+  scan are billed on the total size of the items they examined, not on
+  what the filter kept
+- writes cost one WCU per 1 KB of the larger of the old and new item,
+  also when a condition fails; transactional requests cost double
+"""
+import math
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+READ_UNIT_BYTES = 4096
+WRITE_UNIT_BYTES = 1024
+
+# Operations that are reads / scans for the summary
+READS = {'GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems'}
+SCANS = {'Scan'}
+WRITES = {'PutItem', 'UpdateItem', 'DeleteItem', 'BatchWriteItem', 'TransactWriteItems'}
+# Every operation a ledger records (the Lambda role must allow each one)
+OPERATIONS = READS | WRITES
+
+def value_size(value: Any) -> int:
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (int, float, Decimal)):
+        digits = len(str(abs(value)).replace('.', '').lstrip('0')) or 1
+        return math.ceil(digits / 2) + 1
+    if isinstance(value, dict):
+        return 3 + sum(len(name.encode('utf-8')) + value_size(member) for name, member in value.items())
+    if isinstance(value, (list, tuple)):
+        return 3 + sum(value_size(member) + 1 for member in value)
+    if isinstance(value, (set, frozenset)):
+        return sum(value_size(member) for member in value)
+    return len(str(value))
+
+def item_size(item: Optional[Dict[str, Any]]) -> int:
+    if not item:
+        return 0
+    return sum(len(name.encode('utf-8')) + value_size(value) for name, value in item.items())
+
+def read_units(size: int, consistent: bool = False) -> float:
+    units = max(1, math.ceil(size / READ_UNIT_BYTES))
+    return float(units) if consistent else units / 2.0
+
+def write_units(size: int) -> float:
+    return float(max(1, math.ceil(size / WRITE_UNIT_BYTES)))
+
+class Ledger:
+    """
+    Every request made against a MemoryDynamoDB, in order
+
+    Each entry is {'operation', 'table', 'items' (returned/written),
+    'scanned' (examined), 'rcu', 'wcu'}.
+    """
+
+    def __init__(self):
+        self.requests: List[Dict[str, Any]] = []
+
+    def record(self, operation: str, table: str, items: int = 0, scanned: int = 0,
+               rcu: float = 0.0, wcu: float = 0.0) -> None:
+        self.requests.append({'operation': operation, 'table': table, 'items': items, 'scanned': scanned,
+                              'rcu': rcu, 'wcu': wcu})
+
+    def reset(self) -> None:
+        self.requests = []
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Totals over every recorded request
+
+        Returns:
+            {'roundTrips', 'reads', 'writes', 'scans', 'itemsScanned', 'rcu',
+             'wcu', 'byOperation': {operation: count}}
+        """
+        by_operation: Dict[str, int] = {}
+        for request in self.requests:
+            by_operation[request['operation']] = by_operation.get(request['operation'], 0) + 1
+        reads = sum(1 for request in self.requests if request['operation'] in READS)
+        return {
+            'roundTrips': len(self.requests),
+            'reads': reads,
+            'writes': len(self.requests) - reads,
+            'scans': sum(1 for request in self.requests if request['operation'] in SCANS),
+            'itemsScanned': sum(request['scanned'] for request in self.requests),
+            'rcu': round(sum(request['rcu'] for request in self.requests), 2),
+            'wcu': round(sum(request['wcu'] for request in self.requests), 2),
+            'byOperation': by_operation
+        }
@@ -0,0 +1,405 @@
+"""
+DynamoDB condition, filter, key-condition and update expressions evaluated
+in memory
+
+Conditions support comparisons (= <> < <= > >=), BETWEEN, IN, AND/OR/NOT,
+parentheses, attribute_exists, attribute_not_exists, attribute_type,
+begins_with, contains and size. Updates support SET (with +, -,
+if_not_exists and list_append), REMOVE, ADD and DELETE. Both take #name and
+:value placeholders and nested paths (a.b, a[0]), and are parsed once per
+expression string and cached.
+"""
+import re
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+# Value of a path that does not exist in the item
+MISSING = object()
+
+_TOKEN = re.compile(r"\s*(<>|<=|>=|[=<>(),.\[\]+\-]|#[A-Za-z0-9_]+|:[A-Za-z0-9_]+|[A-Za-z_][A-Za-z0-9_]*|\d+)")
+_KEYWORDS = {'AND', 'OR', 'NOT', 'BETWEEN', 'IN'}
+_UPDATE_CLAUSES = {'SET', 'REMOVE', 'ADD', 'DELETE'}
+_COMPARATORS = {'=', '<>', '<', '<=', '>', '>='}
+
+Evaluator = Callable[[Dict[str, Any], Dict[str, str], Dict[str, Any]], Any]
+
+def validation_error(message: str, operation: str = 'Expression') -> ClientError:
+    return ClientError({'Error': {'Code': 'ValidationException', 'Message': message}}, operation)
+
+def tokenize(expression: str) -> List[str]:
+    tokens, position = [], 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match:
+            raise validation_error(f'Invalid expression near: {expression[position:]!r}')
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+def resolve_name(token: str, names: Dict[str, str]) -> str:
+    if token.startswith('#'):
+        if token not in names:
+            raise validation_error(f'Undefined expression attribute name: {token}')
+        return names[token]
+    return token
+
+def resolve_value(token: str, values: Dict[str, Any]) -> Any:
+    if token not in values:
+        raise validation_error(f'Undefined expression attribute value: {token}')
+    return values[token]
+
+def get_path(item: Any, path: Tuple[Any, ...], names: Dict[str, str]) -> Any:
+    """
+    Value at a parsed document path, or MISSING
+    """
+    current = item
+    for step in path:
+        if isinstance(step, int):
+            if not isinstance(current, list) or step >= len(current):
+                return MISSING
+            current = current[step]
+        else:
+            if not isinstance(current, dict):
+                return MISSING
+            current = current.get(resolve_name(step, names), MISSING)
+            if current is MISSING:
+                return MISSING
+    return current
+
+def _comparable(left: Any, right: Any) -> bool:
+    numbers = (int, float, Decimal)
+    if isinstance(left, bool) or isinstance(right, bool):
+        return isinstance(left, bool) and isinstance(right, bool)
+    if isinstance(left, numbers) and isinstance(right, numbers):
+        return True
+    return type(left) is type(right) and isinstance(left, (str, bytes))
+
+def compare(operator: str, left: Any, right: Any) -> bool:
+    if left is MISSING or right is MISSING:
+        return False
+    if operator == '=':
+        return left == right if _comparable(left, right) or type(left) is type(right) else False
+    if operator == '<>':
+        return not (left == right if _comparable(left, right) or type(left) is type(right) else False)
+    if not _comparable(left, right):
+        return False
+    return {'<': left < right, '<=': left <= right, '>': left > right, '>=': left >= right}[operator]
+
+def _type_name(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'BOOL'
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (int, float, Decimal)):
+        return 'N'
+    if isinstance(value, str):
+        return 'S'
+    if isinstance(value, (bytes, bytearray)):
+        return 'B'
+    if isinstance(value, dict):
+        return 'M'
+    if isinstance(value, list):
+        return 'L'
+    if isinstance(value, set):
+        sample = next(iter(value), '')
+        return 'NS' if isinstance(sample, (int, float, Decimal)) else 'BS' if isinstance(sample, bytes) else 'SS'
+    return 'S'
+
+class _Parser:
+    def __init__(self, expression: str):
+        self.tokens = tokenize(expression)
+        self.position = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self, expected: Optional[str] = None) -> str:
+        token = self.peek()
+        if token is None or (expected is not None and token.upper() != expected):
+            raise validation_error(f'Expected {expected or "a token"} but found {token!r}')
+        self.position += 1
+        return token
+
+    def at_keyword(self, keyword: str) -> bool:
+        token = self.peek()
+        return token is not None and token.upper() == keyword
+
+    def parse(self) -> Evaluator:
+        evaluator = self.parse_or()
+        if self.peek() is not None:
+            raise validation_error(f'Unexpected token: {self.peek()!r}')
+        return evaluator
+
+    def parse_or(self) -> Evaluator:
+        left = self.parse_and()
+        while self.at_keyword('OR'):
+            self.take()
+            right = self.parse_and()
+            left = (lambda a, b: lambda item, n, v: a(item, n, v) or b(item, n, v))(left, right)
+        return left
+
+    def parse_and(self) -> Evaluator:
+        left = self.parse_not()
+        while self.at_keyword('AND'):
+            self.take()
+            right = self.parse_not()
+            left = (lambda a, b: lambda item, n, v: a(item, n, v) and b(item, n, v))(left, right)
+        return left
+
+    def parse_not(self) -> Evaluator:
+        if self.at_keyword('NOT'):
+            self.take()
+            inner = self.parse_not()
+            return lambda item, n, v: not inner(item, n, v)
+        return self.parse_condition()
+
+    def parse_condition(self) -> Evaluator:
+        if self.peek() == '(':
+            self.take()
+            inner = self.parse_or()
+            self.take(')')
+            return inner
+        token = self.peek()
+        if token in ('attribute_exists', 'attribute_not_exists', 'attribute_type', 'begins_with', 'contains'):
+            return self.parse_predicate()
+        left = self.parse_operand()
+        operator = self.peek()
+        if operator in _COMPARATORS:
+            self.take()
+            right = self.parse_operand()
+            return lambda item, n, v: compare(operator, left(item, n, v), right(item, n, v))
+        if self.at_keyword('BETWEEN'):
+            self.take()
+            low = self.parse_operand()
+            self.take('AND')
+            high = self.parse_operand()
+            return lambda item, n, v: (compare('>=', left(item, n, v), low(item, n, v))
+                                       and compare('<=', left(item, n, v), high(item, n, v)))
+        if self.at_keyword('IN'):
+            self.take()
+            self.take('(')
+            options = [self.parse_operand()]
+            while self.peek() == ',':
+                self.take()
+                options.append(self.parse_operand())
+            self.take(')')
+            return lambda item, n, v: any(compare('=', left(item, n, v), option(item, n, v)) for option in options)
+        raise validation_error(f'Expected a comparison after operand, found {operator!r}')
+
+    def parse_predicate(self) -> Evaluator:
+        function = self.take()
+        self.take('(')
+        path = self.parse_path()
+        argument = None
+        if self.peek() == ',':
+            self.take()
+            argument = self.parse_operand()
+        self.take(')')
+        if function == 'attribute_exists':
+            return lambda item, n, v: get_path(item, path, n) is not MISSING
+        if function == 'attribute_not_exists':
+            return lambda item, n, v: get_path(item, path, n) is MISSING
+        if argument is None:
+            raise validation_error(f'{function} needs two arguments')
+        if function == 'attribute_type':
+            return lambda item, n, v: (get_path(item, path, n) is not MISSING
+                                       and _type_name(get_path(item, path, n)) == argument(item, n, v))
+        if function == 'begins_with':
+            def begins_with(item, n, v):
+                value, prefix = get_path(item, path, n), argument(item, n, v)
+                return isinstance(value, (str, bytes)) and type(value) is type(prefix) and value.startswith(prefix)
+            return begins_with
+        def contains(item, n, v):
+            value, member = get_path(item, path, n), argument(item, n, v)
+            if isinstance(value, str):
+                return isinstance(member, str) and member in value
+            return isinstance(value, (list, set)) and member in value
+        return contains
+
+    def parse_operand(self) -> Evaluator:
+        token = self.peek()
+        if token is None:
+            raise validation_error('Expression ended early')
+        if token.startswith(':'):
+            self.take()
+            return lambda item, n, v: resolve_value(token, v)
+        if token == 'size':
+            self.take()
+            self.take('(')
+            path = self.parse_path()
+            self.take(')')
+            def size(item, n, v):
+                value = get_path(item, path, n)
+                return MISSING if value is MISSING or isinstance(value, (int, float, Decimal, bool)) else len(value)
+            return size
+        path = self.parse_path()
+        return lambda item, n, v: get_path(item, path, n)
+
+    def parse_path(self) -> Tuple[Any, ...]:
+        token = self.take()
+        if token.upper() in _KEYWORDS or not (token.startswith('#') or re.match(r'[A-Za-z_]', token)):
+            raise validation_error(f'Invalid attribute path at {token!r}')
+        path = [token]
+        while self.peek() in ('.', '['):
+            if self.take() == '.':
+                path.append(self.take())
+            else:
+                index = self.take()
+                if not index.isdigit():
+                    raise validation_error(f'Invalid list index {index!r}')
+                path.append(int(index))
+                self.take(']')
+        return tuple(path)
+
+    def parse_update(self) -> List[Tuple[str, Tuple[Any, ...], Optional[Evaluator]]]:
+        """
+        Update actions as (clause, path, value evaluator or None)
+        """
+        actions = []
+        while self.peek() is not None:
+            clause = self.take().upper()
+            if clause not in _UPDATE_CLAUSES:
+                raise validation_error(f'Invalid UpdateExpression clause: {clause}')
+            while True:
+                path = self.parse_path()
+                if clause == 'SET':
+                    self.take('=')
+                    actions.append((clause, path, self.parse_set_value()))
+                elif clause == 'REMOVE':
+                    actions.append((clause, path, None))
+                else:
+                    actions.append((clause, path, self.parse_operand()))
+                if self.peek() != ',':
+                    break
+                self.take()
+        if not actions:
+            raise validation_error('UpdateExpression is empty')
+        return actions
+
+    def parse_set_value(self) -> Evaluator:
+        left = self.parse_set_operand()
+        if self.peek() in ('+', '-'):
+            operator = self.take()
+            right = self.parse_set_operand()
+            def arithmetic(item, n, v):
+                a, b = left(item, n, v), right(item, n, v)
+                if not isinstance(a, (int, Decimal)) or not isinstance(b, (int, Decimal)) or \
+                        isinstance(a, bool) or isinstance(b, bool):
+                    raise validation_error('An operand in the update expression has an incorrect data type')
+                return Decimal(a) + Decimal(b) if operator == '+' else Decimal(a) - Decimal(b)
+            return arithmetic
+        return left
+
+    def parse_set_operand(self) -> Evaluator:
+        function = self.peek()
+        if function in ('if_not_exists', 'list_append'):
+            self.take()
+            self.take('(')
+            if function == 'if_not_exists':
+                path = self.parse_path()
+                self.take(',')
+                default = self.parse_set_operand()
+                self.take(')')
+                def if_not_exists(item, n, v):
+                    current = get_path(item, path, n)
+                    return default(item, n, v) if current is MISSING else current
+                return if_not_exists
+            first = self.parse_set_operand()
+            self.take(',')
+            second = self.parse_set_operand()
+            self.take(')')
+            def list_append(item, n, v):
+                a, b = first(item, n, v), second(item, n, v)
+                if not isinstance(a, list) or not isinstance(b, list):
+                    raise validation_error('list_append needs two lists')
+                return a + b
+            return list_append
+        operand = self.parse_operand()
+        def existing(item, n, v):
+            value = operand(item, n, v)
+            if value is MISSING:
+                raise validation_error('The provided expression refers to an attribute that does not exist in the item')
+            return value
+        return existing
+
+@lru_cache(maxsize=512)
+def compile_condition(expression: str) -> Evaluator:
+    """
+    Parse a condition/filter/key-condition expression once
+    """
+    return _Parser(expression).parse()
+
+def evaluate(expression: Optional[str], item: Optional[Dict[str, Any]], names: Optional[Dict[str, str]] = None,
+             values: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Whether an item (None when it does not exist) satisfies an expression
+    """
+    if not expression:
+        return True
+    return bool(compile_condition(expression)(item or {}, names or {}, values or {}))
+
+@lru_cache(maxsize=512)
+def compile_update(expression: str) -> List[Tuple[str, Tuple[Any, ...], Optional[Evaluator]]]:
+    """
+    Parse an update expression once
+    """
+    return _Parser(expression).parse_update()
+
+def _container(item: Dict[str, Any], path: Tuple[Any, ...], names: Dict[str, str]) -> Tuple[Any, Any]:
+    parent = get_path(item, path[:-1], names) if len(path) > 1 else item
+    if parent is MISSING or not isinstance(parent, (dict, list)):
+        raise validation_error('The document path provided in the update expression is invalid for update')
+    step = path[-1]
+    return parent, (step if isinstance(step, int) else resolve_name(step, names))
+
+def apply_update(expression: str, item: Dict[str, Any], names: Optional[Dict[str, str]] = None,
+                 values: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Apply an update expression to (a copy of) an item in place
+
+    Every value is computed from the item as it was before the update, as
+    DynamoDB does, and then all actions are applied.
+    """
+    names, values = names or {}, values or {}
+    actions = compile_update(expression)
+    computed = [(clause, path, evaluator(item, names, values) if evaluator else None)
+                for clause, path, evaluator in actions]
+    for clause, path, value in computed:
+        parent, step = _container(item, path, names)
+        if clause == 'SET':
+            if isinstance(parent, list):
+                if step < len(parent):
+                    parent[step] = value
+                else:
+                    parent.append(value)
+            else:
+                parent[step] = value
+        elif clause == 'REMOVE':
+            if isinstance(parent, list):
+                if step < len(parent):
+                    del parent[step]
+            else:
+                parent.pop(step, None)
+        elif clause == 'ADD':
+            current = parent.get(step, MISSING) if isinstance(parent, dict) else MISSING
+            if isinstance(value, set):
+                parent[step] = (current if current is not MISSING else set()) | value
+            elif isinstance(value, (int, Decimal)) and not isinstance(value, bool):
+                parent[step] = Decimal(current if current is not MISSING else 0) + Decimal(value)
+            else:
+                raise validation_error('ADD only supports numbers and sets')
+        elif clause == 'DELETE':
+            current = parent.get(step, MISSING) if isinstance(parent, dict) else MISSING
+            if not isinstance(value, set):
+                raise validation_error('DELETE only supports sets')
+            if current is not MISSING:
+                remaining = current - value
+                if remaining:
+                    parent[step] = remaining
+                else:
+                    parent.pop(step)
+    return item
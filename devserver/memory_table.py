@@ -0,0 +1,496 @@
+"""
+In-memory stand-in for the boto3 DynamoDB resource, tables and client
+
+Implements what the handlers use and what tests need to hold them to a
+call budget: get_item, put_item, update_item, delete_item, query, scan,
+batch_writer, batch_get_item, batch_write_item and (on the client)
+transact_write_items / transact_get_items, with condition, filter,
+key-condition and update expressions, 1 MB result pages with
+ExclusiveStartKey, parallel scan segments and global secondary indexes.
+
+As with the real service, items are copied on the way in and out, numbers
+are stored and returned as Decimal, floats are rejected, and every request
+is recorded with its consumed capacity in the resource's ledger
+(capacity.py); single-table requests return it as ConsumedCapacity when
+they ask for ReturnConsumedCapacity.
+"""
+import copy
+import re
+import zlib
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from devserver.capacity import READS, Ledger, item_size, read_units, write_units
+from devserver.expressions import apply_update, evaluate, resolve_name, validation_error
+
+# Key schemas (partition key, optional sort key) of the deployed tables
+DEFAULT_KEY_SCHEMAS = {
+    'GameRooms': ('roomId',),
+    'UsersTable': ('username',),
+    'WebSocketConnections': ('connectionId', 'currentRoomId')
+}
+
+# Service limits
+MAX_PAGE_BYTES = 1024 * 1024
+MAX_BATCH_WRITE = 25
+MAX_BATCH_GET = 100
+MAX_TRANSACT_ITEMS = 100
+
+_KEY_EQUALS = re.compile(r'(#?[A-Za-z0-9_]+)\s*=\s*(:[A-Za-z0-9_]+)')
+
+def conditional_check_failed(operation: str) -> ClientError:
+    return ClientError({'Error': {'Code': 'ConditionalCheckFailedException',
+                                  'Message': 'The conditional request failed'}}, operation)
+
+def to_dynamo(value: Any) -> Any:
+    """
+    A value as DynamoDB stores it: numbers become Decimal, floats are
+    refused the way boto3 refuses them
+    """
+    if isinstance(value, bool) or value is None or isinstance(value, (str, bytes, Decimal)):
+        return value
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, float):
+        raise TypeError('Float types are not supported. Use Decimal types instead.')
+    if isinstance(value, dict):
+        return {name: to_dynamo(member) for name, member in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_dynamo(member) for member in value]
+    if isinstance(value, (set, frozenset)):
+        return {to_dynamo(member) for member in value}
+    return value
+
+def with_write_capacity(response: Dict[str, Any], units: Dict[str, float], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add the per-table ConsumedCapacity list of a batch or transactional write when it was asked for
+    """
+    if kwargs.get('ReturnConsumedCapacity') in ('TOTAL', 'INDEXES'):
+        response['ConsumedCapacity'] = [{'TableName': name, 'CapacityUnits': wcu, 'WriteCapacityUnits': wcu}
+                                        for name, wcu in units.items()]
+    return response
+
+def _values(kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    values = kwargs.get('ExpressionAttributeValues')
+    return to_dynamo(values) if values else values
+
+def _project(item: Dict[str, Any], projection: Optional[str], names: Optional[Dict[str, str]]) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(item)
+    fields = [resolve_name(field.strip().split('.')[0].split('[')[0], names or {}) for field in projection.split(',')]
+    return {field: copy.deepcopy(item[field]) for field in fields if field in item}
+
+class MemoryTable:
+    """
+    One DynamoDB table held in a dict keyed by primary key
+    """
+
+    def __init__(self, name: str, key_schema: Tuple[str, ...], indexes: Optional[Dict[str, Tuple[str, ...]]] = None,
+                 ledger: Optional[Ledger] = None):
+        self.name = name
+        self.key_names = tuple(key_schema)
+        self.indexes = dict(indexes or {})
+        self.items: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        self.ledger = ledger if ledger is not None else Ledger()
+
+    @property
+    def table_name(self) -> str:
+        return self.name
+
+    @property
+    def key_schema(self) -> List[Dict[str, str]]:
+        return [{'AttributeName': name, 'KeyType': 'HASH' if i == 0 else 'RANGE'} for i, name in enumerate(self.key_names)]
+
+    def _key_of(self, item: Dict[str, Any], operation: str) -> Tuple[Any, ...]:
+        missing = [name for name in self.key_names if name not in item]
+        if missing:
+            raise validation_error(f'Missing the key {missing[0]} in the item', operation)
+        return tuple(item[name] for name in self.key_names)
+
+    def _exact_key(self, key: Dict[str, Any], operation: str) -> Tuple[Any, ...]:
+        if set(key) != set(self.key_names):
+            raise validation_error('The provided key element does not match the schema', operation)
+        return self._key_of(to_dynamo(key), operation)
+
+    def _condition_holds(self, current: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> bool:
+        return evaluate(kwargs.get('ConditionExpression'), current, kwargs.get('ExpressionAttributeNames'), _values(kwargs))
+
+    @staticmethod
+    def _returned(current: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        mode = kwargs.get('ReturnValues', 'NONE')
+        if mode == 'ALL_OLD' and current is not None:
+            return {'Attributes': copy.deepcopy(current)}
+        if mode == 'ALL_NEW' and new is not None:
+            return {'Attributes': copy.deepcopy(new)}
+        if mode in ('UPDATED_NEW', 'UPDATED_OLD'):
+            source = new if mode == 'UPDATED_NEW' else current
+            old = current or {}
+            changed = {name for name in set(old) | set(new or {}) if old.get(name) != (new or {}).get(name)}
+            attributes = {name: copy.deepcopy(value) for name, value in (source or {}).items() if name in changed}
+            return {'Attributes': attributes} if attributes else {}
+        return {}
+
+    # Single-item operations; the _apply_* helpers are shared with batches
+    # and transactions, which record their own single request
+
+    def _apply_put(self, item: Dict[str, Any], kwargs: Dict[str, Any], operation: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any], float]:
+        new = to_dynamo(item)
+        key = self._key_of(new, operation)
+        current = self.items.get(key)
+        units = write_units(max(item_size(current), item_size(new)))
+        if not self._condition_holds(current, kwargs):
+            raise conditional_check_failed(operation)
+        self.items[key] = new
+        return current, copy.deepcopy(new), units
+
+    def _apply_delete(self, key: Dict[str, Any], kwargs: Dict[str, Any], operation: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        stored_key = self._exact_key(key, operation)
+        current = self.items.get(stored_key)
+        units = write_units(item_size(current))
+        if not self._condition_holds(current, kwargs):
+            raise conditional_check_failed(operation)
+        self.items.pop(stored_key, None)
+        return current, units
+
+    def _apply_update(self, key: Dict[str, Any], kwargs: Dict[str, Any], operation: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any], float]:
+        stored_key = self._exact_key(key, operation)
+        current = self.items.get(stored_key)
+        if not self._condition_holds(current, kwargs):
+            raise conditional_check_failed(operation)
+        new = copy.deepcopy(current) if current is not None else dict(zip(self.key_names, stored_key))
+        if kwargs.get('UpdateExpression'):
+            apply_update(kwargs['UpdateExpression'], new, kwargs.get('ExpressionAttributeNames'), _values(kwargs))
+        if self._key_of(new, operation) != stored_key:
+            raise validation_error('Cannot update attribute in the key', operation)
+        self.items[stored_key] = new
+        return current, new, write_units(max(item_size(current), item_size(new)))
+
+    def _recorded_write(self, operation: str, apply, *args: Any) -> Any:
+        try:
+            result = apply(*args, operation)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                # A failed condition is still billed
+                self.ledger.record(operation, self.name, wcu=1.0)
+            raise
+        self.ledger.record(operation, self.name, items=1, wcu=result[-1])
+        return result
+
+    def get_item(self, Key: Dict[str, Any], ConsistentRead: bool = False, ProjectionExpression: Optional[str] = None,
+                 ExpressionAttributeNames: Optional[Dict[str, str]] = None, **kwargs: Any) -> Dict[str, Any]:
+        item = self.items.get(self._exact_key(Key, 'GetItem'))
+        self.ledger.record('GetItem', self.name, items=int(item is not None), scanned=int(item is not None),
+                           rcu=read_units(item_size(item), ConsistentRead))
+        response = {} if item is None else {'Item': _project(item, ProjectionExpression, ExpressionAttributeNames)}
+        return self._with_capacity(response, kwargs)
+
+    def put_item(self, Item: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        current, new, _ = self._recorded_write('PutItem', self._apply_put, Item, kwargs)
+        return self._with_capacity(self._returned(current, new, kwargs), kwargs)
+
+    def update_item(self, Key: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        current, new, _ = self._recorded_write('UpdateItem', self._apply_update, Key, kwargs)
+        return self._with_capacity(self._returned(current, new, kwargs), kwargs)
+
+    def delete_item(self, Key: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        current, _ = self._recorded_write('DeleteItem', self._apply_delete, Key, kwargs)
+        return self._with_capacity(self._returned(current, None, kwargs), kwargs)
+
+    def _with_capacity(self, response: Dict[str, Any], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add ConsumedCapacity for the request just recorded when it was asked for
+        """
+        if kwargs.get('ReturnConsumedCapacity') not in ('TOTAL', 'INDEXES'):
+            return response
+        entry = self.ledger.requests[-1]
+        consumed = {'TableName': self.name, 'CapacityUnits': entry['rcu'] + entry['wcu']}
+        if entry['operation'] in READS:
+            consumed['ReadCapacityUnits'] = entry['rcu']
+        else:
+            consumed['WriteCapacityUnits'] = entry['wcu']
+        response['ConsumedCapacity'] = consumed
+        return response
+
+    # Reads over many items
+
+    def _ordered(self, key_names: Tuple[str, ...], partition: Any = None, has_partition: bool = False) -> List[Dict[str, Any]]:
+        """
+        Items carrying every attribute of key_names, in key order; a GSI only
+        holds the items that have its key attributes
+        """
+        rows = [item for item in self.items.values()
+                if all(name in item for name in key_names) and (not has_partition or item[key_names[0]] == partition)]
+        if len(key_names) > 1:
+            rows.sort(key=lambda item: item[key_names[1]])
+        return rows
+
+    def _page(self, rows: List[Dict[str, Any]], key_names: Tuple[str, ...], kwargs: Dict[str, Any],
+              operation: str) -> Dict[str, Any]:
+        all_keys = tuple(dict.fromkeys(self.key_names + key_names))
+        start = kwargs.get('ExclusiveStartKey')
+        if start:
+            start_key = tuple(to_dynamo(start.get(name)) for name in all_keys)
+            for position, item in enumerate(rows):
+                if tuple(item.get(name) for name in all_keys) == start_key:
+                    rows = rows[position + 1:]
+                    break
+            else:
+                rows = []
+        limit = kwargs.get('Limit') or len(rows)
+        # A page ends at Limit items or once 1 MB has been examined
+        page, examined_bytes = [], 0
+        for item in rows[:limit]:
+            page.append(item)
+            examined_bytes += item_size(item)
+            if examined_bytes >= MAX_PAGE_BYTES:
+                break
+        names, values = kwargs.get('ExpressionAttributeNames'), _values(kwargs)
+        matched = [item for item in page if evaluate(kwargs.get('FilterExpression'), item, names, values)]
+        self.ledger.record(operation, self.name, items=len(matched), scanned=len(page),
+                           rcu=read_units(examined_bytes, kwargs.get('ConsistentRead', False)))
+        response = {'Count': len(matched), 'ScannedCount': len(page)}
+        if kwargs.get('Select') != 'COUNT':
+            response['Items'] = [_project(item, kwargs.get('ProjectionExpression'), names) for item in matched]
+        if len(page) < len(rows):
+            response['LastEvaluatedKey'] = {name: page[-1][name] for name in all_keys}
+        return self._with_capacity(response, kwargs)
+
+    def _index_keys(self, index_name: Optional[str], operation: str) -> Tuple[str, ...]:
+        if not index_name:
+            return self.key_names
+        if index_name not in self.indexes:
+            raise validation_error(f'The table does not have the specified index: {index_name}', operation)
+        return self.indexes[index_name]
+
+    def query(self, KeyConditionExpression: str, IndexName: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+        key_names = self._index_keys(IndexName, 'Query')
+        names, values = kwargs.get('ExpressionAttributeNames') or {}, _values(kwargs) or {}
+        for name, placeholder in _KEY_EQUALS.findall(KeyConditionExpression):
+            if resolve_name(name, names) == key_names[0]:
+                partition = values.get(placeholder)
+                break
+        else:
+            raise validation_error('Query condition missed key schema element: ' + key_names[0], 'Query')
+        rows = [item for item in self._ordered(key_names, partition, True)
+                if evaluate(KeyConditionExpression, item, names, values)]
+        if kwargs.get('ScanIndexForward') is False:
+            rows.reverse()
+        return self._page(rows, key_names, kwargs, 'Query')
+
+    def scan(self, IndexName: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+        key_names = self._index_keys(IndexName, 'Scan')
+        rows = self._ordered(key_names) if IndexName else list(self.items.values())
+        segments = kwargs.get('TotalSegments')
+        if segments:
+            segment = kwargs.get('Segment', 0)
+            rows = [item for item in rows
+                    if zlib.crc32(repr(self._key_of(item, 'Scan')).encode('utf-8')) % segments == segment]
+        return self._page(rows, key_names, kwargs, 'Scan')
+
+    def batch_writer(self, overwrite_by_pkeys: Optional[List[str]] = None) -> 'MemoryBatchWriter':
+        return MemoryBatchWriter(self)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self.items.values()))
+
+class MemoryBatchWriter:
+    """
+    batch_writer() context manager: buffered writes go out as
+    BatchWriteItem requests of up to 25 items
+    """
+
+    def __init__(self, table: MemoryTable):
+        self.table = table
+        self.pending: List[Tuple[str, Dict[str, Any]]] = []
+
+    def put_item(self, Item: Dict[str, Any]) -> None:
+        self.pending.append(('put', to_dynamo(Item)))
+        if len(self.pending) >= MAX_BATCH_WRITE:
+            self.flush()
+
+    def delete_item(self, Key: Dict[str, Any]) -> None:
+        self.pending.append(('delete', dict(Key)))
+        if len(self.pending) >= MAX_BATCH_WRITE:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        units = 0.0
+        for action, payload in self.pending:
+            if action == 'put':
+                units += self.table._apply_put(payload, {}, 'BatchWriteItem')[-1]
+            else:
+                units += self.table._apply_delete(payload, {}, 'BatchWriteItem')[-1]
+        self.table.ledger.record('BatchWriteItem', self.table.name, items=len(self.pending), wcu=units)
+        self.pending = []
+
+    def __enter__(self) -> 'MemoryBatchWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.flush()
+
+class _Meta:
+    def __init__(self, client: 'MemoryClient'):
+        self.client = client
+
+class MemoryDynamoDB:
+    """
+    Stand-in for boto3.resource('dynamodb'); tables are created on first use
+    with their DEFAULT_KEY_SCHEMAS entry (or create_table)
+    """
+
+    def __init__(self, key_schemas: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self.key_schemas = dict(DEFAULT_KEY_SCHEMAS, **(key_schemas or {}))
+        self.tables: Dict[str, MemoryTable] = {}
+        self.ledger = Ledger()
+        self.meta = _Meta(MemoryClient(self))
+
+    def create_table(self, name: str, key_schema: Tuple[str, ...],
+                     indexes: Optional[Dict[str, Tuple[str, ...]]] = None) -> MemoryTable:
+        self.tables[name] = MemoryTable(name, key_schema, indexes, self.ledger)
+        return self.tables[name]
+
+    def Table(self, name: str) -> MemoryTable:
+        if name not in self.tables:
+            if name not in self.key_schemas:
+                raise ClientError({'Error': {'Code': 'ResourceNotFoundException',
+                                             'Message': f'Requested resource not found: Table: {name} not found'}},
+                                  'DescribeTable')
+            self.create_table(name, self.key_schemas[name])
+        return self.tables[name]
+
+    def batch_get_item(self, RequestItems: Dict[str, Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        if sum(len(request['Keys']) for request in RequestItems.values()) > MAX_BATCH_GET:
+            raise validation_error('Too many items requested for the BatchGetItem call', 'BatchGetItem')
+        responses, units, found = {}, 0.0, 0
+        for table_name, request in RequestItems.items():
+            table = self.Table(table_name)
+            items = []
+            for key in request['Keys']:
+                item = table.items.get(table._exact_key(key, 'BatchGetItem'))
+                units += read_units(item_size(item), request.get('ConsistentRead', False))
+                if item is not None:
+                    items.append(_project(item, request.get('ProjectionExpression'),
+                                          request.get('ExpressionAttributeNames')))
+            responses[table_name] = items
+            found += len(items)
+        self.ledger.record('BatchGetItem', ','.join(RequestItems), items=found, scanned=found, rcu=units)
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict[str, Any]]], **kwargs: Any) -> Dict[str, Any]:
+        if sum(len(requests) for requests in RequestItems.values()) > MAX_BATCH_WRITE:
+            raise validation_error('Too many items requested for the BatchWriteItem call', 'BatchWriteItem')
+        units: Dict[str, float] = {}
+        written = 0
+        for table_name, requests in RequestItems.items():
+            table = self.Table(table_name)
+            units[table_name] = 0.0
+            for request in requests:
+                if 'PutRequest' in request:
+                    units[table_name] += table._apply_put(request['PutRequest']['Item'], {}, 'BatchWriteItem')[-1]
+                else:
+                    units[table_name] += table._apply_delete(request['DeleteRequest']['Key'], {}, 'BatchWriteItem')[-1]
+                written += 1
+        self.ledger.record('BatchWriteItem', ','.join(RequestItems), items=written, wcu=sum(units.values()))
+        return with_write_capacity({'UnprocessedItems': {}}, units, kwargs)
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Every table's items, for persisting
+        """
+        return {name: [copy.deepcopy(item) for item in table.items.values()] for name, table in self.tables.items()}
+
+    def restore(self, snapshot: Dict[str, List[Dict[str, Any]]]) -> None:
+        """
+        Load a snapshot without recording it as traffic
+        """
+        for name, items in snapshot.items():
+            table = self.Table(name)
+            for item in items:
+                stored = to_dynamo(item)
+                table.items[table._key_of(stored, 'Restore')] = stored
+
+class MemoryClient:
+    """
+    Stand-in for boto3.client('dynamodb') transactions, taking and returning
+    low-level attribute values ({'S': ...}) like the real client
+    """
+
+    def __init__(self, dynamodb: MemoryDynamoDB):
+        self.dynamodb = dynamodb
+        from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+        self._deserializer = TypeDeserializer()
+        self._serializer = TypeSerializer()
+
+    def _plain(self, attributes: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if attributes is None:
+            return None
+        return {name: self._deserializer.deserialize(value) for name, value in attributes.items()}
+
+    def _request(self, operation: Dict[str, Any]) -> Dict[str, Any]:
+        request = dict(operation)
+        for field in ('Item', 'Key', 'ExpressionAttributeValues'):
+            if field in request:
+                request[field] = self._plain(request[field])
+        return request
+
+    def transact_write_items(self, TransactItems: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        """
+        All-or-nothing writes: every condition is checked before anything
+        is applied, and a failure cancels the whole transaction
+        """
+        if len(TransactItems) > MAX_TRANSACT_ITEMS:
+            raise validation_error('Member must have length less than or equal to 100', 'TransactWriteItems')
+        plans, reasons, seen = [], [], set()
+        for entry in TransactItems:
+            (kind, operation), = entry.items()
+            request = self._request(operation)
+            table = self.dynamodb.Table(request['TableName'])
+            key = table._key_of(to_dynamo(request['Item']), 'TransactWriteItems') if kind == 'Put' \
+                else table._exact_key(request['Key'], 'TransactWriteItems')
+            if (table.name, key) in seen:
+                raise validation_error('Transaction request cannot include multiple operations on one item',
+                                       'TransactWriteItems')
+            seen.add((table.name, key))
+            holds = table._condition_holds(table.items.get(key), request)
+            reasons.append({'Code': 'None'} if holds else
+                           {'Code': 'ConditionalCheckFailed', 'Message': 'The conditional request failed'})
+            plans.append((kind, table, request))
+        if any(reason['Code'] != 'None' for reason in reasons):
+            self.dynamodb.ledger.record('TransactWriteItems', ','.join(sorted({plan[1].name for plan in plans})),
+                                        wcu=2.0 * len(plans))
+            error = ClientError({'Error': {'Code': 'TransactionCanceledException',
+                                           'Message': 'Transaction cancelled, please refer cancellation reasons'},
+                                 'CancellationReasons': reasons}, 'TransactWriteItems')
+            raise error
+        units: Dict[str, float] = {}
+        for kind, table, request in plans:
+            if kind == 'Put':
+                written = table._apply_put(request['Item'], request, 'TransactWriteItems')[-1]
+            elif kind == 'Update':
+                written = table._apply_update(request['Key'], request, 'TransactWriteItems')[-1]
+            elif kind == 'Delete':
+                written = table._apply_delete(request['Key'], request, 'TransactWriteItems')[-1]
+            else:
+                written = write_units(item_size(table.items.get(table._exact_key(request['Key'], 'ConditionCheck'))))
+            units[table.name] = units.get(table.name, 0.0) + 2.0 * written
+        self.dynamodb.ledger.record('TransactWriteItems', ','.join(sorted(units)),
+                                    items=len(plans), wcu=sum(units.values()))
+        return with_write_capacity({}, units, kwargs)
+
+    def transact_get_items(self, TransactItems: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        responses, units = [], 0.0
+        for entry in TransactItems:
+            request = self._request(entry['Get'])
+            table = self.dynamodb.Table(request['TableName'])
+            item = table.items.get(table._exact_key(request['Key'], 'TransactGetItems'))
+            units += 2.0 * read_units(item_size(item), True)
+            responses.append({'Item': {name: self._serializer.serialize(value) for name, value in item.items()}}
+                             if item is not None else {})
+        self.dynamodb.ledger.record('TransactGetItems', ','.join(sorted({entry['Get']['TableName'] for entry in TransactItems})),
+                                    items=sum(1 for response in responses if response), rcu=units)
+        return {'Responses': responses}
@@ -0,0 +1,298 @@
+"""
+Single-process asyncio server hosting every WebSocket route in memory
+
+The Lambda handlers run unchanged: each socket event is turned into the
+API Gateway-shaped event the handler would receive and dispatched through
+websocket_router. aws_clients is pointed at an in-memory DynamoDB and at a
+Management API stand-in whose post_to_connection writes straight to the
+target socket, so fan-out never leaves the process and no AWS service is
+involved.
+
+Handlers run on the event loop thread one at a time, which gives every
+room the same serialized view of its item that conditional writes give in
+DynamoDB; sockets are read and written concurrently around them.
+"""
+import asyncio
+import base64
+import contextlib
+import json
+import os
+import secrets
+import time
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+from devserver.memory_table import MemoryDynamoDB
+from devserver.stores import MemoryStore
+from devserver.websocket import (ConnectionClosed, WebSocket, read_request_head, reject, server_handshake,
+                                 split_target)
+from lambdas import aws_clients, connections
+
+ENDPOINT = 'http://devserver.local'
+ENVIRONMENT = {
+    'ROOM_TABLE': 'GameRooms',
+    'USER_TABLE': 'UsersTable',
+    'WEBSOCKET_CONNECTIONS_TABLE': 'WebSocketConnections',
+    'WEBSOCKET_ENDPOINT': ENDPOINT
+}
+# Key schema of the table each environment variable names; the connections
+# table follows CONNECTIONS_KEY_SCHEMA (lambdas/connections.py)
+TABLE_KEYS = {
+    'ROOM_TABLE': ('roomId',),
+    'USER_TABLE': ('username',)
+}
+# REST routes served alongside the sockets so clients can get session tokens
+REST_ROUTES = {
+    ('POST', '/account/create'): 'lambdas.account_create',
+    ('POST', '/account/login'): 'lambdas.account_login'
+}
+
+class _Discard:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+class ManagementApi:
+    """
+    Stand-in for the apigatewaymanagementapi client
+    """
+
+    def __init__(self, server: 'DevServer'):
+        self.server = server
+
+    def post_to_connection(self, ConnectionId: str, Data: Any) -> Dict[str, Any]:
+        connection = self.server.connections.get(ConnectionId)
+        if connection is None:
+            raise ClientError({'Error': {'Code': 'GoneException', 'Message': 'Connection is gone'}}, 'PostToConnection')
+        connection.outbox.put_nowait(Data.decode('utf-8') if isinstance(Data, bytes) else Data)
+        return {}
+
+class Connection:
+    def __init__(self, connection_id: str, websocket: WebSocket):
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self.outbox: asyncio.Queue = asyncio.Queue()
+
+    async def pump(self) -> None:
+        """
+        Write queued messages to the socket in order
+        """
+        while True:
+            data = await self.outbox.get()
+            try:
+                await self.websocket.send_text(data)
+            except (ConnectionClosed, ConnectionError):
+                return
+
+class DevServer:
+    """
+    The whole backend in one process
+
+    Args:
+        store: where tables are loaded from and checkpointed to (stores.py)
+        checkpoint_seconds: how often a changed snapshot is saved
+        verbose: keep the handlers' print logging
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8080, store: Any = None,
+                 checkpoint_seconds: float = 5.0, verbose: bool = False):
+        self.host = host
+        self.port = port
+        self.store = store or MemoryStore()
+        self.checkpoint_seconds = checkpoint_seconds
+        self.verbose = verbose
+        self.dynamodb = MemoryDynamoDB()
+        self.connections: Dict[str, Connection] = {}
+        self.requests = 0
+        self._saved_at_request = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._checkpointer: Optional[asyncio.Task] = None
+        self._saving: Optional[asyncio.Future] = None
+        self._sessions = set()
+
+    def install(self) -> None:
+        """
+        Point the handlers at the in-memory backend
+        """
+        for name, value in ENVIRONMENT.items():
+            os.environ.setdefault(name, value)
+        if not os.environ.get('SESSION_SECRET'):
+            # Tokens only need to survive this process
+            os.environ['SESSION_SECRET'] = secrets.token_hex(32)
+        self.dynamodb.key_schemas.update({os.environ[env]: keys for env, keys in TABLE_KEYS.items()})
+        layout = connections.layout()
+        indexes = {connections.ACTIVITY_INDEX: ('activityShard', 'lastActivity')}
+        if layout == connections.CONNECTION_ID:
+            indexes[connections.ROOM_INDEX] = ('currentRoomId',)
+        self.dynamodb.create_table(os.environ['WEBSOCKET_CONNECTIONS_TABLE'], connections.KEY_NAMES[layout], indexes)
+        aws_clients.reset()
+        aws_clients.register_resource('dynamodb', self.dynamodb)
+        aws_clients.register_client('apigatewaymanagementapi', ManagementApi(self), os.environ['WEBSOCKET_ENDPOINT'])
+        snapshot = self.store.load()
+        # Connections of a previous run are gone
+        snapshot.pop(os.environ['WEBSOCKET_CONNECTIONS_TABLE'], None)
+        self.dynamodb.restore(snapshot)
+
+    def invoke(self, module_name: str, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a handler module's entry point on an event
+        """
+        from importlib import import_module
+        module = import_module(module_name)
+        entry = getattr(module, 'lambda_handler', None) or module.handler
+        self.requests += 1
+        if self.verbose:
+            return entry(event, None)
+        with contextlib.redirect_stdout(_Discard()):
+            return entry(event, None)
+
+    def dispatch(self, route_key: str, connection_id: str, **fields: Any) -> Dict[str, Any]:
+        """
+        Deliver one WebSocket event through websocket_router
+        """
+        event = dict(fields)
+        event['requestContext'] = dict(fields.get('requestContext', {}), connectionId=connection_id,
+                                       routeKey=route_key, requestTimeEpoch=int(time.time() * 1000),
+                                       domainName=self.host, stage='dev')
+        return self.invoke('lambdas.websocket_router', event)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, target, headers = await read_request_head(reader)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError):
+            writer.close()
+            return
+        if headers.get('upgrade', '').lower() != 'websocket':
+            await self.handle_http(method, target, headers, reader, writer)
+            return
+
+        path, query = split_target(target)
+        connection_id = base64.b64encode(secrets.token_bytes(12)).decode('ascii')
+        peer = writer.get_extra_info('peername') or ('unknown',)
+        identity = {'sourceIp': peer[0], 'userAgent': headers.get('user-agent', 'unknown')}
+        response = self.dispatch('$connect', connection_id, queryStringParameters=query, headers=headers,
+                                 requestContext={'eventType': 'CONNECT', 'identity': identity})
+        if not 200 <= response.get('statusCode', 500) < 300:
+            # API Gateway refuses the upgrade when $connect fails
+            await reject(writer, response.get('statusCode', 500), response.get('body') or '')
+            return
+        if not await server_handshake(writer, headers):
+            return
+
+        connection = Connection(connection_id, WebSocket(reader, writer, client=False))
+        self.connections[connection_id] = connection
+        pump = asyncio.create_task(connection.pump())
+        self._sessions.add(asyncio.current_task())
+        try:
+            while True:
+                text = await connection.websocket.recv_text()
+                response = self.dispatch(self.route_of(text), connection_id, body=text,
+                                         requestContext={'eventType': 'MESSAGE'})
+                # Route responses go back to the caller like a two-way route
+                if response.get('body'):
+                    connection.outbox.put_nowait(response['body'])
+        except (ConnectionClosed, asyncio.CancelledError):
+            pass
+        finally:
+            self._sessions.discard(asyncio.current_task())
+            self.connections.pop(connection_id, None)
+            self.dispatch('$disconnect', connection_id, requestContext={'eventType': 'DISCONNECT'})
+            # Let queued messages drain before the socket goes
+            await asyncio.sleep(0)
+            pump.cancel()
+            await connection.websocket.close()
+
+    @staticmethod
+    def route_of(text: str) -> str:
+        """
+        Route key by the $request.body.action selection expression
+        """
+        try:
+            action = json.loads(text).get('action')
+        except (ValueError, AttributeError):
+            action = None
+        return action if isinstance(action, str) else '$default'
+
+    async def handle_http(self, method: str, target: str, headers: Dict[str, str],
+                          reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        path, query = split_target(target)
+        length = int(headers.get('content-length') or 0)
+        body = (await reader.readexactly(length)).decode('utf-8') if length else None
+        module_name = REST_ROUTES.get((method, path))
+        if module_name is None:
+            response = {'statusCode': 404, 'body': json.dumps({'error': f'No route for {method} {path}'})}
+        else:
+            response = self.invoke(module_name, {'httpMethod': method, 'path': path, 'headers': headers,
+                                                 'queryStringParameters': query, 'body': body})
+        payload = (response.get('body') or '').encode('utf-8')
+        writer.write((
+            f"HTTP/1.1 {response.get('statusCode', 500)} OK\r\n"
+            'Content-Type: application/json\r\n'
+            f'Content-Length: {len(payload)}\r\n'
+            'Connection: close\r\n\r\n'
+        ).encode('ascii') + payload)
+        await writer.drain()
+        writer.close()
+
+    async def checkpoint(self) -> None:
+        """
+        Save the tables if anything ran since the last save
+
+        The snapshot is copied on the event loop, between requests, so it is
+        consistent; the store writes it on a worker thread while the sockets
+        keep being served. Saves never overlap: one left running by a
+        cancelled checkpoint is waited for before the next.
+        """
+        if self._saving is not None:
+            # Its requests were never marked saved, so this save covers them
+            await asyncio.wait([self._saving])
+            self._saving.exception()
+            self._saving = None
+        requests = self.requests
+        if requests == self._saved_at_request:
+            return
+        snapshot = self.dynamodb.snapshot()
+        snapshot.pop(os.environ['WEBSOCKET_CONNECTIONS_TABLE'], None)
+        self._saving = asyncio.get_running_loop().run_in_executor(None, self.store.save, snapshot)
+        try:
+            await asyncio.shield(self._saving)
+        finally:
+            if self._saving.done():
+                self._saving = None
+        self._saved_at_request = requests
+
+    async def _checkpoint_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.checkpoint_seconds)
+            await self.checkpoint()
+
+    async def start(self) -> None:
+        self.install()
+        self._server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.checkpoint_seconds:
+            self._checkpointer = asyncio.create_task(self._checkpoint_loop())
+
+    async def stop(self) -> None:
+        if self._checkpointer:
+            self._checkpointer.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        sessions = list(self._sessions)
+        for session in sessions:
+            session.cancel()
+        await asyncio.gather(*sessions, return_exceptions=True)
+        await self.checkpoint()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        print(f'devserver listening on ws://{self.host}:{self.port} '
+              f'(REST: {", ".join(f"{m} {p}" for m, p in REST_ROUTES)})')
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
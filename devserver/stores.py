@@ -0,0 +1,54 @@
+"""
+Persistence for the devserver's in-memory tables
+
+A store loads a snapshot ({table name: [items]}) at startup and saves one
+when the server checkpoints or shuts down. Game traffic never waits on it.
+"""
+import json
+import os
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from lambdas.json_utils import dumps
+
+Snapshot = Dict[str, List[Dict[str, Any]]]
+
+class MemoryStore:
+    """
+    Keeps nothing: every run starts empty
+    """
+
+    def load(self) -> Snapshot:
+        return {}
+
+    def save(self, snapshot: Snapshot) -> None:
+        pass
+
+class JsonFileStore:
+    """
+    Whole snapshot in one JSON file, replaced atomically on every save
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Snapshot:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            # Numbers come back as Decimal, as they would from DynamoDB
+            return json.load(f, parse_float=Decimal)
+
+    def save(self, snapshot: Snapshot) -> None:
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as f:
+            f.write(dumps(snapshot))
+        os.replace(temporary, self.path)
+
+def open_store(location: str):
+    """
+    Store for a --store argument: 'memory' or a path to a JSON file
+    """
+    if not location or location == 'memory':
+        return MemoryStore()
+    return JsonFileStore(location)
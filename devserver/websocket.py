@@ -0,0 +1,201 @@
+"""
+Minimal RFC 6455 WebSocket framing over asyncio streams
+
+Just enough protocol for the devserver and its clients (load generator,
+tests): the HTTP upgrade handshake, text frames, fragmentation, ping/pong
+and close. No extensions or subprotocols, so no third-party dependency.
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+MAX_MESSAGE_BYTES = 1 << 20
+
+class ConnectionClosed(Exception):
+    pass
+
+def accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + GUID).encode('ascii')).digest()).decode('ascii')
+
+def encode_frame(opcode: int, payload: bytes, mask: bool = False) -> bytes:
+    """
+    One final frame; clients must mask what they send, servers must not
+    """
+    length = len(payload)
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header += bytes([mask_bit | length])
+    elif length < 1 << 16:
+        header += bytes([mask_bit | 126]) + struct.pack('!H', length)
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack('!Q', length)
+    if not mask:
+        return header + payload
+    key = os.urandom(4)
+    return header + key + _apply_mask(payload, key)
+
+def _apply_mask(payload: bytes, key: bytes) -> bytes:
+    if not payload:
+        return payload
+    repeated = (key * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(payload), 'big')
+
+async def read_request_head(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str]]:
+    """
+    Request line and headers (lower-cased names) of an HTTP request
+    """
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, _ = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return method, target, headers
+
+def split_target(target: str) -> Tuple[str, Optional[Dict[str, str]]]:
+    """
+    Path and query parameters (None when there are none, as API Gateway sends)
+    """
+    parts = urlsplit(target)
+    query = dict(parse_qsl(parts.query))
+    return parts.path, query or None
+
+class WebSocket:
+    """
+    An open WebSocket on either end of the connection
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, client: bool):
+        self.reader = reader
+        self.writer = writer
+        self.client = client
+        self.closed = False
+
+    async def send_text(self, text: str) -> None:
+        await self.send_frame(OP_TEXT, text.encode('utf-8'))
+
+    async def send_frame(self, opcode: int, payload: bytes) -> None:
+        if self.closed:
+            raise ConnectionClosed()
+        self.writer.write(encode_frame(opcode, payload, mask=self.client))
+        await self.writer.drain()
+
+    async def _read_frame(self) -> Tuple[bool, int, bytes]:
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+        if length > MAX_MESSAGE_BYTES:
+            raise ConnectionClosed('message too big')
+        key = await self.reader.readexactly(4) if second & 0x80 else None
+        payload = await self.reader.readexactly(length)
+        if key:
+            payload = _apply_mask(payload, key)
+        return bool(first & 0x80), first & 0x0F, payload
+
+    async def recv_text(self) -> str:
+        """
+        Next complete text message, answering pings on the way
+
+        Raises:
+            ConnectionClosed when the peer closes or the stream ends
+        """
+        message, message_opcode = b'', None
+        while True:
+            try:
+                final, opcode, payload = await self._read_frame()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.closed = True
+                raise ConnectionClosed()
+            if opcode == OP_CLOSE:
+                if not self.closed:
+                    await self.close(payload[:2] or struct.pack('!H', 1000))
+                raise ConnectionClosed()
+            if opcode == OP_PING:
+                await self.send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode != OP_CONTINUATION:
+                message_opcode = opcode
+            message += payload
+            if len(message) > MAX_MESSAGE_BYTES:
+                raise ConnectionClosed('message too big')
+            if final:
+                return message.decode('utf-8') if message_opcode == OP_TEXT else message.decode('latin-1')
+
+    async def close(self, code: bytes = struct.pack('!H', 1000)) -> None:
+        if self.closed:
+            return
+        try:
+            self.writer.write(encode_frame(OP_CLOSE, code, mask=self.client))
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+        self.closed = True
+        self.writer.close()
+
+async def server_handshake(writer: asyncio.StreamWriter, headers: Dict[str, str]) -> bool:
+    """
+    Answer an upgrade request with 101, or 400 if it is not one
+    """
+    key = headers.get('sec-websocket-key')
+    if headers.get('upgrade', '').lower() != 'websocket' or not key:
+        await reject(writer, 400, 'Expected a WebSocket upgrade')
+        return False
+    writer.write((
+        'HTTP/1.1 101 Switching Protocols\r\n'
+        'Upgrade: websocket\r\n'
+        'Connection: Upgrade\r\n'
+        f'Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n'
+    ).encode('ascii'))
+    await writer.drain()
+    return True
+
+async def reject(writer: asyncio.StreamWriter, status: int, body: str) -> None:
+    payload = body.encode('utf-8')
+    writer.write((
+        f'HTTP/1.1 {status} {"Forbidden" if status in (401, 403) else "Error"}\r\n'
+        'Content-Type: application/json\r\n'
+        f'Content-Length: {len(payload)}\r\n'
+        'Connection: close\r\n\r\n'
+    ).encode('ascii') + payload)
+    await writer.drain()
+    writer.close()
+
+async def connect(host: str, port: int, path: str = '/') -> WebSocket:
+    """
+    Open a client WebSocket to ws://host:port/path
+
+    Raises:
+        ConnectionRefusedError if the server rejects the upgrade (e.g. a
+        failed $connect), with the HTTP status line as message
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode('ascii')
+    writer.write((
+        f'GET {path} HTTP/1.1\r\n'
+        f'Host: {host}:{port}\r\n'
+        'Upgrade: websocket\r\n'
+        'Connection: Upgrade\r\n'
+        f'Sec-WebSocket-Key: {key}\r\n'
+        'Sec-WebSocket-Version: 13\r\n\r\n'
+    ).encode('ascii'))
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+    status_line = head.split('\r\n', 1)[0]
+    if ' 101 ' not in status_line + ' ' or accept_key(key) not in head:
+        writer.close()
+        raise ConnectionRefusedError(status_line)
+    return WebSocket(reader, writer, client=True)
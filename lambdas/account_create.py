@@ -2,32 +2,28 @@ import json
 import uuid
 import os
 from datetime import datetime, timezone
-from passlib.hash import bcrypt
-from models.user import User
-import boto3
+from lambdas import aws_clients, instrumentation
 from botocore.exceptions import ClientError
+from lambdas.password_policy import hash_password_async
 
+@instrumentation.instrumented('account_create')
 def handler(event, context):
     try:
         body = event.get('body')
         if body is None:
             return {'statusCode': 400, 'body': json.dumps({'error': 'Missing request body'})}
         if isinstance(body, str):
-            body = json.loads(body)
+            with instrumentation.span('parse'):
+                body = json.loads(body)
         username = body.get('username')
         password = body.get('password')
         if not username or not password:
             return {'statusCode': 400, 'body': json.dumps({'error': 'Username and password required'})}
-        user_id = str(uuid.uuid4())
-        password_hash = bcrypt.hash(password)
-        created_at = datetime.now(timezone.utc).isoformat()
-        user = User(userId=user_id, username=username, passwordHash=password_hash, createdAt=created_at)
         # DynamoDB storage
         table_name = os.environ.get('USER_TABLE')
         if not table_name:
             return {'statusCode': 500, 'body': json.dumps({'error': 'USER_TABLE environment variable not set'})}
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(table_name)
+        table = aws_clients.table(table_name)
         # Check if username already exists
         existing = table.scan(
             FilterExpression='username = :u',
@@ -35,6 +31,13 @@ def handler(event, context):
         )
         if existing['Count'] > 0:
             return {'statusCode': 409, 'body': json.dumps({'error': 'Username already exists'})}
+        # Hash on a worker thread only for new usernames, while the model loads
+        pending_hash = hash_password_async(password)
+        # pydantic is only loaded once a request gets this far
+        from models.user import User
+        user_id = str(uuid.uuid4())
+        created_at = datetime.now(timezone.utc).isoformat()
+        user = User(userId=user_id, username=username, passwordHash=pending_hash.result(), createdAt=created_at)
         table.put_item(Item=user.dict())
         user_dict = user.dict()
         user_dict.pop('passwordHash')
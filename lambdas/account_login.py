@@ -1,17 +1,37 @@
 import json
 import os
-from passlib.hash import bcrypt
-from models.user import User
-import boto3
+from lambdas import aws_clients, instrumentation
 from botocore.exceptions import ClientError
+from lambdas.session_tokens import issue_token
+from lambdas.password_policy import verify_password
 
+def rehash_user(table, user_item, new_hash):
+    """
+    Store a hash made under the current password policy
+
+    The write is conditional on the old hash so a concurrent password change
+    wins, and a failed rehash never fails the login; it is retried next time.
+    """
+    try:
+        table.put_item(
+            Item=dict(user_item, passwordHash=new_hash),
+            ConditionExpression='passwordHash = :old',
+            ExpressionAttributeValues={':old': user_item['passwordHash']}
+        )
+        return dict(user_item, passwordHash=new_hash)
+    except ClientError as e:
+        print(f"Password rehash skipped for {user_item.get('userId')}: {e.response['Error']['Code']}")
+        return user_item
+
+@instrumentation.instrumented('account_login')
 def handler(event, context):
     try:
         body = event.get('body')
         if body is None:
             return {'statusCode': 400, 'body': json.dumps({'error': 'Missing request body'})}
         if isinstance(body, str):
-            body = json.loads(body)
+            with instrumentation.span('parse'):
+                body = json.loads(body)
         username = body.get('username')
         password = body.get('password')
         if not username or not password:
@@ -19,8 +39,7 @@ def handler(event, context):
         table_name = os.environ.get('USER_TABLE')
         if not table_name:
             return {'statusCode': 500, 'body': json.dumps({'error': 'USER_TABLE environment variable not set'})}
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(table_name)
+        table = aws_clients.table(table_name)
         # Query for user by username
         result = table.scan(
             FilterExpression='username = :u',
@@ -29,12 +48,18 @@ def handler(event, context):
         if result['Count'] == 0:
             return {'statusCode': 401, 'body': json.dumps({'error': 'Invalid username or password'})}
         user_item = result['Items'][0]
-        if not bcrypt.verify(password, user_item['passwordHash']):
+        matches, new_hash = verify_password(password, user_item['passwordHash'])
+        if not matches:
             return {'statusCode': 401, 'body': json.dumps({'error': 'Invalid username or password'})}
+        if new_hash:
+            user_item = rehash_user(table, user_item, new_hash)
+        # pydantic is only loaded once a request gets this far
+        from models.user import User
         user = User(**user_item)
         user_dict = user.dict()
         user_dict.pop('passwordHash')
-        return {'statusCode': 200, 'body': json.dumps({'user': user_dict})}
+        session = issue_token(user.userId, user.username)
+        return {'statusCode': 200, 'body': json.dumps({'user': user_dict, 'token': session['token'], 'expiresAt': session['expiresAt']})}
     except ClientError as e:
         return {'statusCode': 500, 'body': json.dumps({'error': e.response['Error']['Message']})}
     except Exception as e:
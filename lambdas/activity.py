@@ -0,0 +1,90 @@
+import os
+import time
+from typing import Dict, Optional
+from lambdas import connections, instrumentation
+
+# Write-behind lastActivity for connection records.
+#
+# The router touch()es the connection of every message it routes (the
+# heartbeat route exists so idle clients have something to send) and calls
+# flush() once the handler has answered. A touch only reaches DynamoDB when
+# this container has not written the connection's lastActivity for
+# ACTIVITY_INTERVAL_SECONDS; otherwise it is dropped. The write itself is
+# conditional on the stored value being older than the interval, so
+# containers sharing a connection do not write it twice either, and it
+# never recreates a deleted connection (connections.touch).
+#
+# Like instrumentation, the state is per container: a Lambda container
+# serves one request at a time, and a cold container writes once at most.
+#
+# Environment:
+#   ACTIVITY_INTERVAL_SECONDS  least time between two lastActivity writes of a connection (default 60)
+
+# Connections remembered before the least recently written are forgotten
+MAX_TRACKED_CONNECTIONS = 10000
+
+# connectionId -> lastActivity (epoch ms) this container last wrote or created
+_written: Dict[str, int] = {}
+# connectionId -> latest activity (epoch ms) not yet flushed
+_pending: Dict[str, int] = {}
+
+def interval_ms() -> int:
+    return int(float(os.environ.get('ACTIVITY_INTERVAL_SECONDS', '60')) * 1000)
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+def written(connection_id: str, at: int) -> None:
+    """
+    Note a lastActivity already stored, e.g. by $connect creating the record
+    """
+    _written.pop(connection_id, None)
+    _written[connection_id] = at
+    while len(_written) > MAX_TRACKED_CONNECTIONS:
+        del _written[next(iter(_written))]
+
+def touch(connection_id: str, at: Optional[int] = None) -> None:
+    """
+    Record activity on a connection, to be written by the next flush()
+    """
+    at = at or now_ms()
+    _pending[connection_id] = max(at, _pending.get(connection_id, 0))
+
+def forget(connection_id: str) -> None:
+    """
+    Drop a connection that has disconnected
+    """
+    _pending.pop(connection_id, None)
+    _written.pop(connection_id, None)
+
+def flush() -> int:
+    """
+    Write the pending activity that is due; errors are logged, not raised,
+    since the request has already been served
+
+    Returns:
+        Number of connections written
+    """
+    pending = list(_pending.items())
+    _pending.clear()
+    count = 0
+    interval = interval_ms()
+    for connection_id, at in pending:
+        if at - _written.get(connection_id, 0) < interval:
+            continue
+        try:
+            with instrumentation.span('activity'):
+                if connections.touch(connection_id, at, at - interval):
+                    count += 1
+            # Written now or recently enough by another container
+            written(connection_id, at)
+        except Exception as e:
+            print(f"Error recording activity of {connection_id}: {str(e)}")
+    return count
+
+def reset() -> None:
+    """
+    Forget every connection (used by tests)
+    """
+    _written.clear()
+    _pending.clear()
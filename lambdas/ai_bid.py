@@ -1,5 +1,7 @@
 import json
+from lambdas import instrumentation
 
+@instrumentation.instrumented('ai_bid')
 def handler(event, context):
     # TODO: Implement AI bid suggestion logic
     return {
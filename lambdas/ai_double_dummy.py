@@ -1,8 +1,90 @@
 import json
+import hashlib
+from collections import OrderedDict
+from lambdas.par import calculate_par, normalize_dd_table
+from lambdas import instrumentation
 
+# Warm-container cache: deal key -> {'ddTable': ..., 'par': {'<vul>:<dealer>': ...}}
+MAX_CACHED_DEALS = 512
+_deal_cache = OrderedDict()
+
+def _deal_key(body, dd_table):
+    """
+    Cache key for a deal: the hands when given, otherwise the table itself
+    """
+    source = body.get('hands') or dd_table
+    return hashlib.sha1(json.dumps(source, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _cache_get(key):
+    entry = _deal_cache.get(key)
+    if entry is not None:
+        _deal_cache.move_to_end(key)
+    return entry
+
+def _cache_put(key, entry):
+    _deal_cache[key] = entry
+    _deal_cache.move_to_end(key)
+    while len(_deal_cache) > MAX_CACHED_DEALS:
+        _deal_cache.popitem(last=False)
+
+@instrumentation.instrumented('ai_double_dummy')
 def handler(event, context):
-    # TODO: Implement double dummy analysis logic
-    return {
-        'statusCode': 200,
-        'body': json.dumps({'message': 'Double dummy analysis (stub)'})
-    } 
\ No newline at end of file
+    """
+    Par score and contracts for a deal from its double-dummy table
+
+    The handler does no double-dummy solving: the caller sends the table
+    (ddTable), computed client-side or by a solver service. hands are only
+    a cache key, so a request with hands and no table is answered from a
+    table this container cached for the same hands; otherwise it gets a
+    400 'ddTable required'.
+    """
+    try:
+        body = event.get('body')
+        if body is None:
+            return {'statusCode': 400, 'body': json.dumps({'error': 'Missing request body'})}
+        if isinstance(body, str):
+            with instrumentation.span('parse'):
+                body = json.loads(body)
+
+        vulnerability = body.get('vulnerability', 'None')
+        dealer = body.get('dealer', 'N')
+        if vulnerability not in ('None', 'NS', 'EW', 'Both'):
+            return {'statusCode': 400, 'body': json.dumps({'error': 'Invalid vulnerability'})}
+        if dealer not in ('N', 'E', 'S', 'W'):
+            return {'statusCode': 400, 'body': json.dumps({'error': 'Invalid dealer'})}
+
+        raw_table = body.get('ddTable')
+        if raw_table is None and not body.get('hands'):
+            return {'statusCode': 400, 'body': json.dumps({'error': 'ddTable required'})}
+
+        key = _deal_key(body, raw_table)
+        entry = _cache_get(key)
+        if entry is None:
+            if raw_table is None:
+                return {'statusCode': 400, 'body': json.dumps({'error': 'ddTable required'})}
+            entry = {'ddTable': normalize_dd_table(raw_table), 'par': {}}
+            _cache_put(key, entry)
+
+        par_key = f"{vulnerability}:{dealer}"
+        par = entry['par'].get(par_key)
+        cached = par is not None
+        if not cached:
+            par = calculate_par(entry['ddTable'], vulnerability, dealer)
+            entry['par'][par_key] = par
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'Double dummy analysis',
+                'ddTable': entry['ddTable'],
+                'vulnerability': vulnerability,
+                'dealer': dealer,
+                'parScore': par['parScore'],
+                'parContracts': par['parContracts'],
+                'cached': cached
+            })
+        }
+    except ValueError as e:
+        return {'statusCode': 400, 'body': json.dumps({'error': str(e)})}
+    except Exception as e:
+        return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
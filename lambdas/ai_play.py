@@ -1,5 +1,7 @@
 import json
+from lambdas import instrumentation
 
+@instrumentation.instrumented('ai_play')
 def handler(event, context):
     # TODO: Implement AI play suggestion logic
     return {
@@ -0,0 +1,111 @@
+import os
+import threading
+from typing import Dict, Any, Optional, Set, Tuple
+from lambdas.consumed_capacity import MeteredTable
+from lambdas.instrumentation import watch_boto_client
+
+# boto3 clients and resources are created on first use and then reused by
+# every warm invocation of the container. boto3 itself is only imported then,
+# so handler paths that never reach AWS (validation errors, routing) skip it.
+# Every boto3 call is timed into the invocation's metrics (instrumentation.py)
+# and Tables report their consumed capacity (consumed_capacity.py).
+_resources: Dict[str, Any] = {}
+_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+_tables: Dict[str, Any] = {}
+# Services served by a registered stand-in rather than boto3
+_registered: Set[str] = set()
+_local = threading.local()
+# Metric span each service's calls are timed into
+_SPANS = {'apigatewaymanagementapi': 'managementApi'}
+
+def resource(service_name: str = 'dynamodb') -> Any:
+    """
+    Shared boto3 resource for a service
+    """
+    if service_name not in _resources:
+        import boto3
+        _resources[service_name] = boto3.resource(service_name)
+        watch_boto_client(_resources[service_name].meta.client, service_name, _SPANS.get(service_name, service_name))
+    return _resources[service_name]
+
+def client(service_name: str, endpoint_url: Optional[str] = None) -> Any:
+    """
+    Shared boto3 client for a service, one per endpoint URL
+    """
+    key = (service_name, endpoint_url)
+    if key not in _clients:
+        import boto3
+        if endpoint_url:
+            _clients[key] = boto3.client(service_name, endpoint_url=endpoint_url)
+        else:
+            _clients[key] = boto3.client(service_name)
+        watch_boto_client(_clients[key], service_name, _SPANS.get(service_name, service_name))
+    return _clients[key]
+
+def table(table_name: str) -> Any:
+    """
+    Shared DynamoDB Table object by table name, metered unless
+    TRACK_CONSUMED_CAPACITY is 'false'
+    """
+    if table_name not in _tables:
+        dynamodb_table = resource('dynamodb').Table(table_name)
+        if os.environ.get('TRACK_CONSUMED_CAPACITY', 'true').lower() != 'false':
+            dynamodb_table = MeteredTable(dynamodb_table, table_name)
+        _tables[table_name] = dynamodb_table
+    return _tables[table_name]
+
+def table_from_env(table_name_env: str) -> Any:
+    """
+    Shared DynamoDB Table object named by an environment variable
+
+    Raises:
+        ValueError if the environment variable is not set
+    """
+    table_name = os.environ.get(table_name_env)
+    if not table_name:
+        raise ValueError(f"{table_name_env} environment variable not set")
+    return table(table_name)
+
+def thread_table(table_name: str) -> Any:
+    """
+    DynamoDB Table for worker threads: boto3 resources are not thread-safe,
+    so each thread gets its own session's (unmetered). A registered resource
+    is shared as is.
+    """
+    if 'dynamodb' in _registered:
+        return table(table_name)
+    tables = getattr(_local, 'tables', None)
+    if tables is None:
+        import boto3
+        _local.dynamodb = boto3.session.Session().resource('dynamodb')
+        tables = _local.tables = {}
+    if table_name not in tables:
+        tables[table_name] = _local.dynamodb.Table(table_name)
+    return tables[table_name]
+
+def register_resource(service_name: str, resource_object: Any) -> None:
+    """
+    Serve a service's resource (and its Tables) from resource_object instead
+    of boto3, e.g. the devserver's in-memory DynamoDB
+    """
+    _resources[service_name] = resource_object
+    _registered.add(service_name)
+    if service_name == 'dynamodb':
+        _tables.clear()
+
+def register_client(service_name: str, client_object: Any, endpoint_url: Optional[str] = None) -> None:
+    """
+    Serve a service's client for an endpoint URL from client_object instead of boto3
+    """
+    _clients[(service_name, endpoint_url)] = client_object
+
+def reset() -> None:
+    """
+    Drop every cached client, resource and table (used by tests)
+    """
+    global _local
+    _resources.clear()
+    _clients.clear()
+    _tables.clear()
+    _registered.clear()
+    _local = threading.local()
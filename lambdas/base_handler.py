@@ -1,22 +1,23 @@
 import json
-import os
-import boto3
+from lambdas import aws_clients, instrumentation
 from botocore.exceptions import ClientError
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, Union
+from lambdas.json_utils import json_default
+from lambdas.session_tokens import authenticate, InvalidToken
 
 class BaseLambdaHandler(ABC):
     """
     Base class for Lambda handlers providing common functionality
     """
     
-    def __init__(self):
-        self.dynamodb = boto3.resource('dynamodb')
-    
     def handle_request(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         """
         Main request handler with common error handling
         """
+        return instrumentation.run(self.metrics_route(event), self._handle_request, event, context)
+    
+    def _handle_request(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         try:
             return self.process_request(event, context)
         except ClientError as e:
@@ -27,6 +28,13 @@ class BaseLambdaHandler(ABC):
         except Exception as e:
             return self.error_response(500, f"Unexpected error: {str(e)}")
     
+    def metrics_route(self, event: Dict[str, Any]) -> str:
+        """
+        Route dimension of the invocation's metrics: the WebSocket route key,
+        otherwise the handler's module name
+        """
+        return instrumentation.route_of(event, type(self).__module__.rsplit('.', 1)[-1])
+    
     @abstractmethod
     def process_request(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         """
@@ -41,7 +49,7 @@ class BaseLambdaHandler(ABC):
         return {
             'statusCode': status_code,
             'headers': self.get_cors_headers(),
-            'body': json.dumps(data)
+            'body': json.dumps(data, default=json_default)
         }
     
     def error_response(self, status_code: int, error_message: str) -> Dict[str, Any]:
@@ -61,7 +69,7 @@ class BaseLambdaHandler(ABC):
         return {
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Allow-Headers': 'Content-Type, Authorization',
             'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS'
         }
     
@@ -69,10 +77,7 @@ class BaseLambdaHandler(ABC):
         """
         Get DynamoDB table by environment variable name
         """
-        table_name = os.environ.get(table_name_env)
-        if not table_name:
-            raise ValueError(f"{table_name_env} environment variable not set")
-        return self.dynamodb.Table(table_name)
+        return aws_clients.table_from_env(table_name_env)
     
     def validate_required_fields(self, data: Dict[str, Any], required_fields: list) -> Optional[str]:
         """
@@ -84,6 +89,17 @@ class BaseLambdaHandler(ABC):
                 return f"{field} is required"
         return None
     
+    def authenticate(self, event: Dict[str, Any], data: Dict[str, Any], user_field: str = 'userId') -> Optional[str]:
+        """
+        Verify the session token and make its user the acting user (data[user_field])
+        Returns error message if authentication fails, None if successful
+        """
+        try:
+            authenticate(event, data, user_field)
+        except InvalidToken as e:
+            return str(e)
+        return None
+    
     def parse_body(self, event: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse and validate request body
@@ -93,7 +109,8 @@ class BaseLambdaHandler(ABC):
             raise ValueError("Missing request body")
         
         if isinstance(body, str):
-            return json.loads(body)
+            with instrumentation.span('parse'):
+                return json.loads(body)
         return body
     
     def extract_data_from_body(self, body: Dict[str, Any]) -> Dict[str, Any]:
@@ -126,6 +143,9 @@ class WebSocketBaseHandler(BaseLambdaHandler):
         """
         Handle WebSocket requests with route key validation
         """
+        return instrumentation.run(self.metrics_route(event), self._handle_websocket_request, event, context)
+    
+    def _handle_websocket_request(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         try:
             route_key = event.get('requestContext', {}).get('routeKey')
             
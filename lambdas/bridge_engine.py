@@ -0,0 +1,299 @@
+import random
+from typing import Dict, Any, List, Optional, Tuple
+from lambdas.scoring import SEATS, STRAINS, final_contract, score_hand
+from lambdas.game_views import PARTNERS
+from lambdas import room_events
+
+SUITS = ['C', 'D', 'H', 'S']
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+CONTRACT_BIDS = [f"{level}{strain}" for level in range(1, 8) for strain in STRAINS]
+VALID_BIDS = ['pass'] + CONTRACT_BIDS + ['double', 'redouble']
+
+_RANK_VALUE = {rank: value for value, rank in enumerate(RANKS)}
+_BID_RANK = {bid: rank for rank, bid in enumerate(CONTRACT_BIDS)}
+
+class IllegalAction(ValueError):
+    """
+    Raised when a bid, play or start is not allowed in the current game state
+    """
+    pass
+
+def next_seat(seat: str) -> str:
+    return SEATS[(SEATS.index(seat) + 1) % 4]
+
+def same_side(seat: str, other: str) -> bool:
+    return seat == other or PARTNERS[seat] == other
+
+def normalize_card(card: str) -> str:
+    """
+    Canonical card code such as 'AH' or 'TS' ('10S' is accepted for tens)
+
+    Raises:
+        IllegalAction if the card is not a valid card code
+    """
+    text = card.strip().upper() if isinstance(card, str) else ''
+    if text.startswith('10'):
+        text = 'T' + text[2:]
+    if len(text) != 2 or text[0] not in _RANK_VALUE or text[1] not in SUITS:
+        raise IllegalAction(
+            f'Invalid card format. Use format like "AH" (Ace of Hearts). '
+            f'Valid ranks: {", ".join(RANKS)}, Valid suits: {", ".join(SUITS)}'
+        )
+    return text
+
+def deal_hands(rng: Optional[random.Random] = None) -> Dict[str, List[str]]:
+    """
+    Shuffle and deal 13 cards to each seat, each hand sorted by suit and rank
+    """
+    rng = rng or random
+    deck = [rank + suit for suit in SUITS for rank in RANKS]
+    rng.shuffle(deck)
+    hands = {}
+    for index, seat in enumerate(SEATS):
+        hand = deck[index * 13:(index + 1) * 13]
+        hand.sort(key=lambda card: (SUITS.index(card[1]), _RANK_VALUE[card[0]]), reverse=True)
+        hands[seat] = hand
+    return hands
+
+def validate_bid(bids: List[Dict[str, Any]], seat: str, call: str) -> None:
+    """
+    Check that a call is legal after the given auction
+
+    Raises:
+        IllegalAction if the call is not a valid bid or is insufficient
+    """
+    if call not in VALID_BIDS:
+        raise IllegalAction(f'Invalid bid. Valid bids: {", ".join(VALID_BIDS)}')
+    if call == 'pass':
+        return
+
+    last_contract = None
+    last_contract_seat = None
+    doubled = 0
+    for entry in bids:
+        previous = entry.get('bid')
+        if previous in _BID_RANK:
+            last_contract, last_contract_seat, doubled = previous, entry.get('seat'), 0
+        elif previous == 'double':
+            doubled = 1
+        elif previous == 'redouble':
+            doubled = 2
+
+    if call in _BID_RANK:
+        if last_contract and _BID_RANK[call] <= _BID_RANK[last_contract]:
+            raise IllegalAction(f'Bid {call} is not higher than {last_contract}')
+    elif call == 'double':
+        if not last_contract or doubled or same_side(seat, last_contract_seat):
+            raise IllegalAction('Double is not allowed now')
+    elif call == 'redouble':
+        if not last_contract or doubled != 1 or not same_side(seat, last_contract_seat):
+            raise IllegalAction('Redouble is not allowed now')
+
+def auction_complete(bids: List[Dict[str, Any]]) -> bool:
+    """
+    An auction ends after four opening passes or three passes after any call
+    """
+    if len(bids) < 4:
+        return False
+    return all(entry.get('bid') == 'pass' for entry in bids[-3:])
+
+def trick_winner(plays: List[Dict[str, Any]], trump: Optional[str] = None) -> Optional[str]:
+    """
+    Seat winning a trick: the highest trump, otherwise the highest card of the led suit
+    """
+    if not plays:
+        return None
+    lead_suit = plays[0]['card'][1]
+    best = plays[0]
+    for play in plays[1:]:
+        card, best_card = play['card'], best['card']
+        if card[1] == best_card[1]:
+            if _RANK_VALUE[card[0]] > _RANK_VALUE[best_card[0]]:
+                best = play
+        elif trump and card[1] == trump:
+            best = play
+        elif card[1] == lead_suit and best_card[1] != trump:
+            best = play
+    return best['seat']
+
+def _current_turn_seat(room_item: Dict[str, Any], game_data: Dict[str, Any]) -> Optional[str]:
+    seat = game_data.get('turnSeat')
+    if seat:
+        return seat
+    # Rooms from before turnSeat existed only record the player whose turn it is
+    for candidate, occupant in room_item.get('seats', {}).items():
+        if occupant == game_data.get('turn'):
+            return candidate
+    return None
+
+def _set_turn(room_item: Dict[str, Any], game_data: Dict[str, Any], seat: str) -> None:
+    """
+    Give the turn to a seat; declarer acts for dummy during the play
+    """
+    game_data['turnSeat'] = seat
+    actor = seat
+    contract = game_data.get('contract')
+    if game_data.get('currentPhase') == 'playing' and contract and seat == PARTNERS[contract['declarer']]:
+        actor = contract['declarer']
+    game_data['turn'] = room_item['seats'][actor]
+
+def _acting_seat(room_item: Dict[str, Any], user_id: str) -> str:
+    for seat, occupant in room_item.get('seats', {}).items():
+        if occupant == user_id:
+            return seat
+    raise IllegalAction('User not found in room')
+
+def start_game(room_item: Dict[str, Any], rng: Optional[random.Random] = None) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    """
+    Fill empty seats with robots, deal, and open the auction
+
+    The dealer is gameData['dealer'] when set, otherwise the owner's seat.
+
+    Returns:
+        (public events, private events per seat)
+    """
+    if room_item.get('state') != 'waiting':
+        raise IllegalAction('Room is not in waiting state')
+
+    events = []
+    seats = room_item['seats']
+    for seat in SEATS:
+        if not seats.get(seat):
+            seats[seat] = f'robot-{seat}'
+            events.append(room_events.seat_changed_event(seat, seats[seat]))
+
+    game_data = room_item.get('gameData') or {}
+    owner_seat = next((seat for seat in SEATS if seats[seat] == room_item.get('ownerId')), 'N')
+    dealer = game_data.get('dealer') or owner_seat
+    vulnerability = game_data.get('vulnerability') or 'None'
+    hands = deal_hands(rng)
+
+    game_data = {
+        'currentPhase': 'bidding',
+        'dealer': dealer,
+        'vulnerability': vulnerability,
+        'bids': [],
+        'hands': hands,
+        'currentTrick': [],
+        'tricks': []
+    }
+    room_item['gameData'] = game_data
+    room_item['state'] = 'bidding'
+    _set_turn(room_item, game_data, dealer)
+
+    events.append(room_events.phase_changed_event('bidding', 'bidding', dealer=dealer, vulnerability=vulnerability))
+    events.append(room_events.hands_dealt_event())
+    private_events = {seat: [room_events.hand_event(seat, hands[seat])] for seat in SEATS}
+    return events, private_events
+
+def apply_bid(room_item: Dict[str, Any], user_id: str, call: str, timestamp: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Apply a call to the room's auction
+
+    Returns:
+        (bid entry, public events)
+    """
+    if room_item.get('state') != 'bidding':
+        raise IllegalAction('Room is not in bidding phase')
+    game_data = room_item.setdefault('gameData', {})
+    bids = game_data.setdefault('bids', [])
+
+    seat = _acting_seat(room_item, user_id)
+    if _current_turn_seat(room_item, game_data) != seat:
+        raise IllegalAction('Not your turn to bid')
+    validate_bid(bids, seat, call)
+
+    entry = {'seat': seat, 'bid': call, 'timestamp': timestamp}
+    bids.append(entry)
+    events = [room_events.bid_event(seat, call)]
+
+    if not auction_complete(bids):
+        _set_turn(room_item, game_data, next_seat(seat))
+        return entry, events
+
+    contract = final_contract(bids)
+    if not contract:
+        # Passed out: nothing to play
+        game_data['currentPhase'] = 'completed'
+        room_item['state'] = 'completed'
+        game_data['result'] = score_hand(game_data)
+        game_data['turn'] = ''
+        game_data['turnSeat'] = ''
+        events.append(room_events.phase_changed_event('completed', 'completed'))
+        events.append(room_events.hand_completed_event(game_data['result']))
+        return entry, events
+
+    game_data['contract'] = contract
+    game_data['currentPhase'] = 'playing'
+    game_data.setdefault('currentTrick', [])
+    game_data.setdefault('tricks', [])
+    room_item['state'] = 'playing'
+    _set_turn(room_item, game_data, next_seat(contract['declarer']))
+    events.append(room_events.phase_changed_event('playing', 'playing', contract=contract))
+    return entry, events
+
+def apply_play(room_item: Dict[str, Any], user_id: str, card: str, timestamp: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Play a card for the seat whose turn it is (declarer plays dummy's cards)
+
+    Returns:
+        (play entry, public events)
+    """
+    if room_item.get('state') != 'playing':
+        raise IllegalAction('Room is not in playing phase')
+    card = normalize_card(card)
+    game_data = room_item.setdefault('gameData', {})
+
+    if game_data.get('turn') != user_id:
+        raise IllegalAction('Not your turn to play')
+    seat = _current_turn_seat(room_item, game_data)
+    if not seat:
+        raise IllegalAction('User not found in room')
+
+    hands = game_data.setdefault('hands', {})
+    hand = hands.get(seat, [])
+    if card not in hand:
+        raise IllegalAction('Card not in your hand')
+
+    current_trick = game_data.setdefault('currentTrick', [])
+    if current_trick:
+        lead_suit = current_trick[0]['card'][1]
+        if card[1] != lead_suit and any(held[1] == lead_suit for held in hand):
+            raise IllegalAction(f'Must follow suit. Lead suit is {lead_suit}')
+
+    hand.remove(card)
+    entry = {'seat': seat, 'card': card, 'timestamp': timestamp}
+    current_trick.append(entry)
+    events = [room_events.play_event(seat, card)]
+
+    tricks = game_data.setdefault('tricks', [])
+    contract = game_data.get('contract') or final_contract(game_data.get('bids', []))
+    if contract and not game_data.get('contract'):
+        game_data['contract'] = contract
+
+    # Dummy is tabled as soon as the opening lead is made
+    if not tricks and len(current_trick) == 1 and contract:
+        dummy = PARTNERS[contract['declarer']]
+        events.append(room_events.dummy_revealed_event(dummy, hands.get(dummy, [])))
+
+    if len(current_trick) < 4:
+        _set_turn(room_item, game_data, next_seat(seat))
+        return entry, events
+
+    trump = contract['strain'] if contract and contract['strain'] != 'NT' else None
+    winner = trick_winner(current_trick, trump)
+    tricks.append({'cards': current_trick, 'winner': winner})
+    game_data['currentTrick'] = []
+    events.append(room_events.trick_closed_event(winner, len(tricks)))
+
+    if len(tricks) == 13:
+        game_data['currentPhase'] = 'completed'
+        game_data['result'] = score_hand(game_data)
+        game_data['turn'] = ''
+        game_data['turnSeat'] = ''
+        room_item['state'] = 'completed'
+        events.append(room_events.phase_changed_event('completed', 'completed'))
+        events.append(room_events.hand_completed_event(game_data['result']))
+    else:
+        _set_turn(room_item, game_data, winner)
+    return entry, events
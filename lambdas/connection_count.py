@@ -1,5 +1,5 @@
-from base_handler import BaseLambdaHandler
-from db_utils import db_utils
+from lambdas.base_handler import BaseLambdaHandler
+from lambdas.db_utils import db_utils
 
 class ConnectionCountHandler(BaseLambdaHandler):
     """
@@ -20,8 +20,8 @@ class ConnectionCountHandler(BaseLambdaHandler):
         return self.success_response(stats)
 
 # Create handler instance
-handler = ConnectionCountHandler()
+connection_count_handler = ConnectionCountHandler()
 
 # Lambda handler function
 def handler(event, context):
-    return handler.handle_request(event, context) 
\ No newline at end of file
+    return connection_count_handler.handle_request(event, context) 
\ No newline at end of file
@@ -0,0 +1,337 @@
+import os
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from botocore.exceptions import ClientError
+from lambdas import aws_clients, unit_of_work
+
+# Connection records, under either key layout of the connections table.
+#
+# room-sort-key (the original layout): connectionId HASH + currentRoomId
+#   RANGE, 'not-joined' until the connection enters a room. Moving into a
+#   room is a delete plus a put, and a disconnect has to query for the
+#   records' sort keys before deleting them.
+# connection-id: connectionId HASH only. currentRoomId is a plain attribute,
+#   left out until the connection enters a room, indexed by the ROOM_INDEX
+#   global secondary index. Moving is one UpdateItem, disconnecting one
+#   DeleteItem.
+#
+# Switching layouts online (README "Connections Table Migration"): name a
+# table in the other layout in WEBSOCKET_CONNECTIONS_MIRROR_TABLE so every
+# write lands in both, backfill it with tools/migrate_connections.py, then
+# swap the two tables and flip CONNECTIONS_KEY_SCHEMA. Reads only ever go
+# to WEBSOCKET_CONNECTIONS_TABLE.
+#
+# Either layout can carry the ACTIVITY_INDEX global secondary index
+# (activityShard HASH + lastActivity RANGE). Records are spread over
+# ACTIVITY_INDEX_SHARDS partitions of it so that the idle reaper
+# (idle_reaper.py) can query each shard for the records idle longest
+# without a hot partition.
+#
+# Environment:
+#   WEBSOCKET_CONNECTIONS_TABLE         table connection records are read from and written to
+#   CONNECTIONS_KEY_SCHEMA              its layout: room-sort-key (default) or connection-id
+#   WEBSOCKET_CONNECTIONS_MIRROR_TABLE  table in the other layout every write is also applied to
+#   ACTIVITY_INDEX_SHARDS               partitions of ACTIVITY_INDEX (default 4)
+
+ROOM_SORT_KEY = 'room-sort-key'
+CONNECTION_ID = 'connection-id'
+KEY_NAMES = {
+    ROOM_SORT_KEY: ('connectionId', 'currentRoomId'),
+    CONNECTION_ID: ('connectionId',)
+}
+# Sort key of a room-sort-key record outside any room
+NOT_JOINED = 'not-joined'
+# Global secondary index on currentRoomId of a connection-id table
+ROOM_INDEX = 'currentRoomId-index'
+# Global secondary index on activityShard + lastActivity
+ACTIVITY_INDEX = 'lastActivity-index'
+
+def layout() -> str:
+    """
+    Key layout of WEBSOCKET_CONNECTIONS_TABLE
+
+    Raises:
+        ValueError if CONNECTIONS_KEY_SCHEMA names no layout
+    """
+    value = os.environ.get('CONNECTIONS_KEY_SCHEMA', ROOM_SORT_KEY)
+    if value not in KEY_NAMES:
+        raise ValueError(f'Unknown CONNECTIONS_KEY_SCHEMA: {value}')
+    return value
+
+def other_layout(current: str) -> str:
+    return CONNECTION_ID if current == ROOM_SORT_KEY else ROOM_SORT_KEY
+
+def key_names_of(table_name: str) -> Tuple[str, ...]:
+    """
+    Key attributes of the connections table or its mirror
+
+    Raises:
+        ValueError for any other table
+    """
+    if table_name == os.environ.get('WEBSOCKET_CONNECTIONS_TABLE'):
+        return KEY_NAMES[layout()]
+    if table_name == os.environ.get('WEBSOCKET_CONNECTIONS_MIRROR_TABLE'):
+        return KEY_NAMES[other_layout(layout())]
+    raise ValueError(f'{table_name} is not a connections table')
+
+def in_layout(record: Dict[str, Any], target: str) -> Dict[str, Any]:
+    """
+    A connection record as stored under a layout: the not-joined placeholder
+    only exists where currentRoomId is the sort key
+    """
+    stored = dict(record)
+    if target == ROOM_SORT_KEY:
+        stored.setdefault('currentRoomId', NOT_JOINED)
+    elif stored.get('currentRoomId') == NOT_JOINED:
+        del stored['currentRoomId']
+    return stored
+
+def key_of(record: Dict[str, Any], target: str) -> Dict[str, Any]:
+    stored = in_layout(record, target)
+    return {name: stored[name] for name in KEY_NAMES[target]}
+
+def activity_shards() -> int:
+    return int(os.environ.get('ACTIVITY_INDEX_SHARDS', '4'))
+
+def activity_shard(connection_id: str) -> str:
+    """
+    ACTIVITY_INDEX partition a connection's records are indexed under
+    """
+    return str(zlib.crc32(connection_id.encode('utf-8')) % activity_shards())
+
+def table() -> Any:
+    return aws_clients.table_from_env('WEBSOCKET_CONNECTIONS_TABLE')
+
+def mirror_table() -> Optional[Any]:
+    table_name = os.environ.get('WEBSOCKET_CONNECTIONS_MIRROR_TABLE')
+    return aws_clients.table(table_name) if table_name else None
+
+def create(record: Dict[str, Any]) -> None:
+    """
+    Store a new connection record (and its mirror copy)
+    """
+    current = layout()
+    with unit_of_work.begin():
+        unit_of_work.put_item(table(), in_layout(record, current))
+        mirror = mirror_table()
+        if mirror is not None:
+            unit_of_work.put_item(mirror, in_layout(record, other_layout(current)))
+
+def _move_copy(target_table: Any, record: Dict[str, Any], moved: Dict[str, Any], target: str) -> None:
+    if target == ROOM_SORT_KEY:
+        # currentRoomId is the sort key: the record is replaced under its new key
+        unit_of_work.delete_item(target_table, key_of(record, target))
+    unit_of_work.put_item(target_table, in_layout(moved, target))
+
+def move_to_room(record: Dict[str, Any], room_id: str) -> None:
+    """
+    Move a connection record, as read from the table, into a room
+    """
+    current = layout()
+    moved = dict(record, currentRoomId=room_id)
+    with unit_of_work.begin():
+        if current == CONNECTION_ID:
+            # Only moves a connection that still exists
+            unit_of_work.update_item(
+                table(), key_of(record, current),
+                UpdateExpression='SET currentRoomId = :roomId',
+                ConditionExpression='attribute_exists(connectionId)',
+                ExpressionAttributeValues={':roomId': room_id}
+            )
+        else:
+            _move_copy(table(), record, moved, current)
+        mirror = mirror_table()
+        if mirror is not None:
+            _move_copy(mirror, record, moved, other_layout(current))
+
+def records_of(connection_id: str) -> List[Dict[str, Any]]:
+    """
+    A connection's records, read by key: one GetItem, or a query of the
+    connectionId partition where currentRoomId is the sort key
+    """
+    connections_table = table()
+    if layout() == CONNECTION_ID:
+        item = connections_table.get_item(Key={'connectionId': connection_id}).get('Item')
+        return [item] if item else []
+    response = connections_table.query(
+        KeyConditionExpression='connectionId = :connectionId',
+        ExpressionAttributeValues={':connectionId': connection_id}
+    )
+    return response.get('Items', [])
+
+def move_connection(connection_id: str, room_id: str) -> bool:
+    """
+    Move a connection into a room by its ID
+
+    Where connectionId is the whole key and no mirror needs the full
+    record, this is the move's single UpdateItem; otherwise the records are
+    read by key first (records_of).
+
+    Returns:
+        False if the connection has no records
+    """
+    if layout() == CONNECTION_ID and mirror_table() is None:
+        move_to_room({'connectionId': connection_id}, room_id)
+        return True
+    records = records_of(connection_id)
+    with unit_of_work.begin():
+        for record in records:
+            if record.get('currentRoomId') != room_id:
+                move_to_room(record, room_id)
+    return bool(records)
+
+def in_room(room_id: str) -> List[Dict[str, Any]]:
+    """
+    Every connection record in a room: one query of ROOM_INDEX, or a
+    filtered scan where currentRoomId is the sort key
+    """
+    connections_table = table()
+    request: Dict[str, Any] = {'ExpressionAttributeValues': {':roomId': room_id}}
+    if layout() == CONNECTION_ID:
+        request.update(IndexName=ROOM_INDEX, KeyConditionExpression='currentRoomId = :roomId')
+        read = connections_table.query
+    else:
+        request['FilterExpression'] = 'currentRoomId = :roomId'
+        read = connections_table.scan
+    records: List[Dict[str, Any]] = []
+    while True:
+        response = read(**request)
+        records.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return records
+        request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def _queue_deletes(connection_id: str, records: List[Dict[str, Any]], from_table: bool) -> None:
+    """
+    Queue the deletes of a connection's records from the table (when
+    from_table) and from the mirror, if there is one
+    """
+    current = layout()
+    mirror = mirror_table()
+    with unit_of_work.begin():
+        if from_table:
+            for record in records:
+                unit_of_work.delete_item(table(), key_of(record, current))
+        if mirror is not None:
+            mirrored = other_layout(current)
+            if mirrored == CONNECTION_ID:
+                unit_of_work.delete_item(mirror, {'connectionId': connection_id})
+            else:
+                for record in records:
+                    unit_of_work.delete_item(mirror, key_of(record, mirrored))
+
+def delete(connection_id: str, records: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Delete every record of a connection (and their mirror copies)
+
+    Inside a unit of work the deletes are queued with the unit's other
+    writes, except the connection-id layout's own DeleteItem, which also
+    reads the record. Pass the records an earlier attempt returned to queue
+    their deletes again after that attempt's unit failed.
+
+    Returns:
+        The records deleted
+    """
+    current = layout()
+    connections_table = table()
+    if records is None and current == CONNECTION_ID:
+        response = connections_table.delete_item(Key={'connectionId': connection_id}, ReturnValues='ALL_OLD')
+        records = [response['Attributes']] if response.get('Attributes') else []
+    elif records is None:
+        response = connections_table.query(
+            KeyConditionExpression='connectionId = :connectionId',
+            ExpressionAttributeValues={':connectionId': connection_id}
+        )
+        records = response.get('Items', [])
+
+    _queue_deletes(connection_id, records, current == ROOM_SORT_KEY)
+    return records
+
+def expire(records: List[Dict[str, Any]]) -> None:
+    """
+    Delete connection records already read (and their mirror copies),
+    queued on the open unit of work so that many go out as batches
+    """
+    by_connection: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_connection.setdefault(record['connectionId'], []).append(record)
+    with unit_of_work.begin():
+        for connection_id, connection_records in by_connection.items():
+            _queue_deletes(connection_id, connection_records, True)
+
+def touch(connection_id: str, at: int, cutoff: int) -> bool:
+    """
+    Set lastActivity on a connection's records to at, unless it is already
+    cutoff or later; a deleted connection is never recreated
+
+    Returns:
+        True if a record was written
+    """
+    current = layout()
+    connections_table = table()
+    if current == CONNECTION_ID:
+        keys = [{'connectionId': connection_id}]
+    else:
+        response = connections_table.query(
+            KeyConditionExpression='connectionId = :connectionId',
+            ExpressionAttributeValues={':connectionId': connection_id}
+        )
+        keys = [key_of(record, current) for record in response.get('Items', [])
+                if int(record.get('lastActivity') or 0) < cutoff]
+    update = {
+        'UpdateExpression': 'SET lastActivity = :at, activityShard = if_not_exists(activityShard, :shard)',
+        'ExpressionAttributeValues': {':at': at, ':cutoff': cutoff, ':shard': activity_shard(connection_id)}
+    }
+    touched = []
+    for key in keys:
+        try:
+            response = connections_table.update_item(
+                Key=key, ReturnValues='ALL_NEW',
+                ConditionExpression='attribute_exists(connectionId) AND '
+                                    '(attribute_not_exists(lastActivity) OR lastActivity < :cutoff)',
+                **update)
+            touched.append(response['Attributes'])
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    mirror = mirror_table()
+    if mirror is not None:
+        for record in touched:
+            try:
+                mirror.update_item(Key=key_of(record, other_layout(current)),
+                                   ConditionExpression='attribute_exists(connectionId)', **update)
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+    return bool(touched)
+
+def idle_since(cutoff: int, page_size: int = 100) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Batches of connection records whose lastActivity is before cutoff, each
+    the next page (up to page_size) of every ACTIVITY_INDEX shard that has any
+
+    The caller deletes each batch before taking the next: every read starts
+    over at the front of its shard, where the next idle records now are. A
+    shard is left once it has none, or once a page repeats its last one
+    (those records could not be deleted).
+    """
+    previous: Dict[int, Set[Tuple[Any, Any]]] = {shard: set() for shard in range(activity_shards())}
+    while previous:
+        batch: List[Dict[str, Any]] = []
+        for shard in list(previous):
+            response = table().query(
+                IndexName=ACTIVITY_INDEX,
+                KeyConditionExpression='activityShard = :shard AND lastActivity < :cutoff',
+                ExpressionAttributeValues={':shard': str(shard), ':cutoff': cutoff},
+                Limit=page_size
+            )
+            records = response.get('Items', [])
+            keys = {(record['connectionId'], record.get('currentRoomId')) for record in records}
+            if not records or keys & previous[shard]:
+                del previous[shard]
+                continue
+            previous[shard] = keys
+            batch.extend(records)
+        if batch:
+            yield batch
@@ -0,0 +1,145 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+from lambdas import instrumentation
+
+# DynamoDB consumed capacity and latency per route, table and operation.
+#
+# aws_clients.table() hands out Tables wrapped in MeteredTable, which asks
+# every single-table operation for ReturnConsumedCapacity=TOTAL, times it,
+# and adds the capacity DynamoDB reports to the current invocation
+# (instrumentation.add_capacity). The invocation's metric line then carries
+# ConsumedRCU / ConsumedWCU and a per table / operation breakdown.
+#
+# Load tests call start_report() to also aggregate every call across
+# invocations, keyed by route; report() returns the totals. Outside a
+# report this module keeps no state beyond the current invocation.
+#
+# Multi-table requests (BatchWriteItem, TransactWriteItems from
+# unit_of_work.py) are recorded with record_batch(). batch_writer() and the
+# other Table attributes pass through unmetered.
+#
+# Environment:
+#   TRACK_CONSUMED_CAPACITY  'false' hands out unwrapped Tables (default on)
+
+READS = {'GetItem', 'Query', 'Scan'}
+
+_reporting = False
+_totals: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+
+def units_of(operation: str, response: Any) -> Tuple[float, float]:
+    """
+    (RCU, WCU) from a response's ConsumedCapacity; (0, 0) when it has none
+    """
+    consumed = response.get('ConsumedCapacity') if isinstance(response, dict) else None
+    if not isinstance(consumed, dict):
+        return 0.0, 0.0
+    total = float(consumed.get('CapacityUnits') or 0)
+    if operation in READS:
+        return float(consumed.get('ReadCapacityUnits') or total), 0.0
+    return 0.0, float(consumed.get('WriteCapacityUnits') or total)
+
+def record(table_name: str, operation: str, rcu: float, wcu: float, elapsed_ms: float) -> None:
+    """
+    Count one call into the current invocation and, while reporting, the totals
+    """
+    instrumentation.add_capacity(table_name, operation, rcu, wcu, elapsed_ms)
+    if not _reporting:
+        return
+    key = (instrumentation.current_route() or 'unrouted', table_name, operation)
+    totals = _totals.setdefault(key, {'calls': 0, 'rcu': 0.0, 'wcu': 0.0, 'totalMs': 0.0, 'maxMs': 0.0})
+    totals['calls'] += 1
+    totals['rcu'] += rcu
+    totals['wcu'] += wcu
+    totals['totalMs'] += elapsed_ms
+    totals['maxMs'] = max(totals['maxMs'], elapsed_ms)
+
+def record_batch(operation: str, response: Any, elapsed_ms: float) -> None:
+    """
+    Count a multi-table request, one entry per table in its ConsumedCapacity
+    list; the latency is split evenly between the tables
+    """
+    consumed = response.get('ConsumedCapacity') if isinstance(response, dict) else None
+    entries = [entry for entry in consumed if isinstance(entry, dict)] if isinstance(consumed, list) else []
+    if not entries:
+        record('(batch)', operation, 0.0, 0.0, elapsed_ms)
+        return
+    for entry in entries:
+        rcu, wcu = units_of(operation, {'ConsumedCapacity': entry})
+        record(entry.get('TableName', 'unknown'), operation, rcu, wcu, elapsed_ms / len(entries))
+
+def start_report() -> None:
+    """
+    Aggregate every metered call from now on, discarding earlier totals
+    """
+    global _reporting
+    _reporting = True
+    _totals.clear()
+
+def stop_report() -> None:
+    global _reporting
+    _reporting = False
+
+def report() -> Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]:
+    """
+    Aggregated totals since start_report()
+
+    Returns:
+        {route: {table: {operation: {'calls', 'rcu', 'wcu', 'rcuPerCall',
+        'wcuPerCall', 'meanMs', 'maxMs'}}}}
+    """
+    result: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {}
+    for (route, table_name, operation), totals in sorted(_totals.items()):
+        calls = totals['calls']
+        result.setdefault(route, {}).setdefault(table_name, {})[operation] = {
+            'calls': calls,
+            'rcu': round(totals['rcu'], 1),
+            'wcu': round(totals['wcu'], 1),
+            'rcuPerCall': round(totals['rcu'] / calls, 2),
+            'wcuPerCall': round(totals['wcu'] / calls, 2),
+            'meanMs': round(totals['totalMs'] / calls, 3),
+            'maxMs': round(totals['maxMs'], 3)
+        }
+    return result
+
+class MeteredTable:
+    """
+    DynamoDB Table proxy recording each operation's consumed capacity and latency
+    """
+
+    def __init__(self, table: Any, table_name: Optional[str] = None):
+        self._table = table
+        self._table_name = table_name or getattr(table, 'name', 'unknown')
+
+    def _call(self, method: str, operation: str, kwargs: Dict[str, Any]) -> Any:
+        kwargs.setdefault('ReturnConsumedCapacity', 'TOTAL')
+        started = time.perf_counter()
+        try:
+            response = getattr(self._table, method)(**kwargs)
+        except Exception:
+            # Failed calls still took the round trip; their capacity is not reported
+            record(self._table_name, operation, 0.0, 0.0, (time.perf_counter() - started) * 1000)
+            raise
+        rcu, wcu = units_of(operation, response)
+        record(self._table_name, operation, rcu, wcu, (time.perf_counter() - started) * 1000)
+        return response
+
+    def get_item(self, **kwargs: Any) -> Any:
+        return self._call('get_item', 'GetItem', kwargs)
+
+    def query(self, **kwargs: Any) -> Any:
+        return self._call('query', 'Query', kwargs)
+
+    def scan(self, **kwargs: Any) -> Any:
+        return self._call('scan', 'Scan', kwargs)
+
+    def put_item(self, **kwargs: Any) -> Any:
+        return self._call('put_item', 'PutItem', kwargs)
+
+    def update_item(self, **kwargs: Any) -> Any:
+        return self._call('update_item', 'UpdateItem', kwargs)
+
+    def delete_item(self, **kwargs: Any) -> Any:
+        return self._call('delete_item', 'DeleteItem', kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._table, name)
@@ -1,7 +1,6 @@
 import os
-import boto3
-from botocore.exceptions import ClientError
-from typing import Dict, Any, List, Optional, Set
+from lambdas import activity, aws_clients, connections, instrumentation, parallel_scan, unit_of_work
+from typing import Dict, Any, Iterator, List, Optional, Set
 from datetime import datetime
 
 class DatabaseUtils:
@@ -9,125 +8,79 @@ class DatabaseUtils:
     Utility class for common DynamoDB operations
     """
     
-    def __init__(self):
-        self.dynamodb = boto3.resource('dynamodb')
-    
     def get_table(self, table_name_env: str):
         """
         Get DynamoDB table by environment variable name
         """
-        table_name = os.environ.get(table_name_env)
-        print(f"Getting table for env var {table_name_env}: {table_name}")
-        if not table_name:
-            raise ValueError(f"{table_name_env} environment variable not set")
-        return self.dynamodb.Table(table_name)
+        return aws_clients.table_from_env(table_name_env)
     
-    def update_user_room(self, user_id: str, room_id: str) -> bool:
+    def update_connection_room(self, connection_id: str, room_id: str) -> bool:
         """
-        Update the user's current room in the connections table
+        Move a connection into a room in the connections table
         Returns True if successful, False otherwise
+        
+        The move is written through the request's unit of work: joined to
+        an open one, or on its own (connections.move_connection)
         """
         try:
-            connections_table = self.get_table('WEBSOCKET_CONNECTIONS_TABLE')
-            
-            # Find the user's connection
-            response = connections_table.scan(
-                FilterExpression='#userId = :userId AND #status = :status',
-                ExpressionAttributeNames={
-                    '#userId': 'userId',
-                    '#status': 'status'
-                },
-                ExpressionAttributeValues={
-                    ':userId': user_id,
-                    ':status': 'connected'
-                }
-            )
-            
-            success_count = 0
-            for item in response.get('Items', []):
-                connection_id = item.get('connectionId')
-                if not connection_id or not isinstance(connection_id, str):
-                    continue
-                
-                try:
-                    # Since currentRoomId is the sort key, delete old item and create new one
-                    old_key = {
-                        'connectionId': connection_id, 
-                        'currentRoomId': item.get('currentRoomId', 'not-joined')
-                    }
-                    
-                    # Delete the old item
-                    connections_table.delete_item(Key=old_key)
-                    
-                    # Create new item with updated currentRoomId
-                    new_item = item.copy()
-                    new_item['currentRoomId'] = room_id
-                    
-                    connections_table.put_item(Item=new_item)
-                    success_count += 1
-                    
-                except ClientError as e:
-                    print(f"Error updating connection {connection_id}: {e.response['Error']['Message']}")
-                    continue
-            
-            return success_count > 0
+            with unit_of_work.begin():
+                return connections.move_connection(connection_id, room_id)
             
         except Exception as e:
-            print(f"Error updating user room: {str(e)}")
+            print(f"Error updating connection room: {str(e)}")
             return False
     
     def get_room_connections(self, user_ids: List[str], room_id: str) -> List[str]:
         """
         Get active WebSocket connections for users in a specific room
         """
+        connections_by_user = self.get_room_connections_by_user(user_ids, room_id)
+        connection_ids = [connection_id for ids in connections_by_user.values() for connection_id in ids]
+        return list(set(connection_ids))  # Remove duplicates
+    
+    def get_room_connections_by_user(self, user_ids: List[str], room_id: str) -> Dict[str, List[str]]:
+        """
+        Get active WebSocket connections for users in a specific room, grouped by user
+        
+        One read of the room's connections (connections.in_room) serves
+        every user, however many seats are taken.
+        """
         try:
-            connections_table = self.get_table('WEBSOCKET_CONNECTIONS_TABLE')
+            # Robot players have no connections
+            connections_by_user: Dict[str, List[str]] = {
+                user_id: [] for user_id in user_ids if user_id and not user_id.startswith('robot-')
+            }
+            if not connections_by_user:
+                return {}
             
-            connection_ids = []
-            for user_id in user_ids:
-                if user_id and not user_id.startswith('robot-'):  # Skip robot players
-                    response = connections_table.scan(
-                        FilterExpression='#status = :status AND #userId = :userId',
-                        ExpressionAttributeNames={'#status': 'status', '#userId': 'userId'},
-                        ExpressionAttributeValues={':status': 'connected', ':userId': user_id}
-                    )
-                    connection_ids.extend([item['connectionId'] for item in response.get('Items', [])])
+            for record in connections.in_room(room_id):
+                user_id = record.get('userId')
+                if user_id in connections_by_user and record.get('status') == 'connected':
+                    connections_by_user[user_id].append(record['connectionId'])
             
-            return list(set(connection_ids))  # Remove duplicates
+            return connections_by_user
             
         except Exception as e:
             print(f"Error getting room connections: {str(e)}")
-            return []
+            return {}
+    
+    def scan_connections(self, attributes: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Stream every connection record, only the given attributes, read in
+        CONNECTION_SCAN_SEGMENTS parallel segments (default 1)
+        """
+        table_name = os.environ.get('WEBSOCKET_CONNECTIONS_TABLE')
+        if not table_name:
+            raise ValueError("WEBSOCKET_CONNECTIONS_TABLE environment variable not set")
+        segments = int(os.environ.get('CONNECTION_SCAN_SEGMENTS', '1'))
+        return parallel_scan.parallel_scan(table_name, segments, attributes=attributes)
     
     def get_active_room_count(self) -> int:
         """
         Get the count of unique active rooms
         """
         try:
-            connections_table = self.get_table('WEBSOCKET_CONNECTIONS_TABLE')
-            
-            active_rooms: Set[str] = set()
-            
-            # Scan all items to get unique room IDs
-            response = connections_table.scan()
-            
-            # Process first batch
-            for item in response.get('Items', []):
-                room_id = item.get('currentRoomId')
-                if room_id and room_id != 'not-joined':
-                    active_rooms.add(room_id)
-            
-            # Continue scanning if there are more items
-            while 'LastEvaluatedKey' in response:
-                response = connections_table.scan(
-                    ExclusiveStartKey=response['LastEvaluatedKey']
-                )
-                for item in response.get('Items', []):
-                    room_id = item.get('currentRoomId')
-                    if room_id and room_id != 'not-joined':
-                        active_rooms.add(room_id)
-            
-            return len(active_rooms)
+            return self.get_connection_stats()['activeRoomCount']
             
         except Exception as e:
             print(f"Error getting active room count: {str(e)}")
@@ -138,30 +91,7 @@ class DatabaseUtils:
         Get the count of unique active users
         """
         try:
-            connections_table = self.get_table('WEBSOCKET_CONNECTIONS_TABLE')
-            
-            active_users: Set[str] = set()
-            
-            # Scan all items to get unique user IDs
-            response = connections_table.scan()
-            
-            # Process first batch
-            for item in response.get('Items', []):
-                user_id = item.get('userId')
-                if user_id and item.get('status') == 'connected':
-                    active_users.add(user_id)
-            
-            # Continue scanning if there are more items
-            while 'LastEvaluatedKey' in response:
-                response = connections_table.scan(
-                    ExclusiveStartKey=response['LastEvaluatedKey']
-                )
-                for item in response.get('Items', []):
-                    user_id = item.get('userId')
-                    if user_id and item.get('status') == 'connected':
-                        active_users.add(user_id)
-            
-            return len(active_users)
+            return self.get_connection_stats()['activeUserCount']
             
         except Exception as e:
             print(f"Error getting active user count: {str(e)}")
@@ -170,104 +100,68 @@ class DatabaseUtils:
     def get_connection_stats(self) -> Dict[str, int]:
         """
         Get both active user count and active room count in a single scan
-        """
-        try:
-            connections_table = self.get_table('WEBSOCKET_CONNECTIONS_TABLE')
-            
-            active_rooms: Set[str] = set()
-            active_users: Set[str] = set()
-            
-            # Scan all items to get unique room IDs and user IDs
-            response = connections_table.scan()
-            
-            # Process first batch
-            for item in response.get('Items', []):
-                # Count active rooms
-                room_id = item.get('currentRoomId')
-                if room_id and room_id != 'not-joined':
-                    active_rooms.add(room_id)
-                
-                # Count active users
-                user_id = item.get('userId')
-                if user_id and item.get('status') == 'connected':
-                    active_users.add(user_id)
-            
-            # Continue scanning if there are more items
-            while 'LastEvaluatedKey' in response:
-                response = connections_table.scan(
-                    ExclusiveStartKey=response['LastEvaluatedKey']
-                )
-                for item in response.get('Items', []):
-                    # Count active rooms
-                    room_id = item.get('currentRoomId')
-                    if room_id and room_id != 'not-joined':
-                        active_rooms.add(room_id)
-                    
-                    # Count active users
-                    user_id = item.get('userId')
-                    if user_id and item.get('status') == 'connected':
-                        active_users.add(user_id)
-            
-            return {
-                'activeUserCount': len(active_users),
-                'activeRoomCount': len(active_rooms)
-            }
-            
-        except Exception as e:
-            print(f"Error getting connection stats: {str(e)}")
-            return {
-                'activeUserCount': 0,
-                'activeRoomCount': 0
-            }
+        
+        Errors are raised rather than reported as zero counts
+        """
+        active_rooms: Set[str] = set()
+        active_users: Set[str] = set()
+        
+        # Only the attributes counted come back
+        for item in self.scan_connections(['currentRoomId', 'userId', 'status']):
+            # Count active rooms
+            room_id = item.get('currentRoomId')
+            if room_id and room_id != 'not-joined':
+                active_rooms.add(room_id)
+            
+            # Count active users
+            user_id = item.get('userId')
+            if user_id and item.get('status') == 'connected':
+                active_users.add(user_id)
+        
+        return {
+            'activeUserCount': len(active_users),
+            'activeRoomCount': len(active_rooms)
+        }
     
-    def find_room_by_id(self, room_id: str) -> Optional[Dict[str, Any]]:
+    def get_room(self, room_id: str) -> Optional[Dict[str, Any]]:
         """
-        Find a room by its ID using scan (since we don't have the sort key)
+        Get a room by its primary key, read once per unit of work
         """
-        try:
-            room_table = self.get_table('ROOM_TABLE')
-            
-            response = room_table.scan(
-                FilterExpression='roomId = :roomId',
-                ExpressionAttributeValues={':roomId': room_id}
-            )
-            
-            if response['Count'] == 0:
-                return None
-            
-            return response['Items'][0]
-            
-        except Exception as e:
-            print(f"Error finding room by ID: {str(e)}")
-            return None
+        room_table = self.get_table('ROOM_TABLE')
+        return unit_of_work.get_item(room_table, {'roomId': room_id})
     
     def create_connection_record(self, connection_id: str, user_id: str, user_name: str, 
-                               request_time: Optional[int] = None) -> bool:
+                               request_time: Optional[int] = None,
+                               session_expires_at: Optional[int] = None) -> bool:
         """
         Create a new connection record in the connections table
+        
+        session_expires_at is the expiry of the session token the identity was
+        verified from; when given the record is marked authenticated.
         """
         try:
-            print(f"Creating connection record for connection_id: {connection_id}, user_id: {user_id}")
-            connections_table = self.get_table('WEBSOCKET_CONNECTIONS_TABLE')
-            
             if not request_time:
                 request_time = int(datetime.now().timestamp() * 1000)
             
             connection_record = {
                 'connectionId': connection_id,
-                'currentRoomId': 'not-joined',  # Sort key - placeholder for new connections
+                'currentRoomId': connections.NOT_JOINED,  # Placeholder until the connection joins a room
                 'connectedAt': request_time,
                 'sourceIp': 'unknown',
                 'userAgent': 'unknown',
                 'status': 'connected',
                 'lastActivity': request_time,
+                'activityShard': connections.activity_shard(connection_id),
                 'userId': user_id,
                 'userName': user_name
             }
+            if session_expires_at:
+                connection_record['authenticated'] = True
+                connection_record['sessionExpiresAt'] = session_expires_at
             
-            print(f"Connection record to create: {connection_record}")
-            connections_table.put_item(Item=connection_record)
-            print(f"Successfully created connection record for {connection_id}")
+            instrumentation.debug('Connection record to create: %s', connection_record)
+            connections.create(connection_record)
+            activity.written(connection_id, request_time)
             return True
             
         except Exception as e:
@@ -280,14 +174,8 @@ class DatabaseUtils:
         Delete a connection record from the connections table
         """
         try:
-            connections_table = self.get_table('WEBSOCKET_CONNECTIONS_TABLE')
-            
-            key = {
-                'connectionId': connection_id,
-                'currentRoomId': current_room_id
-            }
-            
-            connections_table.delete_item(Key=key)
+            record = {'connectionId': connection_id, 'currentRoomId': current_room_id}
+            unit_of_work.delete_item(connections.table(), connections.key_of(record, connections.layout()))
             return True
             
         except Exception as e:
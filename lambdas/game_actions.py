@@ -0,0 +1,178 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+from botocore.exceptions import ClientError
+from lambdas import bridge_engine, instrumentation
+from lambdas.db_utils import db_utils
+from lambdas.game_views import build_room_view, get_user_seat, present_players
+from lambdas.room_events import (current_seq, record_events, has_gap, build_delta, build_snapshot,
+                                 serialize_message, put_room)
+from lambdas.websocket_utils import broadcast_serialized, broadcast_seat_messages
+
+# Game actions accepted by the pipeline; MOVE is resolved to BID or PLAY from the room's phase
+BID = 'bid'
+PLAY = 'play'
+START = 'start'
+MOVE = 'move'
+
+REQUIRED_FIELDS = {
+    BID: ['userId', 'roomId', 'bid'],
+    PLAY: ['userId', 'roomId', 'card'],
+    START: ['userId', 'roomId'],
+    MOVE: ['userId', 'roomId', 'move']
+}
+
+class ActionError(Exception):
+    """
+    A game action that was rejected, carrying the status code to answer with
+    """
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+@contextmanager
+def _stage(timings: Dict[str, float], name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        timings[name] = round(elapsed, 3)
+        instrumentation.add_span(name, elapsed)
+
+def run_action(action: str, data: Dict[str, Any], connection_id: Optional[str] = None,
+               request_time: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run a game action through validate -> load -> apply -> persist -> fan out
+
+    The room is read once, changed by the bridge engine, saved conditionally
+    on its sequence number and the resulting delta is sent to every other
+    connection in the room. Each stage is timed into the invocation's
+    metrics (instrumentation.py).
+
+    Args:
+        action: BID, PLAY, START or MOVE
+        data: Request fields (userId, roomId, bid/card/move, optional lastSeq)
+        connection_id: Caller's WebSocket connection, left out of the fan-out
+        request_time: Request time in epoch milliseconds, defaults to now
+
+    Returns:
+        {action, room, seat, entry, events, seq, turn, timings} plus a
+        snapshot of the caller's view if lastSeq shows missed updates
+
+    Raises:
+        ActionError if the action is invalid, not allowed or lost a race
+    """
+    timings = {}
+    try:
+        with _stage(timings, 'validate'):
+            _validate(action, data)
+
+        with _stage(timings, 'load'):
+            room_item = db_utils.get_room(data['roomId'])
+            if not room_item:
+                raise ActionError(404, 'Room does not exist')
+
+        with _stage(timings, 'apply'):
+            expected_seq = current_seq(room_item)
+            timestamp = int(request_time or time.time() * 1000)
+            try:
+                result = _apply(action, room_item, data, timestamp)
+            except bridge_engine.IllegalAction as e:
+                raise ActionError(400, str(e))
+
+        with _stage(timings, 'persist'):
+            record_events(room_item, result['events'])
+            try:
+                put_room(db_utils.get_table('ROOM_TABLE'), room_item, expected_seq)
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                    raise ActionError(409, 'Room was updated by another move, please retry')
+                raise
+
+        with _stage(timings, 'fanout'):
+            _fan_out(room_item, result, connection_id)
+    finally:
+        instrumentation.debug('Game action %s stage timings (ms): %s', action, timings)
+
+    seat = result['seat']
+    response = {
+        'action': result['action'],
+        'room': room_item,
+        'seat': seat,
+        'entry': result['entry'],
+        'events': result['events'] + result['private'].get(seat, []),
+        'seq': current_seq(room_item),
+        'turn': room_item['gameData'].get('turn'),
+        'timings': timings
+    }
+    if has_gap(room_item, data.get('lastSeq')):
+        response['snapshot'] = build_snapshot(room_item, build_room_view(room_item, seat))
+    return response
+
+def _validate(action: str, data: Dict[str, Any]) -> None:
+    if action not in REQUIRED_FIELDS:
+        raise ActionError(400, f'Unknown action: {action}')
+    missing = [field for field in REQUIRED_FIELDS[action] if not data.get(field)]
+    if missing:
+        raise ActionError(400, f'{", ".join(REQUIRED_FIELDS[action])} required')
+
+def _apply(action: str, room_item: Dict[str, Any], data: Dict[str, Any], timestamp: int) -> Dict[str, Any]:
+    """
+    Apply the action with the bridge engine
+
+    Returns:
+        {action, seat, entry, events, private} where events are the public
+        events and private maps seats to events only that seat may see
+    """
+    user_id = data['userId']
+    if action == MOVE:
+        if room_item.get('state') == 'bidding':
+            action, data = BID, {**data, 'bid': data['move']}
+        elif room_item.get('state') == 'playing':
+            action, data = PLAY, {**data, 'card': data['move']}
+        else:
+            raise ActionError(400, 'Room is not accepting moves')
+
+    if action == START:
+        if room_item.get('ownerId') != user_id:
+            raise ActionError(400, 'Only the room owner can start the game')
+        events, private = bridge_engine.start_game(room_item)
+        return {'action': action, 'seat': get_user_seat(room_item, user_id), 'entry': None,
+                'events': events, 'private': private}
+
+    if action == BID:
+        entry, events = bridge_engine.apply_bid(room_item, user_id, data['bid'], timestamp)
+    else:
+        entry, events = bridge_engine.apply_play(room_item, user_id, data['card'], timestamp)
+    return {'action': action, 'seat': get_user_seat(room_item, user_id), 'entry': entry,
+            'events': events, 'private': {}}
+
+def _fan_out(room_item: Dict[str, Any], result: Dict[str, Any], connection_id: Optional[str]) -> None:
+    """
+    Send the delta to every other connection in the room
+
+    A delta without private events is serialized once for everyone; otherwise
+    each seat gets its own copy with its private events appended. Seats whose
+    player has disconnected are not looked up.
+    """
+    seats = present_players(room_item)
+    turn = room_item['gameData'].get('turn')
+    connections = db_utils.get_room_connections_by_user(list(seats.values()), room_item['roomId'])
+    connections_by_seat = {
+        seat: [other for other in connections.get(occupant, []) if other != connection_id]
+        for seat, occupant in seats.items()
+    }
+
+    if not result['private']:
+        data = serialize_message(build_delta(room_item, result['events'], turn=turn))
+        broadcast_serialized([other for ids in connections_by_seat.values() for other in ids], data)
+        return
+
+    messages = {
+        seat: serialize_message(build_delta(room_item, result['events'] + result['private'].get(seat, []), turn=turn))
+        for seat, connection_ids in connections_by_seat.items() if connection_ids
+    }
+    broadcast_seat_messages(connections_by_seat, messages)
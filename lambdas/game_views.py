@@ -0,0 +1,64 @@
+from typing import Dict, Any, Optional
+from lambdas.scoring import final_contract
+
+PUBLIC_VIEW = 'public'
+PARTNERS = {'N': 'S', 'S': 'N', 'E': 'W', 'W': 'E'}
+
+# Room attributes that never go out in a view (gameData is redacted separately)
+PRIVATE_ROOM_FIELDS = ('gameData', 'eventLog')
+
+def get_dummy_seat(game_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Dummy's seat once the opening lead has been made, otherwise None
+    """
+    if not game_data.get('tricks') and not game_data.get('currentTrick'):
+        return None
+    contract = game_data.get('contract') or final_contract(game_data.get('bids', []))
+    if not contract:
+        return None
+    return PARTNERS[contract['declarer']]
+
+def build_game_view(game_data: Dict[str, Any], seat: Optional[str], dummy_seat: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Redacted copy of gameData for one seat (or the public view when seat is None)
+
+    Only the seat's own hand and, after the opening lead, dummy are included.
+    Every other hand is reduced to its card count.
+    """
+    hands = game_data.get('hands', {}) or {}
+    view = {key: value for key, value in game_data.items() if key != 'hands'}
+    view['hands'] = {
+        hand_seat: cards for hand_seat, cards in hands.items()
+        if hand_seat == seat or hand_seat == dummy_seat
+    }
+    view['handCounts'] = {hand_seat: len(cards) for hand_seat, cards in hands.items()}
+    if dummy_seat:
+        view['dummy'] = dummy_seat
+    return view
+
+def build_room_view(room_item: Dict[str, Any], seat: Optional[str]) -> Dict[str, Any]:
+    """
+    Redacted copy of a room for one seat (or the public view when seat is None)
+    """
+    game_data = room_item.get('gameData', {}) or {}
+    view = {key: value for key, value in room_item.items() if key not in PRIVATE_ROOM_FIELDS}
+    view['gameData'] = build_game_view(game_data, seat, get_dummy_seat(game_data))
+    return view
+
+def get_user_seat(room_item: Dict[str, Any], user_id: str) -> Optional[str]:
+    """
+    Seat occupied by a user, or None
+    """
+    for seat, occupant in room_item.get('seats', {}).items():
+        if occupant == user_id:
+            return seat
+    return None
+
+def present_players(room_item: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Seat -> occupant for every seated player who has not disconnected
+    (absentSeats holds the seats kept for players who left mid-game)
+    """
+    absent = set(room_item.get('absentSeats', []))
+    return {seat: occupant for seat, occupant in room_item.get('seats', {}).items()
+            if occupant and seat not in absent}
@@ -0,0 +1,81 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from botocore.exceptions import ClientError
+from lambdas import activity, connections, instrumentation, unit_of_work
+from lambdas.db_utils import db_utils
+from lambdas.websocket_disconnect import leave_room, publish
+
+# Scheduled job (an EventBridge rule, every few minutes) expiring what
+# clients abandoned without their $disconnect ever being handled.
+#
+# API Gateway drops a socket after 10 idle minutes, and live clients send
+# a heartbeat at least every ACTIVITY_INTERVAL_SECONDS (activity.py), so a
+# connection record idle for IDLE_TIMEOUT_SECONDS belongs to a connection
+# that is gone. Such records are read from connections.ACTIVITY_INDEX a page
+# per shard at a time, and each such batch is deleted with BatchWriteItem
+# (one unit of work per batch). Then, for every room they were in:
+#
+# - a room no connection is left in is deleted, the rooms in batches
+# - otherwise the expired player leaves it as on $disconnect: their seat
+#   is freed or kept absent and the others get a playerDisconnected delta
+#
+# Environment:
+#   IDLE_TIMEOUT_SECONDS  inactivity after which a connection is expired (default 900)
+#   REAP_PAGE_SIZE        idle records read per index shard and batch (default 100)
+
+def idle_timeout_ms() -> int:
+    return int(float(os.environ.get('IDLE_TIMEOUT_SECONDS', '900')) * 1000)
+
+def reap(now: Optional[int] = None, page_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Expire idle connections and the rooms they leave empty
+
+    Returns:
+        {'connections', 'rooms', 'departures'}: records and rooms deleted, and
+        rooms left by an expired player
+    """
+    cutoff = (now or activity.now_ms()) - idle_timeout_ms()
+    page_size = page_size or int(os.environ.get('REAP_PAGE_SIZE', '100'))
+    expired = 0
+    left_rooms: Dict[str, List[Tuple[Optional[str], str]]] = {}
+    for records in connections.idle_since(cutoff, page_size):
+        with unit_of_work.begin():
+            connections.expire(records)
+        expired += len(records)
+        for record in records:
+            activity.forget(record['connectionId'])
+            room_id = record.get('currentRoomId')
+            if room_id and room_id != connections.NOT_JOINED:
+                left_rooms.setdefault(room_id, []).append((record.get('userId'), record['connectionId']))
+
+    abandoned, departures = [], 0
+    for room_id, leavers in left_rooms.items():
+        if not connections.in_room(room_id):
+            abandoned.append(room_id)
+            continue
+        for user_id, connection_id in leavers:
+            try:
+                with unit_of_work.begin():
+                    departure = leave_room(room_id, user_id, connection_id)
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                print(f"Room {room_id} changed while {user_id} was expired, seat left as it was")
+                continue
+            publish([departure])
+            departures += departure is not None
+
+    room_table = db_utils.get_table('ROOM_TABLE')
+    with unit_of_work.begin():
+        for room_id in abandoned:
+            unit_of_work.delete_item(room_table, {'roomId': room_id})
+    return {'connections': expired, 'rooms': len(abandoned), 'departures': departures}
+
+@instrumentation.instrumented('idle_reaper')
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Scheduled entry point
+    """
+    report = reap()
+    print(f"Expired {report['connections']} idle connection records and {report['rooms']} rooms")
+    return report
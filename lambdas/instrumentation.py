@@ -0,0 +1,198 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+from lambdas import profiling
+
+# Per-invocation timing, emitted as one CloudWatch Embedded Metric Format
+# line per request so CloudWatch extracts per-route latency metrics from the
+# log stream without a separate metrics call.
+#
+# A Lambda container serves one request at a time, so the invocation being
+# measured is module state. Invocations nest (websocket_router -> route
+# handler, handle_request -> handle_websocket_request): only the outermost
+# one emits, and spans recorded inside go to it.
+#
+# Spans: parse (request body), dynamodb / managementApi (every boto3 call,
+# timed by botocore hooks in aws_clients), and the game action stages
+# validate / load / apply (bridge engine) / persist / fanout. DynamoDB
+# consumed capacity per table and operation is added by the metered Tables
+# (consumed_capacity.py). Sampled invocations are also profiled (profiling.py).
+#
+# Environment:
+#   METRICS_ENABLED    'false' turns the metric line off (default on)
+#   METRICS_NAMESPACE  CloudWatch namespace (default NextLevelBridge)
+#   LOG_LEVEL          DEBUG enables debug() payload logging (default INFO)
+
+DEFAULT_NAMESPACE = 'NextLevelBridge'
+
+_current: Optional[Dict[str, Any]] = None
+_cold_start = True
+_call_started: Dict[str, float] = {}
+
+def debug_enabled() -> bool:
+    return os.environ.get('LOG_LEVEL', 'INFO').upper() == 'DEBUG'
+
+def debug(message: str, *args: Any) -> None:
+    """
+    Log at debug level; arguments are only formatted when debug is enabled
+    """
+    if debug_enabled():
+        print(message % args if args else message)
+
+def add_span(name: str, elapsed_ms: float, calls: int = 1) -> None:
+    """
+    Add time to a named span of the current invocation (no-op outside one)
+    """
+    if _current is None:
+        return
+    spans = _current['spans']
+    spans[name] = spans.get(name, 0.0) + elapsed_ms
+    counts = _current['counts']
+    counts[name] = counts.get(name, 0) + calls
+
+def add_capacity(table_name: str, operation: str, rcu: float, wcu: float, elapsed_ms: float) -> None:
+    """
+    Add one DynamoDB call's consumed capacity to the current invocation (no-op outside one)
+    """
+    if _current is None:
+        return
+    usage = _current['capacity'].setdefault(table_name, {}).setdefault(
+        operation, {'calls': 0, 'rcu': 0.0, 'wcu': 0.0, 'ms': 0.0})
+    usage['calls'] += 1
+    usage['rcu'] += rcu
+    usage['wcu'] += wcu
+    usage['ms'] += elapsed_ms
+
+def current_route() -> Optional[str]:
+    """
+    Route of the invocation being measured, or None outside one
+    """
+    return _current['route'] if _current is not None else None
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time the enclosed block into the current invocation's named span
+    """
+    if _current is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(name, (time.perf_counter() - started) * 1000)
+
+def route_of(event: Any, default: str) -> str:
+    """
+    Metric dimension for a request: the WebSocket route key, else default
+    """
+    if isinstance(event, dict):
+        route_key = (event.get('requestContext') or {}).get('routeKey')
+        if route_key:
+            return route_key
+    return default
+
+def run(route: str, entry: Callable[[Any, Any], Dict[str, Any]], event: Any, context: Any) -> Dict[str, Any]:
+    """
+    Call a handler entry point as a measured invocation and emit its metrics
+    """
+    global _current, _cold_start
+    if _current is not None:
+        return entry(event, context)
+
+    _current = {'route': route, 'spans': {}, 'counts': {}, 'capacity': {}}
+    started = time.perf_counter()
+    response: Any = None
+    try:
+        mode = profiling.requested_mode(event)
+        response = profiling.run(mode, route, entry, event, context) if mode else entry(event, context)
+        return response
+    finally:
+        record, _current = _current, None
+        cold_start, _cold_start = _cold_start, False
+        if os.environ.get('METRICS_ENABLED', 'true').lower() != 'false':
+            status = response.get('statusCode') if isinstance(response, dict) else None
+            print(json.dumps(emf_record(route, (time.perf_counter() - started) * 1000, record, status,
+                                        getattr(context, 'aws_request_id', None), cold_start),
+                             separators=(',', ':')))
+
+def instrumented(route: str) -> Callable:
+    """
+    Decorator measuring a function-style lambda_handler/handler
+    """
+    def decorate(entry: Callable[[Any, Any], Dict[str, Any]]) -> Callable[[Any, Any], Dict[str, Any]]:
+        def measured(event, context):
+            return run(route_of(event, route), entry, event, context)
+        measured.__name__ = entry.__name__
+        measured.__doc__ = entry.__doc__
+        measured.__wrapped__ = entry
+        return measured
+    return decorate
+
+def emf_record(route: str, duration_ms: float, record: Dict[str, Any], status: Optional[int],
+               request_id: Optional[str], cold_start: bool) -> Dict[str, Any]:
+    """
+    Embedded Metric Format document for one invocation
+
+    Metrics (milliseconds unless noted): Duration, one per span,
+    <span>Calls (count) for dynamodb and managementApi, and ConsumedRCU /
+    ConsumedWCU when metered Tables were used; the Capacity property breaks
+    those down by table and operation
+    """
+    metrics = [{'Name': 'Duration', 'Unit': 'Milliseconds'}]
+    document = {'Route': route, 'Duration': round(duration_ms, 3)}
+    for name, elapsed in record['spans'].items():
+        metrics.append({'Name': name, 'Unit': 'Milliseconds'})
+        document[name] = round(elapsed, 3)
+    for name in ('dynamodb', 'managementApi'):
+        if name in record['counts']:
+            metrics.append({'Name': f'{name}Calls', 'Unit': 'Count'})
+            document[f'{name}Calls'] = record['counts'][name]
+    capacity = record.get('capacity')
+    if capacity:
+        usages = [usage for operations in capacity.values() for usage in operations.values()]
+        metrics.extend([{'Name': 'ConsumedRCU', 'Unit': 'Count'}, {'Name': 'ConsumedWCU', 'Unit': 'Count'}])
+        document['ConsumedRCU'] = round(sum(usage['rcu'] for usage in usages), 1)
+        document['ConsumedWCU'] = round(sum(usage['wcu'] for usage in usages), 1)
+        document['Capacity'] = {table_name: {operation: dict(usage, rcu=round(usage['rcu'], 1), wcu=round(usage['wcu'], 1),
+                                                             ms=round(usage['ms'], 3))
+                                             for operation, usage in operations.items()}
+                                for table_name, operations in capacity.items()}
+    document['_aws'] = {
+        'Timestamp': int(time.time() * 1000),
+        'CloudWatchMetrics': [{
+            'Namespace': os.environ.get('METRICS_NAMESPACE', DEFAULT_NAMESPACE),
+            'Dimensions': [['Route']],
+            'Metrics': metrics
+        }]
+    }
+    document['StatusCode'] = status
+    document['ColdStart'] = cold_start
+    if request_id:
+        document['RequestId'] = request_id
+    return document
+
+def watch_boto_client(boto_client: Any, service_name: str, span_name: str) -> None:
+    """
+    Time every API call a boto3 client makes into a span via botocore events
+    """
+    events = getattr(getattr(boto_client, 'meta', None), 'events', None)
+    if events is None:
+        return
+
+    def before_call(**kwargs):
+        _call_started[span_name] = time.perf_counter()
+
+    def after_call(**kwargs):
+        started = _call_started.pop(span_name, None)
+        if started is not None:
+            add_span(span_name, (time.perf_counter() - started) * 1000)
+
+    # Timed from parameter building, so serialization is included
+    events.register(f'before-parameter-build.{service_name}', before_call)
+    # after-call also fires for error responses; after-call-error for failed sends
+    events.register(f'after-call.{service_name}', after_call)
+    events.register(f'after-call-error.{service_name}', after_call)
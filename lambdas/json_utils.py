@@ -0,0 +1,17 @@
+import json
+from decimal import Decimal
+from typing import Any
+
+def json_default(value: Any) -> Any:
+    """
+    JSON fallback for DynamoDB values (numbers come back as Decimal)
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(data: Any) -> str:
+    """
+    Serialize data that may contain DynamoDB Decimals
+    """
+    return json.dumps(data, default=json_default)
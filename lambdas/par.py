@@ -0,0 +1,164 @@
+from typing import Dict, Any, List, Optional, Tuple
+from lambdas.scoring import SEATS, STRAINS, SCORE_TABLE, is_vulnerable
+
+SIDES = {'NS': ('N', 'S'), 'EW': ('E', 'W')}
+
+def _trick_count(value: Any, seat: str, strain: str) -> int:
+    tricks = int(value)
+    if tricks < 0 or tricks > 13:
+        raise ValueError(f"Invalid trick count {tricks} for {seat} in {strain}")
+    return tricks
+
+def normalize_dd_table(dd_table: Any) -> Dict[str, Dict[str, int]]:
+    """
+    Normalize a double-dummy table into {seat: {strain: tricks}}
+
+    Accepts either the nested form or a flat list of 20 trick counts ordered
+    strain-major (C, D, H, S, NT) and then by seat (N, E, S, W).
+    """
+    if isinstance(dd_table, (list, tuple)):
+        if len(dd_table) != 20:
+            raise ValueError("Double-dummy table must contain 20 results")
+        return {seat: {strain: _trick_count(dd_table[strain_index * 4 + seat_index], seat, strain)
+                       for strain_index, strain in enumerate(STRAINS)}
+                for seat_index, seat in enumerate(SEATS)}
+
+    if not isinstance(dd_table, dict):
+        raise ValueError("Double-dummy table must be a dict or a list of 20 results")
+
+    table = {}
+    for seat in SEATS:
+        row = dd_table.get(seat)
+        if not isinstance(row, dict):
+            raise ValueError(f"Double-dummy table missing seat {seat}")
+        table[seat] = {}
+        for strain in STRAINS:
+            tricks = row.get(strain, row.get('N') if strain == 'NT' else None)
+            if tricks is None:
+                raise ValueError(f"Double-dummy table missing {strain} for seat {seat}")
+            table[seat][strain] = _trick_count(tricks, seat, strain)
+    return table
+
+def _lookup(level: int, strain_index: int, doubled: int, vulnerable: bool, tricks: int) -> int:
+    return SCORE_TABLE[((((level - 1) * 5 + strain_index) * 3 + doubled) * 2 + int(vulnerable)) * 14 + tricks]
+
+def _rank(level: int, strain_index: int) -> int:
+    """
+    Position of a contract in bidding order (1C = 0 ... 7NT = 34)
+    """
+    return (level - 1) * 5 + strain_index
+
+def _side_tricks(table: Dict[str, Dict[str, int]], side: str) -> List[Tuple[int, List[str]]]:
+    """
+    Best tricks per strain for a side, with the seat(s) that achieve them
+    """
+    result = []
+    for strain in STRAINS:
+        best = max(table[seat][strain] for seat in SIDES[side])
+        result.append((best, [seat for seat in SIDES[side] if table[seat][strain] == best]))
+    return result
+
+def _highest_making_rank(side_tricks: List[Tuple[int, List[str]]]) -> int:
+    highest = -1
+    for strain_index, (tricks, _) in enumerate(side_tricks):
+        level = min(tricks - 6, 7)
+        if level >= 1:
+            highest = max(highest, _rank(level, strain_index))
+    return highest
+
+def _first_seat_from_dealer(seats: List[str], dealer: str) -> int:
+    start = SEATS.index(dealer)
+    return min((SEATS.index(seat) - start) % 4 for seat in seats)
+
+def calculate_par(dd_table: Any, vulnerability: str = 'None', dealer: str = 'N') -> Dict[str, Any]:
+    """
+    Calculate the par score and par contract(s) for a deal
+
+    The side that can make the highest-ranking contract is the "declaring"
+    side. For each of its making contracts the opponents' cheapest reply
+    ranked above it is priced (a doubled sacrifice, or a contract they make
+    themselves), and the declaring side picks the contract whose outcome is
+    best for it. Every score comes from the precomputed SCORE_TABLE, so no
+    contract is ever re-solved.
+
+    Args:
+        dd_table: Double-dummy table (see normalize_dd_table)
+        vulnerability: 'None', 'NS', 'EW' or 'Both'
+        dealer: Dealer seat, used to break ties when both sides can make the
+            same highest contract
+
+    Returns:
+        {'parScore': North-South par score, 'parContracts': [...]}
+    """
+    table = normalize_dd_table(dd_table)
+    tricks_by_side = {side: _side_tricks(table, side) for side in SIDES}
+    highest = {side: _highest_making_rank(tricks_by_side[side]) for side in SIDES}
+
+    if highest['NS'] < 0 and highest['EW'] < 0:
+        return {'parScore': 0, 'parContracts': []}
+
+    if highest['NS'] != highest['EW']:
+        declaring = 'NS' if highest['NS'] > highest['EW'] else 'EW'
+    else:
+        # Both sides make the same contract: whoever can bid it first gets it
+        strain_index = highest['NS'] % 5
+        ns_first = _first_seat_from_dealer(tricks_by_side['NS'][strain_index][1], dealer)
+        ew_first = _first_seat_from_dealer(tricks_by_side['EW'][strain_index][1], dealer)
+        declaring = 'NS' if ns_first < ew_first else 'EW'
+    defending = 'EW' if declaring == 'NS' else 'NS'
+    declaring_vul = is_vulnerable(SIDES[declaring][0], vulnerability)
+    defending_vul = is_vulnerable(SIDES[defending][0], vulnerability)
+
+    # Opponents' best reply above each rank, from the declaring side's view
+    reply_above: List[Tuple[int, Optional[Tuple[int, int, int]]]] = []
+    for rank in range(35):
+        best_value = None
+        best_reply = None
+        for strain_index, (tricks, _) in enumerate(tricks_by_side[defending]):
+            level = rank // 5 + (1 if strain_index > rank % 5 else 2)
+            if level > 7:
+                continue
+            if tricks >= level + 6:
+                value = -_lookup(level, strain_index, 0, defending_vul, tricks)
+                doubled = 0
+            else:
+                value = -_lookup(level, strain_index, 1, defending_vul, tricks)
+                doubled = 1
+            if best_value is None or value < best_value:
+                best_value, best_reply = value, (level, strain_index, doubled)
+        reply_above.append((best_value, best_reply))
+
+    par_score = None
+    outcomes = []
+    for strain_index, (tricks, seats) in enumerate(tricks_by_side[declaring]):
+        for level in range(1, min(tricks - 6, 7) + 1):
+            score = _lookup(level, strain_index, 0, declaring_vul, tricks)
+            reply_value, reply = reply_above[_rank(level, strain_index)]
+            if reply is not None and reply_value < score:
+                outcome = (reply_value, defending, reply)
+            else:
+                outcome = (score, declaring, (level, strain_index, 0))
+            outcomes.append(outcome)
+            if par_score is None or outcome[0] > par_score:
+                par_score = outcome[0]
+
+    contracts = []
+    seen = set()
+    for value, side, (level, strain_index, doubled) in outcomes:
+        if value != par_score or (side, strain_index) in seen:
+            continue
+        # Lowest level reaching the par score in each strain
+        seen.add((side, strain_index))
+        tricks, seats = tricks_by_side[side][strain_index]
+        contracts.append({
+            'contract': f"{level}{STRAINS[strain_index]}{'X' if doubled else ''}",
+            'level': level,
+            'strain': STRAINS[strain_index],
+            'doubled': doubled,
+            'declarers': seats,
+            'side': side,
+            'tricks': tricks
+        })
+
+    ns_score = par_score if declaring == 'NS' else -par_score
+    return {'parScore': ns_score, 'parContracts': contracts}
@@ -0,0 +1,175 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from lambdas import aws_clients
+
+# Full-table scans for stats, maintenance and migration jobs.
+#
+# parallel_scan() splits a table into Segment/TotalSegments slices, reads
+# each on its own worker thread and streams the items back to the caller as
+# one generator. Pages pass through a bounded queue, so at most a few pages
+# (up to 1 MB each) per segment are held at a time however large the table
+# is; a worker blocks until the caller catches up. Closing the generator
+# early stops the workers after their current page, and the first worker
+# error is raised in the caller.
+#
+# - attributes: only these come back (ProjectionExpression; names are
+#   placeholders, so reserved words like status work). Capacity is charged
+#   on the items read either way, but far less is transferred and decoded
+# - max_rcu: read capacity units per second the workers share, e.g. a share
+#   of the table's provisioned capacity (read_capacity_budget()), so a job
+#   does not throttle the handlers serving traffic
+# - scan_pages() is the single-segment pager underneath, for jobs that do
+#   their own per-segment work on their own threads (tools/migrate_connections.py)
+
+DEFAULT_SEGMENTS = 4
+# Pages queued per segment before its worker waits for the caller
+QUEUED_PAGES_PER_SEGMENT = 2
+_PUT_TIMEOUT_SECONDS = 0.1
+_DONE = object()
+
+class RateLimiter:
+    """
+    Token bucket of read capacity units shared by a scan's workers
+
+    A page's cost is only known once it has been read, so a worker that
+    overdraws the bucket waits until it has refilled.
+    """
+
+    def __init__(self, units_per_second: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if units_per_second <= 0:
+            raise ValueError('units_per_second must be positive')
+        self.units_per_second = units_per_second
+        self._clock, self._sleep = clock, sleep
+        # Up to one second of capacity can be spent at once
+        self._available = float(units_per_second)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def spend(self, units: float) -> None:
+        with self._lock:
+            now = self._clock()
+            refilled = self._available + (now - self._updated) * self.units_per_second
+            self._available = min(float(self.units_per_second), refilled) - units
+            self._updated = now
+            wait = -self._available / self.units_per_second if self._available < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+
+def projection(attributes: Sequence[str], names: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    ProjectionExpression and ExpressionAttributeNames returning only attributes
+    (merged into any names a filter already uses)
+    """
+    names = dict(names or {})
+    placeholders = []
+    for number, attribute in enumerate(attributes):
+        placeholder = f'#p{number}'
+        names[placeholder] = attribute
+        placeholders.append(placeholder)
+    return {'ProjectionExpression': ', '.join(placeholders), 'ExpressionAttributeNames': names}
+
+def read_capacity_budget(table_name: str, share: float) -> Optional[float]:
+    """
+    A share of a table's provisioned read capacity per second, or None for
+    an on-demand table (nothing provisioned to stay under)
+    """
+    description = aws_clients.resource('dynamodb').meta.client.describe_table(TableName=table_name)['Table']
+    provisioned = (description.get('ProvisionedThroughput') or {}).get('ReadCapacityUnits') or 0
+    return provisioned * share if provisioned else None
+
+def scan_pages(table: Any, segment: int = 0, total_segments: int = 1, attributes: Optional[Sequence[str]] = None,
+               limiter: Optional[RateLimiter] = None, page_size: Optional[int] = None,
+               **scan_kwargs: Any) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Page through one segment of a table, a list of items at a time
+
+    scan_kwargs are passed to every Scan (FilterExpression, ConsistentRead...)
+    """
+    scan_kwargs = dict(scan_kwargs)
+    if attributes:
+        scan_kwargs.update(projection(attributes, scan_kwargs.get('ExpressionAttributeNames')))
+    if total_segments > 1:
+        scan_kwargs.update(Segment=segment, TotalSegments=total_segments)
+    if page_size:
+        scan_kwargs['Limit'] = page_size
+    if limiter is not None:
+        scan_kwargs.setdefault('ReturnConsumedCapacity', 'TOTAL')
+    while True:
+        response = table.scan(**scan_kwargs)
+        if limiter is not None:
+            consumed = response.get('ConsumedCapacity') or {}
+            limiter.spend(float(consumed.get('CapacityUnits') or 0))
+        yield response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def _offer(pages: 'queue.Queue[Any]', entry: Any, stop: threading.Event) -> bool:
+    """
+    Queue an entry unless the caller has stopped reading
+    """
+    while not stop.is_set():
+        try:
+            pages.put(entry, timeout=_PUT_TIMEOUT_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def parallel_scan(table_name: str, segments: int = DEFAULT_SEGMENTS, attributes: Optional[Sequence[str]] = None,
+                  max_rcu: Optional[float] = None, page_size: Optional[int] = None,
+                  open_table: Optional[Callable[[str], Any]] = None, **scan_kwargs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Every item of a table (matching any FilterExpression in scan_kwargs),
+    read in parallel segments; items arrive in no particular order
+
+    Args:
+        open_table: returns a Table for a name, called once per worker thread
+            (default: the shared Table for one segment, aws_clients.thread_table
+            for more)
+
+    Raises:
+        The first error of any worker
+    """
+    if segments < 1:
+        raise ValueError('segments must be at least 1')
+    limiter = RateLimiter(max_rcu) if max_rcu else None
+    options = dict(scan_kwargs, attributes=attributes, limiter=limiter, page_size=page_size)
+    if segments == 1:
+        # Nothing to overlap: page through on the calling thread
+        for page in scan_pages((open_table or aws_clients.table)(table_name), **options):
+            yield from page
+        return
+
+    open_table = open_table or aws_clients.thread_table
+    pages: 'queue.Queue[Any]' = queue.Queue(maxsize=segments * QUEUED_PAGES_PER_SEGMENT)
+    stop = threading.Event()
+
+    def read_segment(segment: int) -> None:
+        try:
+            for page in scan_pages(open_table(table_name), segment, segments, **options):
+                if page and not _offer(pages, page, stop):
+                    return
+            _offer(pages, _DONE, stop)
+        except Exception as e:
+            _offer(pages, e, stop)
+
+    with ThreadPoolExecutor(max_workers=segments, thread_name_prefix='scan') as executor:
+        for segment in range(segments):
+            executor.submit(read_segment, segment)
+        try:
+            running = segments
+            while running:
+                entry = pages.get()
+                if entry is _DONE:
+                    running -= 1
+                elif isinstance(entry, Exception):
+                    raise entry
+                else:
+                    yield from entry
+        finally:
+            stop.set()
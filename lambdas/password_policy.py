@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+# Password hashing policy, read from the environment on first use:
+#   PASSWORD_SCHEME    bcrypt (default) or argon2 (needs argon2-cffi)
+#   BCRYPT_ROUNDS      bcrypt cost factor, 2^rounds iterations (default 12)
+#   ARGON2_MEMORY_KIB  argon2 memory cost (default 65536)
+#   ARGON2_TIME_COST   argon2 passes (default 3)
+# Stored hashes that do not match the policy (other scheme or cost) still
+# verify and are rehashed on the user's next successful login.
+DEFAULT_SCHEME = 'bcrypt'
+DEFAULT_BCRYPT_ROUNDS = 12
+DEFAULT_ARGON2_MEMORY_KIB = 65536
+DEFAULT_ARGON2_TIME_COST = 3
+
+_context: Dict[str, Any] = {}
+_executor: Dict[str, ThreadPoolExecutor] = {}
+
+def policy_settings() -> Dict[str, Any]:
+    """
+    CryptContext settings for the configured policy
+    """
+    scheme = os.environ.get('PASSWORD_SCHEME', DEFAULT_SCHEME)
+    if scheme not in ('bcrypt', 'argon2'):
+        raise ValueError(f"Unsupported PASSWORD_SCHEME: {scheme}")
+    rounds = int(os.environ.get('BCRYPT_ROUNDS', DEFAULT_BCRYPT_ROUNDS))
+    settings = {
+        # The preferred scheme comes first; the rest only verify old hashes
+        'schemes': [scheme] + [name for name in ('bcrypt', 'argon2') if name != scheme],
+        'deprecated': 'auto',
+        # Pinning min and max to the cost makes both raising and lowering it
+        # flag existing hashes for rehash
+        'bcrypt__default_rounds': rounds,
+        'bcrypt__min_rounds': rounds,
+        'bcrypt__max_rounds': rounds
+    }
+    if scheme == 'argon2':
+        settings['argon2__memory_cost'] = int(os.environ.get('ARGON2_MEMORY_KIB', DEFAULT_ARGON2_MEMORY_KIB))
+        settings['argon2__rounds'] = int(os.environ.get('ARGON2_TIME_COST', DEFAULT_ARGON2_TIME_COST))
+    return settings
+
+def password_context() -> Any:
+    """
+    Shared passlib CryptContext for the configured policy
+    """
+    if 'context' not in _context:
+        # passlib is only loaded by the requests that hash or verify
+        from passlib.context import CryptContext
+        _context['context'] = CryptContext(**policy_settings())
+    return _context['context']
+
+def hash_password(password: str) -> str:
+    return password_context().hash(password)
+
+def verify_password(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password against its stored hash
+
+    Returns:
+        (matches, new_hash) where new_hash is set when the stored hash does
+        not meet the current policy and should replace it
+    """
+    return password_context().verify_and_update(password, password_hash)
+
+def hash_password_async(password: str) -> Future:
+    """
+    Start hashing on a worker thread so the caller can do its DynamoDB I/O
+    meanwhile; the bcrypt backend releases the GIL while it works
+    """
+    if 'executor' not in _executor:
+        _executor['executor'] = ThreadPoolExecutor(max_workers=1, thread_name_prefix='password-hash')
+    return _executor['executor'].submit(hash_password, password)
+
+def reset() -> None:
+    """
+    Forget the cached policy so environment changes apply (used by tests)
+    """
+    _context.clear()
@@ -0,0 +1,149 @@
+import json
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# On-demand cProfile / tracemalloc capture for sampled invocations, hooked
+# into instrumentation.run so every handler entry point is covered.
+#
+# An invocation is profiled when PROFILE_SAMPLE_RATE (0..1) samples it, or
+# when PROFILE_ALLOW_REQUEST_FLAG is 'true' and the request asks for it with
+# an X-Profile header or a ?profile= query parameter (cpu, memory or both).
+# Disabled (the default) this costs one environment lookup per request;
+# cProfile and tracemalloc are only imported when a capture runs.
+#
+# A capture writes the full cProfile stats (.prof, for snakeviz/pstats) and
+# its summary (.json) to PROFILE_DIR (default /tmp), and logs the summary
+# as one compact JSON line: top functions by cumulative time, the peak
+# traced memory and the allocation sites whose retained memory grew most.
+#
+# Environment:
+#   PROFILE_SAMPLE_RATE         fraction of invocations to profile (default 0)
+#   PROFILE_MODE                cpu, memory or both for sampled invocations (default cpu)
+#   PROFILE_ALLOW_REQUEST_FLAG  'true' lets a request ask to be profiled
+#   PROFILE_DIR                 where captures are written (default /tmp)
+#   PROFILE_TOP                 entries per summary list (default 15)
+
+MODES = ('cpu', 'memory', 'both')
+DEFAULT_TOP = 15
+
+# PROFILE_SAMPLE_RATE values already reported as invalid
+_invalid_rates = set()
+
+def _sample_rate() -> float:
+    """
+    PROFILE_SAMPLE_RATE as a float; an unparsable value is reported once and
+    sampling stays off
+    """
+    rate = os.environ.get('PROFILE_SAMPLE_RATE')
+    if not rate:
+        return 0.0
+    try:
+        return float(rate)
+    except ValueError:
+        if rate not in _invalid_rates:
+            _invalid_rates.add(rate)
+            print(f"Ignoring invalid PROFILE_SAMPLE_RATE {rate!r}; sampling is off")
+        return 0.0
+
+def requested_mode(event: Any) -> Optional[str]:
+    """
+    Profile mode for this invocation, or None to run it unprofiled
+    """
+    rate = _sample_rate()
+    if rate and random.random() < rate:
+        mode = os.environ.get('PROFILE_MODE', 'cpu')
+        return mode if mode in MODES else 'cpu'
+    if os.environ.get('PROFILE_ALLOW_REQUEST_FLAG', '').lower() != 'true' or not isinstance(event, dict):
+        return None
+    headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+    mode = headers.get('x-profile') or (event.get('queryStringParameters') or {}).get('profile')
+    return mode if mode in MODES else None
+
+def run(mode: str, route: str, entry: Callable[[Any, Any], Dict[str, Any]], event: Any, context: Any) -> Dict[str, Any]:
+    """
+    Call the entry point under cProfile and/or tracemalloc and report the capture
+    """
+    profiler = None
+    tracing = False
+    before = None
+    if mode in ('memory', 'both'):
+        import tracemalloc
+        tracing = not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+    if mode in ('cpu', 'both'):
+        import cProfile
+        profiler = cProfile.Profile()
+
+    started = time.perf_counter()
+    try:
+        if profiler:
+            return profiler.runcall(entry, event, context)
+        return entry(event, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        summary = {'profile': route, 'mode': mode, 'durationMs': round(duration_ms, 3),
+                   'requestId': getattr(context, 'aws_request_id', None)}
+        growth = None
+        if mode in ('memory', 'both'):
+            import tracemalloc
+            summary['peakKiB'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            growth = _without_tracemalloc(tracemalloc.take_snapshot()).compare_to(_without_tracemalloc(before), 'lineno')
+            if tracing:
+                tracemalloc.stop()
+        _report(summary, profiler, growth)
+
+def top_functions(profiler: Any, limit: int) -> List[Dict[str, Any]]:
+    """
+    Functions with the most cumulative time, as compact dicts
+    """
+    import pstats
+    stats = pstats.Stats(profiler).stats
+    ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{
+        'function': f'{os.path.basename(filename)}:{line}({name})',
+        'calls': calls,
+        'totalMs': round(total * 1000, 3),
+        'cumulativeMs': round(cumulative * 1000, 3)
+    } for (filename, line, name), (_, calls, total, cumulative, _) in ranked]
+
+def _without_tracemalloc(snapshot: Any) -> Any:
+    import tracemalloc
+    return snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+def top_allocations(growth: List[Any], limit: int) -> List[Dict[str, Any]]:
+    """
+    Source lines whose retained memory grew most during the invocation (what
+    a warm container keeps, e.g. caches); transient use shows in peakKiB
+    """
+    grown = [stat for stat in growth if stat.size_diff > 0][:limit]
+    return [{
+        'where': f'{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}',
+        'sizeKiB': round(stat.size_diff / 1024, 1),
+        'count': stat.count_diff
+    } for stat in grown]
+
+def _report(summary: Dict[str, Any], profiler: Any, growth: Optional[List[Any]]) -> None:
+    limit = int(os.environ.get('PROFILE_TOP', DEFAULT_TOP))
+    if profiler:
+        summary['topFunctions'] = top_functions(profiler, limit)
+    if growth is not None:
+        summary['topAllocations'] = top_allocations(growth, limit)
+
+    directory = os.environ.get('PROFILE_DIR', '/tmp')
+    base = os.path.join(directory, f"profile-{summary['profile'].strip('$')}-{int(time.time() * 1000)}")
+    files = [f'{base}.prof', f'{base}.json'] if profiler else [f'{base}.json']
+    try:
+        os.makedirs(directory, exist_ok=True)
+        if profiler:
+            profiler.dump_stats(files[0])
+        with open(files[-1], 'w') as f:
+            json.dump(summary, f, indent=2)
+        summary['files'] = files
+    except OSError as e:
+        summary['writeError'] = str(e)
+    print(json.dumps(summary, separators=(',', ':')))
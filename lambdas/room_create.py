@@ -2,18 +2,25 @@ import json
 import uuid
 import os
 import random
-from models.room import Room
-from models.game_state import GameState
-import boto3
+from lambdas import aws_clients, instrumentation
 from botocore.exceptions import ClientError
+from lambdas.session_tokens import authenticate, InvalidToken
 
+@instrumentation.instrumented('room_create')
 def handler(event, context):
     try:
         body = event.get('body')
         if body is None:
             return {'statusCode': 400, 'body': json.dumps({'error': 'Missing request body'})}
         if isinstance(body, str):
-            body = json.loads(body)
+            with instrumentation.span('parse'):
+                body = json.loads(body)
+        
+        # Act as the session token's user; a client-sent ID is never trusted on its own
+        try:
+            authenticate(event, body, 'ownerId')
+        except InvalidToken as e:
+            return {'statusCode': 401, 'body': json.dumps({'error': str(e)})}
         
         # Validate required fields
         owner_id = body.get('ownerId')
@@ -28,6 +35,9 @@ def handler(event, context):
         if not room_name:
             return {'statusCode': 400, 'body': json.dumps({'error': 'roomName required'})}
         
+        # pydantic models are only loaded once a request passes validation
+        from models.room import Room
+        from models.game_state import GameState
         room_id = str(uuid.uuid4())
         seats = {seat: '' for seat in ['N', 'E', 'S', 'W']}
         
@@ -61,8 +71,7 @@ def handler(event, context):
         room_table_name = os.environ.get('ROOM_TABLE')
         if not room_table_name:
             return {'statusCode': 500, 'body': json.dumps({'error': 'ROOM_TABLE environment variable not set'})}
-        dynamodb = boto3.resource('dynamodb')
-        room_table = dynamodb.Table(room_table_name)
+        room_table = aws_clients.table(room_table_name)
         room_table.put_item(Item=room.dict())
         
         # Return success response with room and game state
@@ -0,0 +1,156 @@
+from typing import Dict, Any, List, Optional
+from lambdas import unit_of_work
+from lambdas.json_utils import dumps
+
+# Event types carried by roomDelta messages
+BID = 'bid'
+PLAY = 'play'
+TRICK_CLOSED = 'trickClosed'
+SEAT_CHANGED = 'seatChanged'
+PHASE_CHANGED = 'phaseChanged'
+DUMMY_REVEALED = 'dummyRevealed'
+HAND_COMPLETED = 'handCompleted'
+HANDS_DEALT = 'handsDealt'
+PLAYER_DISCONNECTED = 'playerDisconnected'
+PLAYER_RECONNECTED = 'playerReconnected'
+# Private event: only ever sent to the seat it belongs to, never logged
+HAND = 'hand'
+
+# Number of mutations kept on the room for reconnect catch-up (a full hand is ~90)
+EVENT_LOG_SIZE = 128
+
+def bid_event(seat: str, bid: str) -> Dict[str, Any]:
+    return {'type': BID, 'seat': seat, 'bid': bid}
+
+def play_event(seat: str, card: str) -> Dict[str, Any]:
+    return {'type': PLAY, 'seat': seat, 'card': card}
+
+def trick_closed_event(winner: str, trick_number: int) -> Dict[str, Any]:
+    return {'type': TRICK_CLOSED, 'winner': winner, 'trick': trick_number}
+
+def seat_changed_event(seat: str, user_id: str) -> Dict[str, Any]:
+    return {'type': SEAT_CHANGED, 'seat': seat, 'userId': user_id}
+
+def phase_changed_event(phase: str, state: str, **details: Any) -> Dict[str, Any]:
+    return {'type': PHASE_CHANGED, 'phase': phase, 'state': state, **details}
+
+def dummy_revealed_event(seat: str, cards: List[str]) -> Dict[str, Any]:
+    return {'type': DUMMY_REVEALED, 'seat': seat, 'cards': list(cards)}
+
+def hand_completed_event(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {'type': HAND_COMPLETED, 'result': result}
+
+def hands_dealt_event() -> Dict[str, Any]:
+    return {'type': HANDS_DEALT}
+
+def player_disconnected_event(seat: str, user_id: str, released: bool) -> Dict[str, Any]:
+    return {'type': PLAYER_DISCONNECTED, 'seat': seat, 'userId': user_id, 'released': released}
+
+def player_reconnected_event(seat: str, user_id: str) -> Dict[str, Any]:
+    return {'type': PLAYER_RECONNECTED, 'seat': seat, 'userId': user_id}
+
+def hand_event(seat: str, cards: List[str]) -> Dict[str, Any]:
+    return {'type': HAND, 'seat': seat, 'cards': list(cards)}
+
+def current_seq(room_item: Dict[str, Any]) -> int:
+    """
+    Sequence number of the last mutation applied to a room (0 for a new room)
+    """
+    return int(room_item.get('seq', 0) or 0)
+
+def advance_seq(room_item: Dict[str, Any]) -> int:
+    """
+    Bump the room's sequence number for a new mutation and return it
+    """
+    room_item['seq'] = current_seq(room_item) + 1
+    return room_item['seq']
+
+def record_events(room_item: Dict[str, Any], events: List[Dict[str, Any]]) -> int:
+    """
+    Advance the room's sequence number and append the mutation's events to
+    the room's event log, dropping the oldest entries beyond EVENT_LOG_SIZE
+
+    Returns:
+        The new sequence number
+    """
+    seq = advance_seq(room_item)
+    log = list(room_item.get('eventLog', []))
+    log.append({'seq': seq, 'events': events})
+    room_item['eventLog'] = log[-EVENT_LOG_SIZE:]
+    return seq
+
+def events_since(room_item: Dict[str, Any], last_seq: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Logged mutations after last_seq, oldest first
+
+    Returns:
+        The missed log entries, or None if some of them have already been
+        dropped from the log and a snapshot is needed instead
+    """
+    log = room_item.get('eventLog', [])
+    if last_seq >= current_seq(room_item):
+        return []
+    if not log or int(log[0]['seq']) > last_seq + 1:
+        return None
+    return [entry for entry in log if int(entry['seq']) > last_seq]
+
+def has_gap(room_item: Dict[str, Any], last_seq: Any, applied: int = 1) -> bool:
+    """
+    Check whether a client that last saw last_seq has missed updates
+
+    Call after the mutation has been applied; applied is the number of
+    sequence numbers the mutation consumed. A missing last_seq means the
+    client did not report one, which is not treated as a gap.
+    """
+    if last_seq is None:
+        return False
+    try:
+        return int(last_seq) != current_seq(room_item) - applied
+    except (TypeError, ValueError):
+        return True
+
+def build_delta(room_item: Dict[str, Any], events: List[Dict[str, Any]], turn: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compact roomDelta message for the mutation at the room's current sequence number
+    """
+    delta = {
+        'action': 'roomDelta',
+        'roomId': room_item['roomId'],
+        'seq': current_seq(room_item),
+        'events': events
+    }
+    if turn is not None:
+        delta['turn'] = turn
+    return delta
+
+def build_snapshot(room_item: Dict[str, Any], view: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Full roomSnapshot message carrying a seat's view at the current sequence number
+    """
+    return {
+        'action': 'roomSnapshot',
+        'roomId': room_item['roomId'],
+        'seq': current_seq(room_item),
+        'room': view
+    }
+
+def serialize_message(message: Dict[str, Any]) -> str:
+    """
+    JSON-encode a delta or snapshot once for fan-out
+    """
+    return dumps(message)
+
+def put_room(room_table: Any, room_item: Dict[str, Any], expected_seq: int) -> None:
+    """
+    Save a room only if nobody else advanced its sequence number meanwhile
+
+    Inside a unit of work the write is queued and checked when it commits.
+
+    Raises:
+        ClientError with code ConditionalCheckFailedException on a conflict
+    """
+    unit_of_work.put_item(
+        room_table, room_item,
+        ConditionExpression='attribute_not_exists(seq) OR seq = :expectedSeq',
+        ExpressionAttributeValues={':expectedSeq': expected_seq}
+    )
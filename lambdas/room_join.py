@@ -1,19 +1,29 @@
 import json
 import os
 import random
-from models.room import Room
-import boto3
+from lambdas import aws_clients, instrumentation
 from botocore.exceptions import ClientError
+from lambdas.game_views import build_room_view
+from lambdas.json_utils import dumps
+from lambdas.room_events import current_seq, put_room, record_events, seat_changed_event
+from lambdas.session_tokens import authenticate, InvalidToken
 
 SEATS = ['N', 'E', 'S', 'W']
 
+@instrumentation.instrumented('room_join')
 def handler(event, context):
     try:
         body = event.get('body')
         if body is None:
             return {'statusCode': 400, 'body': json.dumps({'error': 'Missing request body'})}
         if isinstance(body, str):
-            body = json.loads(body)
+            with instrumentation.span('parse'):
+                body = json.loads(body)
+        # Act as the session token's user; a client-sent ID is never trusted on its own
+        try:
+            authenticate(event, body, 'userId')
+        except InvalidToken as e:
+            return {'statusCode': 401, 'body': json.dumps({'error': str(e)})}
         user_id = body.get('userId')
         room_id = body.get('roomId')
         requested_seat = body.get('seat')
@@ -23,8 +33,7 @@ def handler(event, context):
         room_table_name = os.environ.get('ROOM_TABLE')
         if not room_table_name:
             return {'statusCode': 500, 'body': json.dumps({'error': 'ROOM_TABLE environment variable not set'})}
-        dynamodb = boto3.resource('dynamodb')
-        room_table = dynamodb.Table(room_table_name)
+        room_table = aws_clients.table(room_table_name)
         room_result = room_table.scan(
             FilterExpression='roomId = :r',
             ExpressionAttributeValues={':r': room_id}
@@ -57,11 +66,19 @@ def handler(event, context):
             seat_to_assign = random.choice(available_seats)
         
         # Assign user to seat (replacing robot if necessary)
+        expected_seq = current_seq(room_item)
         room_item['seats'][seat_to_assign] = user_id
         
-        # Save updated room
-        room_table.put_item(Item=room_item)
-        return {'statusCode': 200, 'body': json.dumps({'room': room_item})}
+        # Save updated room, unless another join or move got there first
+        record_events(room_item, [seat_changed_event(seat_to_assign, user_id)])
+        try:
+            put_room(room_table, room_item, expected_seq)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return {'statusCode': 409, 'body': json.dumps({'error': 'Room was updated concurrently, please retry'})}
+            raise
+        # Only the joining seat's view: no event log and no other player's hand
+        return {'statusCode': 200, 'body': dumps({'room': build_room_view(room_item, seat_to_assign)})}
     except ClientError as e:
         return {'statusCode': 500, 'body': json.dumps({'error': e.response['Error']['Message']})}
     except Exception as e:
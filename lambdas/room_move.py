@@ -1,8 +1,54 @@
-import json
+from lambdas.base_handler import BaseLambdaHandler
+from lambdas.game_actions import run_action, ActionError, MOVE
+from lambdas.game_views import build_room_view
+
+class RoomMoveHandler(BaseLambdaHandler):
+    """
+    REST API handler for making a move (a bid or a card, depending on the room's phase)
+    """
+    
+    def process_request(self, event, context):
+        """
+        Process the move request
+        """
+        if event.get('httpMethod', 'POST') != 'POST':
+            return self.error_response(405, 'Method not allowed')
+        
+        try:
+            body = self.parse_body(event)
+        except ValueError as e:
+            return self.error_response(400, str(e))
+        data = self.extract_data_from_body(body)
+        
+        # The room can come from the path (/room/{roomId}/move) and the player as playerId
+        path_params = event.get('pathParameters') or {}
+        data.setdefault('roomId', path_params.get('roomId'))
+        data.setdefault('userId', data.get('playerId'))
+        
+        # Act as the session token's user
+        error = self.authenticate(event, data)
+        if error:
+            return self.error_response(401, error)
+        
+        try:
+            result = run_action(MOVE, data, request_time=event.get('requestContext', {}).get('requestTimeEpoch'))
+        except ActionError as e:
+            return self.error_response(e.status_code, e.message)
+        
+        response_data = {
+            'action': 'move',
+            'success': True,
+            'type': result['action'],
+            'move': result['entry'],
+            'nextTurn': result['turn'],
+            'seq': result['seq'],
+            'events': result['events'],
+            'room': build_room_view(result['room'], result['seat'])
+        }
+        return self.success_response(response_data)
+
+# Create handler instance
+room_move_handler = RoomMoveHandler()
 
 def handler(event, context):
-    # TODO: Implement move logic
-    return {
-        'statusCode': 200,
-        'body': json.dumps({'message': 'Move processed (stub)'})
-    } 
\ No newline at end of file
+    return room_move_handler.handle_request(event, context)
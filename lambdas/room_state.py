@@ -1,8 +1,124 @@
-import json
+import os
+import time
+from collections import OrderedDict
+from lambdas.base_handler import BaseLambdaHandler
+from lambdas.game_views import build_room_view, get_user_seat, PUBLIC_VIEW
+from lambdas.json_utils import dumps
+from lambdas.room_events import current_seq
+
+# How long a cached room version is trusted before DynamoDB is read again
+CACHE_TTL_SECONDS = float(os.environ.get('ROOM_STATE_CACHE_TTL_MS', '1000')) / 1000.0
+MAX_CACHED_ROOMS = 256
+
+class RoomStateHandler(BaseLambdaHandler):
+    """
+    REST API handler for fetching a room's state
+
+    Rooms are read through a warm-container cache keyed by roomId and room
+    version (seq). Responses carry an ETag derived from the version and the
+    caller's seat, and a matching If-None-Match is answered with 304.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # roomId -> {'room': item, 'version': seq, 'checkedAt': monotonic seconds}
+        self.rooms = OrderedDict()
+        # (roomId, version, seat) -> serialized body
+        self.bodies = OrderedDict()
+
+    def process_request(self, event, context):
+        """
+        Process the room state request
+        """
+        if event.get('httpMethod', 'GET') != 'GET':
+            return self.error_response(405, 'Method not allowed')
+
+        path_params = event.get('pathParameters') or {}
+        query_params = event.get('queryStringParameters') or {}
+        room_id = path_params.get('roomId') or query_params.get('roomId')
+        user_id = query_params.get('userId')
+        if not room_id:
+            return self.error_response(400, 'roomId is required')
+
+        room_item, version = self._get_room(room_id)
+        if room_item is None:
+            return self.error_response(404, 'Room does not exist')
+
+        # A seat view (with that seat's hand) needs the seat's session token
+        seat = None
+        if user_id:
+            error = self.authenticate(event, {'userId': user_id})
+            if error:
+                return self.error_response(401, error)
+            seat = get_user_seat(room_item, user_id)
+        etag = f'"{version}.{seat or PUBLIC_VIEW}"'
+
+        if self._if_none_match(event) == etag:
+            return {
+                'statusCode': 304,
+                'headers': self._state_headers(etag),
+                'body': ''
+            }
+
+        body_key = (room_id, version, seat)
+        body = self.bodies.get(body_key)
+        if body is None:
+            body = dumps({'room': build_room_view(room_item, seat), 'seq': version})
+            self.bodies[body_key] = body
+            while len(self.bodies) > MAX_CACHED_ROOMS * 4:
+                self.bodies.popitem(last=False)
+
+        return {
+            'statusCode': 200,
+            'headers': self._state_headers(etag),
+            'body': body
+        }
+
+    def _get_room(self, room_id):
+        """
+        Read-through lookup; DynamoDB is only hit once the cached version is stale
+        """
+        now = time.monotonic()
+        cached = self.rooms.get(room_id)
+        if cached and now - cached['checkedAt'] < CACHE_TTL_SECONDS:
+            return cached['room'], cached['version']
+
+        room_table = self.get_table('ROOM_TABLE')
+        room_item = room_table.get_item(Key={'roomId': room_id}).get('Item')
+        if room_item is None:
+            self.rooms.pop(room_id, None)
+            return None, None
+
+        version = current_seq(room_item)
+        if cached and cached['version'] == version:
+            # Unchanged: keep the cached item so its serialized bodies stay valid
+            cached['checkedAt'] = now
+            self.rooms.move_to_end(room_id)
+            return cached['room'], version
+
+        self.rooms[room_id] = {'room': room_item, 'version': version, 'checkedAt': now}
+        self.rooms.move_to_end(room_id)
+        while len(self.rooms) > MAX_CACHED_ROOMS:
+            self.rooms.popitem(last=False)
+        return room_item, version
+
+    def _if_none_match(self, event):
+        headers = event.get('headers') or {}
+        for name, value in headers.items():
+            if name.lower() == 'if-none-match':
+                return value
+        return None
+
+    def _state_headers(self, etag):
+        headers = self.get_cors_headers()
+        headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, If-None-Match'
+        headers['Access-Control-Expose-Headers'] = 'ETag'
+        headers['Cache-Control'] = 'no-cache'
+        headers['ETag'] = etag
+        return headers
+
+# Create handler instance
+room_state_handler = RoomStateHandler()
 
 def handler(event, context):
-    # TODO: Implement room state fetch logic
-    return {
-        'statusCode': 200,
-        'body': json.dumps({'message': 'Room state (stub)'})
-    } 
\ No newline at end of file
+    return room_state_handler.handle_request(event, context)
@@ -0,0 +1,356 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Any, List, Optional, Sequence, Iterable, Tuple
+
+SEATS = ['N', 'E', 'S', 'W']
+STRAINS = ['C', 'D', 'H', 'S', 'NT']
+DOUBLES = ['', 'X', 'XX']
+VULNERABILITIES = ['None', 'NS', 'EW', 'Both']
+
+# Upper bounds (inclusive) of each IMP band, per the WBF scale
+IMP_BOUNDARIES = [10, 40, 80, 120, 160, 210, 260, 310, 360, 420, 490, 590,
+                  740, 890, 1090, 1290, 1490, 1740, 1990, 2240, 2490, 2990,
+                  3490, 3990]
+MAX_IMPS = 24
+
+def _trick_points(strain: str, tricks: int) -> int:
+    """
+    Raw trick score for a number of tricks bid in a strain
+    """
+    if strain == 'NT':
+        return 40 + 30 * (tricks - 1) if tricks > 0 else 0
+    per_trick = 20 if strain in ('C', 'D') else 30
+    return per_trick * tricks
+
+def _undertrick_penalty(down: int, doubled: int, vulnerable: bool) -> int:
+    """
+    Penalty for going down, from the defenders' point of view
+    """
+    if doubled == 0:
+        return down * (100 if vulnerable else 50)
+    if vulnerable:
+        penalty = 200 + 300 * (down - 1)
+    else:
+        penalty = 100 + 200 * min(down - 1, 2) + 300 * max(down - 3, 0)
+    return penalty * doubled
+
+def _compute_score(level: int, strain: str, doubled: int, vulnerable: bool, tricks: int) -> int:
+    """
+    Duplicate score for the declaring side, without table lookups
+    """
+    target = level + 6
+    if tricks < target:
+        return -_undertrick_penalty(target - tricks, doubled, vulnerable)
+
+    multiplier = (1, 2, 4)[doubled]
+    contract_points = _trick_points(strain, level) * multiplier
+    score = contract_points
+
+    if contract_points >= 100:
+        score += 500 if vulnerable else 300
+    else:
+        score += 50
+
+    if level == 6:
+        score += 750 if vulnerable else 500
+    elif level == 7:
+        score += 1500 if vulnerable else 1000
+
+    if doubled:
+        score += 50 * doubled
+
+    overtricks = tricks - target
+    if doubled == 0:
+        score += overtricks * (_trick_points(strain, 2) - _trick_points(strain, 1))
+    else:
+        score += overtricks * (200 if vulnerable else 100) * doubled
+
+    return score
+
+def _table_index(level: int, strain_index: int, doubled: int, vulnerable: int, tricks: int) -> int:
+    return ((((level - 1) * 5 + strain_index) * 3 + doubled) * 2 + vulnerable) * 14 + tricks
+
+# Every (level, strain, doubled, vulnerable, tricks) score, flattened for O(1) lookup
+SCORE_TABLE: List[int] = [0] * (7 * 5 * 3 * 2 * 14)
+for _level in range(1, 8):
+    for _strain_index, _strain in enumerate(STRAINS):
+        for _doubled in range(3):
+            for _vulnerable in range(2):
+                for _tricks in range(14):
+                    SCORE_TABLE[_table_index(_level, _strain_index, _doubled, _vulnerable, _tricks)] = \
+                        _compute_score(_level, _strain, _doubled, bool(_vulnerable), _tricks)
+
+# IMPs indexed by score difference / 10 (all duplicate scores are multiples of 10)
+IMP_TABLE: List[int] = [bisect_left(IMP_BOUNDARIES, diff * 10) for diff in range(IMP_BOUNDARIES[-1] // 10 + 2)]
+
+def parse_contract(contract: str) -> Tuple[int, str, int]:
+    """
+    Parse a contract string such as '4S', '3NTX' or '6HXX'
+
+    Returns:
+        (level, strain, doubled) where doubled is 0, 1 or 2
+    """
+    text = contract.upper().strip()
+    doubled = 0
+    if text.endswith('XX'):
+        doubled, text = 2, text[:-2]
+    elif text.endswith('X'):
+        doubled, text = 1, text[:-1]
+
+    if len(text) < 2 or not text[0].isdigit():
+        raise ValueError(f"Invalid contract: {contract}")
+    level = int(text[0])
+    strain = text[1:]
+    if strain == 'N':
+        strain = 'NT'
+    if level < 1 or level > 7 or strain not in STRAINS:
+        raise ValueError(f"Invalid contract: {contract}")
+    return level, strain, doubled
+
+def is_vulnerable(seat: str, vulnerability: str) -> bool:
+    """
+    Check whether a seat is vulnerable under a board vulnerability
+    """
+    if vulnerability == 'Both':
+        return True
+    if vulnerability == 'NS':
+        return seat in ('N', 'S')
+    if vulnerability == 'EW':
+        return seat in ('E', 'W')
+    return False
+
+def board_vulnerability(board_number: int) -> str:
+    """
+    Standard duplicate vulnerability for a board number (repeats every 16 boards)
+    """
+    index = (board_number - 1) % 16
+    return ['None', 'NS', 'EW', 'Both',
+            'NS', 'EW', 'Both', 'None',
+            'EW', 'Both', 'None', 'NS',
+            'Both', 'None', 'NS', 'EW'][index]
+
+def board_dealer(board_number: int) -> str:
+    """
+    Standard duplicate dealer for a board number
+    """
+    return SEATS[(board_number - 1) % 4]
+
+def contract_score(level: int, strain: str, doubled: int, vulnerable: bool, tricks: int) -> int:
+    """
+    Score for the declaring side of a contract that took a number of tricks
+    """
+    if tricks < 0 or tricks > 13:
+        raise ValueError(f"Invalid trick count: {tricks}")
+    return SCORE_TABLE[_table_index(level, STRAINS.index(strain), doubled, int(vulnerable), tricks)]
+
+def score_result(contract: Optional[str], declarer: Optional[str], tricks: int, vulnerability: str = 'None') -> int:
+    """
+    Score a single result from North-South's point of view
+
+    Args:
+        contract: Contract string like '4SX', or None/'pass' for a passed-out board
+        declarer: Declarer seat
+        tricks: Tricks taken by declarer
+        vulnerability: Board vulnerability ('None', 'NS', 'EW', 'Both')
+
+    Returns:
+        North-South score (negative when East-West score)
+    """
+    if not contract or contract.lower() == 'pass':
+        return 0
+    level, strain, doubled = parse_contract(contract)
+    score = contract_score(level, strain, doubled, is_vulnerable(declarer, vulnerability), tricks)
+    return score if declarer in ('N', 'S') else -score
+
+def _check_range(name: str, values: Sequence[int], low: int, high: int) -> None:
+    """
+    Reject a column with a value outside low..high, which would otherwise
+    index the wrong SCORE_TABLE entry instead of failing
+    """
+    if values and (min(values) < low or max(values) > high):
+        bad = next(value for value in values if value < low or value > high)
+        raise ValueError(f"Invalid {name}: {bad}")
+
+def score_batch(levels: Sequence[int], strains: Sequence[str], doubles: Sequence[int],
+                vulnerable: Sequence[bool], tricks: Sequence[int]) -> List[int]:
+    """
+    Score many contracts at once from column-oriented inputs
+
+    All sequences must have the same length; each position describes one
+    result from the declaring side's point of view. Scores come straight out
+    of SCORE_TABLE, so thousands of results cost one pass over the columns.
+
+    Raises:
+        ValueError if a level is outside 1..7, a doubled outside 0..2 or a
+        trick count outside 0..13
+    """
+    _check_range('level', levels, 1, 7)
+    _check_range('doubled', doubles, 0, 2)
+    _check_range('trick count', tricks, 0, 13)
+    strain_index = {strain: index for index, strain in enumerate(STRAINS)}
+    table = SCORE_TABLE
+    return [
+        table[((((lv - 1) * 5 + strain_index[st]) * 3 + dbl) * 2 + (1 if vul else 0)) * 14 + tr]
+        for lv, st, dbl, vul, tr in zip(levels, strains, doubles, vulnerable, tricks)
+    ]
+
+def score_results(results: Iterable[Dict[str, Any]]) -> List[int]:
+    """
+    Score many results given as dicts with 'contract', 'declarer', 'tricks'
+    and optional 'vulnerability'
+
+    Returns:
+        North-South scores, in input order
+
+    Raises:
+        ValueError for an invalid contract or a trick count outside 0..13
+    """
+    levels, strains, doubles, vulnerable, tricks, signs = [], [], [], [], [], []
+    passed_out = set()
+    for position, result in enumerate(results):
+        contract = result.get('contract')
+        if not contract or contract.lower() == 'pass':
+            passed_out.add(position)
+            contract, declarer = '1C', 'N'
+            taken = 7
+        else:
+            declarer = result['declarer']
+            taken = result['tricks']
+        level, strain, doubled = parse_contract(contract)
+        levels.append(level)
+        strains.append(strain)
+        doubles.append(doubled)
+        vulnerable.append(is_vulnerable(declarer, result.get('vulnerability', 'None')))
+        tricks.append(taken)
+        signs.append(1 if declarer in ('N', 'S') else -1)
+
+    scores = score_batch(levels, strains, doubles, vulnerable, tricks)
+    return [0 if position in passed_out else score * sign
+            for position, (score, sign) in enumerate(zip(scores, signs))]
+
+def imps(score_difference: int) -> int:
+    """
+    Convert a score difference into IMPs (sign follows the difference)
+    """
+    magnitude = abs(score_difference)
+    index = magnitude // 10
+    value = IMP_TABLE[index] if index < len(IMP_TABLE) else MAX_IMPS
+    return value if score_difference >= 0 else -value
+
+def imps_batch(scores: Sequence[int], other_scores: Sequence[int]) -> List[int]:
+    """
+    IMPs for many pairs of results (e.g. open room vs closed room)
+    """
+    table = IMP_TABLE
+    limit = len(table)
+    result = []
+    for score, other in zip(scores, other_scores):
+        diff = score - other
+        index = abs(diff) // 10
+        value = table[index] if index < limit else MAX_IMPS
+        result.append(value if diff >= 0 else -value)
+    return result
+
+def matchpoints(scores: Sequence[int]) -> List[Dict[str, float]]:
+    """
+    Matchpoint one board played at many tables
+
+    Each table earns 2 matchpoints for every North-South score it beats and
+    1 for every tie. Ranks come from sorted bisection rather than pairwise
+    comparison, so large fields stay O(n log n).
+
+    Returns:
+        Per table: 'ns' and 'ew' matchpoints and 'nsPercent'/'ewPercent'
+    """
+    count = len(scores)
+    if count == 0:
+        return []
+    top = 2 * (count - 1)
+    ordered = sorted(scores)
+    results = []
+    for score in scores:
+        below = bisect_left(ordered, score)
+        ties = bisect_right(ordered, score) - below - 1
+        ns = float(2 * below + ties)
+        ew = float(top - ns)
+        results.append({
+            'ns': ns,
+            'ew': ew,
+            'nsPercent': round(100.0 * ns / top, 2) if top else 50.0,
+            'ewPercent': round(100.0 * ew / top, 2) if top else 50.0
+        })
+    return results
+
+def matchpoint_boards(boards: Dict[Any, Sequence[int]]) -> Dict[Any, List[Dict[str, float]]]:
+    """
+    Matchpoint every board of a session (board id -> North-South scores)
+    """
+    return {board_id: matchpoints(scores) for board_id, scores in boards.items()}
+
+def final_contract(bids: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Work out the final contract from an auction stored in gameData['bids']
+
+    Returns:
+        {'contract', 'level', 'strain', 'doubled', 'declarer'} or None if
+        the auction is empty or passed out
+    """
+    last_bid = None
+    last_bidder = None
+    doubled = 0
+    first_to_name: Dict[Tuple[str, str], str] = {}
+
+    for entry in bids:
+        call = entry.get('bid')
+        seat = entry.get('seat')
+        if call == 'pass':
+            continue
+        if call == 'double':
+            doubled = 1
+            continue
+        if call == 'redouble':
+            doubled = 2
+            continue
+        level, strain, _ = parse_contract(call)
+        side = 'NS' if seat in ('N', 'S') else 'EW'
+        first_to_name.setdefault((side, strain), seat)
+        last_bid = (level, strain)
+        last_bidder = seat
+        doubled = 0
+
+    if not last_bid:
+        return None
+
+    level, strain = last_bid
+    side = 'NS' if last_bidder in ('N', 'S') else 'EW'
+    return {
+        'contract': f"{level}{strain}{DOUBLES[doubled]}",
+        'level': level,
+        'strain': strain,
+        'doubled': doubled,
+        'declarer': first_to_name[(side, strain)]
+    }
+
+def score_hand(game_data: Dict[str, Any], vulnerability: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Score a completed hand stored in a room's gameData
+
+    Vulnerability defaults to gameData['vulnerability'], then 'None'.
+    """
+    vulnerability = vulnerability or game_data.get('vulnerability') or 'None'
+    contract = final_contract(game_data.get('bids', []))
+    if not contract:
+        return {'contract': 'pass', 'declarer': None, 'tricks': 0,
+                'vulnerability': vulnerability, 'nsScore': 0, 'ewScore': 0}
+
+    declarer = contract['declarer']
+    declaring_side = ('N', 'S') if declarer in ('N', 'S') else ('E', 'W')
+    tricks = sum(1 for trick in game_data.get('tricks', []) if trick.get('winner') in declaring_side)
+    ns_score = score_result(contract['contract'], declarer, tricks, vulnerability)
+    return {
+        'contract': contract['contract'],
+        'declarer': declarer,
+        'tricks': tricks,
+        'vulnerability': vulnerability,
+        'nsScore': ns_score,
+        'ewScore': -ns_score
+    }
@@ -0,0 +1,115 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from typing import Dict, Any, Optional
+
+# Session lifetime unless SESSION_TTL_SECONDS overrides it
+DEFAULT_TTL_SECONDS = 12 * 60 * 60
+
+class InvalidToken(ValueError):
+    """
+    Raised when a session token is missing, malformed, forged or expired
+    """
+    pass
+
+def _secret() -> bytes:
+    secret = os.environ.get('SESSION_SECRET')
+    if not secret:
+        raise ValueError("SESSION_SECRET environment variable not set")
+    return secret.encode('utf-8')
+
+def _encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+def _decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def _sign(payload: str) -> str:
+    return _encode(hmac.new(_secret(), payload.encode('ascii'), hashlib.sha256).digest())
+
+def issue_token(user_id: str, username: Optional[str] = None, ttl_seconds: Optional[int] = None,
+                now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Issue a signed session token for a logged-in user
+
+    The token is '<payload>.<signature>', both base64url, where the payload is
+    {"sub": userId, "name": username, "exp": epoch seconds} and the signature
+    is HMAC-SHA256 of the payload with SESSION_SECRET.
+
+    Returns:
+        {'token': str, 'expiresAt': epoch seconds}
+    """
+    if ttl_seconds is None:
+        ttl_seconds = int(os.environ.get('SESSION_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+    expires_at = int((now if now is not None else time.time()) + ttl_seconds)
+    claims = {'sub': user_id, 'name': username, 'exp': expires_at}
+    payload = _encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+    return {'token': f'{payload}.{_sign(payload)}', 'expiresAt': expires_at}
+
+def verify_token(token: str, now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Check a session token's signature and expiry without any I/O
+
+    Returns:
+        The token's claims (sub, name, exp)
+
+    Raises:
+        InvalidToken if the token is malformed, forged or expired
+    """
+    if not token or not isinstance(token, str) or token.count('.') != 1:
+        raise InvalidToken('Invalid session token')
+    payload, signature = token.split('.')
+    try:
+        # Tokens come from clients: non-ASCII text is a forgery, not an error
+        expected = _sign(payload)
+    except UnicodeEncodeError:
+        raise InvalidToken('Invalid session token')
+    if not hmac.compare_digest(signature.encode('utf-8'), expected.encode('ascii')):
+        raise InvalidToken('Invalid session token')
+    try:
+        claims = json.loads(_decode(payload))
+    except ValueError:
+        raise InvalidToken('Invalid session token')
+    if not isinstance(claims, dict) or not claims.get('sub'):
+        raise InvalidToken('Invalid session token')
+    if int(claims.get('exp', 0)) <= (now if now is not None else time.time()):
+        raise InvalidToken('Session token expired')
+    return claims
+
+def token_from_request(event: Dict[str, Any], data: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Find the session token in an Authorization: Bearer header, the request
+    data or the query string (WebSocket $connect)
+    """
+    for name, value in (event.get('headers') or {}).items():
+        if name.lower() == 'authorization' and isinstance(value, str) and value.startswith('Bearer '):
+            return value[len('Bearer '):].strip()
+    if data and data.get('token'):
+        return data['token']
+    return (event.get('queryStringParameters') or {}).get('token')
+
+def authenticate(event: Dict[str, Any], data: Dict[str, Any], user_field: str = 'userId') -> Dict[str, Any]:
+    """
+    Verify the request's session token and make the token's user the acting user
+
+    data[user_field] is set to the verified user ID; a different ID sent by
+    the client is rejected rather than trusted.
+
+    Returns:
+        The token's claims
+
+    Raises:
+        InvalidToken if the token is missing or invalid or names another user
+    """
+    token = token_from_request(event, data)
+    if not token:
+        raise InvalidToken('Session token required')
+    claims = verify_token(token)
+    claimed = data.get(user_field)
+    if claimed and claimed != claims['sub']:
+        raise InvalidToken('Session token does not match user')
+    data[user_field] = claims['sub']
+    return claims
@@ -0,0 +1,261 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from botocore.exceptions import ClientError
+from lambdas import aws_clients, consumed_capacity
+
+# Request-scoped unit of work for DynamoDB.
+#
+# Inside `with unit_of_work.begin():` reads through get_item() are served
+# from an identity map after the first one, and writes through put_item(),
+# delete_item() and update_item() are queued instead of sent. When the
+# outermost block exits without an exception the queue is flushed in as
+# few round trips as possible. A lone write is sent as is; otherwise:
+#
+# - as one TransactWriteItems when any queued write has a condition (or the
+#   unit was begun atomic), so the writes land together or not at all; a
+#   failed condition is raised as ConditionalCheckFailedException, like a
+#   single conditional write
+# - otherwise as BatchWriteItem requests of up to 25 puts and deletes, with
+#   each update sent on its own (BatchWriteItem cannot carry updates)
+#
+# Later puts and deletes of an item replace earlier queued ones. Outside a
+# unit the module-level helpers read and write immediately, so shared code
+# (db_utils, room_events, connections) works either way. Like
+# instrumentation, the open unit is module state: a Lambda container serves
+# one request at a time.
+
+MAX_BATCH_WRITE = 25
+MAX_TRANSACT_ITEMS = 100
+MAX_BATCH_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 0.05
+
+# Key attributes of each table, by the environment variable naming it; the
+# connections tables' keys depend on their layout (connections.py)
+KEY_SCHEMAS = {
+    'ROOM_TABLE': ('roomId',),
+    'USER_TABLE': ('username',)
+}
+
+_current: Optional['UnitOfWork'] = None
+
+def key_names(table_name: str) -> Tuple[str, ...]:
+    """
+    Key attributes of a table named by one of the KEY_SCHEMAS variables or
+    of a connections table
+
+    Raises:
+        ValueError if the table is none of them
+    """
+    for table_name_env, names in KEY_SCHEMAS.items():
+        if os.environ.get(table_name_env) == table_name:
+            return names
+    # Imported here: connections writes through this module
+    from lambdas import connections
+    try:
+        return connections.key_names_of(table_name)
+    except ValueError:
+        raise ValueError(f'Key schema of table {table_name} is unknown')
+
+class UnitOfWork:
+    """
+    Identity map and write queue of one request
+    """
+
+    def __init__(self, atomic: bool = False):
+        self.atomic = atomic
+        self._identity: Dict[Tuple[str, Tuple[Any, ...]], Optional[Dict[str, Any]]] = {}
+        self._writes: Dict[Tuple[str, Tuple[Any, ...]], Dict[str, Any]] = {}
+
+    def _identity_key(self, table_name: str, key: Dict[str, Any]) -> Tuple[str, Tuple[Any, ...]]:
+        return table_name, tuple(key[name] for name in key_names(table_name))
+
+    def get_item(self, table: Any, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        The item with this key as this request last read or wrote it (None if missing)
+        """
+        identity = self._identity_key(table.name, key)
+        if identity not in self._identity:
+            self._identity[identity] = table.get_item(Key=key).get('Item')
+        return self._identity[identity]
+
+    def _queue(self, table: Any, kind: str, key: Dict[str, Any], request: Dict[str, Any]) -> None:
+        table_name = table.name
+        identity = self._identity_key(table_name, key)
+        previous = self._writes.pop(identity, None)
+        if previous and 'ConditionExpression' not in request:
+            # The item's check still applies to whatever is written last
+            for field in ('ConditionExpression', 'ExpressionAttributeNames', 'ExpressionAttributeValues'):
+                if field in previous['request']:
+                    request[field] = previous['request'][field]
+        self._writes[identity] = {'table': table_name, 'kind': kind, 'request': request, 'target': table}
+        self._identity[identity] = request.get('Item')
+
+    def update_item(self, table: Any, key: Dict[str, Any], **request: Any) -> None:
+        """
+        Queue an update (UpdateExpression and optional conditions); updates of
+        an item are sent in order and do not replace other queued writes
+        """
+        identity = self._identity_key(table.name, key)
+        # What the item looks like afterwards is only known to DynamoDB
+        self._identity.pop(identity, None)
+        self._writes[('Update', len(self._writes)) + identity] = {
+            'table': table.name, 'kind': 'Update', 'request': dict(request, Key=key), 'target': table}
+
+    def put_item(self, table: Any, item: Dict[str, Any], **conditions: Any) -> None:
+        """
+        Queue a put; conditions are ConditionExpression and its attribute names/values
+        """
+        key = {name: item[name] for name in key_names(table.name)}
+        self._queue(table, 'Put', key, dict(conditions, Item=item))
+
+    def delete_item(self, table: Any, key: Dict[str, Any], **conditions: Any) -> None:
+        """
+        Queue a delete; conditions as for put_item
+        """
+        self._queue(table, 'Delete', key, dict(conditions, Key=key))
+
+    @property
+    def pending(self) -> int:
+        return len(self._writes)
+
+    def commit(self) -> None:
+        """
+        Send every queued write, transactionally if any of them is conditional
+
+        Raises:
+            ClientError (ConditionalCheckFailedException when a condition failed)
+        """
+        writes = list(self._writes.values())
+        self._writes.clear()
+        if not writes:
+            return
+        if len(writes) == 1:
+            # A lone write is atomic by itself and needs no batch
+            self._send(writes[0])
+        elif self.atomic or any('ConditionExpression' in write['request'] for write in writes):
+            self._transact(writes)
+        else:
+            batched = [write for write in writes if write['kind'] != 'Update']
+            if len(batched) == 1:
+                self._send(batched[0])
+            else:
+                for start in range(0, len(batched), MAX_BATCH_WRITE):
+                    self._batch(batched[start:start + MAX_BATCH_WRITE])
+            for write in writes:
+                if write['kind'] == 'Update':
+                    self._send(write)
+
+    @staticmethod
+    def _send(write: Dict[str, Any]) -> None:
+        method = {'Put': 'put_item', 'Delete': 'delete_item', 'Update': 'update_item'}[write['kind']]
+        getattr(write['target'], method)(**write['request'])
+
+    def _batch(self, writes: List[Dict[str, Any]]) -> None:
+        request_items: Dict[str, List[Dict[str, Any]]] = {}
+        for write in writes:
+            if write['kind'] == 'Put':
+                entry = {'PutRequest': {'Item': write['request']['Item']}}
+            else:
+                entry = {'DeleteRequest': {'Key': write['request']['Key']}}
+            request_items.setdefault(write['table'], []).append(entry)
+
+        dynamodb = aws_clients.resource('dynamodb')
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            started = time.perf_counter()
+            response = dynamodb.batch_write_item(RequestItems=request_items, ReturnConsumedCapacity='TOTAL')
+            consumed_capacity.record_batch('BatchWriteItem', response, (time.perf_counter() - started) * 1000)
+            request_items = response.get('UnprocessedItems') or {}
+            if not request_items:
+                return
+            # Throttled writes come back unprocessed: retry them with backoff
+            time.sleep(RETRY_BASE_SECONDS * 2 ** attempt)
+        raise RuntimeError(f'{sum(len(entries) for entries in request_items.values())} writes left unprocessed')
+
+    def _transact(self, writes: List[Dict[str, Any]]) -> None:
+        if len(writes) > MAX_TRANSACT_ITEMS:
+            raise ValueError(f'A transaction holds at most {MAX_TRANSACT_ITEMS} writes, not {len(writes)}')
+        from boto3.dynamodb.types import TypeSerializer
+        serializer = TypeSerializer()
+        transact_items = []
+        for write in writes:
+            request = {'TableName': write['table']}
+            for field, value in write['request'].items():
+                if field in ('Item', 'Key', 'ExpressionAttributeValues'):
+                    value = {name: serializer.serialize(member) for name, member in value.items()}
+                request[field] = value
+            transact_items.append({write['kind']: request})
+
+        started = time.perf_counter()
+        try:
+            response = aws_clients.resource('dynamodb').meta.client.transact_write_items(
+                TransactItems=transact_items, ReturnConsumedCapacity='TOTAL')
+        except ClientError as e:
+            consumed_capacity.record_batch('TransactWriteItems', {}, (time.perf_counter() - started) * 1000)
+            reasons = e.response.get('CancellationReasons') or []
+            if any(reason.get('Code') == 'ConditionalCheckFailed' for reason in reasons):
+                raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException',
+                                             'Message': 'The conditional request failed'},
+                                   'CancellationReasons': reasons}, 'TransactWriteItems') from e
+            raise
+        consumed_capacity.record_batch('TransactWriteItems', response, (time.perf_counter() - started) * 1000)
+
+@contextmanager
+def begin(atomic: bool = False) -> Iterator[UnitOfWork]:
+    """
+    Open the request's unit of work, committed when the outermost block exits
+    cleanly; nested blocks join the open unit
+    """
+    global _current
+    if _current is not None:
+        _current.atomic = _current.atomic or atomic
+        yield _current
+        return
+    work = _current = UnitOfWork(atomic)
+    try:
+        yield work
+    finally:
+        _current = None
+    work.commit()
+
+def current() -> Optional[UnitOfWork]:
+    """
+    The open unit of work, or None outside one
+    """
+    return _current
+
+def get_item(table: Any, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Read an item through the open unit's identity map, or directly outside one
+    """
+    if _current is not None:
+        return _current.get_item(table, key)
+    return table.get_item(Key=key).get('Item')
+
+def put_item(table: Any, item: Dict[str, Any], **conditions: Any) -> None:
+    """
+    Queue a put on the open unit, or write it now outside one
+    """
+    if _current is not None:
+        _current.put_item(table, item, **conditions)
+    else:
+        table.put_item(Item=item, **conditions)
+
+def delete_item(table: Any, key: Dict[str, Any], **conditions: Any) -> None:
+    """
+    Queue a delete on the open unit, or delete now outside one
+    """
+    if _current is not None:
+        _current.delete_item(table, key, **conditions)
+    else:
+        table.delete_item(Key=key, **conditions)
+
+def update_item(table: Any, key: Dict[str, Any], **request: Any) -> None:
+    """
+    Queue an update on the open unit, or update now outside one
+    """
+    if _current is not None:
+        _current.update_item(table, key, **request)
+    else:
+        table.update_item(Key=key, **request)
@@ -1,26 +1,33 @@
-from base_handler import WebSocketBaseHandler
-from db_utils import db_utils
+from lambdas import instrumentation
+from lambdas.base_handler import WebSocketBaseHandler
+from lambdas.db_utils import db_utils
+from lambdas.session_tokens import verify_token, token_from_request, InvalidToken
 
 class WebSocketConnectHandler(WebSocketBaseHandler):
     """
     WebSocket $connect handler
     Stores connection information in DynamoDB table
+    
+    Clients connect with ?token=<session token>; the verified identity is
+    cached on the connection record.
     """
     
     def process_websocket_request(self, event, context):
         """
         Process WebSocket connect request
         """
-        print(f"Processing WebSocket connect request: {event}")
-        
         # Extract connection information
         connection_id = self.get_connection_id(event)
         request_time = event.get('requestContext', {}).get('requestTimeEpoch')
-        user_info = self.get_user_info_from_query(event)
         
-        print(f"Connection ID: {connection_id}")
-        print(f"Request time: {request_time}")
-        print(f"User info: {user_info}")
+        token = token_from_request(event)
+        if not token:
+            return self.error_response(401, 'Session token required')
+        try:
+            claims = verify_token(token)
+        except InvalidToken as e:
+            return self.error_response(401, str(e))
+        user_info = {'userId': claims['sub'], 'userName': claims.get('name')}
         
         if not connection_id:
             return self.error_response(400, 'Missing connection ID')
@@ -30,11 +37,10 @@ class WebSocketConnectHandler(WebSocketBaseHandler):
             connection_id=connection_id,
             user_id=user_info.get('userId'),
             user_name=user_info.get('userName'),
-            request_time=request_time
+            request_time=request_time,
+            session_expires_at=claims['exp']
         )
         
-        print(f"Connection record creation success: {success}")
-        
         if not success:
             return self.error_response(500, 'Failed to create connection record')
         
@@ -47,13 +53,10 @@ handler = WebSocketConnectHandler()
 
 # Lambda handler function
 def lambda_handler(event, context):
-    print(f"LAMBDA HANDLER CALLED with event: {event}")
-    print(f"Event type: {type(event)}")
-    print(f"Event keys: {list(event.keys()) if isinstance(event, dict) else 'Not a dict'}")
-    
+    instrumentation.debug('WebSocket connect event: %s', event)
     try:
         result = handler.handle_websocket_request(event, context)
-        print(f"Handler result: {result}")
+        instrumentation.debug('Handler result: %s', result)
         return result
     except Exception as e:
         print(f"Exception in lambda_handler: {str(e)}")
@@ -1,13 +1,92 @@
-import json
 import os
-import boto3
+from typing import Any, Dict, List, Optional
+from lambdas import activity, connections, instrumentation, unit_of_work
+from lambdas.db_utils import db_utils
+from lambdas.game_views import get_user_seat
+from lambdas.room_events import player_disconnected_event, current_seq, record_events, build_delta, serialize_message, put_room
+from lambdas.websocket_utils import broadcast_serialized
 from botocore.exceptions import ClientError
-from datetime import datetime
 
+# Tries at committing a disconnect before a room that keeps being updated
+# concurrently is left as it is (the connection records are deleted anyway)
+ROOM_UPDATE_ATTEMPTS = 3
+
+def leave_room(room_id: str, user_id: Optional[str], connection_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Queue a room's side of a disconnect on the open unit of work
+
+    A player with no other connection in the room gives up their seat while
+    the room is waiting, and keeps it as an absent seat once the game is on.
+
+    Returns:
+        {'room', 'events', 'targets'} to publish once the unit commits, or
+        None when the player is still connected to the room or not seated in it
+    """
+    remaining = [record for record in connections.in_room(room_id) if record.get('connectionId') != connection_id]
+    if any(record.get('userId') == user_id for record in remaining):
+        return None
+    room_item = db_utils.get_room(room_id)
+    seat = get_user_seat(room_item, user_id) if room_item and user_id else None
+    if not seat:
+        return None
+    
+    expected_seq = current_seq(room_item)
+    released = room_item.get('state') == 'waiting'
+    if released:
+        room_item['seats'][seat] = ''
+    else:
+        room_item['absentSeats'] = sorted(set(room_item.get('absentSeats', [])) | {seat})
+    events = [player_disconnected_event(seat, user_id, released)]
+    record_events(room_item, events)
+    put_room(db_utils.get_table('ROOM_TABLE'), room_item, expected_seq)
+    return {'room': room_item, 'events': events, 'targets': [record['connectionId'] for record in remaining]}
+
+def disconnect(connection_id: str) -> List[Dict[str, Any]]:
+    """
+    Delete a connection's records and leave the rooms they were in, in one
+    commit, then send each room's remaining connections one delta
+
+    Returns:
+        The connection records deleted
+    """
+    records: Optional[List[Dict[str, Any]]] = None
+    departures: List[Optional[Dict[str, Any]]] = []
+    for attempt in range(ROOM_UPDATE_ATTEMPTS):
+        try:
+            with unit_of_work.begin():
+                records = connections.delete(connection_id, records)
+                departures = [leave_room(record['currentRoomId'], record.get('userId'), connection_id)
+                              for record in records
+                              if record.get('currentRoomId') not in (None, connections.NOT_JOINED)]
+            break
+        except ClientError as e:
+            # Another write to the room won: re-read it and try again
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException' or records is None:
+                raise
+    else:
+        with unit_of_work.begin():
+            connections.delete(connection_id, records)
+        departures = []
+    
+    publish(departures)
+    return records or []
+
+def publish(departures: List[Optional[Dict[str, Any]]]) -> None:
+    """
+    Send each room left (leave_room) one delta for its remaining connections
+    """
+    with instrumentation.span('fanout'):
+        for departure in departures:
+            if departure and departure['targets']:
+                delta = build_delta(departure['room'], departure['events'])
+                broadcast_serialized(departure['targets'], serialize_message(delta))
+
+@instrumentation.instrumented('websocket_disconnect')
 def lambda_handler(event, context):
     """
     WebSocket $disconnect handler
-    Removes connection information from DynamoDB table
+    Removes connection information from DynamoDB table and tells the rooms
+    the connection was in that its player left
     
     Expected event structure:
     {
@@ -35,42 +114,11 @@ def lambda_handler(event, context):
                 'statusCode': 500
             }
         
-        # Create DynamoDB client
-        dynamodb = boto3.resource('dynamodb')
-        connections_table = dynamodb.Table(connections_table_name)
-        
-        # First, find all connection records for this connection ID
-        # Since currentRoomId is the sort key, we need to find all items with this connectionId
-        response = connections_table.query(
-            KeyConditionExpression='connectionId = :connectionId',
-            ExpressionAttributeValues={
-                ':connectionId': connection_id
-            }
-        )
-        
-        deleted_count = 0
-        for item in response.get('Items', []):
-            current_room_id = item.get('currentRoomId', 'not-joined')
-            
-            try:
-                # Delete each connection record with its specific sort key
-                connections_table.delete_item(
-                    Key={
-                        'connectionId': connection_id,
-                        'currentRoomId': current_room_id
-                    }
-                )
-                deleted_count += 1
-                print(f"Deleted connection record: {connection_id} with room: {current_room_id}")
-                
-            except ClientError as e:
-                if e.response['Error']['Code'] == 'ResourceNotFoundException':
-                    # Item was already deleted
-                    print(f"Connection record {connection_id} with room {current_room_id} was already deleted")
-                else:
-                    print(f"Error deleting connection record {connection_id} with room {current_room_id}: {e.response['Error']['Message']}")
+        # Delete every record of the connection and update the rooms it was in
+        deleted_count = len(disconnect(connection_id))
+        activity.forget(connection_id)
         
-        print(f"Connection {connection_id} cleanup completed. Deleted {deleted_count} records.")
+        instrumentation.debug('Connection %s cleanup completed, deleted %d records', connection_id, deleted_count)
         
         # For $disconnect, we don't need to return a response to the client
         # The connection is already closed by API Gateway
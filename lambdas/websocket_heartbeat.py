@@ -0,0 +1,37 @@
+from lambdas import activity
+from lambdas.base_handler import WebSocketBaseHandler
+
+class WebSocketHeartbeatHandler(WebSocketBaseHandler):
+    """
+    WebSocket handler for keep-alive messages from otherwise idle clients
+
+    The reply only tells the client the server time. The activity is
+    recorded by lambda_handler too, for when the heartbeat route has its own
+    function instead of going through the router (a second touch of the
+    same message is a no-op).
+    """
+    
+    def process_websocket_request(self, event, context):
+        """
+        Process WebSocket heartbeat request
+        """
+        # Validate route key
+        self.validate_route_key(event, 'heartbeat')
+        
+        return self.success_response({
+            'action': 'heartbeat',
+            'serverTime': activity.now_ms()
+        })
+
+# Create handler instance
+handler = WebSocketHeartbeatHandler()
+
+# Lambda handler function
+def lambda_handler(event, context):
+    request_context = event.get('requestContext', {})
+    if request_context.get('connectionId'):
+        activity.touch(request_context['connectionId'], request_context.get('requestTimeEpoch'))
+    try:
+        return handler.handle_websocket_request(event, context)
+    finally:
+        activity.flush()
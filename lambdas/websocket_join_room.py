@@ -1,7 +1,11 @@
 import random
-from base_handler import WebSocketBaseHandler
-from db_utils import db_utils
-from websocket_utils import broadcast_to_connections
+from botocore.exceptions import ClientError
+from lambdas import instrumentation, unit_of_work
+from lambdas.base_handler import WebSocketBaseHandler
+from lambdas.db_utils import db_utils
+from lambdas.websocket_utils import broadcast_serialized
+from lambdas.game_views import build_room_view, get_user_seat, present_players
+from lambdas.room_events import seat_changed_event, player_reconnected_event, current_seq, record_events, build_delta, serialize_message, put_room
 
 SEATS = ['N', 'E', 'S', 'W']
 
@@ -21,6 +25,11 @@ class WebSocketJoinRoomHandler(WebSocketBaseHandler):
         body = self.parse_body(event)
         data = self.extract_data_from_body(body)
         
+        # Act as the session token's user
+        error = self.authenticate(event, data)
+        if error:
+            return self.error_response(401, error)
+        
         # Extract and validate parameters
         user_id = data.get('userId')
         room_id = data.get('roomId')
@@ -31,49 +40,60 @@ class WebSocketJoinRoomHandler(WebSocketBaseHandler):
             return self.error_response(400, error)
         
         # Find room using database utilities
-        room_item = db_utils.find_room_by_id(room_id)
+        room_item = db_utils.get_room(room_id)
         if not room_item:
             return self.error_response(404, 'Room does not exist')
         
         # Check if user is already in the room
-        if user_id in room_item['seats'].values():
+        absent_seats = room_item.get('absentSeats', [])
+        seat_to_assign = get_user_seat(room_item, user_id)
+        if seat_to_assign and seat_to_assign not in absent_seats:
             return self.error_response(400, 'User already in room')
         
-        # Determine seat assignment
-        seat_to_assign = self._determine_seat(room_item, requested_seat)
-        if not seat_to_assign:
-            return self.error_response(400, 'No seats available')
-        
-        # Assign user to seat
-        room_item['seats'][seat_to_assign] = user_id
+        if seat_to_assign:
+            # Back after disconnecting mid-game: the seat was kept for them
+            room_item['absentSeats'] = [seat for seat in absent_seats if seat != seat_to_assign]
+            events = [player_reconnected_event(seat_to_assign, user_id)]
+        else:
+            # Determine seat assignment
+            seat_to_assign = self._determine_seat(room_item, requested_seat)
+            if not seat_to_assign:
+                return self.error_response(400, 'No seats available')
+            
+            # Assign user to seat
+            room_item['seats'][seat_to_assign] = user_id
+            events = [seat_changed_event(seat_to_assign, user_id)]
         
-        # Update room in database
+        # Update room and the user's connection record in one transaction,
+        # failing if another update of the room landed first
+        expected_seq = current_seq(room_item)
+        record_events(room_item, events)
         room_table = db_utils.get_table('ROOM_TABLE')
-        room_table.put_item(Item=room_item)
-        
-        # Update user's connection record
-        db_utils.update_user_room(user_id, room_id)
-        
-        # Get active connections and broadcast update
-        active_connections = db_utils.get_room_connections(room_item['seats'].values(), room_id)
-        
-        broadcast_message = {
-            'action': 'roomUpdated',
-            'room': room_item,
-            'updateType': 'userJoined',
-            'newUser': user_id,
-            'assignedSeat': seat_to_assign
-        }
+        try:
+            with unit_of_work.begin():
+                put_room(room_table, room_item, expected_seq)
+                db_utils.update_connection_room(self.get_connection_id(event), room_id)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return self.error_response(409, 'Room was updated concurrently, please retry')
+            raise
         
-        broadcast_to_connections(active_connections, broadcast_message)
+        # Everyone already seated gets a compact seatChanged (or playerReconnected) delta
+        with instrumentation.span('fanout'):
+            delta = build_delta(room_item, events)
+            other_users = [occupant for occupant in present_players(room_item).values() if occupant != user_id]
+            active_connections = db_utils.get_room_connections(other_users, room_id)
+            broadcast_serialized(active_connections, serialize_message(delta))
         
-        # Return success response
+        # The joining player gets a full snapshot of their seat's view
+        joined_view = build_room_view(room_item, seat_to_assign)
         return self.success_response({
             'action': 'joinRoom',
             'success': True,
-            'room': room_item,
+            'room': joined_view,
+            'seq': delta['seq'],
             'assignedSeat': seat_to_assign,
-            'gameState': room_item.get('gameData', {})
+            'gameState': joined_view['gameData']
         })
     
     def _determine_seat(self, room_item, requested_seat):
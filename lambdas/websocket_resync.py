@@ -0,0 +1,77 @@
+from lambdas.base_handler import WebSocketBaseHandler
+from lambdas.db_utils import db_utils
+from lambdas.game_views import build_room_view, get_user_seat
+from lambdas.room_events import current_seq, events_since, build_snapshot, HANDS_DEALT
+
+# Past this many missed mutations a snapshot is smaller than the replay
+MAX_RESYNC_ENTRIES = 64
+
+class WebSocketResyncHandler(WebSocketBaseHandler):
+    """
+    WebSocket handler for catching a reconnected client up on a room
+    """
+    
+    def process_websocket_request(self, event, context):
+        """
+        Process WebSocket resync request
+        """
+        # Validate route key
+        self.validate_route_key(event, 'resync')
+        
+        # Parse request body
+        body = self.parse_body(event)
+        data = self.extract_data_from_body(body)
+        
+        # Act as the session token's user
+        error = self.authenticate(event, data)
+        if error:
+            return self.error_response(401, error)
+        
+        error = self.validate_required_fields(data, ['userId', 'roomId'])
+        if error:
+            return self.error_response(400, error)
+        
+        user_id = data.get('userId')
+        room_id = data.get('roomId')
+        
+        room_item = db_utils.get_room(room_id)
+        if not room_item:
+            return self.error_response(404, 'Room does not exist')
+        
+        # Spectators and unknown users get the public view
+        seat = get_user_seat(room_item, user_id)
+        
+        missed = None
+        last_seq = data.get('lastSeq')
+        if last_seq is not None:
+            try:
+                missed = events_since(room_item, int(last_seq))
+            except (TypeError, ValueError):
+                missed = None
+        
+        # Hands are never logged, so a missed deal can only be caught up with a snapshot
+        if missed and any(e.get('type') == HANDS_DEALT for entry in missed for e in entry['events']):
+            missed = None
+        
+        if missed is None or len(missed) > MAX_RESYNC_ENTRIES:
+            return self.success_response({
+                'action': 'resync',
+                'roomId': room_id,
+                'seq': current_seq(room_item),
+                'snapshot': build_snapshot(room_item, build_room_view(room_item, seat))
+            })
+        
+        return self.success_response({
+            'action': 'resync',
+            'roomId': room_id,
+            'seq': current_seq(room_item),
+            'deltas': [{'seq': int(entry['seq']), 'events': entry['events']} for entry in missed],
+            'turn': room_item.get('gameData', {}).get('turn')
+        })
+
+# Create handler instance
+handler = WebSocketResyncHandler()
+
+# Lambda handler function
+def lambda_handler(event, context):
+    return handler.handle_websocket_request(event, context)
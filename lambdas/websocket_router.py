@@ -0,0 +1,61 @@
+import importlib
+import json
+from typing import Dict, Any, Callable, Optional
+from lambdas import activity, instrumentation
+
+# routeKey -> module exposing lambda_handler(event, context); modules are only
+# imported the first time their route is hit, so one warm container serves
+# every route without paying for all of them at cold start
+ROUTES = {
+    '$connect': 'lambdas.websocket_connect',
+    '$disconnect': 'lambdas.websocket_disconnect',
+    'createRoom': 'lambdas.websocket_create_room',
+    'joinRoom': 'lambdas.websocket_join_room',
+    'startRoom': 'lambdas.websocket_start_room',
+    'makeBid': 'lambdas.websocket_make_bid',
+    'playCard': 'lambdas.websocket_play_card',
+    'resync': 'lambdas.websocket_resync',
+    'heartbeat': 'lambdas.websocket_heartbeat'
+}
+# Routes that do not count as activity on the connection
+# ($connect stores the first lastActivity, $disconnect ends it)
+NOT_ACTIVITY = {'$connect', '$disconnect'}
+
+_handlers: Dict[str, Callable[[Dict[str, Any], Any], Dict[str, Any]]] = {}
+
+def resolve_route(route_key: Optional[str]) -> Optional[Callable[[Dict[str, Any], Any], Dict[str, Any]]]:
+    """
+    Get the handler for a route, importing its module on first use
+
+    Returns:
+        The route's lambda_handler, or None for an unknown route
+    """
+    handler = _handlers.get(route_key)
+    if handler is None and route_key in ROUTES:
+        handler = importlib.import_module(ROUTES[route_key]).lambda_handler
+        _handlers[route_key] = handler
+    return handler
+
+@instrumentation.instrumented('websocket_router')
+def lambda_handler(event, context):
+    """
+    Single WebSocket entry point dispatching on requestContext.routeKey
+
+    Every routed message counts as activity on its connection; the
+    lastActivity write, when one is due, happens after the handler
+    """
+    request_context = event.get('requestContext', {})
+    route_key = request_context.get('routeKey')
+    handler = resolve_route(route_key)
+    if handler is None:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': f'Invalid route key: {route_key}'})
+        }
+    connection_id = request_context.get('connectionId')
+    if connection_id and route_key not in NOT_ACTIVITY:
+        activity.touch(connection_id, request_context.get('requestTimeEpoch'))
+    try:
+        return handler(event, context)
+    finally:
+        activity.flush()
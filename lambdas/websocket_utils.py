@@ -1,8 +1,8 @@
 import json
-import boto3
+from lambdas import aws_clients, instrumentation
 import os
 from botocore.exceptions import ClientError
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List
 
 def send_websocket_message(connection_id: str, message: Dict[str, Any]) -> bool:
     """
@@ -12,6 +12,19 @@ def send_websocket_message(connection_id: str, message: Dict[str, Any]) -> bool:
         connection_id: The WebSocket connection ID
         message: The message to send (will be JSON serialized)
     
+    Returns:
+        True if message sent successfully, False otherwise
+    """
+    return send_serialized_message(connection_id, json.dumps(message))
+
+def send_serialized_message(connection_id: str, data: str) -> bool:
+    """
+    Send an already JSON-encoded message to a specific WebSocket connection
+    
+    Args:
+        connection_id: The WebSocket connection ID
+        data: The JSON payload
+    
     Returns:
         True if message sent successfully, False otherwise
     """
@@ -22,16 +35,16 @@ def send_websocket_message(connection_id: str, message: Dict[str, Any]) -> bool:
             print("WEBSOCKET_ENDPOINT environment variable not set")
             return False
         
-        # Create API Gateway Management API client
-        apigateway = boto3.client('apigatewaymanagementapi', endpoint_url=endpoint_url)
+        # Reuse the container's API Gateway Management API client
+        apigateway = aws_clients.client('apigatewaymanagementapi', endpoint_url=endpoint_url)
         
         # Send the message
-        response = apigateway.post_to_connection(
+        apigateway.post_to_connection(
             ConnectionId=connection_id,
-            Data=json.dumps(message)
+            Data=data
         )
         
-        print(f"Message sent to connection {connection_id}: {message}")
+        instrumentation.debug('Message sent to connection %s (%d bytes)', connection_id, len(data))
         return True
         
     except ClientError as e:
@@ -56,11 +69,44 @@ def broadcast_to_connections(connection_ids: List[str], message: Dict[str, Any])
         Results for each connection (connection_id -> success)
     """
     results = {}
-    print(f"Broadcasting to {connection_ids}")
+    instrumentation.debug('Broadcasting to %s', connection_ids)
     for connection_id in connection_ids:
         results[connection_id] = send_websocket_message(connection_id, message)
     return results
 
+def broadcast_serialized(connection_ids: List[str], data: str) -> Dict[str, bool]:
+    """
+    Send one pre-serialized payload to multiple WebSocket connections
+    
+    Args:
+        connection_ids: List of connection IDs
+        data: The JSON payload, encoded once by the caller
+    
+    Returns:
+        Results for each connection (connection_id -> success)
+    """
+    return {connection_id: send_serialized_message(connection_id, data) for connection_id in connection_ids}
+
+def broadcast_seat_messages(connections_by_seat: Dict[str, List[str]], messages_by_seat: Dict[str, str]) -> Dict[str, bool]:
+    """
+    Send each seat's pre-serialized message to that seat's connections
+    
+    Args:
+        connections_by_seat: Seat -> connection IDs of the user in that seat
+        messages_by_seat: Seat -> JSON payload
+    
+    Returns:
+        Results for each connection (connection_id -> success)
+    """
+    results = {}
+    for seat, connection_ids in connections_by_seat.items():
+        data = messages_by_seat.get(seat)
+        if data is None:
+            continue
+        for connection_id in connection_ids:
+            results[connection_id] = send_serialized_message(connection_id, data)
+    return results
+
 def get_active_connections() -> List[str]:
     """
     Get all active WebSocket connections from DynamoDB
@@ -74,8 +120,7 @@ def get_active_connections() -> List[str]:
             print("WEBSOCKET_CONNECTIONS_TABLE environment variable not set")
             return []
         
-        dynamodb = boto3.resource('dynamodb')
-        connections_table = dynamodb.Table(connections_table_name)
+        connections_table = aws_clients.table(connections_table_name)
         
         # Scan for active connections
         response = connections_table.scan(
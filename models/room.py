@@ -9,4 +9,5 @@ class Room(BaseModel):
     isPrivate: bool
     seats: Dict[str, str]
     state: str
-    gameData: Any 
\ No newline at end of file
+    gameData: Any
+    seq: int = 0
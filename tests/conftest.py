@@ -0,0 +1,37 @@
+import pytest
+import json
+import os
+from lambdas import activity, aws_clients, password_policy
+from lambdas.session_tokens import issue_token
+from devserver.server import ENVIRONMENT
+
+# Session tokens in tests are signed with a fixed secret
+os.environ.setdefault('SESSION_SECRET', 'test-session-secret')
+
+@pytest.fixture(autouse=True)
+def reset_aws_clients():
+    # Tables cached by one test must not leak its mocks into the next
+    aws_clients.reset()
+    password_policy.reset()
+    activity.reset()
+    yield
+    aws_clients.reset()
+    password_policy.reset()
+    activity.reset()
+
+@pytest.fixture
+def devserver_environment(monkeypatch):
+    # The table names and management endpoint the devserver runs the handlers with
+    for name, value in ENVIRONMENT.items():
+        monkeypatch.setenv(name, value)
+
+@pytest.fixture
+def auth_event():
+    # REST requests carry the session token of the user named in the body
+    def build(body):
+        user_id = body.get('userId') or body.get('ownerId')
+        event = {'body': json.dumps(body)}
+        if user_id:
+            event['headers'] = {'Authorization': f"Bearer {issue_token(user_id)['token']}"}
+        return event
+    return build
@@ -4,11 +4,11 @@ import json
 import os
 from unittest.mock import patch, MagicMock
 
-@patch('lambdas.account_create.boto3')
-def test_account_create_success(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_account_create_success(mock_resource):
     os.environ['USER_TABLE'] = 'users-table'
     mock_table = MagicMock()
-    mock_boto3.resource.return_value.Table.return_value = mock_table
+    mock_resource.return_value.Table.return_value = mock_table
     mock_table.scan.return_value = {'Count': 0}
     mock_table.put_item.return_value = {}
     event = {
@@ -25,11 +25,12 @@ def test_account_create_success(mock_boto3):
     assert 'createdAt' in user
     assert 'passwordHash' not in user
 
-@patch('lambdas.account_create.boto3')
-def test_account_create_duplicate_username(mock_boto3):
+@patch('lambdas.account_create.hash_password_async')
+@patch('lambdas.aws_clients.resource')
+def test_account_create_duplicate_username(mock_resource, mock_hash):
     os.environ['USER_TABLE'] = 'users-table'
     mock_table = MagicMock()
-    mock_boto3.resource.return_value.Table.return_value = mock_table
+    mock_resource.return_value.Table.return_value = mock_table
     mock_table.scan.return_value = {'Count': 1}
     event = {
         'body': json.dumps({'username': 'jacob', 'password': 'testpass'})
@@ -39,9 +40,11 @@ def test_account_create_duplicate_username(mock_boto3):
     body = json.loads(response['body'])
     assert 'error' in body
     assert 'exists' in body['error']
+    # A taken username costs no hashing work
+    mock_hash.assert_not_called()
 
-@patch('lambdas.account_create.boto3')
-def test_account_create_missing_user_table_env(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_account_create_missing_user_table_env(mock_resource):
     if 'USER_TABLE' in os.environ:
         del os.environ['USER_TABLE']
     event = {
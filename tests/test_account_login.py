@@ -4,9 +4,10 @@ import json
 import os
 from unittest.mock import patch, MagicMock
 from passlib.hash import bcrypt
+from lambdas.session_tokens import verify_token
 
-@patch('lambdas.account_login.boto3')
-def test_account_login_success(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_account_login_success(mock_resource):
     os.environ['USER_TABLE'] = 'users-table'
     password = 'testpass'
     password_hash = bcrypt.hash(password)
@@ -17,7 +18,7 @@ def test_account_login_success(mock_boto3):
         'createdAt': '2024-01-01T00:00:00Z'
     }
     mock_table = MagicMock()
-    mock_boto3.resource.return_value.Table.return_value = mock_table
+    mock_resource.return_value.Table.return_value = mock_table
     mock_table.scan.return_value = {'Count': 1, 'Items': [user_item]}
     event = {'body': json.dumps({'username': 'jacob', 'password': password})}
     response = account_login.handler(event, None)
@@ -29,9 +30,12 @@ def test_account_login_success(mock_boto3):
     assert 'userId' in user
     assert 'createdAt' in user
     assert 'passwordHash' not in user
+    claims = verify_token(body['token'])
+    assert claims['sub'] == '123'
+    assert claims['exp'] == body['expiresAt']
 
-@patch('lambdas.account_login.boto3')
-def test_account_login_wrong_password(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_account_login_wrong_password(mock_resource):
     os.environ['USER_TABLE'] = 'users-table'
     password_hash = bcrypt.hash('correctpass')
     user_item = {
@@ -41,7 +45,7 @@ def test_account_login_wrong_password(mock_boto3):
         'createdAt': '2024-01-01T00:00:00Z'
     }
     mock_table = MagicMock()
-    mock_boto3.resource.return_value.Table.return_value = mock_table
+    mock_resource.return_value.Table.return_value = mock_table
     mock_table.scan.return_value = {'Count': 1, 'Items': [user_item]}
     event = {'body': json.dumps({'username': 'jacob', 'password': 'wrongpass'})}
     response = account_login.handler(event, None)
@@ -50,11 +54,11 @@ def test_account_login_wrong_password(mock_boto3):
     assert 'error' in body
     assert 'Invalid' in body['error']
 
-@patch('lambdas.account_login.boto3')
-def test_account_login_user_not_found(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_account_login_user_not_found(mock_resource):
     os.environ['USER_TABLE'] = 'users-table'
     mock_table = MagicMock()
-    mock_boto3.resource.return_value.Table.return_value = mock_table
+    mock_resource.return_value.Table.return_value = mock_table
     mock_table.scan.return_value = {'Count': 0, 'Items': []}
     event = {'body': json.dumps({'username': 'notfound', 'password': 'testpass'})}
     response = account_login.handler(event, None)
@@ -81,4 +85,35 @@ def test_account_login_missing_fields():
     response = account_login.handler(event, None)
     assert response['statusCode'] == 400
     body = json.loads(response['body'])
-    assert 'error' in body 
\ No newline at end of file
+    assert 'error' in body 
+@patch('lambdas.aws_clients.resource')
+def test_account_login_rehashes_below_policy(mock_resource, monkeypatch):
+    os.environ['USER_TABLE'] = 'users-table'
+    monkeypatch.setenv('BCRYPT_ROUNDS', '5')
+    old_hash = bcrypt.hash('testpass', rounds=4)
+    user_item = {'userId': '123', 'username': 'jacob', 'passwordHash': old_hash, 'createdAt': '2024-01-01T00:00:00Z'}
+    mock_table = MagicMock()
+    mock_resource.return_value.Table.return_value = mock_table
+    mock_table.scan.return_value = {'Count': 1, 'Items': [user_item]}
+    event = {'body': json.dumps({'username': 'jacob', 'password': 'testpass'})}
+    response = account_login.handler(event, None)
+    assert response['statusCode'] == 200
+    kwargs = mock_table.put_item.call_args.kwargs
+    assert kwargs['ExpressionAttributeValues'] == {':old': old_hash}
+    new_hash = kwargs['Item']['passwordHash']
+    assert new_hash.startswith('$2b$05$')
+    assert bcrypt.verify('testpass', new_hash)
+
+@patch('lambdas.aws_clients.resource')
+def test_account_login_keeps_hash_meeting_policy(mock_resource, monkeypatch):
+    os.environ['USER_TABLE'] = 'users-table'
+    monkeypatch.setenv('BCRYPT_ROUNDS', '4')
+    user_item = {'userId': '123', 'username': 'jacob', 'passwordHash': bcrypt.hash('testpass', rounds=4),
+                 'createdAt': '2024-01-01T00:00:00Z'}
+    mock_table = MagicMock()
+    mock_resource.return_value.Table.return_value = mock_table
+    mock_table.scan.return_value = {'Count': 1, 'Items': [user_item]}
+    event = {'body': json.dumps({'username': 'jacob', 'password': 'testpass'})}
+    response = account_login.handler(event, None)
+    assert response['statusCode'] == 200
+    mock_table.put_item.assert_not_called()
@@ -1,9 +1,54 @@
 import pytest
 from lambdas import ai_double_dummy
+import json
 
-def test_ai_double_dummy_stub():
-    event = {}
-    context = None
-    response = ai_double_dummy.handler(event, context)
+DD_TABLE = {
+    'N': {'C': 8, 'D': 8, 'H': 4, 'S': 10, 'NT': 7},
+    'S': {'C': 8, 'D': 8, 'H': 4, 'S': 10, 'NT': 7},
+    'E': {'C': 5, 'D': 5, 'H': 9, 'S': 3, 'NT': 5},
+    'W': {'C': 5, 'D': 5, 'H': 9, 'S': 3, 'NT': 5}
+}
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    ai_double_dummy._deal_cache.clear()
+    yield
+    ai_double_dummy._deal_cache.clear()
+
+def test_ai_double_dummy_missing_body():
+    response = ai_double_dummy.handler({}, None)
+    assert response['statusCode'] == 400
+
+def test_ai_double_dummy_par_from_table():
+    event = {'body': json.dumps({'ddTable': DD_TABLE, 'vulnerability': 'None'})}
+    response = ai_double_dummy.handler(event, None)
     assert response['statusCode'] == 200
-    assert 'Double dummy analysis' in response['body'] 
\ No newline at end of file
+    body = json.loads(response['body'])
+    assert 'Double dummy analysis' in body['message']
+    assert body['parScore'] == 300
+    assert body['parContracts'][0]['contract'] == '5HX'
+    assert body['cached'] is False
+
+def test_ai_double_dummy_caches_par_with_table():
+    hands = {'N': ['AS'], 'E': ['KS'], 'S': ['QS'], 'W': ['JS']}
+    event = {'body': json.dumps({'ddTable': DD_TABLE, 'hands': hands, 'vulnerability': 'NS'})}
+    first = json.loads(ai_double_dummy.handler(event, None)['body'])
+    assert first['cached'] is False
+
+    # Same hands without a table are served from the cached table
+    event = {'body': json.dumps({'hands': hands, 'vulnerability': 'NS'})}
+    second = json.loads(ai_double_dummy.handler(event, None)['body'])
+    assert second['cached'] is True
+    assert second['parScore'] == first['parScore']
+    assert second['ddTable'] == first['ddTable']
+
+def test_ai_double_dummy_unknown_hands_without_table():
+    event = {'body': json.dumps({'hands': {'N': ['AS']}})}
+    response = ai_double_dummy.handler(event, None)
+    assert response['statusCode'] == 400
+    assert json.loads(response['body'])['error'] == 'ddTable required'
+
+def test_ai_double_dummy_invalid_vulnerability():
+    event = {'body': json.dumps({'ddTable': DD_TABLE, 'vulnerability': 'All'})}
+    response = ai_double_dummy.handler(event, None)
+    assert response['statusCode'] == 400
@@ -0,0 +1,36 @@
+import pytest
+import os
+import subprocess
+import sys
+from lambdas import aws_clients
+from unittest.mock import patch
+
+@patch('boto3.resource')
+def test_table_is_created_once_and_reused(mock_resource):
+    first = aws_clients.table('rooms-table')
+    second = aws_clients.table('rooms-table')
+    assert first is second
+    mock_resource.assert_called_once_with('dynamodb')
+    mock_resource.return_value.Table.assert_called_once_with('rooms-table')
+
+@patch('boto3.client')
+def test_clients_are_cached_per_endpoint(mock_client):
+    aws_clients.client('apigatewaymanagementapi', endpoint_url='https://a')
+    aws_clients.client('apigatewaymanagementapi', endpoint_url='https://a')
+    aws_clients.client('apigatewaymanagementapi', endpoint_url='https://b')
+    assert mock_client.call_count == 2
+
+def test_table_from_env_requires_variable():
+    os.environ.pop('MISSING_TABLE', None)
+    with pytest.raises(ValueError, match='MISSING_TABLE environment variable not set'):
+        aws_clients.table_from_env('MISSING_TABLE')
+
+def test_handlers_import_without_boto3_passlib_or_pydantic():
+    script = (
+        "import sys\n"
+        "import lambdas.account_create, lambdas.account_login, lambdas.room_create, lambdas.websocket_make_bid\n"
+        "print(sorted(m for m in ('boto3', 'passlib', 'pydantic') if m in sys.modules))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', script], cwd=root, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == '[]'
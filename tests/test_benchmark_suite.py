@@ -0,0 +1,26 @@
+import os
+from benchmarks.suite import CASES, compare, late_play_room, mid_auction_room, run
+
+def test_every_case_runs_its_handler_successfully():
+    results = run(rounds=1)
+    assert set(results) == set(CASES)
+    assert all(result['medianUs'] > 0 for result in results.values())
+
+def test_account_cases_hash_at_the_fixed_cost_and_restore_the_configured_one(monkeypatch):
+    monkeypatch.setenv('BCRYPT_ROUNDS', '12')
+    results = run(['rest.accountCreate', 'rest.accountLogin'], rounds=1)
+    assert set(results) == {'rest.accountCreate', 'rest.accountLogin'}
+    assert os.environ['BCRYPT_ROUNDS'] == '12'
+
+def test_representative_rooms():
+    auction = mid_auction_room()
+    assert auction['state'] == 'bidding' and len(auction['gameData']['bids']) == 6
+    late = late_play_room()
+    assert late['state'] == 'playing'
+    assert len(late['gameData']['tricks']) == 11 and len(late['gameData']['currentTrick']) == 1
+
+def test_compare_flags_only_slowdowns_beyond_the_threshold():
+    baseline = {'a': {'medianUs': 100.0}, 'b': {'medianUs': 100.0}}
+    results = {'a': {'medianUs': 160.0}, 'b': {'medianUs': 140.0}, 'new': {'medianUs': 1.0}}
+    assert compare(results, baseline, threshold=0.5) == [
+        {'name': 'a', 'medianUs': 160.0, 'baselineUs': 100.0, 'change': 0.6}]
@@ -0,0 +1,124 @@
+import pytest
+import random
+from lambdas import bridge_engine
+from lambdas.bridge_engine import IllegalAction
+
+SEATS = ['N', 'E', 'S', 'W']
+
+def make_room(state='waiting', game_data=None):
+    return {
+        'roomId': 'room-abc',
+        'ownerId': 'user-n',
+        'seats': {'N': 'user-n', 'E': 'user-e', 'S': 'user-s', 'W': 'user-w'},
+        'state': state,
+        'gameData': game_data or {}
+    }
+
+def started_room(seed=1):
+    room = make_room()
+    bridge_engine.start_game(room, random.Random(seed))
+    return room
+
+def bid_all(room, calls):
+    for call in calls:
+        bridge_engine.apply_bid(room, room['gameData']['turn'], call, 0)
+
+def test_deal_hands_deals_every_card_once():
+    hands = bridge_engine.deal_hands(random.Random(7))
+    cards = [card for seat in SEATS for card in hands[seat]]
+    assert all(len(hands[seat]) == 13 for seat in SEATS)
+    assert len(set(cards)) == 52
+    assert 'TS' in cards
+
+def test_start_game_deals_and_fills_empty_seats():
+    room = make_room()
+    room['seats']['E'] = ''
+    events, private = bridge_engine.start_game(room, random.Random(3))
+    assert room['state'] == 'bidding'
+    assert room['seats']['E'] == 'robot-E'
+    assert room['gameData']['turn'] == 'user-n'
+    assert room['gameData']['turnSeat'] == 'N'
+    assert [event['type'] for event in events] == ['seatChanged', 'phaseChanged', 'handsDealt']
+    assert private['S'][0]['cards'] == room['gameData']['hands']['S']
+
+def test_start_game_requires_waiting_room():
+    with pytest.raises(IllegalAction):
+        bridge_engine.start_game(make_room(state='bidding'))
+
+def test_validate_bid_rejects_insufficient_and_illegal_doubles():
+    auction = [{'seat': 'N', 'bid': '2H'}]
+    with pytest.raises(IllegalAction):
+        bridge_engine.validate_bid(auction, 'E', '2D')
+    with pytest.raises(IllegalAction):
+        bridge_engine.validate_bid(auction, 'S', 'double')
+    with pytest.raises(IllegalAction):
+        bridge_engine.validate_bid(auction, 'E', 'redouble')
+    with pytest.raises(IllegalAction):
+        bridge_engine.validate_bid(auction, 'E', '8NT')
+    bridge_engine.validate_bid(auction, 'E', 'double')
+    bridge_engine.validate_bid(auction, 'E', '2S')
+    bridge_engine.validate_bid(auction + [{'seat': 'E', 'bid': 'double'}], 'S', 'redouble')
+
+def test_bid_out_of_turn_is_rejected():
+    room = started_room()
+    with pytest.raises(IllegalAction, match='Not your turn'):
+        bridge_engine.apply_bid(room, 'user-e', 'pass', 0)
+
+def test_auction_ends_with_lead_from_left_of_declarer():
+    room = started_room()
+    bid_all(room, ['1H', 'pass', '4H', 'pass', 'pass', 'pass'])
+    game_data = room['gameData']
+    assert room['state'] == 'playing'
+    assert game_data['contract']['declarer'] == 'N'
+    assert game_data['turnSeat'] == 'E'
+    assert game_data['turn'] == 'user-e'
+
+def test_passed_out_hand_is_completed():
+    room = started_room()
+    bid_all(room, ['pass'] * 4)
+    assert room['state'] == 'completed'
+    assert room['gameData']['result']['nsScore'] == 0
+
+def test_trick_winner_respects_trumps():
+    plays = [
+        {'seat': 'N', 'card': 'AS'},
+        {'seat': 'E', 'card': '2H'},
+        {'seat': 'S', 'card': 'KS'},
+        {'seat': 'W', 'card': '3H'}
+    ]
+    assert bridge_engine.trick_winner(plays, None) == 'N'
+    assert bridge_engine.trick_winner(plays, 'H') == 'W'
+    assert bridge_engine.trick_winner(plays, 'D') == 'N'
+
+def test_declarer_plays_dummy_cards_and_ten_is_playable():
+    room = make_room(state='playing', game_data={
+        'currentPhase': 'playing',
+        'contract': {'contract': '1NT', 'level': 1, 'strain': 'NT', 'doubled': 0, 'declarer': 'N'},
+        'hands': {'N': ['AS'], 'E': ['KS'], 'S': ['TS'], 'W': ['2S']},
+        'bids': [], 'currentTrick': [], 'tricks': [],
+        'turn': 'user-e', 'turnSeat': 'E'
+    })
+    entry, events = bridge_engine.apply_play(room, 'user-e', 'KS', 0)
+    assert entry['seat'] == 'E'
+    assert events[1] == {'type': 'dummyRevealed', 'seat': 'S', 'cards': ['TS']}
+    # Dummy (South) is next, so declarer acts
+    assert room['gameData']['turn'] == 'user-n'
+    entry, _ = bridge_engine.apply_play(room, 'user-n', '10S', 0)
+    assert entry == {'seat': 'S', 'card': 'TS', 'timestamp': 0}
+    bridge_engine.apply_play(room, 'user-w', '2S', 0)
+    _, events = bridge_engine.apply_play(room, 'user-n', 'AS', 0)
+    assert events[-1] == {'type': 'trickClosed', 'winner': 'N', 'trick': 1}
+    assert room['gameData']['turnSeat'] == 'N'
+
+def test_must_follow_suit():
+    room = make_room(state='playing', game_data={
+        'currentPhase': 'playing',
+        'contract': {'contract': '1NT', 'level': 1, 'strain': 'NT', 'doubled': 0, 'declarer': 'N'},
+        'hands': {'N': ['AS'], 'E': ['KS', '2H'], 'S': ['TS'], 'W': ['2S']},
+        'bids': [], 'tricks': [{'cards': [], 'winner': 'W'}],
+        'currentTrick': [{'seat': 'W', 'card': '3S'}],
+        'turn': 'user-n', 'turnSeat': 'N'
+    })
+    room['gameData']['turn'], room['gameData']['turnSeat'] = 'user-e', 'E'
+    with pytest.raises(IllegalAction, match='Must follow suit'):
+        bridge_engine.apply_play(room, 'user-e', '2H', 0)
@@ -0,0 +1,31 @@
+import pytest
+import zipfile
+from tools import bundle
+
+def test_import_graph_follows_only_reachable_modules():
+    graph = bundle.import_graph('lambdas.connection_count')
+    assert graph['modules'] == {
+        'lambdas', 'lambdas.connection_count', 'lambdas.base_handler',
+        'lambdas.db_utils', 'lambdas.aws_clients', 'lambdas.json_utils', 'lambdas.session_tokens',
+        'lambdas.instrumentation', 'lambdas.profiling', 'lambdas.consumed_capacity',
+        'lambdas.unit_of_work', 'lambdas.connections', 'lambdas.parallel_scan', 'lambdas.activity'
+    }
+    assert 'pydantic' not in graph['third_party']
+
+def test_import_graph_includes_deferred_and_string_imports():
+    account = bundle.import_graph('lambdas.account_create')
+    assert 'models.user' in account['modules']
+    assert {'passlib', 'pydantic'} <= account['third_party']
+    router = bundle.import_graph('lambdas.websocket_router')
+    assert 'lambdas.websocket_play_card' in router['modules']
+
+def test_build_emits_precompiled_bundle(tmp_path):
+    report = bundle.build('connection-count', str(tmp_path))
+    with zipfile.ZipFile(report['zip']) as bundle_zip:
+        names = set(bundle_zip.namelist())
+    assert 'lambda_function.py' in names
+    assert 'lambdas/db_utils.pyc' in names
+    assert not any(name.endswith('.py') and name != 'lambda_function.py' for name in names)
+    assert 'lambdas/room_state.pyc' not in names
+    assert report['requirements'] == []
+    assert report['importMs'] > 0
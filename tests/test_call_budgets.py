@@ -0,0 +1,29 @@
+import pytest
+from benchmarks.call_budget import BUDGETS, measure, over_budget
+
+pytestmark = pytest.mark.usefixtures('devserver_environment')
+
+def test_routes_stay_within_their_call_budgets():
+    results = measure()
+    assert set(results) == set(BUDGETS)
+    assert over_budget(results) == []
+
+def test_game_actions_read_the_room_once_and_write_it_once():
+    results = measure()
+    for route in ('startRoom', 'makeBid', 'playCard'):
+        operations = results[route]['byOperation']
+        assert (operations['GetItem'], operations['PutItem']) == (1, 1)
+    assert results['resync']['byOperation'] == {'GetItem': 1}
+    assert results['resync']['wcu'] == 0
+
+def test_connection_id_layout_disconnects_with_a_single_delete_and_no_scan(monkeypatch):
+    monkeypatch.setenv('CONNECTIONS_KEY_SCHEMA', 'connection-id')
+    results = measure()
+    assert over_budget(results) == []
+    # The record, then the room and who is left in it (ROOM_INDEX), then the room update
+    assert results['$disconnect']['byOperation'] == {'DeleteItem': 1, 'Query': 1, 'GetItem': 1, 'PutItem': 1}
+    # Moving into a room is the transaction's UpdateItem; fan-out is one ROOM_INDEX query
+    assert results['createRoom']['byOperation'] == {'TransactWriteItems': 1}
+    assert results['joinRoom']['byOperation'] == {'GetItem': 1, 'TransactWriteItems': 1, 'Query': 1}
+    for route in ('startRoom', 'makeBid', 'playCard'):
+        assert results[route]['byOperation'] == {'GetItem': 1, 'PutItem': 1, 'Query': 1}
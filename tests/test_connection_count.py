@@ -4,8 +4,8 @@ import json
 import os
 from unittest.mock import patch, MagicMock
 
-@patch('lambdas.connection_count.boto3')
-def test_connection_count_success(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_connection_count_success(mock_resource):
     os.environ['WEBSOCKET_CONNECTIONS_TABLE'] = 'connections-table'
     
     # Mock DynamoDB table with connections in different rooms and users
@@ -19,7 +19,7 @@ def test_connection_count_success(mock_boto3):
             {'currentRoomId': 'room-3', 'userId': 'user-5', 'status': 'connected'}
         ]
     }
-    mock_boto3.resource.return_value.Table.return_value = mock_table
+    mock_resource.return_value.Table.return_value = mock_table
     
     event = {'httpMethod': 'GET'}
     response = connection_count.handler(event, None)
@@ -29,8 +29,8 @@ def test_connection_count_success(mock_boto3):
     assert body['activeUserCount'] == 5  # All 5 users are connected
     assert body['activeRoomCount'] == 3  # room-1, room-2, room-3 (excluding 'not-joined')
 
-@patch('lambdas.connection_count.boto3')
-def test_connection_count_with_pagination(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_connection_count_with_pagination(mock_resource):
     os.environ['WEBSOCKET_CONNECTIONS_TABLE'] = 'connections-table'
     
     # Mock DynamoDB table with pagination
@@ -56,7 +56,7 @@ def test_connection_count_with_pagination(mock_boto3):
             ]
         }
     ]
-    mock_boto3.resource.return_value.Table.return_value = mock_table
+    mock_resource.return_value.Table.return_value = mock_table
     
     event = {'httpMethod': 'GET'}
     response = connection_count.handler(event, None)
@@ -86,14 +86,14 @@ def test_connection_count_missing_env_var():
     body = json.loads(response['body'])
     assert 'WEBSOCKET_CONNECTIONS_TABLE environment variable not set' in body['error']
 
-@patch('lambdas.connection_count.boto3')
-def test_connection_count_dynamodb_error(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_connection_count_dynamodb_error(mock_resource):
     os.environ['WEBSOCKET_CONNECTIONS_TABLE'] = 'connections-table'
     
     # Mock DynamoDB error
     mock_table = MagicMock()
     mock_table.scan.side_effect = Exception('DynamoDB error')
-    mock_boto3.resource.return_value.Table.return_value = mock_table
+    mock_resource.return_value.Table.return_value = mock_table
     
     event = {'httpMethod': 'GET'}
     response = connection_count.handler(event, None)
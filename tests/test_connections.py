@@ -0,0 +1,93 @@
+import pytest
+from devserver.memory_table import MemoryDynamoDB
+from lambdas import aws_clients, connections
+from tools.migrate_connections import backfill
+
+LEGACY, MIGRATED = 'WebSocketConnections', 'WebSocketConnectionsV2'
+
+@pytest.fixture
+def dynamodb(devserver_environment):
+    memory = MemoryDynamoDB()
+    memory.create_table(LEGACY, connections.KEY_NAMES[connections.ROOM_SORT_KEY])
+    memory.create_table(MIGRATED, connections.KEY_NAMES[connections.CONNECTION_ID],
+                        {connections.ROOM_INDEX: ('currentRoomId',)})
+    aws_clients.register_resource('dynamodb', memory)
+    return memory
+
+def use(monkeypatch, layout, table_name, mirror_name=None):
+    monkeypatch.setenv('CONNECTIONS_KEY_SCHEMA', layout)
+    monkeypatch.setenv('WEBSOCKET_CONNECTIONS_TABLE', table_name)
+    if mirror_name:
+        monkeypatch.setenv('WEBSOCKET_CONNECTIONS_MIRROR_TABLE', mirror_name)
+
+def record(connection_id):
+    return {'connectionId': connection_id, 'currentRoomId': connections.NOT_JOINED, 'userId': 'u1', 'status': 'connected'}
+
+def operations(dynamodb):
+    operations = [request['operation'] for request in dynamodb.ledger.requests]
+    dynamodb.ledger.reset()
+    return operations
+
+def test_connection_id_layout_moves_with_one_update_and_deletes_with_one_delete(dynamodb, monkeypatch):
+    use(monkeypatch, connections.CONNECTION_ID, MIGRATED)
+    connections.create(record('c1'))
+    stored = dynamodb.Table(MIGRATED).items[('c1',)]
+    assert 'currentRoomId' not in stored
+    operations(dynamodb)
+    connections.move_to_room(stored, 'r1')
+    assert operations(dynamodb) == ['UpdateItem']
+    assert dynamodb.Table(MIGRATED).items[('c1',)]['currentRoomId'] == 'r1'
+    [deleted] = connections.delete('c1')
+    assert operations(dynamodb) == ['DeleteItem'] and deleted['currentRoomId'] == 'r1'
+    # A connection that is gone is not brought back by a late move
+    with pytest.raises(Exception):
+        connections.move_to_room(deleted, 'r2')
+    assert dynamodb.Table(MIGRATED).items == {}
+
+def test_connection_id_layout_mirrors_the_legacy_table(dynamodb, monkeypatch):
+    use(monkeypatch, connections.CONNECTION_ID, MIGRATED, LEGACY)
+    connections.create(record('c1'))
+    assert set(dynamodb.Table(LEGACY).items) == {('c1', 'not-joined')}
+    connections.move_to_room(dynamodb.Table(MIGRATED).items[('c1',)], 'r1')
+    assert set(dynamodb.Table(LEGACY).items) == {('c1', 'r1')}
+    connections.delete('c1')
+    assert dynamodb.Table(MIGRATED).items == {} and dynamodb.Table(LEGACY).items == {}
+
+def test_room_sort_key_layout_keeps_a_connection_id_mirror(dynamodb, monkeypatch):
+    use(monkeypatch, connections.ROOM_SORT_KEY, LEGACY, MIGRATED)
+    connections.create(record('c1'))
+    connections.move_to_room(dynamodb.Table(LEGACY).items[('c1', 'not-joined')], 'r1')
+    assert set(dynamodb.Table(LEGACY).items) == {('c1', 'r1')}
+    assert dynamodb.Table(MIGRATED).items[('c1',)]['currentRoomId'] == 'r1'
+    assert len(connections.delete('c1')) == 1
+    assert dynamodb.Table(LEGACY).items == {} and dynamodb.Table(MIGRATED).items == {}
+
+def test_connections_move_by_id_with_a_key_read_at_most(dynamodb, monkeypatch):
+    use(monkeypatch, connections.ROOM_SORT_KEY, LEGACY)
+    connections.create(record('c1'))
+    operations(dynamodb)
+    assert connections.move_connection('c1', 'r1')
+    assert operations(dynamodb) == ['Query', 'BatchWriteItem']
+    assert set(dynamodb.Table(LEGACY).items) == {('c1', 'r1')}
+    assert not connections.move_connection('gone', 'r1')
+
+    use(monkeypatch, connections.CONNECTION_ID, MIGRATED)
+    connections.create(record('c2'))
+    operations(dynamodb)
+    assert connections.move_connection('c2', 'r1')
+    assert operations(dynamodb) == ['UpdateItem']
+    assert dynamodb.Table(MIGRATED).items[('c2',)]['currentRoomId'] == 'r1'
+
+def test_backfill_copies_in_parallel_segments_without_overwriting_mirrored_records(dynamodb, monkeypatch):
+    legacy = dynamodb.Table(LEGACY)
+    for number in range(40):
+        legacy.put_item(Item=dict(record(f'c{number}'), currentRoomId='r1' if number % 2 else 'not-joined'))
+    # Already mirrored by a handler since the mirror was switched on
+    dynamodb.Table(MIGRATED).put_item(Item={'connectionId': 'c3', 'currentRoomId': 'r9', 'status': 'connected'})
+
+    report = backfill(LEGACY, MIGRATED, segments=4, open_table=dynamodb.Table)
+    assert (report['scanned'], report['copied'], report['skipped']) == (40, 39, 1)
+    migrated = dynamodb.Table(MIGRATED).items
+    assert len(migrated) == 40 and migrated[('c3',)]['currentRoomId'] == 'r9'
+    assert 'currentRoomId' not in migrated[('c0',)] and migrated[('c1',)]['currentRoomId'] == 'r1'
+    assert backfill(LEGACY, MIGRATED, segments=4, open_table=dynamodb.Table)['copied'] == 0
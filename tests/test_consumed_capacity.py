@@ -0,0 +1,52 @@
+import pytest
+import json
+from devserver.memory_table import MemoryDynamoDB
+from lambdas import aws_clients, consumed_capacity, instrumentation
+
+@pytest.fixture
+def scores():
+    dynamodb = MemoryDynamoDB()
+    dynamodb.create_table('scores', ('id',))
+    aws_clients.register_resource('dynamodb', dynamodb)
+    return aws_clients.table('scores')
+
+def play(event, context):
+    table = aws_clients.table('scores')
+    table.put_item(Item={'id': 'a', 'note': 'x' * 1500})
+    table.get_item(Key={'id': 'a'}, ConsistentRead=True)
+    table.scan()
+    return {'statusCode': 200}
+
+def test_invocation_line_carries_capacity_per_table_and_operation(scores, capsys):
+    instrumentation.run('play', play, {}, None)
+    [line] = [json.loads(text) for text in capsys.readouterr().out.splitlines()]
+    assert line['ConsumedWCU'] == 2.0 and line['ConsumedRCU'] == 1.5
+    capacity = line['Capacity']['scores']
+    assert capacity['PutItem']['wcu'] == 2.0 and capacity['GetItem']['rcu'] == 1.0 and capacity['Scan']['rcu'] == 0.5
+    assert all(usage['calls'] == 1 and usage['ms'] >= 0 for usage in capacity.values())
+    names = {metric['Name'] for metric in line['_aws']['CloudWatchMetrics'][0]['Metrics']}
+    assert {'ConsumedRCU', 'ConsumedWCU'} <= names
+
+def test_report_mode_aggregates_by_route(scores, monkeypatch):
+    monkeypatch.setenv('METRICS_ENABLED', 'false')
+    scores.get_item(Key={'id': 'missing'})
+    consumed_capacity.start_report()
+    try:
+        for _ in range(3):
+            instrumentation.run('play', play, {}, None)
+        scores.get_item(Key={'id': 'a'})
+        report = consumed_capacity.report()
+    finally:
+        consumed_capacity.stop_report()
+    put = report['play']['scores']['PutItem']
+    assert put['calls'] == 3 and put['wcu'] == 6.0 and put['wcuPerCall'] == 2.0
+    assert report['unrouted']['scores']['GetItem']['calls'] == 1
+
+def test_caller_settings_are_kept_and_metering_can_be_turned_off(scores, monkeypatch):
+    response = scores.get_item(Key={'id': 'a'}, ReturnConsumedCapacity='NONE')
+    assert 'ConsumedCapacity' not in response
+    assert consumed_capacity.units_of('GetItem', scores.get_item(Key={'id': 'a'})) == (0.5, 0.0)
+    aws_clients.reset()
+    monkeypatch.setenv('TRACK_CONSUMED_CAPACITY', 'false')
+    aws_clients.register_resource('dynamodb', MemoryDynamoDB({'scores': ('id',)}))
+    assert not isinstance(aws_clients.table('scores'), consumed_capacity.MeteredTable)
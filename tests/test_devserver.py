@@ -0,0 +1,156 @@
+import pytest
+import asyncio
+import json
+import os
+import threading
+from botocore.exceptions import ClientError
+from decimal import Decimal
+from devserver.memory_table import MemoryDynamoDB, MemoryTable
+from devserver.server import DevServer
+from devserver.stores import JsonFileStore, MemoryStore
+from devserver.websocket import connect
+
+@pytest.fixture(autouse=True)
+def fast_hashing(devserver_environment, monkeypatch):
+    monkeypatch.setenv('BCRYPT_ROUNDS', '4')
+
+def test_memory_table_conditions_queries_and_paging():
+    table = MemoryTable('connections', ('connectionId', 'currentRoomId'))
+    table.put_item(Item={'connectionId': 'c1', 'currentRoomId': 'r1', 'status': 'connected', 'seq': 1})
+    table.put_item(Item={'connectionId': 'c1', 'currentRoomId': 'r2', 'status': 'gone'})
+    table.put_item(Item={'connectionId': 'c2', 'currentRoomId': 'r1', 'status': 'connected'})
+    with pytest.raises(ClientError) as error:
+        table.put_item(Item={'connectionId': 'c1', 'currentRoomId': 'r1'},
+                       ConditionExpression='attribute_not_exists(seq) OR seq = :s', ExpressionAttributeValues={':s': 0})
+    assert error.value.response['Error']['Code'] == 'ConditionalCheckFailedException'
+    result = table.query(KeyConditionExpression='connectionId = :c', ExpressionAttributeValues={':c': 'c1'})
+    assert [item['currentRoomId'] for item in result['Items']] == ['r1', 'r2']
+    first = table.scan(FilterExpression='#s = :s', ExpressionAttributeNames={'#s': 'status'},
+                       ExpressionAttributeValues={':s': 'connected'}, Limit=2)
+    rest = table.scan(FilterExpression='#s = :s', ExpressionAttributeNames={'#s': 'status'},
+                      ExpressionAttributeValues={':s': 'connected'}, ExclusiveStartKey=first['LastEvaluatedKey'])
+    assert (first['ScannedCount'], first['Count'], rest['Count']) == (2, 1, 1)
+    assert 'LastEvaluatedKey' not in rest
+
+async def http_post(port, path, body):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    payload = json.dumps(body).encode('utf-8')
+    writer.write(f'POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(payload)}\r\n\r\n'.encode('ascii') + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.partition(b'\r\n\r\n')[2])
+
+async def login(port, username):
+    await http_post(port, '/account/create', {'username': username, 'password': 'pw'})
+    return (await http_post(port, '/account/login', {'username': username, 'password': 'pw'}))['token']
+
+async def receive(websocket):
+    return json.loads(await asyncio.wait_for(websocket.recv_text(), 5))
+
+def test_rooms_are_played_over_sockets_with_direct_fanout(tmp_path):
+    async def scenario():
+        server = DevServer(port=0, store=JsonFileStore(str(tmp_path / 'tables.json')), checkpoint_seconds=0)
+        await server.start()
+        try:
+            with pytest.raises(ConnectionRefusedError, match='401'):
+                await connect('127.0.0.1', server.port, '/?token=forged')
+
+            owner_token, guest_token = await login(server.port, 'ann'), await login(server.port, 'bob')
+            owner = await connect('127.0.0.1', server.port, f'/?token={owner_token}')
+            guest = await connect('127.0.0.1', server.port, f'/?token={guest_token}')
+
+            await owner.send_text(json.dumps({'action': 'createRoom', 'token': owner_token,
+                                              'data': {'playerName': 'Ann', 'roomName': 'Table 1'}}))
+            room_id = (await receive(owner))['room']['roomId']
+
+            await guest.send_text(json.dumps({'action': 'joinRoom', 'token': guest_token, 'roomId': room_id}))
+            joined = await receive(guest)
+            # The owner's socket gets the join as a delta from the guest's request
+            delta = await receive(owner)
+            assert delta['action'] == 'roomDelta'
+            assert delta['events'][0]['type'] == 'seatChanged'
+            assert delta['seq'] == joined['seq'] == 1
+
+            await guest.send_text('not json')
+            assert 'error' in await receive(guest)
+            await owner.close()
+            await guest.close()
+        finally:
+            await server.stop()
+        return room_id
+
+    room_id = asyncio.run(scenario())
+    saved = json.loads((tmp_path / 'tables.json').read_text())
+    assert [room['roomId'] for room in saved['GameRooms']] == [room_id]
+    assert 'WebSocketConnections' not in saved
+
+class BlockingStore(MemoryStore):
+    def __init__(self):
+        self.started, self.release, self.saved = threading.Event(), threading.Event(), []
+
+    def save(self, snapshot):
+        self.started.set()
+        self.release.wait(5)
+        self.saved.append(threading.current_thread() is threading.main_thread())
+
+def test_checkpoints_write_off_the_event_loop():
+    async def scenario():
+        store = BlockingStore()
+        server = DevServer(port=0, store=store, checkpoint_seconds=0)
+        server.install()
+        server.requests = 1
+        checkpoint = asyncio.create_task(server.checkpoint())
+        # The loop keeps running while the store is busy writing
+        while not store.started.is_set():
+            await asyncio.sleep(0.01)
+        assert not checkpoint.done()
+        store.release.set()
+        await checkpoint
+        # Nothing new ran, so the next checkpoint does not save again
+        await server.checkpoint()
+        assert store.saved == [False]
+
+    asyncio.run(scenario())
+
+def test_memory_table_updates_batches_and_transactions_are_accounted():
+    dynamodb = MemoryDynamoDB()
+    table = dynamodb.create_table('scores', ('id',))
+    table.update_item(Key={'id': 'a'}, UpdateExpression='SET points = if_not_exists(points, :zero) + :one',
+                      ExpressionAttributeValues={':zero': 0, ':one': 1})
+    updated = table.update_item(Key={'id': 'a'}, UpdateExpression='ADD points :one', ReturnValues='UPDATED_NEW',
+                                ExpressionAttributeValues={':one': 1})
+    assert updated['Attributes'] == {'points': Decimal(2)}
+    with pytest.raises(TypeError):
+        table.put_item(Item={'id': 'b', 'points': 1.5})
+
+    dynamodb.batch_write_item(RequestItems={'scores': [{'PutRequest': {'Item': {'id': 'b'}}},
+                                                       {'PutRequest': {'Item': {'id': 'c'}}}]})
+    assert len(dynamodb.batch_get_item(RequestItems={'scores': {'Keys': [{'id': 'a'}, {'id': 'z'}]}})['Responses']['scores']) == 1
+
+    client = dynamodb.meta.client
+    with pytest.raises(ClientError) as error:
+        client.transact_write_items(TransactItems=[
+            {'Delete': {'TableName': 'scores', 'Key': {'id': {'S': 'b'}}}},
+            {'ConditionCheck': {'TableName': 'scores', 'Key': {'id': {'S': 'a'}}, 'ConditionExpression': 'points = :p',
+                                'ExpressionAttributeValues': {':p': {'N': '5'}}}}])
+    assert error.value.response['CancellationReasons'][1]['Code'] == 'ConditionalCheckFailed'
+    assert 'Item' in table.get_item(Key={'id': 'b'})
+    client.transact_write_items(TransactItems=[{'Delete': {'TableName': 'scores', 'Key': {'id': {'S': 'b'}}}}])
+    assert client.transact_get_items(TransactItems=[{'Get': {'TableName': 'scores', 'Key': {'id': {'S': 'b'}}}}])['Responses'] == [{}]
+
+    summary = dynamodb.ledger.summary()
+    assert summary['byOperation'] == {'UpdateItem': 2, 'BatchWriteItem': 1, 'BatchGetItem': 1, 'TransactWriteItems': 2,
+                                      'GetItem': 1, 'TransactGetItems': 1}
+    assert (summary['roundTrips'], summary['scans']) == (8, 0)
+    # Transactional writes cost double
+    assert dynamodb.ledger.requests[-2]['wcu'] == 2.0
+
+def test_memory_table_pages_stop_at_one_megabyte():
+    table = MemoryTable('blobs', ('id',))
+    for i in range(3):
+        table.items[(str(i),)] = {'id': str(i), 'data': 'x' * 600000}
+    first = table.scan()
+    assert first['ScannedCount'] == 2 and 'LastEvaluatedKey' in first
+    assert table.scan(ExclusiveStartKey=first['LastEvaluatedKey'])['ScannedCount'] == 1
+    assert table.ledger.requests[0]['rcu'] == 146.5
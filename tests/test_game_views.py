@@ -0,0 +1,98 @@
+import pytest
+from lambdas import game_views
+from lambdas.json_utils import dumps
+import json
+
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+SUITS = ['C', 'D', 'H', 'S']
+
+def make_room(bids=None, tricks=None, current_trick=None):
+    deck = [rank + suit for suit in SUITS for rank in RANKS]
+    hands = {seat: deck[i::4] for i, seat in enumerate(['N', 'E', 'S', 'W'])}
+    return {
+        'roomId': 'room-abc',
+        'ownerId': 'user-n',
+        'playerName': 'North',
+        'roomName': 'Test Room',
+        'isPrivate': False,
+        'seats': {'N': 'user-n', 'E': 'user-e', 'S': 'user-s', 'W': 'user-w'},
+        'state': 'playing' if bids else 'bidding',
+        'gameData': {
+            'currentPhase': 'playing' if bids else 'bidding',
+            'turn': 'user-e',
+            'bids': bids or [],
+            'hands': hands,
+            'tricks': tricks or [],
+            'currentTrick': current_trick or []
+        }
+    }
+
+AUCTION = [
+    {'seat': 'N', 'bid': '1NT'},
+    {'seat': 'E', 'bid': 'pass'},
+    {'seat': 'S', 'bid': '3NT'},
+    {'seat': 'W', 'bid': 'pass'},
+    {'seat': 'N', 'bid': 'pass'},
+    {'seat': 'E', 'bid': 'pass'}
+]
+
+def seat_views(room):
+    views = {seat: game_views.build_room_view(room, seat) for seat in ['N', 'E', 'S', 'W']}
+    views['public'] = game_views.build_room_view(room, None)
+    return views
+
+def test_seat_view_only_contains_own_hand():
+    room = make_room()
+    views = seat_views(room)
+    for seat in ['N', 'E', 'S', 'W']:
+        hands = views[seat]['gameData']['hands']
+        assert list(hands.keys()) == [seat]
+        assert hands[seat] == room['gameData']['hands'][seat]
+        assert views[seat]['gameData']['handCounts'] == {'N': 13, 'E': 13, 'S': 13, 'W': 13}
+    assert views['public']['gameData']['hands'] == {}
+
+def test_views_do_not_modify_room():
+    room = make_room()
+    seat_views(room)
+    assert all(len(cards) == 13 for cards in room['gameData']['hands'].values())
+
+def test_dummy_hidden_before_opening_lead():
+    room = make_room(bids=AUCTION)
+    assert game_views.get_dummy_seat(room['gameData']) is None
+    views = seat_views(room)
+    assert 'S' not in views['E']['gameData']['hands']
+
+def test_dummy_visible_after_opening_lead():
+    room = make_room(bids=AUCTION, current_trick=[{'seat': 'E', 'card': '2C'}])
+    assert game_views.get_dummy_seat(room['gameData']) == 'S'
+    views = seat_views(room)
+    assert sorted(views['E']['gameData']['hands'].keys()) == ['E', 'S']
+    assert sorted(views['N']['gameData']['hands'].keys()) == ['N', 'S']
+    assert list(views['public']['gameData']['hands'].keys()) == ['S']
+    assert views['W']['gameData']['dummy'] == 'S'
+    # Public history is shared by every view
+    assert views['W']['gameData']['bids'] == AUCTION
+    assert views['W']['gameData']['currentTrick'] == room['gameData']['currentTrick']
+
+def test_seat_payload_is_a_fraction_of_full_state():
+    room = make_room()
+    full_bytes = len(json.dumps({'action': 'roomUpdated', 'room': room}))
+    messages = {seat: dumps({'action': 'roomUpdated', 'room': view}) for seat, view in seat_views(room).items()}
+    for seat in ['N', 'E', 'S', 'W']:
+        assert 'user-' in messages[seat]
+        assert len(messages[seat]) < full_bytes * 0.75
+    hand_bytes = len(json.dumps(room['gameData']['hands']))
+    seat_hand_bytes = len(json.dumps(json.loads(messages['N'])['room']['gameData']['hands']))
+    assert seat_hand_bytes * 4 <= hand_bytes
+
+def test_serialize_handles_decimals():
+    from decimal import Decimal
+    room = make_room()
+    room['gameData']['bids'] = [{'seat': 'N', 'bid': 'pass', 'timestamp': Decimal('1700000000')}]
+    messages = {seat: dumps(view) for seat, view in seat_views(room).items()}
+    assert json.loads(messages['N'])['gameData']['bids'][0]['timestamp'] == 1700000000
+
+def test_get_user_seat():
+    room = make_room()
+    assert game_views.get_user_seat(room, 'user-w') == 'W'
+    assert game_views.get_user_seat(room, 'nobody') is None
@@ -0,0 +1,87 @@
+import json
+import pytest
+from devserver.server import DevServer
+from lambdas import activity, connections, idle_reaper, websocket_heartbeat
+from lambdas.session_tokens import issue_token
+
+MINUTE = 60 * 1000
+
+@pytest.fixture(params=[connections.ROOM_SORT_KEY, connections.CONNECTION_ID])
+def server(request, devserver_environment, monkeypatch):
+    monkeypatch.setenv('CONNECTIONS_KEY_SCHEMA', request.param)
+    server = DevServer()
+    server.install()
+    return server
+
+def connect(server, user, connection_id=None):
+    connection_id = connection_id or f'conn-{user}'
+    server.dispatch('$connect', connection_id, queryStringParameters={'token': issue_token(user, user)['token']})
+    return connection_id
+
+def last_activity(server, connection_id):
+    [record] = [record for record in server.dynamodb.Table('WebSocketConnections').items.values()
+                if record['connectionId'] == connection_id]
+    return record['lastActivity']
+
+def updates(server):
+    return [request for request in server.dynamodb.ledger.requests if request['operation'] == 'UpdateItem']
+
+def test_activity_is_written_at_most_once_per_interval(server):
+    connection_id = connect(server, 'ann')
+    connected_at = last_activity(server, connection_id)
+    response = server.dispatch('heartbeat', connection_id, body=json.dumps({'action': 'heartbeat'}))
+    assert json.loads(response['body'])['action'] == 'heartbeat'
+    assert updates(server) == []
+
+    for offset in (MINUTE + 1, MINUTE + 2000, MINUTE + 3000):
+        activity.touch(connection_id, connected_at + offset)
+        activity.flush()
+    assert len(updates(server)) == 1 and last_activity(server, connection_id) == connected_at + MINUTE + 1
+
+    # Another container without the memory is stopped by the stored value
+    activity.reset()
+    activity.touch(connection_id, connected_at + MINUTE + 4000)
+    assert activity.flush() == 0
+    assert last_activity(server, connection_id) == connected_at + MINUTE + 1
+
+    # A connection that is gone is not recreated
+    server.dispatch('$disconnect', connection_id)
+    activity.touch(connection_id, connected_at + 5 * MINUTE)
+    assert activity.flush() == 0
+    assert server.dynamodb.Table('WebSocketConnections').items == {}
+
+def test_a_heartbeat_function_of_its_own_records_activity(server):
+    connection_id = connect(server, 'ann')
+    at = last_activity(server, connection_id) + MINUTE + 1
+    response = websocket_heartbeat.lambda_handler({'requestContext': {
+        'routeKey': 'heartbeat', 'connectionId': connection_id, 'requestTimeEpoch': at}}, None)
+    assert response['statusCode'] == 200
+    assert last_activity(server, connection_id) == at
+
+def test_reaper_expires_idle_connections_and_the_rooms_they_abandon(server, monkeypatch):
+    monkeypatch.setenv('IDLE_TIMEOUT_SECONDS', '900')
+    tokens = {user: issue_token(user, user)['token'] for user in ('ann', 'bob', 'cy')}
+    for user in tokens:
+        connect(server, user)
+
+    def send(route, user, **body):
+        return json.loads(server.dispatch(route, f'conn-{user}',
+                                          body=json.dumps(dict(body, action=route, token=tokens[user])))['body'])
+
+    lonely = send('createRoom', 'ann', data={'ownerId': 'ann', 'playerName': 'Ann', 'roomName': 'A'})['room']['roomId']
+    shared = send('createRoom', 'bob', data={'ownerId': 'bob', 'playerName': 'Bob', 'roomName': 'B'})['room']['roomId']
+    seat = send('joinRoom', 'cy', roomId=shared, userId='cy')['assignedSeat']
+    # Only bob's client kept sending heartbeats
+    now = last_activity(server, 'conn-bob') + 20 * MINUTE
+    activity.touch('conn-bob', now - MINUTE)
+    activity.flush()
+    server.dynamodb.ledger.reset()
+
+    report = idle_reaper.reap(now, page_size=2)
+    assert report == {'connections': 2, 'rooms': 1, 'departures': 1}
+    assert {record['connectionId'] for record in server.dynamodb.Table('WebSocketConnections').items.values()} == {'conn-bob'}
+    rooms = server.dynamodb.Table('GameRooms').items
+    assert set(rooms) == {(shared,)} and rooms[(shared,)]['seats'][seat] == ''
+    # The idle records went out as one batch
+    assert [request['operation'] for request in server.dynamodb.ledger.requests].count('BatchWriteItem') == 1
+    assert idle_reaper.reap(now) == {'connections': 0, 'rooms': 0, 'departures': 0}
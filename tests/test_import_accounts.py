@@ -0,0 +1,58 @@
+import pytest
+import io
+import json
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from tools import import_accounts
+from lambdas import password_policy
+from devserver.memory_table import MemoryDynamoDB
+
+@pytest.fixture(autouse=True)
+def fast_hashing(monkeypatch):
+    monkeypatch.setenv('BCRYPT_ROUNDS', '4')
+
+def make_table(existing=()):
+    table = MemoryDynamoDB({'users-table': ('username',)}).Table('users-table')
+    for name in existing:
+        table.put_item(Item={'username': name, 'userId': f'old-{name}', 'passwordHash': 'old'})
+    return table
+
+def test_read_accounts_streams_csv_and_jsonl():
+    rows = import_accounts.read_accounts(io.StringIO('username,password,userId\nann,pw1,\nbob,pw2,u-2\n'), 'csv')
+    assert next(rows) == {'username': 'ann', 'password': 'pw1'}
+    assert next(rows) == {'username': 'bob', 'password': 'pw2', 'userId': 'u-2'}
+    lines = io.StringIO(json.dumps({'username': 'cy', 'password': 'pw3'}) + '\n\n')
+    assert list(import_accounts.read_accounts(lines, 'jsonl')) == [{'username': 'cy', 'password': 'pw3'}]
+
+def test_import_puts_new_accounts_conditionally_and_skips_duplicates():
+    table = make_table(existing=['ann', 'dee'])
+    rows = [
+        {'username': 'ann', 'password': 'pw'},
+        {'username': 'bob', 'password': 'pw-bob', 'userId': 'u-bob'},
+        {'username': 'bob', 'password': 'again'},
+        {'username': 'cy'},
+        {'username': 'eve', 'password': 'pw-eve'}
+    ]
+    report = import_accounts.import_accounts(iter(rows), table)
+    assert (report['imported'], report['duplicates'], report['invalid']) == (2, 2, 1)
+    # Existing accounts and the first of a repeated username are kept as they were
+    assert table.get_item(Key={'username': 'ann'})['Item']['passwordHash'] == 'old'
+    bob = table.get_item(Key={'username': 'bob'})['Item']
+    assert bob['userId'] == 'u-bob'
+    assert password_policy.verify_password('pw-bob', bob['passwordHash'])[0]
+    assert sorted(item['username'] for item in table) == ['ann', 'bob', 'dee', 'eve']
+
+def test_import_reads_nothing_up_front():
+    table = MagicMock()
+    conflict = ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'exists'}}, 'PutItem')
+    table.put_item.side_effect = [None, conflict]
+    rows = [{'username': 'ann', 'password': 'pw'}, {'username': 'bob', 'password': 'pw'}]
+    report = import_accounts.import_accounts(iter(rows), table)
+    assert (report['imported'], report['duplicates']) == (1, 1)
+    assert table.put_item.call_args.kwargs['ConditionExpression'] == 'attribute_not_exists(username)'
+    table.scan.assert_not_called()
+
+def test_process_pool_keeps_input_order():
+    rows = ({'username': f'user-{i}', 'password': 'pw'} for i in range(7))
+    users = list(import_accounts.hashed_users(rows, workers=2, batch_size=3))
+    assert [user['username'] for user in users] == [f'user-{i}' for i in range(7)]
@@ -0,0 +1,63 @@
+import pytest
+import json
+import boto3
+from botocore.stub import Stubber
+from lambdas import instrumentation, websocket_router
+from lambdas.base_handler import BaseLambdaHandler
+
+class EchoHandler(BaseLambdaHandler):
+    def process_request(self, event, context):
+        body = self.parse_body(event)
+        with instrumentation.span('apply'):
+            pass
+        return self.success_response(body)
+
+class Context:
+    aws_request_id = 'request-1'
+
+def metric_lines(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{')]
+
+def test_handler_emits_one_embedded_metric_line(capsys):
+    response = EchoHandler().handle_request({'body': '{"a": 1}'}, Context())
+    assert response['statusCode'] == 200
+    [line] = metric_lines(capsys)
+    assert line['Route'] == 'test_instrumentation'
+    assert line['StatusCode'] == 200 and line['RequestId'] == 'request-1'
+    assert {'parse', 'apply'} <= set(line)
+    [directive] = line['_aws']['CloudWatchMetrics']
+    assert directive['Dimensions'] == [['Route']]
+    assert {metric['Name'] for metric in directive['Metrics']} >= {'Duration', 'parse', 'apply'}
+
+def test_nested_invocations_emit_once_under_the_route_key(capsys):
+    event = {'requestContext': {'routeKey': 'makeBid', 'connectionId': 'c1'}, 'body': '{}'}
+    websocket_router.lambda_handler(event, None)
+    [line] = metric_lines(capsys)
+    assert line['Route'] == 'makeBid'
+    assert line['StatusCode'] == 401
+
+def test_metrics_and_debug_logging_are_switchable(capsys, monkeypatch):
+    monkeypatch.setenv('METRICS_ENABLED', 'false')
+    EchoHandler().handle_request({'body': '{}'}, None)
+    instrumentation.debug('payload %s', {'secret': 1})
+    assert capsys.readouterr().out == ''
+    monkeypatch.setenv('LOG_LEVEL', 'DEBUG')
+    instrumentation.debug('payload %s', {'secret': 1})
+    assert capsys.readouterr().out == "payload {'secret': 1}\n"
+
+def test_boto_calls_are_timed_into_a_span():
+    client = boto3.client('dynamodb', region_name='us-east-1', aws_access_key_id='x', aws_secret_access_key='x')
+    instrumentation.watch_boto_client(client, 'dynamodb', 'dynamodb')
+    records = []
+    original = instrumentation.emf_record
+    def capture(route, duration, record, *args):
+        records.append(record)
+        return original(route, duration, record, *args)
+    with Stubber(client) as stubber:
+        stubber.add_response('get_item', {})
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(instrumentation, 'emf_record', capture)
+            instrumentation.run('test', lambda event, context: client.get_item(
+                TableName='t', Key={'id': {'S': 'a'}}) or {'statusCode': 200}, {}, None)
+    assert records[0]['counts'] == {'dynamodb': 1}
+    assert records[0]['spans']['dynamodb'] >= 0
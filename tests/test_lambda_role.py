@@ -0,0 +1,21 @@
+import os
+import re
+from benchmarks.call_budget import measure
+from devserver.capacity import OPERATIONS
+
+ROLE_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'create-lambda-role.sh')
+
+def allowed_dynamodb_actions():
+    with open(ROLE_SCRIPT) as f:
+        return set(re.findall(r'"dynamodb:(\w+)"', f.read()))
+
+def test_role_allows_every_operation_the_fake_records(devserver_environment, monkeypatch):
+    allowed = allowed_dynamodb_actions()
+    assert OPERATIONS <= allowed
+    # What the handlers actually issue is among the operations accounted for
+    for layout in ('room-sort-key', 'connection-id'):
+        monkeypatch.setenv('CONNECTIONS_KEY_SCHEMA', layout)
+        used = {operation for summary in measure().values() for operation in summary['byOperation']}
+        assert used <= OPERATIONS
+    # tools/migrate_connections.py --capacity-share
+    assert 'DescribeTable' in allowed
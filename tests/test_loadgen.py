@@ -0,0 +1,25 @@
+import pytest
+from tools.loadgen import choose_call, run_load
+
+pytestmark = pytest.mark.usefixtures('devserver_environment')
+
+def test_choose_call_opens_the_auction_and_stays_legal():
+    import random
+    rng = random.Random(7)
+    assert choose_call([], 'N', rng) != 'pass'
+    bids = [{'seat': 'N', 'bid': '7NT'}]
+    assert all(choose_call(bids, 'E', rng) == 'pass' for _ in range(20))
+
+def test_tables_are_played_to_the_end_through_the_handlers():
+    report = run_load(tables=3, seed=11)
+    assert report['gamesCompleted'] == 3
+    assert report['errors'] == 0
+    routes = report['routes']
+    assert routes['playCard']['requests'] == 3 * 52
+    assert routes['joinRoom']['requests'] == 3 * 3
+    assert routes['$connect']['requests'] == routes['$disconnect']['requests'] == 3 * 4
+    assert report['dynamodb']['roundTrips'] > 0
+    assert report['fanout']['messages'] > 0
+    assert routes['playCard']['p50Ms'] <= routes['playCard']['p99Ms']
+    assert report['consumedCapacity']['playCard']['GameRooms']['PutItem']['calls'] == 3 * 52
+    assert routes['playCard']['wcuPerRequest'] >= 1
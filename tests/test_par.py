@@ -0,0 +1,71 @@
+import pytest
+from lambdas import par
+
+def make_table(ns, ew):
+    """
+    Build a table where both members of a side take the same tricks
+    """
+    strains = ['C', 'D', 'H', 'S', 'NT']
+    return {
+        'N': dict(zip(strains, ns)),
+        'S': dict(zip(strains, ns)),
+        'E': dict(zip(strains, ew)),
+        'W': dict(zip(strains, ew))
+    }
+
+def test_par_simple_game():
+    table = make_table([6, 6, 6, 10, 6], [6, 6, 6, 3, 6])
+    result = par.calculate_par(table, 'None')
+    assert result['parScore'] == 420
+    assert [c['contract'] for c in result['parContracts']] == ['4S']
+    assert result['parContracts'][0]['side'] == 'NS'
+
+def test_par_sacrifice():
+    table = make_table([8, 8, 4, 10, 7], [5, 5, 9, 3, 5])
+    result = par.calculate_par(table, 'None')
+    assert result['parScore'] == 300
+    contract = result['parContracts'][0]
+    assert contract['contract'] == '5HX'
+    assert contract['side'] == 'EW'
+
+def test_par_sacrifice_too_expensive_when_vulnerable():
+    table = make_table([8, 8, 4, 10, 7], [5, 5, 9, 3, 5])
+    result = par.calculate_par(table, 'EW')
+    assert result['parScore'] == 420
+    assert result['parContracts'][0]['contract'] == '4S'
+
+def test_par_east_west_slam():
+    table = make_table([3, 3, 3, 3, 1], [10, 10, 12, 10, 12])
+    result = par.calculate_par(table, 'Both')
+    assert result['parScore'] == -1440
+    assert [c['contract'] for c in result['parContracts']] == ['6NT']
+
+def test_par_multiple_contracts():
+    table = make_table([6, 6, 10, 10, 6], [6, 6, 3, 3, 6])
+    result = par.calculate_par(table, 'None')
+    assert result['parScore'] == 420
+    assert sorted(c['contract'] for c in result['parContracts']) == ['4H', '4S']
+
+def test_par_passed_out():
+    table = make_table([6, 6, 6, 6, 6], [6, 6, 6, 6, 6])
+    assert par.calculate_par(table) == {'parScore': 0, 'parContracts': []}
+
+def test_normalize_flat_table():
+    flat = [9, 4, 9, 4] + [7] * 16
+    table = par.normalize_dd_table(flat)
+    assert table['N']['C'] == 9
+    assert table['E']['C'] == 4
+    assert table['W']['NT'] == 7
+
+def test_normalize_rejects_bad_tables():
+    with pytest.raises(ValueError):
+        par.normalize_dd_table([7] * 19)
+    with pytest.raises(ValueError):
+        par.normalize_dd_table({'N': {}})
+    with pytest.raises(ValueError):
+        par.normalize_dd_table(make_table([14, 6, 6, 6, 6], [6, 6, 6, 6, 6]))
+    with pytest.raises(ValueError):
+        par.normalize_dd_table([7] * 21)
+    for bad in (14, -1):
+        with pytest.raises(ValueError):
+            par.calculate_par([bad] * 20)
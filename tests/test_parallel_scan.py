@@ -0,0 +1,50 @@
+import threading
+import pytest
+from botocore.exceptions import ClientError
+from devserver.memory_table import MemoryDynamoDB
+from lambdas import aws_clients, parallel_scan
+
+@pytest.fixture
+def dynamodb():
+    memory = MemoryDynamoDB({'Scores': ('id',)})
+    aws_clients.register_resource('dynamodb', memory)
+    scores = memory.Table('Scores')
+    for number in range(300):
+        scores.put_item(Item={'id': f's{number}', 'status': 'open' if number % 3 else 'closed',
+                              'score': number, 'notes': 'x' * 200})
+    memory.ledger.reset()
+    return memory
+
+def test_segments_stream_every_item_with_only_the_projected_attributes(dynamodb):
+    items = list(parallel_scan.parallel_scan('Scores', segments=4, attributes=['id', 'status'], page_size=20,
+                                             FilterExpression='#status = :open',
+                                             ExpressionAttributeNames={'#status': 'status'},
+                                             ExpressionAttributeValues={':open': 'open'}))
+    assert len(items) == 200 and {item['id'] for item in items} == {f's{n}' for n in range(300) if n % 3}
+    assert all(set(item) == {'id', 'status'} for item in items)
+    scans = dynamodb.ledger.requests
+    assert sum(request['scanned'] for request in scans) == 300 and len(scans) > 4
+    # One segment pages through on the calling thread
+    assert len(list(parallel_scan.parallel_scan('Scores', segments=1, attributes=['id']))) == 300
+
+def test_workers_share_the_read_capacity_budget():
+    now, waits = [0.0], []
+    limiter = parallel_scan.RateLimiter(10, clock=lambda: now[0], sleep=waits.append)
+    limiter.spend(8)
+    limiter.spend(4)
+    assert waits == [pytest.approx(0.2)]
+    now[0] = 1.0
+    limiter.spend(8)
+    # A second of refill covers the 2 units overdrawn, leaving 8
+    assert len(waits) == 1
+    limiter.spend(1)
+    assert waits[-1] == pytest.approx(0.1)
+
+def test_closing_early_stops_the_workers_and_errors_reach_the_caller(dynamodb):
+    scan = parallel_scan.parallel_scan('Scores', segments=4, page_size=5)
+    assert next(scan)['id'].startswith('s')
+    scan.close()
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('scan')]
+    with pytest.raises(ClientError) as error:
+        list(parallel_scan.parallel_scan('Missing', segments=2))
+    assert error.value.response['Error']['Code'] == 'ResourceNotFoundException'
@@ -0,0 +1,28 @@
+import pytest
+from lambdas import password_policy
+
+def test_hash_uses_configured_rounds(monkeypatch):
+    monkeypatch.setenv('BCRYPT_ROUNDS', '4')
+    password_hash = password_policy.hash_password('secret')
+    assert password_hash.startswith('$2b$04$')
+    assert password_policy.verify_password('secret', password_hash) == (True, None)
+    assert password_policy.verify_password('wrong', password_hash) == (False, None)
+
+def test_cost_change_flags_rehash_both_ways(monkeypatch):
+    monkeypatch.setenv('BCRYPT_ROUNDS', '5')
+    password_hash = password_policy.hash_password('secret')
+    monkeypatch.setenv('BCRYPT_ROUNDS', '4')
+    password_policy.reset()
+    matches, new_hash = password_policy.verify_password('secret', password_hash)
+    assert matches
+    assert new_hash.startswith('$2b$04$')
+
+def test_async_hash_matches_policy(monkeypatch):
+    monkeypatch.setenv('BCRYPT_ROUNDS', '4')
+    password_hash = password_policy.hash_password_async('secret').result()
+    assert password_policy.verify_password('secret', password_hash)[0]
+
+def test_unknown_scheme_rejected(monkeypatch):
+    monkeypatch.setenv('PASSWORD_SCHEME', 'md5_crypt')
+    with pytest.raises(ValueError, match='PASSWORD_SCHEME'):
+        password_policy.password_context()
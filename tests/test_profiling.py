@@ -0,0 +1,59 @@
+import pytest
+import json
+from lambdas import profiling
+from lambdas.base_handler import BaseLambdaHandler
+
+class AllocatingHandler(BaseLambdaHandler):
+    cache = []
+
+    def process_request(self, event, context):
+        transient = [bytearray(1024) for _ in range(200)]
+        self.cache.append(bytearray(64 * 1024))
+        return self.success_response({'blocks': len(transient)})
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('PROFILE_DIR', str(tmp_path))
+    monkeypatch.setenv('METRICS_ENABLED', 'false')
+    return tmp_path
+
+def summaries(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if '"profile"' in line]
+
+def test_profiling_is_off_by_default(capsys, profile_dir):
+    AllocatingHandler().handle_request({'headers': {'X-Profile': 'both'}}, None)
+    assert summaries(capsys) == []
+    assert list(profile_dir.iterdir()) == []
+
+def test_sampled_invocation_writes_cpu_and_memory_summaries(capsys, profile_dir, monkeypatch):
+    monkeypatch.setenv('PROFILE_SAMPLE_RATE', '1')
+    monkeypatch.setenv('PROFILE_MODE', 'both')
+    response = AllocatingHandler().handle_request({}, None)
+    assert response['statusCode'] == 200
+    [summary] = summaries(capsys)
+    assert summary['profile'] == 'test_profiling' and summary['mode'] == 'both'
+    assert any('process_request' in entry['function'] for entry in summary['topFunctions'])
+    assert summary['topAllocations'][0]['where'].startswith('test_profiling.py:')
+    assert summary['topAllocations'][0]['sizeKiB'] >= 64
+    assert summary['peakKiB'] >= 200
+    assert sorted(path.suffix for path in profile_dir.iterdir()) == ['.json', '.prof']
+
+def test_request_flag_needs_to_be_allowed(capsys, monkeypatch):
+    event = {'queryStringParameters': {'profile': 'memory'}}
+    assert profiling.requested_mode(event) is None
+    monkeypatch.setenv('PROFILE_ALLOW_REQUEST_FLAG', 'true')
+    assert profiling.requested_mode(event) == 'memory'
+    assert profiling.requested_mode({'headers': {'x-profile': 'bogus'}}) is None
+    AllocatingHandler().handle_request({'headers': {'X-Profile': 'cpu'}}, None)
+    [summary] = summaries(capsys)
+    assert 'topAllocations' not in summary and summary['topFunctions']
+
+def test_invalid_sample_rate_is_reported_once_and_treated_as_zero(capsys, monkeypatch):
+    monkeypatch.setenv('PROFILE_SAMPLE_RATE', 'ten percent')
+    monkeypatch.setattr(profiling, '_invalid_rates', set())
+    for _ in range(3):
+        response = AllocatingHandler().handle_request({}, None)
+        assert response['statusCode'] == 200
+    out = capsys.readouterr().out
+    assert out.count('Ignoring invalid PROFILE_SAMPLE_RATE') == 1
+    assert '"profile"' not in out
@@ -4,13 +4,13 @@ import json
 import os
 from unittest.mock import patch, MagicMock
 
-@patch('lambdas.room_create.boto3')
-def test_room_create_success(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_room_create_success(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
     mock_table = MagicMock()
-    mock_boto3.resource.return_value.Table.return_value = mock_table
+    mock_resource.return_value.Table.return_value = mock_table
     mock_table.put_item.return_value = {}
-    event = {'body': json.dumps({'ownerId': 'user-123', 'playerName': 'TestPlayer', 'roomName': 'TestRoom'})}
+    event = auth_event({'ownerId': 'user-123', 'playerName': 'TestPlayer', 'roomName': 'TestRoom'})
     response = room_create.handler(event, None)
     assert response['statusCode'] == 201
     body = json.loads(response['body'])
@@ -27,13 +27,13 @@ def test_room_create_success(mock_boto3):
     robot_count = sum(1 for occupant in seats.values() if occupant.startswith('robot-'))
     assert robot_count == 3  # Should have 3 robots
 
-@patch('lambdas.room_create.boto3')
-def test_room_create_robot_assignment(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_room_create_robot_assignment(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
     mock_table = MagicMock()
-    mock_boto3.resource.return_value.Table.return_value = mock_table
+    mock_resource.return_value.Table.return_value = mock_table
     mock_table.put_item.return_value = {}
-    event = {'body': json.dumps({'ownerId': 'user-123', 'playerName': 'TestPlayer', 'roomName': 'TestRoom'})}
+    event = auth_event({'ownerId': 'user-123', 'playerName': 'TestPlayer', 'roomName': 'TestRoom'})
     response = room_create.handler(event, None)
     assert response['statusCode'] == 201
     body = json.loads(response['body'])
@@ -45,20 +45,20 @@ def test_room_create_robot_assignment(mock_boto3):
         if occupant.startswith('robot-'):
             assert occupant == f'robot-{seat}'
 
-def test_room_create_missing_owner():
+def test_room_create_missing_owner(auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
-    event = {'body': json.dumps({})}
+    # Without a session token there is no owner to act as
+    event = auth_event({})
     response = room_create.handler(event, None)
-    assert response['statusCode'] == 400
+    assert response['statusCode'] == 401
     body = json.loads(response['body'])
-    assert 'error' in body
-    assert 'ownerId' in body['error']
+    assert body['error'] == 'Session token required'
 
-@patch('lambdas.room_create.boto3')
-def test_room_create_missing_room_table_env(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_room_create_missing_room_table_env(mock_resource, auth_event):
     if 'ROOM_TABLE' in os.environ:
         del os.environ['ROOM_TABLE']
-    event = {'body': json.dumps({'ownerId': 'user-123', 'playerName': 'TestPlayer', 'roomName': 'TestRoom'})}
+    event = auth_event({'ownerId': 'user-123', 'playerName': 'TestPlayer', 'roomName': 'TestRoom'})
     response = room_create.handler(event, None)
     assert response['statusCode'] == 500
     body = json.loads(response['body'])
@@ -0,0 +1,104 @@
+import pytest
+from lambdas import room_events
+import json
+from unittest.mock import MagicMock
+
+def make_room(seq=None, tricks=0):
+    room = {
+        'roomId': 'room-abc',
+        'seats': {'N': 'user-n', 'E': 'user-e', 'S': 'user-s', 'W': 'user-w'},
+        'state': 'playing',
+        'gameData': {
+            'bids': [{'seat': 'N', 'bid': '1NT'}] + [{'seat': s, 'bid': 'pass'} for s in 'ESW'],
+            'tricks': [{'cards': [{'seat': s, 'card': 'AS'} for s in 'NESW'], 'winner': 'N'}] * tricks
+        }
+    }
+    if seq is not None:
+        room['seq'] = seq
+    return room
+
+def test_advance_seq_is_monotonic():
+    room = make_room()
+    assert room_events.current_seq(room) == 0
+    assert room_events.advance_seq(room) == 1
+    assert room_events.advance_seq(room) == 2
+    assert room['seq'] == 2
+
+def test_build_delta():
+    room = make_room(seq=7)
+    events = [room_events.play_event('N', 'AS'), room_events.trick_closed_event('N', 3)]
+    delta = room_events.build_delta(room, events, turn='user-n')
+    assert delta == {
+        'action': 'roomDelta',
+        'roomId': 'room-abc',
+        'seq': 7,
+        'events': [
+            {'type': 'play', 'seat': 'N', 'card': 'AS'},
+            {'type': 'trickClosed', 'winner': 'N', 'trick': 3}
+        ],
+        'turn': 'user-n'
+    }
+
+def test_delta_size_does_not_grow_with_hand_progress():
+    sizes = []
+    for tricks in (0, 6, 12):
+        room = make_room(seq=10 + tricks, tricks=tricks)
+        delta = room_events.build_delta(room, [room_events.play_event('E', '2C')], turn='user-s')
+        sizes.append(len(room_events.serialize_message(delta)))
+    assert max(sizes) - min(sizes) <= 2
+    assert max(sizes) < 150
+
+def test_has_gap():
+    room = make_room(seq=5)
+    assert room_events.has_gap(room, None) is False
+    assert room_events.has_gap(room, 4) is False
+    assert room_events.has_gap(room, '4') is False
+    assert room_events.has_gap(room, 2) is True
+    assert room_events.has_gap(room, 'bogus') is True
+
+def test_build_snapshot():
+    room = make_room(seq=3)
+    snapshot = room_events.build_snapshot(room, {'roomId': 'room-abc'})
+    assert snapshot['action'] == 'roomSnapshot'
+    assert snapshot['seq'] == 3
+    assert snapshot['room'] == {'roomId': 'room-abc'}
+
+def test_put_room_is_conditional_on_sequence():
+    table = MagicMock()
+    room = make_room(seq=4)
+    room_events.put_room(table, room, 3)
+    kwargs = table.put_item.call_args.kwargs
+    assert kwargs['Item'] is room
+    assert 'seq = :expectedSeq' in kwargs['ConditionExpression']
+    assert kwargs['ExpressionAttributeValues'] == {':expectedSeq': 3}
+
+def test_serialize_message_handles_decimals():
+    from decimal import Decimal
+    data = room_events.serialize_message({'seq': Decimal('12')})
+    assert json.loads(data) == {'seq': 12}
+
+def test_record_events_appends_to_bounded_log():
+    room = make_room()
+    for i in range(room_events.EVENT_LOG_SIZE + 5):
+        seq = room_events.record_events(room, [room_events.bid_event('N', 'pass')])
+    assert seq == room_events.EVENT_LOG_SIZE + 5
+    assert len(room['eventLog']) == room_events.EVENT_LOG_SIZE
+    assert room['eventLog'][0]['seq'] == 6
+    assert room['eventLog'][-1]['seq'] == seq
+
+def test_events_since():
+    room = make_room()
+    for card in ['2C', '3C', '4C']:
+        room_events.record_events(room, [room_events.play_event('N', card)])
+    assert room_events.events_since(room, 3) == []
+    missed = room_events.events_since(room, 1)
+    assert [entry['seq'] for entry in missed] == [2, 3]
+    assert missed[0]['events'][0]['card'] == '3C'
+    assert len(room_events.events_since(room, 0)) == 3
+
+def test_events_since_needs_snapshot_when_log_truncated():
+    room = make_room()
+    for i in range(room_events.EVENT_LOG_SIZE + 10):
+        room_events.record_events(room, [room_events.bid_event('N', 'pass')])
+    assert room_events.events_since(room, 5) is None
+    assert len(room_events.events_since(room, 20)) == room_events.EVENT_LOG_SIZE - 10
@@ -4,8 +4,8 @@ import json
 import os
 from unittest.mock import patch, MagicMock
 
-@patch('lambdas.room_join.boto3')
-def test_room_join_success_replace_robot(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_room_join_success_replace_robot(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
     # Mock room exists with robots in seats
     room_item = {
@@ -18,8 +18,8 @@ def test_room_join_success_replace_robot(mock_boto3):
     mock_room_table = MagicMock()
     mock_room_table.scan.return_value = {'Count': 1, 'Items': [room_item.copy()]}
     mock_room_table.put_item.return_value = {}
-    mock_boto3.resource.return_value.Table.return_value = mock_room_table
-    event = {'body': json.dumps({'userId': 'user-123', 'roomId': 'room-abc'})}
+    mock_resource.return_value.Table.return_value = mock_room_table
+    event = auth_event({'userId': 'user-123', 'roomId': 'room-abc'})
     response = room_join.handler(event, None)
     assert response['statusCode'] == 200
     body = json.loads(response['body'])
@@ -31,8 +31,8 @@ def test_room_join_success_replace_robot(mock_boto3):
     robot_count = sum(1 for occupant in room['seats'].values() if occupant.startswith('robot-'))
     assert robot_count == 2  # Should have 2 robots now
 
-@patch('lambdas.room_join.boto3')
-def test_room_join_success_specific_robot_seat(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_room_join_success_specific_robot_seat(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
     room_item = {
         'roomId': 'room-abc',
@@ -44,29 +44,29 @@ def test_room_join_success_specific_robot_seat(mock_boto3):
     mock_room_table = MagicMock()
     mock_room_table.scan.return_value = {'Count': 1, 'Items': [room_item.copy()]}
     mock_room_table.put_item.return_value = {}
-    mock_boto3.resource.return_value.Table.return_value = mock_room_table
-    event = {'body': json.dumps({'userId': 'user-123', 'roomId': 'room-abc', 'seat': 'E'})}
+    mock_resource.return_value.Table.return_value = mock_room_table
+    event = auth_event({'userId': 'user-123', 'roomId': 'room-abc', 'seat': 'E'})
     response = room_join.handler(event, None)
     assert response['statusCode'] == 200
     body = json.loads(response['body'])
     room = body['room']
     assert room['seats']['E'] == 'user-123'
 
-@patch('lambdas.room_join.boto3')
-def test_room_join_room_not_found(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_room_join_room_not_found(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
     mock_room_table = MagicMock()
     mock_room_table.scan.return_value = {'Count': 0, 'Items': []}
-    mock_boto3.resource.return_value.Table.return_value = mock_room_table
-    event = {'body': json.dumps({'userId': 'user-123', 'roomId': 'room-abc'})}
+    mock_resource.return_value.Table.return_value = mock_room_table
+    event = auth_event({'userId': 'user-123', 'roomId': 'room-abc'})
     response = room_join.handler(event, None)
     assert response['statusCode'] == 404
     body = json.loads(response['body'])
     assert 'error' in body
     assert 'does not exist' in body['error']
 
-@patch('lambdas.room_join.boto3')
-def test_room_join_seat_not_available_human_occupied(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_room_join_seat_not_available_human_occupied(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
     room_item = {
         'roomId': 'room-abc',
@@ -78,16 +78,16 @@ def test_room_join_seat_not_available_human_occupied(mock_boto3):
     mock_room_table = MagicMock()
     mock_room_table.scan.return_value = {'Count': 1, 'Items': [room_item.copy()]}
     mock_room_table.put_item.return_value = {}
-    mock_boto3.resource.return_value.Table.return_value = mock_room_table
-    event = {'body': json.dumps({'userId': 'user-123', 'roomId': 'room-abc', 'seat': 'E'})}
+    mock_resource.return_value.Table.return_value = mock_room_table
+    event = auth_event({'userId': 'user-123', 'roomId': 'room-abc', 'seat': 'E'})
     response = room_join.handler(event, None)
     assert response['statusCode'] == 400
     body = json.loads(response['body'])
     assert 'error' in body
     assert 'Seat not available' in body['error']
 
-@patch('lambdas.room_join.boto3')
-def test_room_join_user_already_in_room(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_room_join_user_already_in_room(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
     room_item = {
         'roomId': 'room-abc',
@@ -98,16 +98,16 @@ def test_room_join_user_already_in_room(mock_boto3):
     }
     mock_room_table = MagicMock()
     mock_room_table.scan.return_value = {'Count': 1, 'Items': [room_item.copy()]}
-    mock_boto3.resource.return_value.Table.return_value = mock_room_table
-    event = {'body': json.dumps({'userId': 'user-123', 'roomId': 'room-abc'})}
+    mock_resource.return_value.Table.return_value = mock_room_table
+    event = auth_event({'userId': 'user-123', 'roomId': 'room-abc'})
     response = room_join.handler(event, None)
     assert response['statusCode'] == 400
     body = json.loads(response['body'])
     assert 'error' in body
     assert 'already in room' in body['error']
 
-@patch('lambdas.room_join.boto3')
-def test_room_join_no_seats_available_all_humans(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_room_join_no_seats_available_all_humans(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
     room_item = {
         'roomId': 'room-abc',
@@ -118,16 +118,16 @@ def test_room_join_no_seats_available_all_humans(mock_boto3):
     }
     mock_room_table = MagicMock()
     mock_room_table.scan.return_value = {'Count': 1, 'Items': [room_item.copy()]}
-    mock_boto3.resource.return_value.Table.return_value = mock_room_table
-    event = {'body': json.dumps({'userId': 'user-123', 'roomId': 'room-abc'})}
+    mock_resource.return_value.Table.return_value = mock_room_table
+    event = auth_event({'userId': 'user-123', 'roomId': 'room-abc'})
     response = room_join.handler(event, None)
     assert response['statusCode'] == 400
     body = json.loads(response['body'])
     assert 'error' in body
     assert 'No seats available' in body['error']
 
-@patch('lambdas.room_join.boto3')
-def test_room_join_success_with_empty_seats(mock_boto3):
+@patch('lambdas.aws_clients.resource')
+def test_room_join_success_with_empty_seats(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
     # Test backward compatibility with rooms that might have empty seats
     room_item = {
@@ -140,28 +140,72 @@ def test_room_join_success_with_empty_seats(mock_boto3):
     mock_room_table = MagicMock()
     mock_room_table.scan.return_value = {'Count': 1, 'Items': [room_item.copy()]}
     mock_room_table.put_item.return_value = {}
-    mock_boto3.resource.return_value.Table.return_value = mock_room_table
-    event = {'body': json.dumps({'userId': 'user-123', 'roomId': 'room-abc', 'seat': 'E'})}
+    mock_resource.return_value.Table.return_value = mock_room_table
+    event = auth_event({'userId': 'user-123', 'roomId': 'room-abc', 'seat': 'E'})
     response = room_join.handler(event, None)
     assert response['statusCode'] == 200
     body = json.loads(response['body'])
     room = body['room']
     assert room['seats']['E'] == 'user-123'
 
-def test_room_join_missing_fields():
+def test_room_join_missing_fields(auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
-    event = {'body': json.dumps({'userId': 'user-123'})}
+    event = auth_event({'userId': 'user-123'})
     response = room_join.handler(event, None)
     assert response['statusCode'] == 400
     body = json.loads(response['body'])
     assert 'error' in body
-    event = {'body': json.dumps({'roomId': 'room-abc'})}
+    event = auth_event({'roomId': 'room-abc'})
     response = room_join.handler(event, None)
-    assert response['statusCode'] == 400
+    assert response['statusCode'] == 401
     body = json.loads(response['body'])
     assert 'error' in body
     event = {'body': None}
     response = room_join.handler(event, None)
     assert response['statusCode'] == 400
     body = json.loads(response['body'])
-    assert 'error' in body 
\ No newline at end of file
+    assert 'error' in body 
+def test_room_join_room_with_events_saves_conditionally_and_returns_the_seat_view(auth_event):
+    from devserver.memory_table import MemoryDynamoDB
+    from lambdas import aws_clients
+    from lambdas.room_events import record_events
+    os.environ['ROOM_TABLE'] = 'rooms-table'
+    dynamodb = MemoryDynamoDB({'rooms-table': ('roomId',)})
+    room_item = {
+        'roomId': 'room-abc',
+        'ownerId': 'owner-1',
+        'seats': {'N': 'owner-1', 'E': '', 'S': '', 'W': ''},
+        'state': 'waiting',
+        'gameData': {'hands': {'N': ['AS'], 'E': ['KS'], 'S': ['QS'], 'W': ['JS']}}
+    }
+    record_events(room_item, [{'type': 'seatChanged', 'seat': 'N', 'userId': 'owner-1'}])
+    dynamodb.restore({'rooms-table': [room_item]})
+    aws_clients.register_resource('dynamodb', dynamodb)
+
+    # Stored numbers come back as Decimal
+    response = room_join.handler(auth_event({'userId': 'user-123', 'roomId': 'room-abc', 'seat': 'E'}), None)
+    assert response['statusCode'] == 200
+    room = json.loads(response['body'])['room']
+    assert room['seq'] == 2 and room['seats']['E'] == 'user-123'
+    assert 'eventLog' not in room and room['gameData']['hands'] == {'E': ['KS']}
+    assert dynamodb.Table('rooms-table').items[('room-abc',)]['seq'] == 2
+
+def test_room_join_conflict_returns_409(auth_event):
+    from botocore.exceptions import ClientError
+    os.environ['ROOM_TABLE'] = 'rooms-table'
+    room_item = {
+        'roomId': 'room-abc',
+        'ownerId': 'owner-1',
+        'seats': {'N': 'owner-1', 'E': '', 'S': '', 'W': ''},
+        'state': 'waiting',
+        'gameData': {},
+        'seq': 1
+    }
+    table = MagicMock()
+    table.scan.return_value = {'Count': 1, 'Items': [room_item]}
+    table.put_item.side_effect = ClientError(
+        {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'seq moved'}}, 'PutItem')
+    with patch('lambdas.aws_clients.table', return_value=table):
+        response = room_join.handler(auth_event({'userId': 'user-123', 'roomId': 'room-abc'}), None)
+    assert response['statusCode'] == 409
+    assert table.put_item.call_args.kwargs['ExpressionAttributeValues'] == {':expectedSeq': 1}
@@ -1,9 +1,104 @@
 import pytest
 from lambdas import room_move
+import json
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from lambdas.session_tokens import issue_token
 
-def test_room_move_stub():
-    event = {}
-    context = None
-    response = room_move.handler(event, context)
+def make_room():
+    return {
+        'roomId': 'room-abc',
+        'ownerId': 'user-n',
+        'seats': {'N': 'user-n', 'E': 'user-e', 'S': 'user-s', 'W': 'user-w'},
+        'state': 'bidding',
+        'seq': 3,
+        'gameData': {
+            'currentPhase': 'bidding',
+            'dealer': 'N',
+            'turn': 'user-n',
+            'turnSeat': 'N',
+            'bids': [],
+            'hands': {'N': ['AS'], 'E': ['KS'], 'S': ['QS'], 'W': ['JS']},
+            'currentTrick': [],
+            'tricks': []
+        }
+    }
+
+def make_event(body, room_id='room-abc'):
+    user_id = body.get('userId') or body.get('playerId')
+    return {
+        'httpMethod': 'POST',
+        'pathParameters': {'roomId': room_id},
+        'headers': {'Authorization': f"Bearer {issue_token(user_id)['token']}"} if user_id else {},
+        'requestContext': {'requestTimeEpoch': 1700000000000},
+        'body': json.dumps(body)
+    }
+
+@pytest.fixture
+def mock_db_utils():
+    with patch('lambdas.game_actions.db_utils') as mock_db_utils, \
+         patch('lambdas.game_actions.broadcast_serialized') as mock_broadcast:
+        mock_db_utils.get_room_connections_by_user.return_value = {'user-e': ['conn-e'], 'user-s': ['conn-s']}
+        mock_db_utils.broadcast = mock_broadcast
+        yield mock_db_utils
+
+def test_move_bid_loads_once_saves_conditionally_and_fans_out(mock_db_utils):
+    mock_db_utils.get_room.return_value = make_room()
+    response = room_move.handler(make_event({'playerId': 'user-n', 'move': '1NT'}), None)
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert body['type'] == 'bid'
+    assert body['move'] == {'seat': 'N', 'bid': '1NT', 'timestamp': 1700000000000}
+    assert body['nextTurn'] == 'user-e'
+    assert body['seq'] == 4
+    # Other seats' hands stay hidden
+    assert body['room']['gameData']['hands'] == {'N': ['AS']}
+
+    mock_db_utils.get_room.assert_called_once_with('room-abc')
+    put_kwargs = mock_db_utils.get_table.return_value.put_item.call_args.kwargs
+    assert put_kwargs['ExpressionAttributeValues'] == {':expectedSeq': 3}
+    connections, data = mock_db_utils.broadcast.call_args.args
+    assert sorted(connections) == ['conn-e', 'conn-s']
+    assert json.loads(data)['events'] == [{'type': 'bid', 'seat': 'N', 'bid': '1NT'}]
+
+def test_move_is_played_as_card_in_playing_phase(mock_db_utils):
+    room = make_room()
+    room['state'] = 'playing'
+    room['gameData'].update({
+        'currentPhase': 'playing',
+        'contract': {'contract': '1NT', 'level': 1, 'strain': 'NT', 'doubled': 0, 'declarer': 'W'},
+    })
+    mock_db_utils.get_room.return_value = room
+    response = room_move.handler(make_event({'userId': 'user-n', 'move': 'AS'}), None)
     assert response['statusCode'] == 200
-    assert 'Move processed' in response['body'] 
\ No newline at end of file
+    body = json.loads(response['body'])
+    assert body['type'] == 'play'
+    assert body['move']['card'] == 'AS'
+    # East is dummy, so declarer (West) plays next
+    assert body['nextTurn'] == 'user-w'
+
+def test_move_rejects_illegal_bid(mock_db_utils):
+    room = make_room()
+    room['gameData']['bids'] = [{'seat': 'W', 'bid': '2S'}]
+    mock_db_utils.get_room.return_value = room
+    response = room_move.handler(make_event({'userId': 'user-n', 'move': '1NT'}), None)
+    assert response['statusCode'] == 400
+    mock_db_utils.get_table.return_value.put_item.assert_not_called()
+
+def test_move_missing_room(mock_db_utils):
+    mock_db_utils.get_room.return_value = None
+    response = room_move.handler(make_event({'userId': 'user-n', 'move': '1NT'}), None)
+    assert response['statusCode'] == 404
+
+def test_move_requires_fields(mock_db_utils):
+    response = room_move.handler(make_event({'userId': 'user-n'}), None)
+    assert response['statusCode'] == 400
+    mock_db_utils.get_room.assert_not_called()
+
+def test_move_conflict_returns_409(mock_db_utils):
+    mock_db_utils.get_room.return_value = make_room()
+    mock_db_utils.get_table.return_value.put_item.side_effect = ClientError(
+        {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'conflict'}}, 'PutItem')
+    response = room_move.handler(make_event({'userId': 'user-n', 'move': '1NT'}), None)
+    assert response['statusCode'] == 409
+    mock_db_utils.broadcast.assert_not_called()
@@ -3,14 +3,12 @@ from lambdas import room_start
 import json
 import os
 from unittest.mock import patch, MagicMock
+from botocore.exceptions import ClientError
 
-@patch('lambdas.room_start.boto3')
-def test_room_start_success(mock_boto3):
-    os.environ['USER_TABLE'] = 'users-table'
+@patch('lambdas.aws_clients.resource')
+def test_room_start_success(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
     # Mock user exists
-    mock_user_table = MagicMock()
-    mock_user_table.scan.return_value = {'Count': 1, 'Items': [{'userId': 'owner-1'}]}
     # Mock room exists with all seats filled (humans and robots)
     room_item = {
         'roomId': 'room-abc',
@@ -20,10 +18,10 @@ def test_room_start_success(mock_boto3):
         'gameData': {}
     }
     mock_room_table = MagicMock()
-    mock_room_table.scan.return_value = {'Count': 1, 'Items': [room_item.copy()]}
+    mock_room_table.get_item.return_value = {'Item': room_item.copy()}
     mock_room_table.put_item.return_value = {}
-    mock_boto3.resource.return_value.Table.side_effect = [mock_user_table, mock_room_table]
-    event = {'body': json.dumps({'userId': 'owner-1', 'roomId': 'room-abc'})}
+    mock_resource.return_value.Table.return_value = mock_room_table
+    event = auth_event({'userId': 'owner-1', 'roomId': 'room-abc'})
     response = room_start.handler(event, None)
     assert response['statusCode'] == 200
     body = json.loads(response['body'])
@@ -32,12 +30,9 @@ def test_room_start_success(mock_boto3):
     # Seats should remain the same, only state should change
     assert room['seats'] == room_item['seats']
 
-@patch('lambdas.room_start.boto3')
-def test_room_start_not_owner(mock_boto3):
-    os.environ['USER_TABLE'] = 'users-table'
+@patch('lambdas.aws_clients.resource')
+def test_room_start_not_owner(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
-    mock_user_table = MagicMock()
-    mock_user_table.scan.return_value = {'Count': 1, 'Items': [{'userId': 'user-2'}]}
     room_item = {
         'roomId': 'room-abc',
         'ownerId': 'owner-1',
@@ -46,21 +41,18 @@ def test_room_start_not_owner(mock_boto3):
         'gameData': {}
     }
     mock_room_table = MagicMock()
-    mock_room_table.scan.return_value = {'Count': 1, 'Items': [room_item.copy()]}
-    mock_boto3.resource.return_value.Table.side_effect = [mock_user_table, mock_room_table]
-    event = {'body': json.dumps({'userId': 'user-2', 'roomId': 'room-abc'})}
+    mock_room_table.get_item.return_value = {'Item': room_item.copy()}
+    mock_resource.return_value.Table.return_value = mock_room_table
+    event = auth_event({'userId': 'user-2', 'roomId': 'room-abc'})
     response = room_start.handler(event, None)
     assert response['statusCode'] == 400
     body = json.loads(response['body'])
     assert 'error' in body
     assert 'owner' in body['error']
 
-@patch('lambdas.room_start.boto3')
-def test_room_start_not_waiting(mock_boto3):
-    os.environ['USER_TABLE'] = 'users-table'
+@patch('lambdas.aws_clients.resource')
+def test_room_start_not_waiting(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
-    mock_user_table = MagicMock()
-    mock_user_table.scan.return_value = {'Count': 1, 'Items': [{'userId': 'owner-1'}]}
     room_item = {
         'roomId': 'room-abc',
         'ownerId': 'owner-1',
@@ -69,60 +61,92 @@ def test_room_start_not_waiting(mock_boto3):
         'gameData': {}
     }
     mock_room_table = MagicMock()
-    mock_room_table.scan.return_value = {'Count': 1, 'Items': [room_item.copy()]}
-    mock_boto3.resource.return_value.Table.side_effect = [mock_user_table, mock_room_table]
-    event = {'body': json.dumps({'userId': 'owner-1', 'roomId': 'room-abc'})}
+    mock_room_table.get_item.return_value = {'Item': room_item.copy()}
+    mock_resource.return_value.Table.return_value = mock_room_table
+    event = auth_event({'userId': 'owner-1', 'roomId': 'room-abc'})
     response = room_start.handler(event, None)
     assert response['statusCode'] == 400
     body = json.loads(response['body'])
     assert 'error' in body
     assert 'waiting' in body['error']
 
-@patch('lambdas.room_start.boto3')
-def test_room_start_user_not_logged_in(mock_boto3):
-    os.environ['USER_TABLE'] = 'users-table'
+@patch('lambdas.aws_clients.resource')
+def test_room_start_user_not_logged_in(mock_resource):
     os.environ['ROOM_TABLE'] = 'rooms-table'
-    mock_user_table = MagicMock()
-    mock_user_table.scan.return_value = {'Count': 0, 'Items': []}
-    mock_boto3.resource.return_value.Table.side_effect = [mock_user_table]
     event = {'body': json.dumps({'userId': 'owner-1', 'roomId': 'room-abc'})}
     response = room_start.handler(event, None)
     assert response['statusCode'] == 401
     body = json.loads(response['body'])
-    assert 'error' in body
-    assert 'not logged in' in body['error'] or 'does not exist' in body['error']
+    assert body['error'] == 'Session token required'
+    mock_resource.return_value.Table.assert_not_called()
 
-@patch('lambdas.room_start.boto3')
-def test_room_start_room_not_found(mock_boto3):
-    os.environ['USER_TABLE'] = 'users-table'
+@patch('lambdas.aws_clients.resource')
+def test_room_start_room_not_found(mock_resource, auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
-    mock_user_table = MagicMock()
-    mock_user_table.scan.return_value = {'Count': 1, 'Items': [{'userId': 'owner-1'}]}
     mock_room_table = MagicMock()
-    mock_room_table.scan.return_value = {'Count': 0, 'Items': []}
-    mock_boto3.resource.return_value.Table.side_effect = [mock_user_table, mock_room_table]
-    event = {'body': json.dumps({'userId': 'owner-1', 'roomId': 'room-abc'})}
+    mock_room_table.get_item.return_value = {}
+    mock_resource.return_value.Table.return_value = mock_room_table
+    event = auth_event({'userId': 'owner-1', 'roomId': 'room-abc'})
     response = room_start.handler(event, None)
     assert response['statusCode'] == 404
     body = json.loads(response['body'])
     assert 'error' in body
     assert 'does not exist' in body['error']
 
-def test_room_start_missing_fields():
-    os.environ['USER_TABLE'] = 'users-table'
+def test_room_start_missing_fields(auth_event):
     os.environ['ROOM_TABLE'] = 'rooms-table'
-    event = {'body': json.dumps({'userId': 'owner-1'})}
+    event = auth_event({'userId': 'owner-1'})
     response = room_start.handler(event, None)
     assert response['statusCode'] == 400
     body = json.loads(response['body'])
     assert 'error' in body
-    event = {'body': json.dumps({'roomId': 'room-abc'})}
+    event = auth_event({'roomId': 'room-abc'})
     response = room_start.handler(event, None)
-    assert response['statusCode'] == 400
+    assert response['statusCode'] == 401
     body = json.loads(response['body'])
     assert 'error' in body
     event = {'body': None}
     response = room_start.handler(event, None)
     assert response['statusCode'] == 400
     body = json.loads(response['body'])
-    assert 'error' in body 
\ No newline at end of file
+    assert 'error' in body 
+def make_waiting_room():
+    return {
+        'roomId': 'room-abc',
+        'ownerId': 'owner-1',
+        'seats': {'N': 'owner-1', 'E': 'robot-E', 'S': 'robot-S', 'W': 'user-2'},
+        'state': 'waiting',
+        'seq': 2,
+        'gameData': {}
+    }
+
+@patch('lambdas.game_actions.broadcast_seat_messages')
+@patch('lambdas.game_actions.db_utils')
+def test_room_start_saves_conditionally_and_fans_out(mock_db_utils, mock_broadcast, auth_event):
+    mock_db_utils.get_room.return_value = make_waiting_room()
+    mock_db_utils.get_room_connections_by_user.return_value = {'user-2': ['conn-w']}
+    response = room_start.handler(auth_event({'userId': 'owner-1', 'roomId': 'room-abc'}), None)
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert body['seq'] > 2
+    # Only the owner's hand is in the response
+    assert list(body['room']['gameData']['hands']) == ['N']
+
+    mock_db_utils.get_room.assert_called_once_with('room-abc')
+    put_kwargs = mock_db_utils.get_table.return_value.put_item.call_args.kwargs
+    assert put_kwargs['ExpressionAttributeValues'] == {':expectedSeq': 2}
+    # West gets the delta with its own hand
+    connections_by_seat, messages = mock_broadcast.call_args.args
+    assert connections_by_seat['W'] == ['conn-w']
+    assert list(messages) == ['W']
+    assert json.loads(messages['W'])['seq'] == body['seq']
+
+@patch('lambdas.game_actions.broadcast_seat_messages')
+@patch('lambdas.game_actions.db_utils')
+def test_room_start_conflict_returns_409(mock_db_utils, mock_broadcast, auth_event):
+    mock_db_utils.get_room.return_value = make_waiting_room()
+    mock_db_utils.get_table.return_value.put_item.side_effect = ClientError(
+        {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'conflict'}}, 'PutItem')
+    response = room_start.handler(auth_event({'userId': 'owner-1', 'roomId': 'room-abc'}), None)
+    assert response['statusCode'] == 409
+    mock_broadcast.assert_not_called()
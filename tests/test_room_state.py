@@ -1,9 +1,95 @@
 import pytest
+import os
 from lambdas import room_state
+import json
+from unittest.mock import patch, MagicMock
+from lambdas.session_tokens import issue_token
 
-def test_room_state_stub():
-    event = {}
-    context = None
-    response = room_state.handler(event, context)
+def make_room(seq):
+    return {
+        'roomId': 'room-abc',
+        'seats': {'N': 'user-n', 'E': 'user-e', 'S': 'user-s', 'W': 'user-w'},
+        'state': 'bidding',
+        'seq': seq,
+        'gameData': {
+            'turn': 'user-n',
+            'bids': [],
+            'hands': {'N': ['AS'], 'E': ['KS'], 'S': ['QS'], 'W': ['JS']},
+            'tricks': []
+        }
+    }
+
+@pytest.fixture
+def mock_room_table():
+    os.environ['ROOM_TABLE'] = 'rooms-table'
+    room_state.room_state_handler.rooms.clear()
+    room_state.room_state_handler.bodies.clear()
+    mock_table = MagicMock()
+    with patch('lambdas.aws_clients.resource') as mock_resource:
+        mock_resource.return_value.Table.return_value = mock_table
+        yield mock_table
+
+def make_event(user_id='user-n', etag=None):
+    event = {
+        'httpMethod': 'GET',
+        'pathParameters': {'roomId': 'room-abc'},
+        'queryStringParameters': {'userId': user_id} if user_id else None,
+        'headers': {'Authorization': f"Bearer {issue_token(user_id)['token']}"} if user_id else {}
+    }
+    if etag:
+        event['headers']['If-None-Match'] = etag
+    return event
+
+def test_room_state_returns_seat_view_with_etag(mock_room_table):
+    mock_room_table.get_item.return_value = {'Item': make_room(3)}
+    response = room_state.handler(make_event(), None)
     assert response['statusCode'] == 200
-    assert 'Room state' in response['body'] 
\ No newline at end of file
+    assert response['headers']['ETag'] == '"3.N"'
+    body = json.loads(response['body'])
+    assert body['seq'] == 3
+    assert list(body['room']['gameData']['hands'].keys()) == ['N']
+
+def test_room_state_public_view(mock_room_table):
+    mock_room_table.get_item.return_value = {'Item': make_room(3)}
+    response = room_state.handler(make_event(user_id=None), None)
+    assert response['headers']['ETag'] == '"3.public"'
+    assert json.loads(response['body'])['room']['gameData']['hands'] == {}
+
+def test_room_state_not_modified_without_dynamodb_read(mock_room_table):
+    mock_room_table.get_item.return_value = {'Item': make_room(3)}
+    first = room_state.handler(make_event(), None)
+    second = room_state.handler(make_event(etag=first['headers']['ETag']), None)
+    assert second['statusCode'] == 304
+    assert second['body'] == ''
+    assert mock_room_table.get_item.call_count == 1
+
+def test_room_state_serves_cached_body(mock_room_table):
+    mock_room_table.get_item.return_value = {'Item': make_room(3)}
+    first = room_state.handler(make_event(), None)
+    with patch('lambdas.room_state.dumps') as mock_dumps:
+        second = room_state.handler(make_event(), None)
+        mock_dumps.assert_not_called()
+    assert second['body'] == first['body']
+
+def test_room_state_refetches_after_ttl(mock_room_table):
+    mock_room_table.get_item.return_value = {'Item': make_room(3)}
+    first = room_state.handler(make_event(), None)
+    with patch('lambdas.room_state.CACHE_TTL_SECONDS', 0):
+        mock_room_table.get_item.return_value = {'Item': make_room(4)}
+        second = room_state.handler(make_event(etag=first['headers']['ETag']), None)
+    assert second['statusCode'] == 200
+    assert second['headers']['ETag'] == '"4.N"'
+    assert mock_room_table.get_item.call_count == 2
+
+def test_room_state_not_found(mock_room_table):
+    mock_room_table.get_item.return_value = {}
+    response = room_state.handler(make_event(), None)
+    assert response['statusCode'] == 404
+
+def test_room_state_missing_room_id(mock_room_table):
+    response = room_state.handler({'httpMethod': 'GET'}, None)
+    assert response['statusCode'] == 400
+
+def test_room_state_wrong_method(mock_room_table):
+    response = room_state.handler({'httpMethod': 'POST'}, None)
+    assert response['statusCode'] == 405
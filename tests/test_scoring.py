@@ -0,0 +1,152 @@
+import pytest
+from lambdas import scoring
+
+def test_contract_score_made_contracts():
+    assert scoring.contract_score(1, 'NT', 0, False, 7) == 90
+    assert scoring.contract_score(3, 'NT', 0, False, 9) == 400
+    assert scoring.contract_score(3, 'NT', 0, True, 10) == 630
+    assert scoring.contract_score(4, 'S', 0, False, 10) == 420
+    assert scoring.contract_score(2, 'C', 0, False, 8) == 90
+    assert scoring.contract_score(5, 'D', 0, True, 11) == 600
+
+def test_contract_score_slams():
+    assert scoring.contract_score(6, 'S', 0, False, 12) == 980
+    assert scoring.contract_score(6, 'NT', 0, True, 12) == 1440
+    assert scoring.contract_score(7, 'NT', 0, True, 13) == 2220
+    assert scoring.contract_score(7, 'C', 0, False, 13) == 1440
+
+def test_contract_score_doubled_and_redoubled():
+    # 2HX making is game
+    assert scoring.contract_score(2, 'H', 1, False, 8) == 470
+    assert scoring.contract_score(2, 'H', 1, True, 8) == 670
+    # Overtricks doubled
+    assert scoring.contract_score(1, 'S', 1, False, 9) == 360
+    assert scoring.contract_score(1, 'NT', 2, True, 8) == 1160
+
+def test_contract_score_undertricks():
+    assert scoring.contract_score(4, 'S', 0, False, 8) == -100
+    assert scoring.contract_score(4, 'S', 0, True, 8) == -200
+    assert scoring.contract_score(4, 'S', 1, False, 7) == -500
+    assert scoring.contract_score(4, 'S', 1, False, 6) == -800
+    assert scoring.contract_score(4, 'S', 1, True, 7) == -800
+    assert scoring.contract_score(4, 'S', 2, False, 9) == -200
+    assert scoring.contract_score(7, 'NT', 1, True, 0) == -3800
+
+def test_score_table_matches_direct_computation():
+    for level in range(1, 8):
+        for strain in scoring.STRAINS:
+            for doubled in range(3):
+                for vulnerable in (False, True):
+                    for tricks in range(14):
+                        assert scoring.contract_score(level, strain, doubled, vulnerable, tricks) == \
+                            scoring._compute_score(level, strain, doubled, vulnerable, tricks)
+
+def test_parse_contract():
+    assert scoring.parse_contract('4S') == (4, 'S', 0)
+    assert scoring.parse_contract('3NTX') == (3, 'NT', 1)
+    assert scoring.parse_contract('6hxx') == (6, 'H', 2)
+    with pytest.raises(ValueError):
+        scoring.parse_contract('8S')
+    with pytest.raises(ValueError):
+        scoring.parse_contract('S')
+
+def test_score_result_is_from_north_south_view():
+    assert scoring.score_result('4S', 'N', 10, 'None') == 420
+    assert scoring.score_result('4S', 'E', 10, 'EW') == -620
+    assert scoring.score_result('4S', 'E', 9, 'NS') == 50
+    assert scoring.score_result('pass', None, 0) == 0
+
+def test_score_results_batch_matches_single():
+    results = [
+        {'contract': '3NT', 'declarer': 'S', 'tricks': 10, 'vulnerability': 'Both'},
+        {'contract': '4HX', 'declarer': 'W', 'tricks': 8, 'vulnerability': 'EW'},
+        {'contract': 'pass'},
+        {'contract': '1C', 'declarer': 'E', 'tricks': 7}
+    ] * 500
+    batch = scoring.score_results(results)
+    assert len(batch) == 2000
+    expected = [scoring.score_result(r['contract'], r.get('declarer'), r.get('tricks', 0),
+                                     r.get('vulnerability', 'None')) for r in results]
+    assert batch == expected
+    assert batch[:4] == [630, 500, 0, -70]
+
+def test_batches_reject_values_outside_the_score_table():
+    for tricks in (-1, 14):
+        with pytest.raises(ValueError):
+            scoring.score_results([{'contract': '4S', 'declarer': 'N', 'tricks': tricks}])
+    with pytest.raises(ValueError):
+        scoring.score_batch([8], ['S'], [0], [False], [13])
+    with pytest.raises(ValueError):
+        scoring.score_batch([4], ['S'], [3], [False], [10])
+    assert scoring.score_batch([], [], [], [], []) == []
+
+def test_board_vulnerability_and_dealer():
+    assert scoring.board_vulnerability(1) == 'None'
+    assert scoring.board_vulnerability(4) == 'Both'
+    assert scoring.board_vulnerability(16) == 'EW'
+    assert scoring.board_vulnerability(17) == 'None'
+    assert scoring.board_dealer(1) == 'N'
+    assert scoring.board_dealer(6) == 'E'
+
+def test_imps():
+    assert scoring.imps(0) == 0
+    assert scoring.imps(10) == 0
+    assert scoring.imps(20) == 1
+    assert scoring.imps(-50) == -2
+    assert scoring.imps(420) == 9
+    assert scoring.imps(430) == 10
+    assert scoring.imps(3990) == 23
+    assert scoring.imps(4000) == 24
+    assert scoring.imps(-7600) == -24
+    assert scoring.imps_batch([620, -100, 0], [170, 100, 0]) == [10, -5, 0]
+
+def test_matchpoints():
+    results = scoring.matchpoints([420, 450, 420, -50])
+    assert [r['ns'] for r in results] == [3.0, 6.0, 3.0, 0.0]
+    assert [r['ew'] for r in results] == [3.0, 0.0, 3.0, 6.0]
+    assert results[1]['nsPercent'] == 100.0
+    assert scoring.matchpoints([]) == []
+    assert scoring.matchpoints([100])[0]['nsPercent'] == 50.0
+
+def test_matchpoint_boards():
+    boards = scoring.matchpoint_boards({1: [100, 200], 2: [-50, -50]})
+    assert boards[1][1]['ns'] == 2.0
+    assert boards[2][0]['ns'] == 1.0
+
+def test_final_contract():
+    bids = [
+        {'seat': 'N', 'bid': '1H'},
+        {'seat': 'E', 'bid': 'pass'},
+        {'seat': 'S', 'bid': '2H'},
+        {'seat': 'W', 'bid': '2S'},
+        {'seat': 'N', 'bid': '4H'},
+        {'seat': 'E', 'bid': 'double'},
+        {'seat': 'S', 'bid': 'pass'},
+        {'seat': 'W', 'bid': 'pass'},
+        {'seat': 'N', 'bid': 'pass'}
+    ]
+    contract = scoring.final_contract(bids)
+    assert contract['contract'] == '4HX'
+    assert contract['declarer'] == 'N'
+    assert scoring.final_contract([{'seat': s, 'bid': 'pass'} for s in scoring.SEATS]) is None
+
+def test_score_hand():
+    game_data = {
+        'bids': [
+            {'seat': 'N', 'bid': 'pass'},
+            {'seat': 'E', 'bid': '1S'},
+            {'seat': 'S', 'bid': 'pass'},
+            {'seat': 'W', 'bid': '4S'},
+            {'seat': 'N', 'bid': 'pass'},
+            {'seat': 'E', 'bid': 'pass'},
+            {'seat': 'S', 'bid': 'pass'}
+        ],
+        'tricks': [{'cards': [], 'winner': 'E' if i < 6 else ('W' if i < 10 else 'N')} for i in range(13)],
+        'vulnerability': 'EW'
+    }
+    result = scoring.score_hand(game_data)
+    assert result['contract'] == '4S'
+    assert result['declarer'] == 'E'
+    assert result['tricks'] == 10
+    assert result['nsScore'] == -620
+    assert result['ewScore'] == 620
@@ -0,0 +1,48 @@
+import pytest
+import json
+from lambdas import session_tokens
+from lambdas.session_tokens import issue_token, verify_token, authenticate, InvalidToken
+
+def test_issue_and_verify_round_trip():
+    issued = issue_token('user-1', 'jacob', ttl_seconds=60, now=1000)
+    claims = verify_token(issued['token'], now=1030)
+    assert claims == {'sub': 'user-1', 'name': 'jacob', 'exp': 1060}
+    assert issued['expiresAt'] == 1060
+
+def test_verify_rejects_expired_token():
+    token = issue_token('user-1', ttl_seconds=60, now=1000)['token']
+    with pytest.raises(InvalidToken, match='expired'):
+        verify_token(token, now=1060)
+
+def test_verify_rejects_tampered_payload():
+    token = issue_token('user-1', now=1000)['token']
+    payload, signature = token.split('.')
+    forged = session_tokens._encode(json.dumps({'sub': 'user-2', 'exp': 10 ** 10}).encode('utf-8'))
+    with pytest.raises(InvalidToken):
+        verify_token(f'{forged}.{signature}', now=1000)
+    with pytest.raises(InvalidToken):
+        verify_token('not-a-token')
+
+@pytest.mark.parametrize('token', ['\u00e9.abc', 'abc.\u00e9'])
+def test_verify_rejects_non_ascii_tokens(token):
+    with pytest.raises(InvalidToken):
+        verify_token(token)
+
+def test_verify_rejects_token_signed_with_another_secret(monkeypatch):
+    token = issue_token('user-1')['token']
+    monkeypatch.setenv('SESSION_SECRET', 'rotated-secret')
+    with pytest.raises(InvalidToken):
+        verify_token(token)
+
+def test_authenticate_reads_bearer_header_and_sets_user():
+    token = issue_token('user-1')['token']
+    data = {}
+    authenticate({'headers': {'authorization': f'Bearer {token}'}}, data)
+    assert data['userId'] == 'user-1'
+
+def test_authenticate_rejects_missing_token_and_other_user():
+    with pytest.raises(InvalidToken, match='required'):
+        authenticate({}, {'userId': 'user-1'})
+    token = issue_token('user-1')['token']
+    with pytest.raises(InvalidToken, match='does not match'):
+        authenticate({'queryStringParameters': {'token': token}}, {'ownerId': 'user-2'}, 'ownerId')
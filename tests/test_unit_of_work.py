@@ -0,0 +1,57 @@
+import pytest
+from botocore.exceptions import ClientError
+from devserver.memory_table import MemoryDynamoDB
+from lambdas import aws_clients, unit_of_work
+
+@pytest.fixture
+def dynamodb(devserver_environment):
+    memory = MemoryDynamoDB()
+    aws_clients.register_resource('dynamodb', memory)
+    return memory
+
+def operations(dynamodb):
+    return [request['operation'] for request in dynamodb.ledger.requests]
+
+def test_reads_are_served_once_and_writes_flush_as_one_batch(dynamodb):
+    rooms = aws_clients.table_from_env('ROOM_TABLE')
+    connections = aws_clients.table_from_env('WEBSOCKET_CONNECTIONS_TABLE')
+    rooms.put_item(Item={'roomId': 'r1', 'seq': 0})
+    dynamodb.ledger.reset()
+    with unit_of_work.begin() as work:
+        room = unit_of_work.get_item(rooms, {'roomId': 'r1'})
+        assert unit_of_work.get_item(rooms, {'roomId': 'r1'}) is room
+        for connection_id in ('c1', 'c2'):
+            unit_of_work.delete_item(connections, {'connectionId': connection_id, 'currentRoomId': 'not-joined'})
+            unit_of_work.put_item(connections, {'connectionId': connection_id, 'currentRoomId': 'r1'})
+        # A later write to the same item replaces the queued one
+        unit_of_work.put_item(rooms, dict(room, seq=1))
+        unit_of_work.put_item(rooms, dict(room, seq=2))
+        assert work.pending == 5 and operations(dynamodb) == ['GetItem']
+    assert operations(dynamodb) == ['GetItem', 'BatchWriteItem']
+    assert rooms.get_item(Key={'roomId': 'r1'})['Item']['seq'] == 2
+    assert len(connections.items) == 2
+
+def test_conditional_writes_commit_atomically(dynamodb):
+    rooms = aws_clients.table_from_env('ROOM_TABLE')
+    connections = aws_clients.table_from_env('WEBSOCKET_CONNECTIONS_TABLE')
+    rooms.put_item(Item={'roomId': 'r1', 'seq': 3})
+    condition = {'ConditionExpression': 'seq = :expected', 'ExpressionAttributeValues': {':expected': 2}}
+    with pytest.raises(ClientError) as error:
+        with unit_of_work.begin():
+            unit_of_work.put_item(rooms, {'roomId': 'r1', 'seq': 4}, **condition)
+            # Nested blocks join the open unit
+            with unit_of_work.begin():
+                unit_of_work.put_item(connections, {'connectionId': 'c1', 'currentRoomId': 'r1'})
+    assert error.value.response['Error']['Code'] == 'ConditionalCheckFailedException'
+    assert operations(dynamodb)[-1] == 'TransactWriteItems'
+    assert connections.items == {} and rooms.get_item(Key={'roomId': 'r1'})['Item']['seq'] == 3
+
+def test_an_exception_discards_the_queue_and_no_unit_writes_directly(dynamodb):
+    rooms = aws_clients.table_from_env('ROOM_TABLE')
+    with pytest.raises(RuntimeError):
+        with unit_of_work.begin():
+            unit_of_work.put_item(rooms, {'roomId': 'r1'})
+            raise RuntimeError('handler failed')
+    assert unit_of_work.current() is None and rooms.items == {}
+    unit_of_work.put_item(rooms, {'roomId': 'r2'})
+    assert operations(dynamodb) == ['PutItem']
@@ -0,0 +1,65 @@
+import json
+import os
+import pytest
+from devserver.server import DevServer
+from lambdas import aws_clients, connections
+from lambdas.session_tokens import issue_token
+
+class RecordingApi:
+    def __init__(self):
+        self.sent = []
+
+    def post_to_connection(self, ConnectionId, Data):
+        self.sent.append((ConnectionId, json.loads(Data)))
+        return {}
+
+@pytest.fixture(params=[connections.ROOM_SORT_KEY, connections.CONNECTION_ID])
+def server(request, devserver_environment, monkeypatch):
+    monkeypatch.setenv('CONNECTIONS_KEY_SCHEMA', request.param)
+    server = DevServer()
+    server.install()
+    server.api = RecordingApi()
+    aws_clients.register_client('apigatewaymanagementapi', server.api, os.environ['WEBSOCKET_ENDPOINT'])
+    return server
+
+def seated_room(server, state_after_join=None):
+    tokens = {user: issue_token(user, user)['token'] for user in ('ann', 'bob')}
+    for user, token in tokens.items():
+        server.dispatch('$connect', f'conn-{user}', queryStringParameters={'token': token})
+
+    def send(route, user, **body):
+        response = server.dispatch(route, f'conn-{user}', body=json.dumps(dict(body, action=route, token=tokens[user])))
+        assert 200 <= response['statusCode'] < 300, response
+        return json.loads(response['body'])
+
+    room_id = send('createRoom', 'ann', data={'ownerId': 'ann', 'playerName': 'Ann', 'roomName': 'T'})['room']['roomId']
+    seat = send('joinRoom', 'bob', roomId=room_id, userId='bob')['assignedSeat']
+    if state_after_join == 'started':
+        send('startRoom', 'ann', roomId=room_id, userId='ann')
+    server.api.sent.clear()
+    return room_id, seat, send
+
+def test_leaving_a_waiting_room_frees_the_seat_and_tells_the_others_once(server):
+    room_id, seat, _ = seated_room(server)
+    server.dispatch('$disconnect', 'conn-bob')
+    room = server.dynamodb.Table('GameRooms').items[(room_id,)]
+    assert room['seats'][seat] == ''
+    [(target, delta)] = server.api.sent
+    assert target == 'conn-ann' and delta['seq'] == room['seq']
+    assert delta['events'] == [{'type': 'playerDisconnected', 'seat': seat, 'userId': 'bob', 'released': True}]
+    assert all(record['connectionId'] != 'conn-bob' for record in server.dynamodb.Table('WebSocketConnections').items.values())
+
+def test_a_player_who_leaves_mid_game_keeps_the_seat_until_rejoining(server):
+    room_id, seat, _ = seated_room(server, 'started')
+    server.dispatch('$disconnect', 'conn-bob')
+    room = server.dynamodb.Table('GameRooms').items[(room_id,)]
+    assert room['seats'][seat] == 'bob' and room['absentSeats'] == [seat]
+    assert server.api.sent[0][1]['events'][0]['released'] is False
+
+    server.api.sent.clear()
+    server.dispatch('$connect', 'conn-bob-2', queryStringParameters={'token': issue_token('bob', 'bob')['token']})
+    response = server.dispatch('joinRoom', 'conn-bob-2', body=json.dumps(
+        {'action': 'joinRoom', 'token': issue_token('bob', 'bob')['token'], 'roomId': room_id, 'userId': 'bob'}))
+    assert json.loads(response['body'])['assignedSeat'] == seat
+    assert server.dynamodb.Table('GameRooms').items[(room_id,)]['absentSeats'] == []
+    assert [delta['events'][0]['type'] for _, delta in server.api.sent] == ['playerReconnected']
@@ -0,0 +1,95 @@
+import pytest
+from lambdas import websocket_resync, room_events
+import json
+from unittest.mock import patch
+from lambdas.session_tokens import issue_token
+
+def make_room(moves):
+    room = {
+        'roomId': 'room-abc',
+        'seats': {'N': 'user-n', 'E': 'user-e', 'S': 'user-s', 'W': 'user-w'},
+        'state': 'playing',
+        'gameData': {
+            'turn': 'user-e',
+            'bids': [],
+            'hands': {'N': ['AS'], 'E': ['KS'], 'S': ['QS'], 'W': ['JS']},
+            'tricks': []
+        }
+    }
+    for i in range(moves):
+        room_events.record_events(room, [room_events.bid_event('NESW'[i % 4], 'pass')])
+    return room
+
+def make_event(body):
+    if body.get('userId'):
+        body = dict(body, token=issue_token(body['userId'])['token'])
+    return {
+        'requestContext': {'connectionId': 'conn-1', 'routeKey': 'resync'},
+        'body': json.dumps(body)
+    }
+
+@patch('lambdas.websocket_resync.db_utils')
+def test_resync_returns_missed_events_only(mock_db_utils):
+    mock_db_utils.get_room.return_value = make_room(10)
+    response = websocket_resync.lambda_handler(make_event({'roomId': 'room-abc', 'userId': 'user-n', 'lastSeq': 7}), None)
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert body['seq'] == 10
+    assert [delta['seq'] for delta in body['deltas']] == [8, 9, 10]
+    assert 'snapshot' not in body
+
+@patch('lambdas.websocket_resync.db_utils')
+def test_resync_up_to_date(mock_db_utils):
+    mock_db_utils.get_room.return_value = make_room(4)
+    response = websocket_resync.lambda_handler(make_event({'roomId': 'room-abc', 'userId': 'user-n', 'lastSeq': 4}), None)
+    body = json.loads(response['body'])
+    assert body['deltas'] == []
+
+@patch('lambdas.websocket_resync.db_utils')
+def test_resync_falls_back_to_snapshot_when_gap_too_large(mock_db_utils):
+    mock_db_utils.get_room.return_value = make_room(room_events.EVENT_LOG_SIZE + 20)
+    response = websocket_resync.lambda_handler(make_event({'roomId': 'room-abc', 'userId': 'user-e', 'lastSeq': 3}), None)
+    body = json.loads(response['body'])
+    snapshot = body['snapshot']
+    assert snapshot['seq'] == room_events.EVENT_LOG_SIZE + 20
+    assert list(snapshot['room']['gameData']['hands'].keys()) == ['E']
+    assert 'eventLog' not in snapshot['room']
+    assert 'deltas' not in body
+
+@patch('lambdas.websocket_resync.db_utils')
+def test_resync_without_last_seq_returns_snapshot(mock_db_utils):
+    mock_db_utils.get_room.return_value = make_room(2)
+    response = websocket_resync.lambda_handler(make_event({'roomId': 'room-abc', 'userId': 'spectator'}), None)
+    body = json.loads(response['body'])
+    assert body['snapshot']['room']['gameData']['hands'] == {}
+
+@patch('lambdas.websocket_resync.db_utils')
+def test_resync_room_not_found(mock_db_utils):
+    mock_db_utils.get_room.return_value = None
+    response = websocket_resync.lambda_handler(make_event({'roomId': 'room-abc', 'userId': 'user-n', 'lastSeq': 1}), None)
+    assert response['statusCode'] == 404
+
+def test_resync_missing_fields():
+    response = websocket_resync.lambda_handler(make_event({'userId': 'user-n'}), None)
+    assert response['statusCode'] == 400
+
+def test_resync_requires_session_token():
+    response = websocket_resync.lambda_handler(make_event({'roomId': 'room-abc'}), None)
+    assert response['statusCode'] == 401
+    forged = make_event({'roomId': 'room-abc', 'userId': 'user-n', 'lastSeq': 0})
+    body = json.loads(forged['body'])
+    body['userId'] = 'user-s'
+    forged['body'] = json.dumps(body)
+    response = websocket_resync.lambda_handler(forged, None)
+    assert response['statusCode'] == 401
+    assert json.loads(response['body'])['error'] == 'Session token does not match user'
+
+@patch('lambdas.websocket_resync.db_utils')
+def test_resync_snapshots_when_deal_was_missed(mock_db_utils):
+    room = make_room(3)
+    room_events.record_events(room, [room_events.hands_dealt_event()])
+    mock_db_utils.get_room.return_value = room
+    response = websocket_resync.lambda_handler(make_event({'roomId': 'room-abc', 'userId': 'user-n', 'lastSeq': 2}), None)
+    body = json.loads(response['body'])
+    assert 'deltas' not in body
+    assert body['snapshot']['room']['gameData']['hands'] == {'N': ['AS']}
@@ -0,0 +1,31 @@
+import pytest
+from lambdas import websocket_router
+import json
+from unittest.mock import patch, MagicMock
+
+@pytest.fixture(autouse=True)
+def clear_handlers():
+    websocket_router._handlers.clear()
+    yield
+    websocket_router._handlers.clear()
+
+def test_router_dispatches_on_route_key():
+    route_handler = MagicMock(return_value={'statusCode': 200})
+    with patch('lambdas.websocket_router.importlib') as mock_importlib:
+        mock_importlib.import_module.return_value.lambda_handler = route_handler
+        event = {'requestContext': {'routeKey': 'makeBid', 'connectionId': 'conn-1'}}
+        response = websocket_router.lambda_handler(event, None)
+        websocket_router.lambda_handler(event, None)
+    assert response == {'statusCode': 200}
+    # The route's module is imported once and reused by warm invocations
+    mock_importlib.import_module.assert_called_once_with('lambdas.websocket_make_bid')
+    assert route_handler.call_count == 2
+
+def test_router_rejects_unknown_route():
+    response = websocket_router.lambda_handler({'requestContext': {'routeKey': '$default'}}, None)
+    assert response['statusCode'] == 400
+    assert 'Invalid route key' in json.loads(response['body'])['error']
+
+def test_router_routes_resolve_to_handlers():
+    for route in websocket_router.ROUTES:
+        assert callable(websocket_router.resolve_route(route))
@@ -0,0 +1,234 @@
+"""
+Build a dependency-pruned deployment bundle per Lambda function
+
+Instead of copying all of lambdas/ and models/ into every zip (deploy.sh),
+walk the handler's import graph and ship only the first-party modules it
+can reach, precompiled to .pyc, plus a lambda_function.py entry point.
+Third-party packages the graph needs are listed in the bundle's
+requirements.txt (boto3/botocore come with the Lambda runtime) and are
+only installed into the bundle with --install.
+
+Imports are found statically, including imports deferred into functions
+and module names passed as strings (websocket_router's lazy ROUTES).
+
+.pyc files are specific to the Python version that builds them, so build
+with the same minor version as the Lambda runtime (python3.12), or pass
+--source to ship .py files alongside.
+
+Usage:
+    python tools/bundle.py room-state connection-count
+    python tools/bundle.py --all [--install] [--source] [--out dist]
+"""
+import argparse
+import ast
+import json
+import os
+import py_compile
+import shutil
+import subprocess
+import sys
+import time
+import zipfile
+from typing import Dict, List, Set
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_PARTY = ('lambdas', 'models')
+# Provided by the Lambda Python runtime
+RUNTIME_PROVIDED = {'boto3', 'botocore'}
+# Import name -> requirement line when they differ
+REQUIREMENTS = {'pydantic': 'pydantic==1.10.13', 'passlib': 'passlib', 'typing_extensions': 'typing_extensions'}
+
+def module_path(module: str) -> str:
+    """
+    Source file of a first-party module or package, or '' if there is none
+    """
+    base = os.path.join(REPO_ROOT, *module.split('.'))
+    if os.path.isfile(base + '.py'):
+        return base + '.py'
+    if os.path.isfile(os.path.join(base, '__init__.py')):
+        return os.path.join(base, '__init__.py')
+    return ''
+
+def _imports_of(path: str, module: str) -> Set[str]:
+    """
+    Every module name a source file may import, at any nesting level
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    package = module if path.endswith('__init__.py') else module.rpartition('.')[0]
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ''
+            if node.level:
+                parent = package.split('.')[:len(package.split('.')) - node.level + 1]
+                base = '.'.join(parent + ([base] if base else []))
+            names.add(base)
+            # 'from lambdas import aws_clients' imports a submodule
+            names.update(f'{base}.{alias.name}' for alias in node.names if module_path(f'{base}.{alias.name}'))
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            # importlib targets such as 'lambdas.websocket_connect'
+            if node.value.split('.')[0] in FIRST_PARTY and module_path(node.value):
+                names.add(node.value)
+    return names
+
+def import_graph(handler_module: str) -> Dict[str, Set[str]]:
+    """
+    First-party modules reachable from a handler and the third-party
+    top-level packages they import
+
+    Returns:
+        {'modules': set of first-party module names (packages included),
+         'third_party': set of top-level distribution import names}
+    """
+    modules, third_party = set(), set()
+    pending = [handler_module]
+    while pending:
+        module = pending.pop()
+        if module in modules:
+            continue
+        modules.add(module)
+        # Importing a submodule runs its parent packages' __init__ too
+        parent = module.rpartition('.')[0]
+        if parent:
+            pending.append(parent)
+        for name in _imports_of(module_path(module), module):
+            top = name.split('.')[0]
+            if top in FIRST_PARTY:
+                if module_path(name):
+                    pending.append(name)
+            elif top and top not in sys.stdlib_module_names:
+                third_party.add(top)
+    return {'modules': modules, 'third_party': third_party}
+
+def handler_module(function_name: str) -> str:
+    return 'lambdas.' + function_name.replace('-', '_')
+
+def list_functions() -> List[str]:
+    """
+    Deployable function names (handler modules under lambdas/)
+    """
+    names = []
+    for filename in sorted(os.listdir(os.path.join(REPO_ROOT, 'lambdas'))):
+        if not filename.endswith('.py'):
+            continue
+        with open(os.path.join(REPO_ROOT, 'lambdas', filename)) as f:
+            source = f.read()
+        if 'def handler(' in source or 'def lambda_handler(' in source:
+            names.append(filename[:-3].replace('_', '-'))
+    return names
+
+def _entry_point(module: str) -> str:
+    with open(module_path(module)) as f:
+        tree = ast.parse(f.read())
+    functions = {node.name for node in tree.body if isinstance(node, ast.FunctionDef)}
+    name = 'lambda_handler' if 'lambda_handler' in functions else 'handler'
+    return f"from {module} import {name} as lambda_handler\n"
+
+def _directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+def measure_import(bundle_dir: str, runs: int = 3) -> float:
+    """
+    Median time (ms) to import the bundle's entry point in a fresh interpreter
+    """
+    script = (
+        "import time\n"
+        "started = time.perf_counter()\n"
+        "import lambda_function\n"
+        "print((time.perf_counter() - started) * 1000)\n"
+    )
+    env = dict(os.environ, AWS_DEFAULT_REGION=os.environ.get('AWS_DEFAULT_REGION', 'us-west-2'))
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', script], cwd=bundle_dir, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return round(sorted(samples)[len(samples) // 2], 2)
+
+def build(function_name: str, out_dir: str, install: bool = False, source: bool = False) -> Dict[str, object]:
+    """
+    Build out_dir/<function> and out_dir/<function>.zip
+
+    Returns:
+        Report with the bundled modules, requirements, sizes and import time
+    """
+    module = handler_module(function_name)
+    if not module_path(module):
+        raise ValueError(f'Unknown function: {function_name}')
+    graph = import_graph(module)
+
+    bundle_dir = os.path.join(out_dir, function_name)
+    shutil.rmtree(bundle_dir, ignore_errors=True)
+    os.makedirs(bundle_dir)
+
+    for name in sorted(graph['modules']):
+        src = module_path(name)
+        relative = os.path.relpath(src, REPO_ROOT)
+        dest = os.path.join(bundle_dir, relative)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # Sourceless .pyc next to where the .py would be is importable as is
+        py_compile.compile(src, cfile=dest + 'c', dfile=relative, doraise=True)
+        if source:
+            shutil.copy2(src, dest)
+
+    with open(os.path.join(bundle_dir, 'lambda_function.py'), 'w') as f:
+        f.write(_entry_point(module))
+
+    requirements = sorted(REQUIREMENTS.get(name, name) for name in graph['third_party'] - RUNTIME_PROVIDED)
+    with open(os.path.join(bundle_dir, 'requirements.txt'), 'w') as f:
+        f.write(''.join(f'{line}\n' for line in requirements))
+    if install and requirements:
+        subprocess.run([sys.executable, '-m', 'pip', 'install', '--quiet', '-t', bundle_dir] + requirements, check=True)
+
+    import_ms = measure_import(bundle_dir)
+
+    zip_path = os.path.join(out_dir, f'{function_name}.zip')
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as bundle_zip:
+        for root, _, files in os.walk(bundle_dir):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                bundle_zip.write(path, os.path.relpath(path, bundle_dir))
+
+    return {
+        'function': function_name,
+        'modules': sorted(graph['modules']),
+        'requirements': requirements,
+        'unpackedBytes': _directory_size(bundle_dir),
+        'zipBytes': os.path.getsize(zip_path),
+        'importMs': import_ms,
+        'zip': zip_path
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('functions', nargs='*', help='function names as used by deploy.sh, e.g. room-state')
+    parser.add_argument('--all', action='store_true', help='bundle every handler under lambdas/')
+    parser.add_argument('--out', default=os.path.join(REPO_ROOT, 'dist'), help='output directory')
+    parser.add_argument('--install', action='store_true', help='pip install third-party requirements into the bundle')
+    parser.add_argument('--source', action='store_true', help='ship .py sources alongside the .pyc files')
+    parser.add_argument('--json', help='also write the reports to this file')
+    args = parser.parse_args()
+
+    functions = list_functions() if args.all else args.functions
+    if not functions:
+        parser.error('name at least one function or pass --all')
+
+    reports = []
+    print(f"{'function':<24}{'modules':>8}{'unpacked KB':>13}{'zip KB':>9}{'import ms':>11}  requirements")
+    for function_name in functions:
+        started = time.perf_counter()
+        report = build(function_name, args.out, install=args.install, source=args.source)
+        report['buildMs'] = round((time.perf_counter() - started) * 1000, 1)
+        reports.append(report)
+        print(f"{function_name:<24}{len(report['modules']):>8}{report['unpackedBytes'] / 1024:>13.1f}"
+              f"{report['zipBytes'] / 1024:>9.1f}{report['importMs']:>11.2f}  {', '.join(report['requirements']) or '-'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+if __name__ == '__main__':
+    main()
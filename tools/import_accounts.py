@@ -0,0 +1,168 @@
+"""
+Bulk account import for seeding tournaments and migrating users
+
+Creating accounts one at a time through account_create costs a full
+username scan and a single put_item each. This tool instead:
+
+- streams rows from CSV (username,password[,userId]) or JSONL
+  ({"username", "password", "userId"?}), so memory stays flat
+- hashes passwords across a process pool with the same password policy
+  as account_create (PASSWORD_SCHEME, BCRYPT_ROUNDS, ...)
+- writes each account with put_item guarded by attribute_not_exists(username)
+  (username is the table's key), so existing usernames and repeats within
+  the input are skipped by DynamoDB rather than remembered here, and live
+  signups during the import are never overwritten
+
+Usage:
+    USER_TABLE=UsersTable python tools/import_accounts.py users.csv
+    python tools/import_accounts.py users.jsonl --table UsersTable --workers 8
+    python tools/import_accounts.py - --format csv --dry-run < users.csv
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from lambdas import aws_clients, password_policy
+
+# Rows handed to a worker at a time, and batches in flight per worker
+BATCH_SIZE = 100
+BATCHES_PER_WORKER = 2
+
+def read_accounts(stream: Iterable[str], input_format: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield {'username', 'password', 'userId'?} rows one at a time
+    """
+    if input_format == 'csv':
+        for row in csv.DictReader(stream):
+            yield {key: value for key, value in row.items() if key and value}
+    elif input_format == 'jsonl':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported input format: {input_format}")
+
+def build_users(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Hash a batch of rows into user items (runs in the worker processes)
+    """
+    created_at = datetime.now(timezone.utc).isoformat()
+    return [{
+        'userId': row.get('userId') or str(uuid.uuid4()),
+        'username': row['username'],
+        'passwordHash': password_policy.hash_password(row['password']),
+        'createdAt': created_at
+    } for row in rows]
+
+def _batches(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def hashed_users(rows: Iterator[Dict[str, Any]], workers: int, batch_size: int = BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    User items for rows, in order, hashed across a process pool
+
+    Only a bounded number of batches is in flight, so the input is read as
+    fast as it is hashed rather than all at once. workers=0 hashes in process.
+    """
+    if workers <= 0:
+        for batch in _batches(rows, batch_size):
+            yield from build_users(batch)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in _batches(rows, batch_size):
+            pending.append(pool.submit(build_users, batch))
+            if len(pending) >= workers * BATCHES_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def import_accounts(rows: Iterable[Dict[str, Any]], table: Any, workers: int = 0,
+                    dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Create an account for every new username in rows
+
+    Nothing is kept per username, so memory stays flat however large the
+    table and the input are; a row whose username is taken is still hashed
+    before its put is rejected. A dry run reads nothing and cannot tell
+    duplicates apart, so it counts every valid row as imported.
+
+    Returns:
+        Report with imported, duplicate and invalid counts and throughput
+    """
+    started = time.perf_counter()
+    report = {'imported': 0, 'duplicates': 0, 'invalid': 0}
+
+    def valid_rows():
+        for row in rows:
+            if not row.get('username') or not row.get('password'):
+                report['invalid'] += 1
+            else:
+                yield row
+
+    users = hashed_users(valid_rows(), workers)
+    if dry_run:
+        for _ in users:
+            report['imported'] += 1
+    else:
+        from botocore.exceptions import ClientError
+        for user in users:
+            try:
+                table.put_item(Item=user, ConditionExpression='attribute_not_exists(username)')
+                report['imported'] += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                report['duplicates'] += 1
+
+    elapsed = time.perf_counter() - started
+    report['seconds'] = round(elapsed, 2)
+    report['accountsPerSec'] = round(report['imported'] / elapsed, 1) if elapsed else 0.0
+    return report
+
+def _input_format(path: str, requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="CSV or JSONL file, or '-' for stdin")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='input format (default: from the file extension)')
+    parser.add_argument('--table', default=os.environ.get('USER_TABLE'), help='user table (default: $USER_TABLE)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='hashing processes (0 hashes in process)')
+    parser.add_argument('--dry-run', action='store_true', help='hash only; read and write nothing in DynamoDB')
+    args = parser.parse_args()
+
+    if not args.table and not args.dry_run:
+        parser.error('pass --table or set USER_TABLE')
+    table = None if args.dry_run else aws_clients.table(args.table)
+    stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8') if args.input == '-' else open(args.input, newline='')
+    with stream:
+        report = import_accounts(read_accounts(stream, _input_format(args.input, args.format)), table,
+                                 workers=args.workers, dry_run=args.dry_run)
+    print(f"imported {report['imported']}, skipped {report['duplicates']} duplicate and {report['invalid']} invalid rows "
+          f"in {report['seconds']:.2f} s ({report['accountsPerSec']:.1f} accounts/s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""
+Synthetic load generator playing whole tables through the WebSocket handlers
+
+Each simulated table runs a complete game the way four clients would: four
+$connect, createRoom, three joinRoom, startRoom, a random legal auction,
+all 52 cards, then four $disconnect. Tables are interleaved one request at
+a time, so every table is live at once and the connections table holds all
+of their players, as it would in production.
+
+Requests go through websocket_router and the unchanged handlers (via the
+devserver's dispatch, handler logging discarded) against the in-memory
+DynamoDB; post_to_connection is a stub that only counts deliveries. Moves
+are chosen from the stored room without going through DynamoDB, so only
+the handlers' own calls are counted.
+
+Reported per route: requests, errors, p50/p95/p99 latency, mean DynamoDB
+round trips and scans; overall: requests/sec, games/sec, DynamoDB totals
+and messages fanned out. The consumed capacity the handlers' metered Tables
+saw (consumed_capacity.py) is reported per route, table and operation, with
+mean RCU / WCU per request for capacity planning.
+
+Usage:
+    python tools/loadgen.py [--tables 50] [--seed 1] [--json report.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from devserver.server import ENVIRONMENT, DevServer
+from lambdas import aws_clients, bridge_engine, consumed_capacity
+from lambdas.session_tokens import issue_token
+
+SEATS = ['N', 'E', 'S', 'W']
+# Odds that a player overcalls instead of passing once the auction is open
+OVERCALL_RATE = 0.25
+
+# (route, connection id, request body; query parameters for $connect)
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+
+class CountingManagementApi:
+    """
+    post_to_connection stub that counts messages and bytes instead of sending
+    """
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    def post_to_connection(self, ConnectionId: str, Data: Any) -> Dict[str, Any]:
+        self.messages += 1
+        self.bytes += len(Data)
+        return {}
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def choose_call(bids: List[Dict[str, Any]], seat: str, rng: random.Random) -> str:
+    """
+    A random legal call: the first call opens at the one level, later ones
+    mostly pass so auctions end in a playable contract
+    """
+    contracts = [entry['bid'] for entry in bids if entry['bid'] in bridge_engine.CONTRACT_BIDS]
+    if not contracts:
+        return rng.choice(bridge_engine.CONTRACT_BIDS[:5])
+    if rng.random() >= OVERCALL_RATE:
+        return 'pass'
+    higher = bridge_engine.CONTRACT_BIDS.index(contracts[-1]) + 1
+    candidates = bridge_engine.CONTRACT_BIDS[higher:higher + 3]
+    call = rng.choice(candidates) if candidates else 'pass'
+    bridge_engine.validate_bid(bids, seat, call)
+    return call
+
+def choose_card(game_data: Dict[str, Any], rng: random.Random) -> str:
+    """
+    A random card the seat on turn may play, following suit when it can
+    """
+    hand = game_data['hands'][game_data['turnSeat']]
+    trick = game_data.get('currentTrick') or []
+    if trick:
+        following = [card for card in hand if card[1] == trick[0]['card'][1]]
+        if following:
+            return rng.choice(following)
+    return rng.choice(hand)
+
+def play_table(table_number: int, rooms: Any, rng: random.Random) -> Iterator[Request]:
+    """
+    The requests of one table's game, in order
+
+    A generator: each response is sent back in before the next request is
+    chosen. rooms is the room table the next move is chosen from.
+    """
+    users = [f'load-{table_number}-{seat}' for seat in SEATS]
+    connections = {user: f'conn-{user}' for user in users}
+    tokens = {user: issue_token(user, user)['token'] for user in users}
+    for user in users:
+        yield '$connect', connections[user], {'token': tokens[user]}
+
+    owner = users[0]
+    response = yield 'createRoom', connections[owner], {
+        'token': tokens[owner], 'data': {'ownerId': owner, 'playerName': owner, 'roomName': f'Load {table_number}'}}
+    room_id = response['room']['roomId']
+    for user in users[1:]:
+        yield 'joinRoom', connections[user], {'token': tokens[user], 'roomId': room_id, 'userId': user}
+    yield 'startRoom', connections[owner], {'token': tokens[owner], 'roomId': room_id, 'userId': owner}
+
+    while True:
+        room = rooms.items[(room_id,)]
+        game_data = room['gameData']
+        actor = game_data.get('turn')
+        if room['state'] == 'bidding':
+            move = {'bid': choose_call(game_data['bids'], game_data['turnSeat'], rng)}
+            route = 'makeBid'
+        elif room['state'] == 'playing':
+            move = {'card': choose_card(game_data, rng)}
+            route = 'playCard'
+        else:
+            break
+        yield route, connections[actor], dict(move, token=tokens[actor], roomId=room_id, userId=actor,
+                                              lastSeq=int(room['seq']))
+
+    for user in users:
+        yield '$disconnect', connections[user], None
+
+def run_load(tables: int, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Play the given number of concurrent tables to the end
+
+    Returns:
+        {'tables', 'gamesCompleted', 'requests', 'errors', 'seconds',
+         'requestsPerSec', 'gamesPerSec', 'dynamodb', 'fanout', 'routes',
+         'consumedCapacity'}
+    """
+    for name, value in ENVIRONMENT.items():
+        os.environ[name] = value
+    os.environ.setdefault('SESSION_SECRET', 'loadgen')
+    server = DevServer()
+    server.install()
+    management_api = CountingManagementApi()
+    aws_clients.register_client('apigatewaymanagementapi', management_api, os.environ['WEBSOCKET_ENDPOINT'])
+    ledger = server.dynamodb.ledger
+    rooms = server.dynamodb.Table(os.environ['ROOM_TABLE'])
+    rng = random.Random(seed)
+
+    latencies: Dict[str, List[float]] = {}
+    routes: Dict[str, Dict[str, Any]] = {}
+    totals = {'roundTrips': 0, 'scans': 0, 'itemsScanned': 0, 'rcu': 0.0, 'wcu': 0.0}
+    consumed_capacity.start_report()
+    active = deque((play_table(number, rooms, random.Random(rng.random())), None) for number in range(tables))
+    started = time.perf_counter()
+    while active:
+        game, response = active.popleft()
+        try:
+            route, connection_id, body = game.send(response)
+        except StopIteration:
+            continue
+        if route == '$connect':
+            fields = {'queryStringParameters': body}
+        elif body is not None:
+            fields = {'body': json.dumps(dict(body, action=route))}
+        else:
+            fields = {}
+
+        ledger.reset()
+        request_started = time.perf_counter()
+        result = server.dispatch(route, connection_id, **fields)
+        latencies.setdefault(route, []).append((time.perf_counter() - request_started) * 1000)
+
+        stats = routes.setdefault(route, {'requests': 0, 'errors': 0, 'roundTrips': 0, 'scans': 0})
+        summary = ledger.summary()
+        stats['requests'] += 1
+        stats['roundTrips'] += summary['roundTrips']
+        stats['scans'] += summary['scans']
+        for name in totals:
+            totals[name] += summary[name]
+        if not 200 <= result.get('statusCode', 500) < 300:
+            stats['errors'] += 1
+            # A table whose request failed cannot go on
+            game.close()
+            continue
+        active.append((game, json.loads(result.get('body') or '{}')))
+    seconds = time.perf_counter() - started
+    capacity = consumed_capacity.report()
+    consumed_capacity.stop_report()
+
+    report_routes = {}
+    for route, stats in routes.items():
+        samples = latencies[route]
+        operations = [usage for tables in capacity.get(route, {}).values() for usage in tables.values()]
+        report_routes[route] = {
+            'requests': stats['requests'],
+            'errors': stats['errors'],
+            'p50Ms': round(_percentile(samples, 0.50), 3),
+            'p95Ms': round(_percentile(samples, 0.95), 3),
+            'p99Ms': round(_percentile(samples, 0.99), 3),
+            'roundTripsPerRequest': round(stats['roundTrips'] / stats['requests'], 2),
+            'scansPerRequest': round(stats['scans'] / stats['requests'], 2),
+            'rcuPerRequest': round(sum(usage['rcu'] for usage in operations) / stats['requests'], 2),
+            'wcuPerRequest': round(sum(usage['wcu'] for usage in operations) / stats['requests'], 2)
+        }
+    completed = sum(1 for room in rooms.items.values() if room.get('state') == 'completed')
+    requests = sum(stats['requests'] for stats in routes.values())
+    return {
+        'tables': tables,
+        'gamesCompleted': completed,
+        'requests': requests,
+        'errors': sum(stats['errors'] for stats in routes.values()),
+        'seconds': round(seconds, 3),
+        'requestsPerSec': round(requests / seconds, 1) if seconds else 0.0,
+        'gamesPerSec': round(completed / seconds, 2) if seconds else 0.0,
+        'dynamodb': dict(totals, rcu=round(totals['rcu'], 1), wcu=round(totals['wcu'], 1)),
+        'fanout': {'messages': management_api.messages, 'bytes': management_api.bytes},
+        'routes': report_routes,
+        'consumedCapacity': capacity
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tables', type=int, default=50, help='tables played concurrently')
+    parser.add_argument('--seed', type=int, help='random seed for deals and moves')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+
+    report = run_load(args.tables, args.seed)
+    print(f"{'route':<14}{'requests':>9}{'errors':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'trips':>7}{'scans':>7}"
+          f"{'RCU':>7}{'WCU':>7}")
+    for route, stats in report['routes'].items():
+        print(f"{route:<14}{stats['requests']:>9}{stats['errors']:>7}{stats['p50Ms']:>9.2f}{stats['p95Ms']:>9.2f}"
+              f"{stats['p99Ms']:>9.2f}{stats['roundTripsPerRequest']:>7.2f}{stats['scansPerRequest']:>7.2f}"
+              f"{stats['rcuPerRequest']:>7.2f}{stats['wcuPerRequest']:>7.2f}")
+    dynamodb = report['dynamodb']
+    print(f"\n{report['gamesCompleted']}/{report['tables']} games, {report['requests']} requests in "
+          f"{report['seconds']:.2f} s: {report['requestsPerSec']:.0f} requests/s, {report['gamesPerSec']:.2f} games/s")
+    print(f"DynamoDB: {dynamodb['roundTrips']} round trips, {dynamodb['scans']} scans over {dynamodb['itemsScanned']} items, "
+          f"{dynamodb['rcu']} RCU, {dynamodb['wcu']} WCU; fan-out: {report['fanout']['messages']} messages")
+    print(f"\n{'route':<14}{'table':<22}{'operation':<20}{'calls':>7}{'RCU':>9}{'WCU':>9}{'mean ms':>9}")
+    for route, tables in report['consumedCapacity'].items():
+        for table_name, operations in tables.items():
+            for operation, usage in operations.items():
+                print(f"{route:<14}{table_name:<22}{operation:<20}{usage['calls']:>7}{usage['rcu']:>9.1f}"
+                      f"{usage['wcu']:>9.1f}{usage['meanMs']:>9.3f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if report['errors'] else 0)
+
+if __name__ == '__main__':
+    main()
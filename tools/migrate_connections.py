@@ -0,0 +1,117 @@
+"""
+Backfill for moving the connections table to the other key layout
+
+Handlers keep a mirror table in the other layout current while
+WEBSOCKET_CONNECTIONS_MIRROR_TABLE names it (lambdas/connections.py). This
+tool copies the records written before that into it:
+
+- the source table is scanned in parallel segments (Segment/TotalSegments),
+  one worker thread each, a page at a time, so memory stays flat; the
+  reads can be held to a share of its provisioned capacity
+  (lambdas/parallel_scan.py) so the live handlers are not throttled
+- each record is converted to the target layout (the not-joined
+  placeholder only exists where currentRoomId is the sort key) and put
+  with attribute_not_exists(connectionId), so a record the handlers have
+  already mirrored, which is newer, is never overwritten
+- it can run while the handlers serve traffic, and again: records already
+  copied are skipped
+
+Usage:
+    python tools/migrate_connections.py --source WebSocketConnections --target WebSocketConnectionsV2
+    python tools/migrate_connections.py --source WebSocketConnectionsV2 --target WebSocketConnections \\
+        --target-layout room-sort-key --segments 4 --capacity-share 0.25
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from botocore.exceptions import ClientError
+from lambdas import aws_clients, connections, parallel_scan
+
+DEFAULT_SEGMENTS = 8
+
+def copy_segment(source: str, target: str, target_layout: str, segment: int, segments: int,
+                 open_table: Callable[[str], Any], dry_run: bool = False,
+                 limiter: Optional[parallel_scan.RateLimiter] = None) -> Dict[str, int]:
+    """
+    Copy one scan segment of the source table
+
+    Returns:
+        {'scanned', 'copied', 'skipped'}
+    """
+    source_table, target_table = open_table(source), open_table(target)
+    counts = {'scanned': 0, 'copied': 0, 'skipped': 0}
+    for page in parallel_scan.scan_pages(source_table, segment, segments, limiter=limiter):
+        for item in page:
+            counts['scanned'] += 1
+            if dry_run:
+                continue
+            try:
+                target_table.put_item(Item=connections.in_layout(item, target_layout),
+                                      ConditionExpression='attribute_not_exists(connectionId)')
+                counts['copied'] += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                counts['skipped'] += 1
+    return counts
+
+def backfill(source: str, target: str, target_layout: str = connections.CONNECTION_ID,
+             segments: int = DEFAULT_SEGMENTS, open_table: Optional[Callable[[str], Any]] = None,
+             dry_run: bool = False, max_rcu: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Copy every record of the source table into the target table
+
+    Args:
+        open_table: returns a Table for a name, called once per worker thread
+            for each table (default: aws_clients.thread_table)
+        max_rcu: read capacity units per second shared by the segments
+
+    Returns:
+        {'scanned', 'copied', 'skipped', 'segments', 'seconds'}
+    """
+    if target_layout not in connections.KEY_NAMES:
+        raise ValueError(f'Unknown target layout: {target_layout}')
+    open_table = open_table or aws_clients.thread_table
+    limiter = parallel_scan.RateLimiter(max_rcu) if max_rcu else None
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        results = list(executor.map(
+            lambda segment: copy_segment(source, target, target_layout, segment, segments, open_table,
+                                         dry_run, limiter),
+            range(segments)))
+    report: Dict[str, Any] = {name: sum(result[name] for result in results) for name in ('scanned', 'copied', 'skipped')}
+    report['segments'] = segments
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', required=True, help='table to copy from')
+    parser.add_argument('--target', required=True, help='table to copy into')
+    parser.add_argument('--target-layout', default=connections.CONNECTION_ID, choices=sorted(connections.KEY_NAMES),
+                        help='key layout of the target table')
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS, help='parallel scan segments')
+    parser.add_argument('--max-rcu', type=float, help='read capacity units per second to stay under')
+    parser.add_argument('--capacity-share', type=float,
+                        help="share of the source's provisioned read capacity to use (ignored on demand)")
+    parser.add_argument('--dry-run', action='store_true', help='only scan and count the source')
+    args = parser.parse_args()
+
+    max_rcu = args.max_rcu
+    if max_rcu is None and args.capacity_share:
+        max_rcu = parallel_scan.read_capacity_budget(args.source, args.capacity_share)
+    report = backfill(args.source, args.target, args.target_layout, args.segments,
+                      dry_run=args.dry_run, max_rcu=max_rcu)
+    print(json.dumps(report))
+
+if __name__ == '__main__':
+    main()